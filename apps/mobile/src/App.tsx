@@ -1,5 +1,5 @@
 ﻿import { useEffect, useMemo, useRef, useState } from 'react'
-import axios from 'axios'
+import axios, { AxiosInstance } from 'axios'
 import { MobileRoleSelector } from './features/rbac/MobileRoleSelector'
 import type { FiliereCode, RbacRole } from './features/rbac/types'
 
@@ -14,6 +14,9 @@ const API_BASE_URL =
   (import.meta as any).env?.VITE_API_URL ||
   ((import.meta as any).env?.DEV ? '/api/v1' : 'http://localhost:8000/api/v1')
 
+// Taille de page maximale acceptée par l'API pour les listes paginées par curseur
+const MAX_PAGE_SIZE = 1000
+
 const STORAGE_TOKEN_KEY = 'mobile_access_token'
 const STORAGE_ROLE_KEY = 'mobile_selected_role'
 const STORAGE_FILIERE_KEY = 'mobile_selected_filiere'
@@ -58,6 +61,23 @@ const SIGNUP_ROLE_OPTIONS: Array<{ code: string; label: string; filiere: Filiere
   { code: 'bois_exploitant', label: 'Petit exploitant bois', filiere: 'BOIS' },
 ]
 
+// Listes en tableau JSON : l'API renvoie une page et annonce la suivante dans X-Next-Cursor.
+// Sans curseur explicite de l'appelant, on enchaîne les pages pour rendre la liste complète.
+function followCursorPages(c: AxiosInstance) {
+  c.interceptors.response.use(async (response) => {
+    const config = response.config
+    if (config.method !== 'get' || !Array.isArray(response.data) || config.params?.cursor) return response
+    let items: unknown[] = response.data
+    let cursor = response.headers['x-next-cursor']
+    while (cursor) {
+      const next = await c.get(config.url ?? '', { params: { ...config.params, cursor, page_size: MAX_PAGE_SIZE } })
+      items = items.concat(next.data)
+      cursor = next.headers['x-next-cursor']
+    }
+    return { ...response, data: items }
+  })
+}
+
 function normalizeRole(role: string | null | undefined): string {
   return (role || '').trim().toLowerCase()
 }
@@ -211,6 +231,7 @@ export default function App() {
   const client = useMemo(() => {
     const c = axios.create({ baseURL: API_BASE_URL })
     if (token) c.defaults.headers.common.Authorization = `Bearer ${token}`
+    followCursorPages(c)
     return c
   }, [token])
 
@@ -1,8 +1,11 @@
-import axios, { AxiosInstance } from "axios";
+import axios, { AxiosInstance, AxiosResponse } from "axios";
 import { useAuthStore } from "../stores/authStore";
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || "http://localhost:8000/api/v1";
 
+// Taille de page maximale acceptée par l'API pour les listes paginées par curseur
+const MAX_PAGE_SIZE = 1000;
+
 export const apiClient: AxiosInstance = axios.create({
   baseURL: API_BASE_URL,
   headers: {
@@ -19,9 +22,28 @@ apiClient.interceptors.request.use((config) => {
   return config;
 });
 
+// Listes en tableau JSON : l'API renvoie une page et annonce la suivante dans X-Next-Cursor.
+// Sans curseur explicite de l'appelant, on enchaîne les pages pour rendre la liste complète.
+async function followCursor(response: AxiosResponse) {
+  const config = response.config;
+  if (config.method !== "get" || !Array.isArray(response.data) || config.params?.cursor) {
+    return response;
+  }
+  let items: unknown[] = response.data;
+  let cursor = response.headers["x-next-cursor"];
+  while (cursor) {
+    const next = await apiClient.get(config.url ?? "", {
+      params: { ...config.params, cursor, page_size: MAX_PAGE_SIZE },
+    });
+    items = items.concat(next.data);
+    cursor = next.headers["x-next-cursor"];
+  }
+  return { ...response, data: items };
+}
+
 // Intercepteur pour gérer les erreurs
 apiClient.interceptors.response.use(
-  (response) => response,
+  followCursor,
   async (error) => {
     if (error.response?.status === 401) {
       // Token expiré, déconnexion
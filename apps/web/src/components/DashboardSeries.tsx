@@ -0,0 +1,43 @@
+import { useQuery } from '@tanstack/react-query'
+import { api } from '../lib/api'
+
+type TimeseriesSerie = { key: number | string | null; label: string | null; values: number[] }
+
+const SERIES_DAYS = 30
+
+// Volume créé par jour sur la période : une seule requête groupée côté API.
+export function DashboardSeries({ regionId, communeId }: { regionId?: number; communeId?: number }) {
+  const dateFrom = new Date(Date.now() - (SERIES_DAYS - 1) * 86400000).toISOString().slice(0, 10)
+  const { data } = useQuery({
+    queryKey: ['dashboard-timeseries', regionId ?? null, communeId ?? null, dateFrom],
+    queryFn: () =>
+      api.getDashboardTimeseries({
+        metric: 'volume_created',
+        granularity: 'day',
+        date_from: dateFrom,
+        region_id: regionId,
+        commune_id: communeId,
+      }),
+  })
+  if (!data) return null
+  const values: number[] = (data.series as TimeseriesSerie[])[0]?.values ?? data.buckets.map(() => 0)
+  const max = Math.max(...values, 0)
+  return (
+    <div className="card">
+      <h2>Volume créé ({SERIES_DAYS} derniers jours)</h2>
+      {(data.buckets as string[]).map((bucket, index) => (
+        <div key={bucket} style={{ display: 'flex', alignItems: 'center', gap: '0.5rem' }}>
+          <span style={{ width: 90 }}>{bucket}</span>
+          <div
+            style={{
+              height: 10,
+              width: `${max > 0 ? (values[index] / max) * 100 : 0}%`,
+              background: 'var(--color-primary)',
+            }}
+          />
+          <span>{values[index]}</span>
+        </div>
+      ))}
+    </div>
+  )
+}
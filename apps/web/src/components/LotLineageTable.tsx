@@ -0,0 +1,47 @@
+import { Link } from 'react-router-dom'
+
+export type LotLineageEdge = {
+  ancestor_lot_id: number
+  descendant_lot_id: number
+  relation_type: string
+  quantity: number
+  depth: number
+}
+
+export type LotLineage = {
+  root_lot_ids: number[]
+  direction: 'up' | 'down'
+  depth: number
+  edges: LotLineageEdge[]
+}
+
+// Arêtes de la généalogie (une requête côté API), par profondeur croissante.
+export function LotLineageTable({ lineage }: { lineage: LotLineage }) {
+  if (lineage.edges.length === 0) {
+    return <p className="empty-state">Aucune filiation enregistree.</p>
+  }
+  return (
+    <table className="table">
+      <thead>
+        <tr>
+          <th>Niveau</th>
+          <th>Lot origine</th>
+          <th>Lot issu</th>
+          <th>Relation</th>
+          <th>Quantite</th>
+        </tr>
+      </thead>
+      <tbody>
+        {lineage.edges.map((edge) => (
+          <tr key={`${edge.ancestor_lot_id}-${edge.descendant_lot_id}-${edge.relation_type}`}>
+            <td>{edge.depth}</td>
+            <td><Link to={`/lots/${edge.ancestor_lot_id}`}>{edge.ancestor_lot_id}</Link></td>
+            <td><Link to={`/lots/${edge.descendant_lot_id}`}>{edge.descendant_lot_id}</Link></td>
+            <td>{edge.relation_type}</td>
+            <td>{edge.quantity}</td>
+          </tr>
+        ))}
+      </tbody>
+    </table>
+  )
+}
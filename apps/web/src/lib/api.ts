@@ -1,10 +1,13 @@
-import axios, { AxiosInstance, InternalAxiosRequestConfig } from 'axios'
+import axios, { AxiosInstance, AxiosResponse, InternalAxiosRequestConfig } from 'axios'
 
 // En dev, utiliser le proxy Vite (/api → localhost:8000) pour éviter CORS et erreurs de connexion
 const API_BASE_URL =
   import.meta.env.VITE_API_URL ||
   (import.meta.env.DEV ? '/api/v1' : 'http://localhost:8000/api/v1')
 
+// Taille de page maximale acceptée par l'API pour les listes paginées par curseur
+const MAX_PAGE_SIZE = 1000
+
 class ApiClient {
   private client: AxiosInstance
 
@@ -30,7 +33,7 @@ class ApiClient {
 
     // Intercepteur 401 : tenter refresh token avant de rediriger vers login
     this.client.interceptors.response.use(
-      (response) => response,
+      (response) => this.followCursor(response),
       async (error) => {
         const originalRequest = error.config
         const isRefreshRequest = originalRequest?.url?.includes?.('/auth/refresh')
@@ -57,6 +60,25 @@ class ApiClient {
     )
   }
 
+  // Listes en tableau JSON : l'API renvoie une page et annonce la suivante dans X-Next-Cursor.
+  // Sans curseur explicite de l'appelant, on enchaîne les pages pour rendre la liste complète.
+  private async followCursor(response: AxiosResponse) {
+    const config = response.config
+    if (config.method !== 'get' || !Array.isArray(response.data) || config.params?.cursor) {
+      return response
+    }
+    let items: unknown[] = response.data
+    let cursor = response.headers['x-next-cursor']
+    while (cursor) {
+      const next = await this.client.get(config.url ?? '', {
+        params: { ...config.params, cursor, page_size: MAX_PAGE_SIZE },
+      })
+      items = items.concat(next.data)
+      cursor = next.headers['x-next-cursor']
+    }
+    return { ...response, data: items }
+  }
+
   async login(identifier: string, password: string) {
     const response = await this.client.post('/auth/login', {
       identifier,
@@ -278,6 +300,11 @@ class ApiClient {
     const response = await this.client.get(`/lots/${lotId}`)
     return response.data
   }
+
+  async getLotLineage(lotId: number, params?: { direction?: 'up' | 'down'; depth?: number }) {
+    const response = await this.client.get(`/lots/${lotId}/lineage`, { params })
+    return response.data
+  }
   async patchLotWoodClassification(
     lotId: number,
     data: {
@@ -416,6 +443,11 @@ class ApiClient {
     return response.data
   }
 
+  async getExportLineage(exportId: number, params?: { depth?: number }) {
+    const response = await this.client.get(`/exports/${exportId}/lineage`, { params })
+    return response.data
+  }
+
   async updateExportStatus(exportId: number, status: string) {
     const response = await this.client.patch(`/exports/${exportId}/status`, { status })
     return response.data
@@ -508,6 +540,15 @@ class ApiClient {
     return response.data
   }
 
+  // Export en flux côté API (CSV), pour les réquisitions et audits sans limite de page
+  async downloadLedgerExport(params?: { actor_id?: number; lot_id?: number; date_from?: string; date_to?: string }) {
+    const response = await this.client.get('/ledger/export', {
+      params: { format: 'csv', ...params },
+      responseType: 'blob',
+    })
+    return response.data as Blob
+  }
+
   async getLedgerBalance(params?: { actor_id?: number }) {
     const response = await this.client.get('/ledger/balance', { params })
     return response.data
@@ -781,6 +822,20 @@ class ApiClient {
     return response.data
   }
 
+  // Séries par jour / semaine / mois pour les graphiques, en un appel
+  async getDashboardTimeseries(params: {
+    metric?: 'volume_created' | 'ledger_movements' | 'transactions_total' | 'transactions_count'
+    granularity?: 'day' | 'week' | 'month'
+    group_by?: 'region' | 'commune' | 'filiere'
+    date_from?: string
+    date_to?: string
+    region_id?: number
+    commune_id?: number
+  }) {
+    const response = await this.client.get('/dashboards/timeseries', { params })
+    return response.data
+  }
+
   async getHomeWidgets() {
     const response = await this.client.get('/dashboards/home-widgets')
     return response.data
@@ -1,5 +1,6 @@
 import { useQuery } from '@tanstack/react-query'
 import { api } from '../lib/api'
+import { DashboardSeries } from '../components/DashboardSeries'
 import { canSeeDashboardCommune } from '../config/rolesMenu'
 import { useAuth } from '../contexts/AuthContext'
 import './DashboardPage.css'
@@ -76,6 +77,7 @@ export default function DashboardCommunePage() {
           </div>
         </div>
       ) : null}
+      {data && <DashboardSeries communeId={communeId} />}
     </div>
   )
 }
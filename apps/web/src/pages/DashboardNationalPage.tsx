@@ -1,6 +1,7 @@
 import { Link } from 'react-router-dom'
 import { useQuery } from '@tanstack/react-query'
 import { api } from '../lib/api'
+import { DashboardSeries } from '../components/DashboardSeries'
 import { canSeeDashboardNational } from '../config/rolesMenu'
 import { useAuth } from '../contexts/AuthContext'
 import './DashboardPage.css'
@@ -70,6 +71,8 @@ export default function DashboardNationalPage() {
             )}
           </div>
 
+          <DashboardSeries />
+
           {data.alertes_strategiques?.length > 0 && (
             <div className="card">
               <h2>Alertes stratégiques</h2>
@@ -1,6 +1,7 @@
 import { useState } from 'react'
 import { useQuery } from '@tanstack/react-query'
 import { api } from '../lib/api'
+import { DashboardSeries } from '../components/DashboardSeries'
 import { canSeeDashboardRegional } from '../config/rolesMenu'
 import { useAuth } from '../contexts/AuthContext'
 import './DashboardPage.css'
@@ -88,6 +89,7 @@ export default function DashboardRegionalPage() {
           </div>
         </div>
       )}
+      {data && <DashboardSeries regionId={data.region_id} />}
     </div>
   )
 }
@@ -3,6 +3,7 @@ import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
 import { api } from '../lib/api'
 import { useToast } from '../contexts/ToastContext'
 import { getErrorMessage } from '../lib/apiErrors'
+import { LotLineageTable } from '../components/LotLineageTable'
 import './DashboardPage.css'
 import './LotsPage.css'
 
@@ -90,6 +91,11 @@ export default function ExportsPage() {
     queryFn: () => api.getExport(selectedExportId as number),
     enabled: !!selectedExportId,
   })
+  const { data: selectedExportLineage } = useQuery({
+    queryKey: ['export-lineage', selectedExportId],
+    queryFn: () => api.getExportLineage(selectedExportId as number),
+    enabled: !!selectedExportId,
+  })
   const linkLotMutation = useMutation({
     mutationFn: () =>
       api.linkLotsToExport(selectedExportId as number, [
@@ -353,6 +359,12 @@ export default function ExportsPage() {
             <div className="info-item"><span className="info-label">Valeur</span><span className="info-value">{selectedExportDetail.declared_value ?? '-'}</span></div>
             <div className="info-item"><span className="info-label">QR scelle</span><span className="info-value">{selectedExportDetail.sealed_qr || '-'}</span></div>
           </div>
+          {selectedExportLineage && (
+            <>
+              <h3>Provenance des lots</h3>
+              <LotLineageTable lineage={selectedExportLineage} />
+            </>
+          )}
         </div>
       )}
     </div>
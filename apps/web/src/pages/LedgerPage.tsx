@@ -20,6 +20,15 @@ export default function LedgerPage() {
     queryFn: () => api.getLedgerBalance({ actor_id: actorId }),
   })
 
+  const downloadExport = async () => {
+    const blob = await api.downloadLedgerExport({ actor_id: actorId, lot_id: lotId })
+    const link = document.createElement('a')
+    link.href = URL.createObjectURL(blob)
+    link.download = `registre_madavola_${new Date().toISOString().slice(0, 10)}.csv`
+    link.click()
+    URL.revokeObjectURL(link.href)
+  }
+
   return (
     <div className="dashboard">
       <h1>Historique des paiements</h1>
@@ -52,6 +61,9 @@ export default function LedgerPage() {
               placeholder="optionnel"
             />
           </div>
+          <button type="button" className="btn-secondary" onClick={downloadExport}>
+            Exporter le registre (CSV)
+          </button>
         </div>
       </div>
 
@@ -1,6 +1,8 @@
+import { useState } from 'react'
 import { useParams, Link } from 'react-router-dom'
 import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query'
 import { api } from '../lib/api'
+import { LotLineageTable } from '../components/LotLineageTable'
 import './DashboardPage.css'
 import { useToast } from '../contexts/ToastContext'
 
@@ -16,6 +18,13 @@ export default function LotDetailPage() {
     enabled: Number.isInteger(lotId),
   })
 
+  const [lineageDirection, setLineageDirection] = useState<'up' | 'down'>('up')
+  const { data: lineage } = useQuery({
+    queryKey: ['lot-lineage', lotId, lineageDirection],
+    queryFn: () => api.getLotLineage(lotId, { direction: lineageDirection }),
+    enabled: Number.isInteger(lotId),
+  })
+
   const splitMutation = useMutation({
     mutationFn: (quantities: number[]) => api.splitLot(lotId, quantities),
     onSuccess: (rows) => {
@@ -131,6 +140,14 @@ export default function LotDetailPage() {
           Mettre a jour CITES
         </button>
       </div>
+      <div className="card">
+        <h2>Genealogie</h2>
+        <select value={lineageDirection} onChange={(e) => setLineageDirection(e.target.value as 'up' | 'down')}>
+          <option value="up">Origines</option>
+          <option value="down">Lots issus</option>
+        </select>
+        {lineage && <LotLineageTable lineage={lineage} />}
+      </div>
     </div>
   )
 }
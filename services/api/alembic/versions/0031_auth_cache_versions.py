@@ -0,0 +1,32 @@
+"""auth cache version stamps
+
+Revision ID: 0031_auth_cache_versions
+Revises: 0030_messages_marketplace
+Create Date: 2026-10-17 09:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0031_auth_cache_versions"
+down_revision = "0030_messages_marketplace"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "auth_cache_versions" not in set(inspector.get_table_names()):
+        op.create_table(
+            "auth_cache_versions",
+            sa.Column("scope", sa.String(length=50), primary_key=True),
+            sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("auth_cache_versions")
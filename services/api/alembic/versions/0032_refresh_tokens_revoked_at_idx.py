@@ -0,0 +1,28 @@
+"""index refresh_tokens.revoked_at for the access-token denylist
+
+Revision ID: 0032_refresh_tokens_revoked_idx
+Revises: 0031_auth_cache_versions
+Create Date: 2026-10-17 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0032_refresh_tokens_revoked_idx"
+down_revision = "0031_auth_cache_versions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing = {index["name"] for index in inspector.get_indexes("refresh_tokens")}
+    if "ix_refresh_tokens_revoked_at" not in existing:
+        op.create_index("ix_refresh_tokens_revoked_at", "refresh_tokens", ["revoked_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_refresh_tokens_revoked_at", table_name="refresh_tokens")
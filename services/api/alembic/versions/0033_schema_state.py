@@ -0,0 +1,32 @@
+"""schema fingerprint state
+
+Revision ID: 0033_schema_state
+Revises: 0032_refresh_tokens_revoked_idx
+Create Date: 2026-10-17 11:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0033_schema_state"
+down_revision = "0032_refresh_tokens_revoked_idx"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "schema_state" not in set(inspector.get_table_names()):
+        op.create_table(
+            "schema_state",
+            sa.Column("key", sa.String(length=50), primary_key=True),
+            sa.Column("fingerprint", sa.String(length=64), nullable=False),
+            sa.Column("applied_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("schema_state")
@@ -0,0 +1,52 @@
+"""document render jobs and document status
+
+Revision ID: 0034_document_jobs
+Revises: 0033_schema_state
+Create Date: 2026-10-17 14:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0034_document_jobs"
+down_revision = "0033_schema_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {col["name"] for col in inspector.get_columns("documents")}
+    if "status" not in columns:
+        op.add_column(
+            "documents",
+            sa.Column("status", sa.String(length=20), nullable=False, server_default="ready"),
+        )
+    if "document_jobs" not in set(inspector.get_table_names()):
+        op.create_table(
+            "document_jobs",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("document_id", sa.Integer(), sa.ForeignKey("documents.id"), nullable=False),
+            sa.Column("kind", sa.String(length=30), nullable=False),
+            sa.Column("payload_json", sa.Text(), nullable=False),
+            sa.Column("status", sa.String(length=20), nullable=False),
+            sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("run_after", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("locked_by", sa.String(length=80)),
+            sa.Column("locked_at", sa.DateTime(timezone=True)),
+            sa.Column("last_error", sa.Text()),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("finished_at", sa.DateTime(timezone=True)),
+        )
+        op.create_index("ix_document_jobs_document_id", "document_jobs", ["document_id"])
+        op.create_index("ix_document_jobs_status_run_after", "document_jobs", ["status", "run_after"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_document_jobs_status_run_after", table_name="document_jobs")
+    op.drop_index("ix_document_jobs_document_id", table_name="document_jobs")
+    op.drop_table("document_jobs")
+    op.drop_column("documents", "status")
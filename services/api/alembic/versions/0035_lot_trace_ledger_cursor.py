@@ -0,0 +1,32 @@
+"""lot trace ledger cursor
+
+Revision ID: 0035_lot_trace_ledger_cursor
+Revises: 0034_document_jobs
+Create Date: 2026-10-17 15:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0035_lot_trace_ledger_cursor"
+down_revision = "0034_document_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {col["name"] for col in inspector.get_columns("lots")}
+    if "trace_ledger_cursor" not in columns:
+        op.add_column("lots", sa.Column("trace_ledger_cursor", sa.Integer(), nullable=True))
+    indexes = {index["name"] for index in inspector.get_indexes("inventory_ledger")}
+    if "ix_inventory_ledger_lot_id_id" not in indexes:
+        op.create_index("ix_inventory_ledger_lot_id_id", "inventory_ledger", ["lot_id", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_inventory_ledger_lot_id_id", table_name="inventory_ledger")
+    op.drop_column("lots", "trace_ledger_cursor")
@@ -0,0 +1,46 @@
+"""lot lineage indexes
+
+Revision ID: 0036_lot_lineage_indexes
+Revises: 0035_lot_trace_ledger_cursor
+Create Date: 2026-10-17 16:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0036_lot_lineage_indexes"
+down_revision = "0035_lot_trace_ledger_cursor"
+branch_labels = None
+depends_on = None
+
+LINEAGE_INDEXES = [
+    ("ix_lots_parent_lot_id", "lots", ["parent_lot_id"]),
+    ("ix_lot_links_parent_lot_id", "lot_links", ["parent_lot_id"]),
+    ("ix_lot_links_child_lot_id", "lot_links", ["child_lot_id"]),
+    ("ix_pierre_transformation_links_event_id", "pierre_transformation_links", ["transformation_event_id"]),
+    ("ix_pierre_transformation_links_lot_id", "pierre_transformation_links", ["lot_id"]),
+    ("ix_inventory_ledger_movement_ref", "inventory_ledger", ["movement_type", "ref_event_id"]),
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    for name, table, columns in LINEAGE_INDEXES:
+        if table not in tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    for name, table, _columns in reversed(LINEAGE_INDEXES):
+        if table in tables and name in {index["name"] for index in inspector.get_indexes(table)}:
+            op.drop_index(name, table_name=table)
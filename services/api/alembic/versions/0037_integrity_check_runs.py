@@ -0,0 +1,47 @@
+"""integrity check runs
+
+Revision ID: 0037_integrity_check_runs
+Revises: 0036_lot_lineage_indexes
+Create Date: 2026-10-17 17:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0037_integrity_check_runs"
+down_revision = "0036_lot_lineage_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "integrity_check_runs" not in set(inspector.get_table_names()):
+        op.create_table(
+            "integrity_check_runs",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("target", sa.String(length=20), nullable=False),
+            sa.Column("status", sa.String(length=20), nullable=False),
+            sa.Column("requested_by_actor_id", sa.Integer(), sa.ForeignKey("actors.id")),
+            sa.Column("last_id", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("chain_tail_hash", sa.String(length=64)),
+            sa.Column("records_checked", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("records_skipped", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("breaks_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("breaks_json", sa.Text()),
+            sa.Column("locked_by", sa.String(length=80)),
+            sa.Column("locked_at", sa.DateTime(timezone=True)),
+            sa.Column("last_error", sa.Text()),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("started_at", sa.DateTime(timezone=True)),
+            sa.Column("finished_at", sa.DateTime(timezone=True)),
+        )
+        op.create_index("ix_integrity_check_runs_status", "integrity_check_runs", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_integrity_check_runs_status", table_name="integrity_check_runs")
+    op.drop_table("integrity_check_runs")
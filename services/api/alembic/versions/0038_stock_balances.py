@@ -0,0 +1,41 @@
+"""stock balances
+
+Revision ID: 0038_stock_balances
+Revises: 0037_integrity_check_runs
+Create Date: 2026-10-17 19:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0038_stock_balances"
+down_revision = "0037_integrity_check_runs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "stock_balances" in set(inspector.get_table_names()):
+        return
+    op.create_table(
+        "stock_balances",
+        sa.Column("actor_id", sa.Integer(), sa.ForeignKey("actors.id"), primary_key=True),
+        sa.Column("lot_id", sa.Integer(), sa.ForeignKey("lots.id"), primary_key=True),
+        sa.Column("quantity", sa.Numeric(14, 4), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_stock_balances_lot_id", "stock_balances", ["lot_id"])
+    op.execute(
+        "INSERT INTO stock_balances (actor_id, lot_id, quantity, updated_at) "
+        "SELECT actor_id, lot_id, SUM(quantity_delta), CURRENT_TIMESTAMP "
+        "FROM inventory_ledger GROUP BY actor_id, lot_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_stock_balances_lot_id", table_name="stock_balances")
+    op.drop_table("stock_balances")
@@ -0,0 +1,120 @@
+"""monthly partitions for inventory_ledger and audit_logs (PostgreSQL)
+
+Revision ID: 0039_partition_ledger_audit
+Revises: 0038_stock_balances
+Create Date: 2026-10-17 21:00:00.000000
+
+Les tables deviennent partitionnées par mois sur `created_at` (RANGE), avec
+une partition par défaut ; la clé primaire devient (id, created_at), la
+séquence de l'id est conservée. Les index et clés étrangères de l'ancienne
+table sont recréés sur la table partitionnée. Sans effet sous SQLite.
+Les partitions suivantes sont créées par app.core.partitions (worker).
+"""
+
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0039_partition_ledger_audit"
+down_revision = "0038_stock_balances"
+branch_labels = None
+depends_on = None
+
+TABLES = ("inventory_ledger", "audit_logs")
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _is_partitioned(bind, table: str) -> bool:
+    return bool(
+        bind.execute(
+            sa.text(
+                "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+                "WHERE c.relname = :table AND c.relnamespace = 'public'::regnamespace"
+            ),
+            {"table": table},
+        ).scalar()
+    )
+
+
+def _definitions(bind, table: str) -> tuple[list[str], list[str]]:
+    """Index (hors clé primaire) et clés étrangères de `table`, en DDL."""
+    indexes = bind.execute(
+        sa.text(
+            "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i "
+            "WHERE i.indrelid = CAST(:table AS regclass) AND NOT i.indisprimary"
+        ),
+        {"table": table},
+    ).scalars().all()
+    foreign_keys = bind.execute(
+        sa.text(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'"
+        ),
+        {"table": table},
+    ).all()
+    return indexes, [f"CONSTRAINT {name} {definition}" for name, definition in foreign_keys]
+
+
+def _rebuild(bind, table: str, partitioned: bool) -> None:
+    old = f"{table}_old"
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table}).scalar()
+    indexes, foreign_keys = _definitions(bind, table)
+    op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    if partitioned:
+        op.execute(
+            f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS, "
+            f"PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)"
+        )
+        first = bind.execute(sa.text(f"SELECT MIN(created_at) FROM {old}")).scalar()
+        today = datetime.now(timezone.utc).date().replace(day=1)
+        month = first.date().replace(day=1) if first else today
+        while month <= _add_months(today, MONTHS_AHEAD):
+            following = _add_months(month, 1)
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+            )
+            month = following
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+    else:
+        op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS, PRIMARY KEY (id))")
+    op.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+    if sequence:
+        # Sinon la séquence disparaîtrait avec l'ancienne table.
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+    op.execute(f"DROP TABLE {old} CASCADE")
+    for definition in indexes:
+        # Définitions lues avant le renommage : elles visent déjà `table`.
+        # "ON ONLY" : index d'une table partitionnée (retour arrière).
+        op.execute(definition.replace(" ON ONLY ", " ON "))
+    for definition in foreign_keys:
+        op.execute(f"ALTER TABLE {table} ADD {definition}")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    # Bornes mensuelles en UTC.
+    op.execute("SET LOCAL TIME ZONE 'UTC'")
+    for table in TABLES:
+        if not _is_partitioned(bind, table):
+            _rebuild(bind, table, partitioned=True)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    for table in TABLES:
+        if _is_partitioned(bind, table):
+            # Les partitions détachées (archive) ne sont pas réintégrées.
+            _rebuild(bind, table, partitioned=False)
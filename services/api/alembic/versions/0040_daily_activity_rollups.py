@@ -0,0 +1,77 @@
+"""daily activity rollups
+
+Revision ID: 0040_daily_activity_rollups
+Revises: 0039_partition_ledger_audit
+Create Date: 2026-10-17 22:00:00.000000
+
+Tables vides : l'historique est agrégé par le worker ou par
+`python -m app.reports.rollups` ; d'ici là les lectures restent sur les
+tables brutes.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0040_daily_activity_rollups"
+down_revision = "0039_partition_ledger_audit"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    if "daily_activity_rollups" not in tables:
+        op.create_table(
+            "daily_activity_rollups",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("filiere", sa.String(length=20), primary_key=True),
+            sa.Column("region_id", sa.Integer(), primary_key=True),
+            sa.Column("district_id", sa.Integer(), primary_key=True),
+            sa.Column("commune_id", sa.Integer(), primary_key=True),
+            sa.Column("actor_id", sa.Integer(), primary_key=True),
+            sa.Column("volume_created", sa.Numeric(18, 4), nullable=False),
+            sa.Column("ledger_movements", sa.Integer(), nullable=False),
+            sa.Column("transactions_total", sa.Numeric(18, 2), nullable=False),
+            sa.Column("transactions_count", sa.Integer(), nullable=False),
+            sa.Column("lots_first_seen", sa.Integer(), nullable=False),
+            sa.Column("lots_first_seen_region", sa.Integer(), nullable=False),
+            sa.Column("lots_first_seen_commune", sa.Integer(), nullable=False),
+        )
+        op.create_index("ix_daily_activity_rollups_region_day", "daily_activity_rollups", ["region_id", "day"])
+        op.create_index("ix_daily_activity_rollups_commune_day", "daily_activity_rollups", ["commune_id", "day"])
+        op.create_index("ix_daily_activity_rollups_actor_day", "daily_activity_rollups", ["actor_id", "day"])
+    if "daily_region_rollups" not in tables:
+        op.create_table(
+            "daily_region_rollups",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("filiere", sa.String(length=20), primary_key=True),
+            sa.Column("region_id", sa.Integer(), primary_key=True),
+            sa.Column("volume_created", sa.Numeric(18, 4), nullable=False),
+            sa.Column("ledger_movements", sa.Integer(), nullable=False),
+            sa.Column("transactions_total", sa.Numeric(18, 2), nullable=False),
+            sa.Column("transactions_count", sa.Integer(), nullable=False),
+            sa.Column("lots_first_seen", sa.Integer(), nullable=False),
+            sa.Column("lots_first_seen_region", sa.Integer(), nullable=False),
+        )
+        op.create_index("ix_daily_region_rollups_region_day", "daily_region_rollups", ["region_id", "day"])
+    if "rollup_watermarks" not in tables:
+        op.create_table(
+            "rollup_watermarks",
+            sa.Column("name", sa.String(length=50), primary_key=True),
+            sa.Column("rolled_through", sa.Date(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("rollup_watermarks")
+    op.drop_index("ix_daily_region_rollups_region_day", table_name="daily_region_rollups")
+    op.drop_table("daily_region_rollups")
+    op.drop_index("ix_daily_activity_rollups_actor_day", table_name="daily_activity_rollups")
+    op.drop_index("ix_daily_activity_rollups_commune_day", table_name="daily_activity_rollups")
+    op.drop_index("ix_daily_activity_rollups_region_day", table_name="daily_activity_rollups")
+    op.drop_table("daily_activity_rollups")
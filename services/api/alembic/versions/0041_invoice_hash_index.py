@@ -0,0 +1,34 @@
+"""invoice hash index
+
+Revision ID: 0041_invoice_hash_index
+Revises: 0040_daily_activity_rollups
+Create Date: 2026-10-18 10:00:00.000000
+
+La vérification de chaîne des factures recherche chaque `previous_invoice_hash`
+parmi les `invoice_hash` existants au lieu de suivre l'ordre des ids : le
+dernier hash de chaîne n'est plus un point de reprise.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0041_invoice_hash_index"
+down_revision = "0040_daily_activity_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "ix_invoices_invoice_hash" not in {index["name"] for index in inspector.get_indexes("invoices")}:
+        op.create_index("ix_invoices_invoice_hash", "invoices", ["invoice_hash"])
+    if "chain_tail_hash" in {column["name"] for column in inspector.get_columns("integrity_check_runs")}:
+        op.drop_column("integrity_check_runs", "chain_tail_hash")
+
+
+def downgrade() -> None:
+    op.add_column("integrity_check_runs", sa.Column("chain_tail_hash", sa.String(length=64)))
+    op.drop_index("ix_invoices_invoice_hash", table_name="invoices")
@@ -4,14 +4,15 @@ import json
 from pathlib import Path
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, File, UploadFile
+from fastapi import APIRouter, Depends, File, Response, UploadFile
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_actor, get_optional_actor, require_roles
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor, get_optional_actor, get_optional_auth_context, require_roles
 from app.auth.security import hash_password
 from app.common.errors import bad_request
+from app.common.pagination import PaginationParams, get_cursor_pagination, paginate, set_page_headers
 from app.core.config import settings
-from app.db import get_db
+from app.db import get_db, get_read_db
 from app.audit.logger import write_audit
 from app.models.actor import Actor, ActorAuth, ActorKYC, ActorRole, ActorWallet, CommuneProfile
 from app.models.actor_filiere import ActorFiliere
@@ -42,6 +43,7 @@ def create_actor(
     payload: ActorCreate,
     db: Session = Depends(get_db),
     current_actor=Depends(get_optional_actor),
+    auth: AuthContext | None = Depends(get_optional_auth_context),
 ):
     active_version = db.query(TerritoryVersion).filter_by(status="active").first()
     if not active_version:
@@ -91,9 +93,9 @@ def create_actor(
     if not region or not district or not commune:
         raise bad_request("territoire_invalide")
     if current_actor:
-        if not _is_admin(db, current_actor.id) and not _is_commune_agent(db, current_actor.id):
+        if not auth.is_admin_like and not auth.has_role("commune_agent"):
             raise bad_request("acces_refuse")
-        if _is_commune_agent(db, current_actor.id) and current_actor.commune_id != commune.id:
+        if auth.has_role("commune_agent") and current_actor.commune_id != commune.id:
             raise bad_request("acces_refuse")
 
     geo_point = db.query(GeoPoint).filter_by(id=payload.geo_point_id).first()
@@ -191,11 +193,12 @@ def get_actor(
     actor_id: int,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     actor = db.query(Actor).filter_by(id=actor_id).first()
     if not actor:
         raise bad_request("acteur_introuvable")
-    if not _is_admin(db, current_actor.id) and current_actor.id != actor.id:
+    if not auth.is_admin_like and current_actor.id != actor.id:
         raise bad_request("acces_refuse")
     region = db.query(Region).filter_by(id=actor.region_id).first()
     district = db.query(District).filter_by(id=actor.district_id).first()
@@ -213,8 +216,9 @@ def get_actor_roles(
     actor_id: int,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    if not _is_admin(db, current_actor.id) and current_actor.id != actor_id:
+    if not auth.is_admin_like and current_actor.id != actor_id:
         raise bad_request("acces_refuse")
     roles = (
         db.query(ActorRole)
@@ -230,6 +234,7 @@ def update_actor_status(
     payload: ActorStatusUpdate,
     db: Session = Depends(get_db),
     current_actor=Depends(require_roles({"admin", "dirigeant", "commune_agent"})),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     """Valider ou rejeter un acteur (statut pending → active ou rejected). Réservé maire/commune_agent (même commune) ou admin."""
     actor = db.query(Actor).filter_by(id=actor_id).first()
@@ -237,8 +242,8 @@ def update_actor_status(
         raise bad_request("acteur_introuvable")
     if actor.status != "pending":
         raise bad_request("acteur_invalide")  # déjà traité
-    is_admin_or_dir = _is_admin(db, current_actor.id)
-    is_commune_agent = _is_commune_agent(db, current_actor.id)
+    is_admin_or_dir = auth.is_admin_like
+    is_commune_agent = auth.has_role("commune_agent")
     if is_commune_agent and current_actor.commune_id != actor.commune_id:
         raise bad_request("acces_refuse_commune")
     if not is_admin_or_dir and not is_commune_agent:
@@ -273,22 +278,19 @@ def update_actor_status(
 
 @router.get("", response_model=list[ActorOut])
 def list_actors(
+    response: Response,
     role: str | None = None,
     filiere: str | None = None,
     commune_code: str | None = None,
     status: str | None = None,
-    db: Session = Depends(get_db),
+    pagination: PaginationParams = Depends(get_cursor_pagination),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(require_roles({"admin", "dirigeant", "commune_agent"})),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     query = db.query(Actor).filter(Actor.status != "blocked")
 
-    is_commune_agent = (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == current_actor.id, ActorRole.role == "commune_agent")
-        .first()
-        is not None
-    )
-    if is_commune_agent:
+    if auth.has_role("commune_agent"):
         query = query.filter(Actor.commune_id == current_actor.commune_id)
 
     if status:
@@ -310,7 +312,9 @@ def list_actors(
             return []
         query = query.filter(Actor.commune_id == commune.id)
 
-    actors = query.distinct().order_by(Actor.created_at.desc()).all()
+    page = paginate(query.distinct(), sort_column=Actor.created_at, id_column=Actor.id, pagination=pagination)
+    set_page_headers(response, page)
+    actors = page.rows
     results = []
     for actor in actors:
         results.append(
@@ -325,12 +329,13 @@ def upload_actor_photo(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     actor = db.query(Actor).filter_by(id=actor_id).first()
     if not actor:
         raise bad_request("acteur_introuvable")
-    if not _is_admin(db, current_actor.id) and current_actor.id != actor_id:
-        if not (_is_commune_agent(db, current_actor.id) and current_actor.commune_id == actor.commune_id):
+    if not auth.is_admin_like and current_actor.id != actor_id:
+        if not (auth.has_role("commune_agent") and current_actor.commune_id == actor.commune_id):
             raise bad_request("acces_refuse")
     if not file.filename:
         raise bad_request("fichier_obligatoire")
@@ -378,24 +383,6 @@ def upload_actor_photo(
     }
 
 
-def _is_admin(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role.in_(["admin", "dirigeant"]))
-        .first()
-        is not None
-    )
-
-
-def _is_commune_agent(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role == "commune_agent")
-        .first()
-        is not None
-    )
-
-
 def _get_opening_fee_id(db: Session, actor_id: int) -> int | None:
     fee = (
         db.query(Fee)
@@ -599,12 +586,13 @@ def create_actor_kyc(
     payload: ActorKYCCreate,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     actor = db.query(Actor).filter_by(id=actor_id).first()
     if not actor:
         raise bad_request("acteur_introuvable")
-    if not _is_admin(db, current_actor.id) and current_actor.id != actor_id:
-        if not (_is_commune_agent(db, current_actor.id) and current_actor.commune_id == actor.commune_id):
+    if not auth.is_admin_like and current_actor.id != actor_id:
+        if not (auth.has_role("commune_agent") and current_actor.commune_id == actor.commune_id):
             raise bad_request("acces_refuse")
     row = ActorKYC(
         actor_id=actor_id,
@@ -629,12 +617,13 @@ def list_actor_kyc(
     actor_id: int,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     actor = db.query(Actor).filter_by(id=actor_id).first()
     if not actor:
         raise bad_request("acteur_introuvable")
-    if not _is_admin(db, current_actor.id) and current_actor.id != actor_id:
-        if not (_is_commune_agent(db, current_actor.id) and current_actor.commune_id == actor.commune_id):
+    if not auth.is_admin_like and current_actor.id != actor_id:
+        if not (auth.has_role("commune_agent") and current_actor.commune_id == actor.commune_id):
             raise bad_request("acces_refuse")
     rows = db.query(ActorKYC).filter(ActorKYC.actor_id == actor_id).order_by(ActorKYC.id.desc()).all()
     return [
@@ -656,11 +645,12 @@ def create_actor_wallet(
     payload: ActorWalletCreate,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     actor = db.query(Actor).filter_by(id=actor_id).first()
     if not actor:
         raise bad_request("acteur_introuvable")
-    if not _is_admin(db, current_actor.id) and current_actor.id != actor_id:
+    if not auth.is_admin_like and current_actor.id != actor_id:
         raise bad_request("acces_refuse")
     if payload.provider not in {"mobile_money", "bank", "card"}:
         raise bad_request("provider_invalide")
@@ -695,8 +685,9 @@ def list_actor_wallets(
     actor_id: int,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    if not _is_admin(db, current_actor.id) and current_actor.id != actor_id:
+    if not auth.is_admin_like and current_actor.id != actor_id:
         raise bad_request("acces_refuse")
     rows = (
         db.query(ActorWallet)
@@ -724,10 +715,11 @@ def patch_commune_profile(
     payload: CommuneProfilePatch,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    if not _is_admin(db, current_actor.id) and not _is_commune_agent(db, current_actor.id):
+    if not auth.is_admin_like and not auth.has_role("commune_agent"):
         raise bad_request("acces_refuse")
-    if _is_commune_agent(db, current_actor.id) and current_actor.commune_id != commune_id:
+    if auth.has_role("commune_agent") and current_actor.commune_id != commune_id:
         raise bad_request("acces_refuse")
 
     commune = db.query(Commune).filter(Commune.id == commune_id).first()
@@ -763,10 +755,11 @@ def get_commune_profile(
     commune_id: int,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    if not _is_admin(db, current_actor.id) and not _is_commune_agent(db, current_actor.id):
+    if not auth.is_admin_like and not auth.has_role("commune_agent"):
         raise bad_request("acces_refuse")
-    if _is_commune_agent(db, current_actor.id) and current_actor.commune_id != commune_id:
+    if auth.has_role("commune_agent") and current_actor.commune_id != commune_id:
         raise bad_request("acces_refuse")
     row = db.query(CommuneProfile).filter(CommuneProfile.commune_id == commune_id).first()
     if not row:
@@ -1,3 +1,4 @@
+import json
 from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends, Query
@@ -7,6 +8,8 @@ from app.admin.schemas import (
     ActorRoleAssign,
     ActorRoleOut,
     ActorRoleUpdate,
+    IntegrityCheckCreate,
+    IntegrityCheckOut,
     SystemConfigCreate,
     SystemConfigOut,
     SystemConfigUpdate,
@@ -16,8 +19,10 @@ from app.audit.logger import write_audit
 from app.common.errors import bad_request
 from app.core.config import settings
 from app.db import get_db
+from app.integrity.chains import create_check_runs
 from app.models.admin import SystemConfig
 from app.models.actor import Actor, ActorRole
+from app.models.audit import IntegrityCheckRun
 
 router = APIRouter(prefix=f"{settings.api_prefix}/admin", tags=["admin"])
 
@@ -253,3 +258,79 @@ def revoke_role(
         meta={"target_actor_id": actor_id, "role": role_name},
     )
 
+
+# Vérification des chaînes de hash (exécutée par le worker)
+def _integrity_check_out(run: IntegrityCheckRun, *, with_breaks: bool = False) -> IntegrityCheckOut:
+    return IntegrityCheckOut(
+        id=run.id,
+        target=run.target,
+        status=run.status,
+        requested_by_actor_id=run.requested_by_actor_id,
+        last_id=run.last_id or 0,
+        records_checked=run.records_checked or 0,
+        records_skipped=run.records_skipped or 0,
+        breaks_count=run.breaks_count or 0,
+        breaks=json.loads(run.breaks_json) if with_breaks and run.breaks_json else [],
+        last_error=run.last_error,
+        created_at=run.created_at,
+        started_at=run.started_at,
+        finished_at=run.finished_at,
+    )
+
+
+@router.post("/integrity-checks", response_model=list[IntegrityCheckOut], status_code=201)
+def create_integrity_check(
+    payload: IntegrityCheckCreate,
+    db: Session = Depends(get_db),
+    current_actor=Depends(require_roles({"admin"})),
+):
+    runs = create_check_runs(db, payload.target, requested_by_actor_id=current_actor.id)
+    db.flush()
+    write_audit(
+        db,
+        actor_id=current_actor.id,
+        action="integrity_check_requested",
+        entity_type="integrity_check",
+        entity_id=",".join(str(run.id) for run in runs),
+        meta={"target": payload.target},
+    )
+    db.commit()
+    return [_integrity_check_out(run) for run in runs]
+
+
+@router.get("/integrity-checks", response_model=list[IntegrityCheckOut])
+def list_integrity_checks(
+    db: Session = Depends(get_db),
+    current_actor=Depends(require_roles({"admin"})),
+):
+    runs = db.query(IntegrityCheckRun).order_by(IntegrityCheckRun.id.desc()).limit(50).all()
+    return [_integrity_check_out(run) for run in runs]
+
+
+@router.get("/integrity-checks/{run_id}", response_model=IntegrityCheckOut)
+def get_integrity_check(
+    run_id: int,
+    db: Session = Depends(get_db),
+    current_actor=Depends(require_roles({"admin"})),
+):
+    run = db.query(IntegrityCheckRun).filter_by(id=run_id).first()
+    if not run:
+        raise bad_request("verification_introuvable")
+    return _integrity_check_out(run, with_breaks=True)
+
+
+@router.post("/integrity-checks/{run_id}/resume", response_model=IntegrityCheckOut)
+def resume_integrity_check(
+    run_id: int,
+    db: Session = Depends(get_db),
+    current_actor=Depends(require_roles({"admin"})),
+):
+    run = db.query(IntegrityCheckRun).filter_by(id=run_id).first()
+    if not run:
+        raise bad_request("verification_introuvable")
+    if run.status != "failed":
+        raise bad_request("verification_non_reprenable", {"status": run.status})
+    run.status = "pending"
+    run.last_error = None
+    db.commit()
+    return _integrity_check_out(run)
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Literal
 
 from pydantic import BaseModel, ConfigDict
 
@@ -47,3 +48,31 @@ class ActorRoleOut(BaseModel):
     valid_to: datetime | None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class IntegrityCheckCreate(BaseModel):
+    target: Literal["lots", "invoices", "all"] = "all"
+
+
+class IntegrityBreakOut(BaseModel):
+    id: int
+    position: int
+    reason: str
+    expected: str | None = None
+    found: str | None = None
+
+
+class IntegrityCheckOut(BaseModel):
+    id: int
+    target: str
+    status: str
+    requested_by_actor_id: int | None = None
+    last_id: int
+    records_checked: int
+    records_skipped: int
+    breaks_count: int
+    breaks: list[IntegrityBreakOut] = []
+    last_error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
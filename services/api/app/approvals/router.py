@@ -1,13 +1,14 @@
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.auth.dependencies import get_current_actor, require_roles
 from app.common.errors import bad_request
+from app.common.pagination import PaginationParams, get_cursor_pagination, paginate, set_page_headers
 from app.core.config import settings
-from app.db import get_db
+from app.db import get_db, get_read_db
 from app.models.bois import WorkflowApproval
 
 
@@ -76,9 +77,11 @@ def decide_approval(
 
 @router.get("", status_code=200)
 def list_approvals(
+    response: Response,
     filiere: str | None = None,
     status: str | None = None,
-    db: Session = Depends(get_db),
+    pagination: PaginationParams = Depends(get_cursor_pagination),
+    db: Session = Depends(get_read_db),
     _actor=Depends(get_current_actor),
 ):
     query = db.query(WorkflowApproval)
@@ -86,7 +89,9 @@ def list_approvals(
         query = query.filter(WorkflowApproval.filiere == filiere.strip().upper())
     if status:
         query = query.filter(WorkflowApproval.status == status)
-    rows = query.order_by(WorkflowApproval.created_at.desc()).all()
+    page = paginate(query, sort_column=WorkflowApproval.created_at, id_column=WorkflowApproval.id, pagination=pagination)
+    set_page_headers(response, page)
+    rows = page.rows
     return [
         {
             "id": r.id,
@@ -1,37 +1,46 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import func
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
 
 from app.audit.logger import write_audit
-from app.auth.dependencies import get_current_actor, get_actor_role_codes
-from app.auth.roles_config import has_permission, PERM_AUDIT_LOGS
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor
+from app.auth.roles_config import PERM_AUDIT_LOGS
 from app.common.errors import bad_request
+from app.common.export import ExportFormat, date_bounds, export_response
+from app.common.pagination import PaginationParams, get_cursor_pagination, paginate
+from app.common.responses import RowProjection
 from app.core.config import settings
-from app.db import get_db
-from app.models.actor import ActorRole
+from app.db import get_db, get_read_db
 from app.models.audit import AuditLog
-from app.models.lot import InventoryLedger, Lot
+from app.models.lot import Lot, StockBalance
 from app.audit.schemas import AuditLogOut, StockCoherenceItemOut, StockCoherenceReportOut
 
 router = APIRouter(prefix=f"{settings.api_prefix}/audit", tags=["admin"])
 
+AUDIT_LOG_ROWS = RowProjection(AuditLogOut, AuditLog)
+
 
-def _can_see_all_audit(db, actor) -> bool:
-    if _is_admin(db, actor.id):
+def _can_see_all_audit(auth: AuthContext) -> bool:
+    if auth.is_admin_like:
         return True
-    role_codes = get_actor_role_codes(actor, db)
-    return has_permission(role_codes, PERM_AUDIT_LOGS)  # BIANCO, Justice (réquisition à part)
+    return auth.has_permission(PERM_AUDIT_LOGS)  # BIANCO, Justice (réquisition à part)
 
 
 @router.get("", response_model=list[AuditLogOut])
 def list_audit_logs(
     actor_id: int | None = None,
     entity_type: str | None = None,
-    db: Session = Depends(get_db),
+    date_from: date | None = None,
+    date_to: date | None = None,
+    pagination: PaginationParams = Depends(get_cursor_pagination),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    query = db.query(AuditLog)
-    if not _can_see_all_audit(db, current_actor):
+    query = AUDIT_LOG_ROWS.query(db)
+    if not _can_see_all_audit(auth):
         query = query.filter(AuditLog.actor_id == current_actor.id)
         if actor_id and actor_id != current_actor.id:
             return []
@@ -39,20 +48,57 @@ def list_audit_logs(
         query = query.filter(AuditLog.actor_id == actor_id)
     if entity_type:
         query = query.filter(AuditLog.entity_type == entity_type)
-    logs = query.order_by(AuditLog.created_at.desc()).all()
-    return [
-        AuditLogOut(
-            id=log.id,
-            actor_id=log.actor_id,
-            action=log.action,
-            entity_type=log.entity_type,
-            entity_id=log.entity_id,
-            justification=log.justification,
-            meta_json=log.meta_json,
-            created_at=log.created_at,
-        )
-        for log in logs
-    ]
+    # Bornes sur created_at : seules les partitions de la période sont lues.
+    start, end = date_bounds(date_from, date_to)
+    if start:
+        query = query.filter(AuditLog.created_at >= start)
+    if end:
+        query = query.filter(AuditLog.created_at < end)
+    page = paginate(query, sort_column=AuditLog.created_at, id_column=AuditLog.id, pagination=pagination)
+    return AUDIT_LOG_ROWS.response(page)
+
+
+@router.get("/export")
+def export_audit_logs(
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    gzip: bool = False,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    actor_id: int | None = None,
+    entity_type: str | None = None,
+    entity_id: str | None = None,
+    action: str | None = None,
+    db: Session = Depends(get_read_db),
+    current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
+):
+    """Journal d'audit en flux (NDJSON ou CSV), par id croissant ; réquisitions et audits nationaux."""
+    if not _can_see_all_audit(auth):
+        if actor_id and actor_id != current_actor.id:
+            raise bad_request("acces_refuse")
+        actor_id = current_actor.id
+    start, end = date_bounds(date_from, date_to)
+    statement = AUDIT_LOG_ROWS.select()
+    if actor_id:
+        statement = statement.where(AuditLog.actor_id == actor_id)
+    if entity_type:
+        statement = statement.where(AuditLog.entity_type == entity_type)
+    if entity_id:
+        statement = statement.where(AuditLog.entity_id == entity_id)
+    if action:
+        statement = statement.where(AuditLog.action == action)
+    if start:
+        statement = statement.where(AuditLog.created_at >= start)
+    if end:
+        statement = statement.where(AuditLog.created_at < end)
+    return export_response(
+        db.get_bind(),
+        statement.order_by(AuditLog.id),
+        AUDIT_LOG_ROWS.fields,
+        fmt=export_format,
+        compress=gzip,
+        name="audit",
+    )
 
 
 @router.get("/stock-coherence", response_model=StockCoherenceReportOut)
@@ -62,13 +108,18 @@ def audit_stock_coherence(
     include_coherent: bool = False,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    if not _can_see_all_audit(db, current_actor):
+    if not _can_see_all_audit(auth):
         if actor_id and actor_id != current_actor.id:
             raise bad_request("acces_refuse")
         actor_id = current_actor.id
 
-    query = db.query(Lot)
+    # Solde du propriétaire actuel lu dans stock_balances, joint en une requête.
+    query = db.query(Lot, StockBalance.quantity).outerjoin(
+        StockBalance,
+        and_(StockBalance.lot_id == Lot.id, StockBalance.actor_id == Lot.current_owner_actor_id),
+    )
     if actor_id:
         query = query.filter(Lot.current_owner_actor_id == actor_id)
     if lot_id:
@@ -77,14 +128,9 @@ def audit_stock_coherence(
     lots = query.all()
     items: list[StockCoherenceItemOut] = []
     alerts_created = 0
-    for row in lots:
+    for row, ledger_qty in lots:
         if row.status not in {"available", "available_for_sale", "suspect"}:
             continue
-        ledger_qty = (
-            db.query(func.sum(InventoryLedger.quantity_delta))
-            .filter(InventoryLedger.lot_id == row.id, InventoryLedger.actor_id == row.current_owner_actor_id)
-            .scalar()
-        )
         ledger_val = float(ledger_qty or 0)
         declared_val = float(row.quantity or 0)
         delta = round(declared_val - ledger_val, 4)
@@ -126,11 +172,3 @@ def audit_stock_coherence(
         items=items,
     )
 
-
-def _is_admin(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role.in_(["admin", "dirigeant"]))
-        .first()
-        is not None
-    )
@@ -1,15 +1,27 @@
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from functools import cached_property
+from typing import Iterable
 
 from fastapi import Depends, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, joinedload
 
 from app.common.errors import bad_request
 from app.core.config import settings
 from app.db import get_db
 from app.models.actor import Actor, ActorRole
-from app.auth.security import decode_token
-from app.auth.roles_config import has_permission
+from app.auth.revocation import is_session_revoked
+from app.auth.role_cache import (
+    CachedActorAuth,
+    actor_version_is_current,
+    get_cached_actor_auth,
+    read_actor_version,
+    store_actor_auth,
+)
+from app.auth.security import create_access_token, decode_token
+from app.auth.roles_config import permissions_for_roles
 
 bearer_scheme = HTTPBearer(auto_error=False)
 AUTH_PATH_ALLOWLIST_FOR_PASSWORD_CHANGE = {
@@ -18,12 +30,162 @@ AUTH_PATH_ALLOWLIST_FOR_PASSWORD_CHANGE = {
     f"{settings.api_prefix}/auth/logout",
     f"{settings.api_prefix}/auth/refresh",
 }
+ADMIN_LIKE_ROLES = frozenset({"admin", "dirigeant"})
 
 
-def _enforce_password_rotation(actor: Actor, request: Request) -> None:
-    if not actor.auth:
-        return
-    if not bool(actor.auth.must_change_password):
+@dataclass
+class AuthContext:
+    """Acteur authentifié et ses rôles actifs, résolus une seule fois par requête.
+
+    L'objet `Actor` n'est chargé qu'au premier accès à `actor` : un endpoint
+    qui ne consulte que les rôles ou l'identifiant n'interroge pas la base.
+    """
+
+    actor_id: int
+    role_codes: frozenset[str]
+    db: Session | None = field(default=None, repr=False, compare=False)
+    _actor: Actor | None = field(default=None, repr=False, compare=False)
+
+    @property
+    def actor(self) -> Actor:
+        if self._actor is None:
+            actor = self.db.get(Actor, self.actor_id) if self.db is not None else None
+            if actor is None:
+                raise bad_request("compte_inactif")
+            self._actor = actor
+        return self._actor
+
+    @cached_property
+    def permissions(self) -> frozenset[str]:
+        return permissions_for_roles(self.role_codes)
+
+    @property
+    def is_admin_like(self) -> bool:
+        return not self.role_codes.isdisjoint(ADMIN_LIKE_ROLES)
+
+    @property
+    def territory_scope(self) -> dict[str, int | None]:
+        return {
+            "region_id": self.actor.region_id,
+            "district_id": self.actor.district_id,
+            "commune_id": self.actor.commune_id,
+            "fokontany_id": self.actor.fokontany_id,
+        }
+
+    def has_role(self, role: str) -> bool:
+        return role in self.role_codes
+
+    def has_any_role(self, roles: Iterable[str]) -> bool:
+        return not self.role_codes.isdisjoint(roles)
+
+    def has_permission(self, permission: str) -> bool:
+        return permission in self.permissions
+
+
+def active_role_clause(now: datetime | None = None):
+    """Filtre SQL des rôles actifs et valides à l'instant donné."""
+    now = now or datetime.now(timezone.utc)
+    return and_(
+        ActorRole.status == "active",
+        or_(ActorRole.valid_from == None, ActorRole.valid_from <= now),  # noqa: E711
+        or_(ActorRole.valid_to == None, ActorRole.valid_to >= now),  # noqa: E711
+    )
+
+
+def load_active_role_codes(db: Session, actor_id: int) -> set[str]:
+    """Codes de rôles actifs d'un acteur quelconque (hors contexte de requête)."""
+    rows = (
+        db.query(ActorRole.role)
+        .filter(ActorRole.actor_id == actor_id)
+        .filter(active_role_clause())
+        .distinct()
+        .all()
+    )
+    return {r[0] for r in rows}
+
+
+def _load_actor_auth(db: Session, actor_id: int) -> CachedActorAuth | None:
+    cached = get_cached_actor_auth(db, actor_id)
+    if cached:
+        return cached
+    # Une seule requête : acteur + auth (joinedload) + rôles actifs avec leurs bornes (outer join).
+    rows = (
+        db.query(Actor, ActorRole.role, ActorRole.valid_from, ActorRole.valid_to)
+        .outerjoin(ActorRole, and_(ActorRole.actor_id == Actor.id, ActorRole.status == "active"))
+        .options(joinedload(Actor.auth))
+        .filter(Actor.id == actor_id)
+        .all()
+    )
+    if not rows:
+        return None
+    actor = rows[0][0]
+    return store_actor_auth(db, actor, [(role, valid_from, valid_to) for _, role, valid_from, valid_to in rows if role])
+
+
+def _load_auth_context(db: Session, actor_id: int) -> tuple[AuthContext, bool] | None:
+    entry = _load_actor_auth(db, actor_id)
+    if not entry or entry.status != "active":
+        return None
+    ctx = AuthContext(actor_id=actor_id, role_codes=entry.role_codes_at(), db=db)
+    return ctx, entry.must_change_password
+
+
+def _auth_context_from_claims(db: Session, payload: dict) -> tuple[AuthContext, bool] | None:
+    """Contexte construit depuis un jeton autoportant, sans lecture de l'acteur.
+
+    Retourne None si le jeton n'est pas autoportant ou si l'acteur (rôles,
+    statut, mot de passe) a changé depuis son émission (actor_version
+    dépassée) : la requête repasse alors par le chemin base de données.
+    """
+    session_id = payload.get("sid")
+    if session_id and is_session_revoked(db, session_id):
+        raise bad_request("token_invalide")
+    actor_version = payload.get("actor_version")
+    if actor_version is None or payload.get("status") != "active":
+        return None
+    if not actor_version_is_current(db, int(payload["sub"]), int(actor_version)):
+        return None
+    ctx = AuthContext(
+        actor_id=int(payload["sub"]),
+        role_codes=frozenset(payload.get("roles") or ()),
+        db=db,
+    )
+    return ctx, bool(payload.get("must_change_password"))
+
+
+def issue_access_token(db: Session, actor_id: int, session_id: str) -> str:
+    """Émet le jeton d'accès ; autoportant si `auth_stateless_access_tokens` est actif."""
+    if not settings.auth_stateless_access_tokens:
+        return create_access_token(actor_id)
+    # Version lue avant les rôles : une modification concurrente rend le jeton obsolète.
+    actor_version = read_actor_version(db, actor_id)
+    entry = _load_actor_auth(db, actor_id)
+    if not entry:
+        return create_access_token(actor_id)
+    now = datetime.now(timezone.utc)
+    role_codes = entry.role_codes_at(now)
+    # Le jeton expire au plus tard au prochain changement de validité d'un rôle.
+    boundaries = [
+        bound
+        for role in entry.roles
+        for bound in (role.valid_to_utc, role.valid_from_utc)
+        if bound is not None and bound > now
+    ]
+    return create_access_token(
+        actor_id,
+        claims={
+            "sid": session_id,
+            "status": entry.status,
+            "roles": sorted(role_codes),
+            "actor_version": actor_version,
+            "must_change_password": entry.must_change_password,
+        },
+        not_after=min(boundaries) if boundaries else None,
+    )
+
+
+def _enforce_password_rotation(must_change_password: bool, request: Request) -> None:
+    if not must_change_password:
         return
     current_path = request.url.path
     if current_path in AUTH_PATH_ALLOWLIST_FOR_PASSWORD_CHANGE:
@@ -31,89 +193,74 @@ def _enforce_password_rotation(actor: Actor, request: Request) -> None:
     raise bad_request("password_change_required")
 
 
-def get_current_actor(
+def _resolve_auth_context(
     request: Request,
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-    db: Session = Depends(get_db),
-) -> Actor:
-    if not credentials:
-        raise bad_request("token_manquant")
+    credentials: HTTPAuthorizationCredentials,
+    db: Session,
+) -> AuthContext:
     try:
         payload = decode_token(credentials.credentials)
     except Exception:
         raise bad_request("token_invalide")
-    actor_id = int(payload["sub"])
-    actor = db.query(Actor).filter_by(id=actor_id).first()
-    if not actor or actor.status != "active":
+    loaded = _auth_context_from_claims(db, payload) if settings.auth_stateless_access_tokens else None
+    if loaded is None:
+        loaded = _load_auth_context(db, int(payload["sub"]))
+    if not loaded:
         raise bad_request("compte_inactif")
-    _enforce_password_rotation(actor, request)
-    return actor
+    ctx, must_change_password = loaded
+    _enforce_password_rotation(must_change_password, request)
+    request.state.auth_context = ctx
+    return ctx
+
+
+def get_auth_context(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    db: Session = Depends(get_db),
+) -> AuthContext:
+    if not credentials:
+        raise bad_request("token_manquant")
+    return _resolve_auth_context(request, credentials, db)
 
 
-def get_optional_actor(
+def get_optional_auth_context(
     request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
     db: Session = Depends(get_db),
-) -> Actor | None:
+) -> AuthContext | None:
     if not credentials:
         return None
-    try:
-        payload = decode_token(credentials.credentials)
-    except Exception:
-        raise bad_request("token_invalide")
-    actor_id = int(payload["sub"])
-    actor = db.query(Actor).filter_by(id=actor_id).first()
-    if not actor or actor.status != "active":
-        raise bad_request("compte_inactif")
-    _enforce_password_rotation(actor, request)
-    return actor
+    return _resolve_auth_context(request, credentials, db)
+
+
+def get_current_actor(auth: AuthContext = Depends(get_auth_context)) -> Actor:
+    return auth.actor
+
+
+def get_optional_actor(auth: AuthContext | None = Depends(get_optional_auth_context)) -> Actor | None:
+    return auth.actor if auth else None
 
 
 def require_roles(roles: set[str]):
-    def _checker(
-        actor: Actor = Depends(get_current_actor), db: Session = Depends(get_db)
-    ) -> Actor:
-        now = datetime.now(timezone.utc)
-        matches = (
-            db.query(ActorRole)
-            .filter(ActorRole.actor_id == actor.id)
-            .filter(ActorRole.role.in_(roles))
-            .filter(ActorRole.status == "active")
-            .filter((ActorRole.valid_from == None) | (ActorRole.valid_from <= now))
-            .filter((ActorRole.valid_to == None) | (ActorRole.valid_to >= now))
-            .first()
-        )
-        if not matches:
+    def _checker(auth: AuthContext = Depends(get_auth_context)) -> Actor:
+        if not auth.has_any_role(roles):
             raise bad_request("role_insuffisant", {"roles": sorted(roles)})
-        return actor
+        return auth.actor
 
     return _checker
 
 
 def get_actor_role_codes(actor: Actor, db: Session) -> list[str]:
     """Retourne la liste des codes de rôles actifs de l'acteur."""
-    now = datetime.now(timezone.utc)
-    rows = (
-        db.query(ActorRole.role)
-        .filter(ActorRole.actor_id == actor.id)
-        .filter(ActorRole.status == "active")
-        .filter((ActorRole.valid_from == None) | (ActorRole.valid_from <= now))
-        .filter((ActorRole.valid_to == None) | (ActorRole.valid_to >= now))
-        .distinct()
-        .all()
-    )
-    return [r[0] for r in rows]
+    return sorted(load_active_role_codes(db, actor.id))
 
 
 def require_permission(permission: str):
     """Exige que l'acteur ait au moins un rôle possédant la permission donnée."""
 
-    def _checker(
-        actor: Actor = Depends(get_current_actor), db: Session = Depends(get_db)
-    ) -> Actor:
-        role_codes = get_actor_role_codes(actor, db)
-        if not has_permission(role_codes, permission):
+    def _checker(auth: AuthContext = Depends(get_auth_context)) -> Actor:
+        if not auth.has_permission(permission):
             raise bad_request("permission_insuffisante", {"permission": permission})
-        return actor
+        return auth.actor
 
     return _checker
@@ -0,0 +1,105 @@
+"""
+Pool dédié aux calculs bcrypt (vérification et hachage des mots de passe).
+
+Les calculs bcrypt tournent sur un nombre fixe de threads
+(`password_hash_workers`) plutôt que sur le threadpool partagé des
+endpoints : une vague de connexions ne bloque plus les autres requêtes.
+Au-delà de `password_hash_max_pending` calculs en cours ou en attente,
+les nouvelles demandes sont refusées immédiatement (503) au lieu de
+s'empiler.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from app.auth.security import hash_password, verify_password
+from app.core.config import settings
+
+
+class PasswordHashPool:
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix="password-hash",
+                    )
+        return self._executor
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HTTPException(status_code=503, detail={"message": "authentification_surchargee"})
+            self._pending += 1
+
+    def _run(self, func, *args):
+        started = time.perf_counter()
+        with self._lock:
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._running -= 1
+                self._pending -= 1
+                self._completed += 1
+                self._busy_seconds += elapsed
+
+    async def submit(self, func, *args):
+        self._acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._get_executor(), self._run, func, *args)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return await future
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self.submit(verify_password, password, password_hash)
+
+    async def hash(self, password: str) -> str:
+        return await self.submit(hash_password, password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "busy_seconds": round(self._busy_seconds, 3),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+password_pool = PasswordHashPool(
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
@@ -0,0 +1,70 @@
+"""
+Liste de révocation compacte pour les jetons d'accès autoportants.
+
+Un jeton d'accès autoportant porte l'identifiant de la session (`sid`, le
+`jti` du refresh token émis en même temps). Une session révoquée (logout,
+rotation du refresh token) invalide donc les jetons d'accès qui en dérivent.
+
+Seules les révocations plus récentes que la durée de vie d'un jeton d'accès
+sont conservées : au-delà, les jetons concernés ont expiré d'eux-mêmes.
+La liste est reconstruite depuis `refresh_tokens.revoked_at` au plus toutes
+les `auth_revocation_refresh_seconds` ; les révocations faites par ce worker
+y sont ajoutées immédiatement.
+"""
+
+import threading
+import time
+import weakref
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.actor import RefreshToken
+
+
+class _Denylist:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.session_ids: frozenset[str] = frozenset()
+        self.local: set[str] = set()
+        self.refreshed_at = 0.0
+
+
+_denylists: "weakref.WeakKeyDictionary[Engine, _Denylist]" = weakref.WeakKeyDictionary()
+_denylists_lock = threading.Lock()
+
+
+def _denylist_for(engine: Engine) -> _Denylist:
+    denylist = _denylists.get(engine)
+    if denylist is None:
+        with _denylists_lock:
+            denylist = _denylists.setdefault(engine, _Denylist())
+    return denylist
+
+
+def _refresh(db: Session, denylist: _Denylist) -> None:
+    now = time.monotonic()
+    if now - denylist.refreshed_at < settings.auth_revocation_refresh_seconds:
+        return
+    cutoff = datetime.now(timezone.utc) - timedelta(minutes=settings.access_token_exp_minutes)
+    rows = db.execute(select(RefreshToken.token_id).where(RefreshToken.revoked_at >= cutoff)).scalars().all()
+    with denylist.lock:
+        denylist.session_ids = frozenset(rows)
+        denylist.local.clear()
+        denylist.refreshed_at = now
+
+
+def is_session_revoked(db: Session, session_id: str) -> bool:
+    denylist = _denylist_for(db.get_bind())
+    _refresh(db, denylist)
+    return session_id in denylist.session_ids or session_id in denylist.local
+
+
+def mark_session_revoked(db: Session, session_id: str) -> None:
+    """Ajoute la session à la liste locale sans attendre la prochaine relecture."""
+    denylist = _denylist_for(db.get_bind())
+    with denylist.lock:
+        denylist.local.add(session_id)
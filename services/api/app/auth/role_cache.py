@@ -0,0 +1,309 @@
+"""
+Cache des rôles actifs par acteur, partagé entre requêtes.
+
+Chaque entrée garde les rôles actifs avec leurs bornes valid_from/valid_to,
+le statut du compte et le drapeau must_change_password : l'expiration d'un
+rôle est donc appliquée sans relire la base.
+
+Invalidation :
+- locale et immédiate via les événements ORM sur Actor, ActorRole et ActorAuth ;
+- entre workers via un numéro de version (table auth_cache_versions,
+  scope AUTH_ROLES_SCOPE), incrémenté dans la même transaction que la
+  mutation et relu au plus toutes les `auth_role_cache_version_poll_seconds`.
+
+Chaque mutation incrémente aussi la version de l'acteur (scope
+`actor:<id>`), portée par les jetons d'accès autoportants. Les workers
+gardent les versions des acteurs modifiés pendant la durée de vie d'un jeton
+d'accès : un jeton n'est réexaminé que si son propre acteur a changé.
+
+La version `profile:<id>` suit tout ce qu'affiche GET /auth/me (colonnes de
+l'acteur, rôles, filières, must_change_password). Les libellés de région,
+district, commune et fokontany affichés par le profil suivent la version
+globale `territory`, incrémentée à chaque modification ou suppression d'une
+ligne de territoire. L'ETag du profil combine les deux versions.
+"""
+
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.actor import Actor, ActorAuth, ActorRole, AuthCacheVersion
+from app.models.actor_filiere import ActorFiliere
+from app.models.territory import Commune, District, Fokontany, Region
+
+AUTH_ROLES_SCOPE = "actor_roles"
+ACTOR_SCOPE_PREFIX = "actor:"
+PROFILE_SCOPE_PREFIX = "profile:"
+TERRITORY_SCOPE = "territory"
+
+
+def actor_scope(actor_id: int) -> str:
+    return f"{ACTOR_SCOPE_PREFIX}{actor_id}"
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class CachedRole:
+    code: str
+    valid_from: datetime | None
+    valid_to: datetime | None
+
+    @property
+    def valid_from_utc(self) -> datetime | None:
+        return _as_utc(self.valid_from)
+
+    @property
+    def valid_to_utc(self) -> datetime | None:
+        return _as_utc(self.valid_to)
+
+    def is_valid_at(self, now: datetime) -> bool:
+        valid_from = self.valid_from_utc
+        valid_to = self.valid_to_utc
+        if valid_from is not None and valid_from > now:
+            return False
+        if valid_to is not None and valid_to < now:
+            return False
+        return True
+
+
+@dataclass(frozen=True)
+class CachedActorAuth:
+    actor_id: int
+    status: str
+    must_change_password: bool
+    roles: tuple[CachedRole, ...]
+    version: int
+
+    def role_codes_at(self, now: datetime | None = None) -> frozenset[str]:
+        now = now or datetime.now(timezone.utc)
+        return frozenset(role.code for role in self.roles if role.is_valid_at(now))
+
+
+class _EngineCache:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.entries: dict[int, tuple[CachedActorAuth, float]] = {}
+        self.version = 0
+        self.version_checked_at = 0.0
+        # Acteurs modifiés pendant la durée de vie d'un jeton d'accès : version courante.
+        self.actor_versions: dict[int, int] = {}
+        # Modifiés par ce worker depuis la dernière relecture.
+        self.changed_actors: set[int] = set()
+        self.actor_versions_checked_at = 0.0
+
+
+_caches: "weakref.WeakKeyDictionary[Engine, _EngineCache]" = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def _cache_for(engine: Engine) -> _EngineCache:
+    cache = _caches.get(engine)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.setdefault(engine, _EngineCache())
+    return cache
+
+
+def read_cache_version(db: Session, scope: str) -> int:
+    return db.execute(select(AuthCacheVersion.version).where(AuthCacheVersion.scope == scope)).scalar() or 0
+
+
+def read_roles_version(db: Session) -> int:
+    return read_cache_version(db, AUTH_ROLES_SCOPE)
+
+
+def _sync_version(db: Session, cache: _EngineCache) -> int:
+    now = time.monotonic()
+    if now - cache.version_checked_at < settings.auth_role_cache_version_poll_seconds:
+        return cache.version
+    version = read_roles_version(db)
+    with cache.lock:
+        if version != cache.version:
+            cache.entries.clear()
+            cache.version = version
+        cache.version_checked_at = now
+    return version
+
+
+def read_actor_version(db: Session, actor_id: int) -> int:
+    return read_cache_version(db, actor_scope(actor_id))
+
+
+def read_profile_versions(db: Session, actor_id: int) -> tuple[int, int]:
+    """Versions (profil, territoire) lues en une requête."""
+    profile_scope = f"{PROFILE_SCOPE_PREFIX}{actor_id}"
+    versions = dict(
+        db.execute(
+            select(AuthCacheVersion.scope, AuthCacheVersion.version).where(
+                AuthCacheVersion.scope.in_((profile_scope, TERRITORY_SCOPE))
+            )
+        ).all()
+    )
+    return versions.get(profile_scope, 0), versions.get(TERRITORY_SCOPE, 0)
+
+
+def _sync_actor_versions(db: Session, cache: _EngineCache) -> None:
+    now = time.monotonic()
+    if now - cache.actor_versions_checked_at < settings.auth_role_cache_version_poll_seconds:
+        return
+    cutoff = datetime.now(timezone.utc) - timedelta(minutes=settings.access_token_exp_minutes)
+    rows = db.execute(
+        select(AuthCacheVersion.scope, AuthCacheVersion.version).where(
+            AuthCacheVersion.scope.startswith(ACTOR_SCOPE_PREFIX),
+            AuthCacheVersion.updated_at >= cutoff,
+        )
+    ).all()
+    with cache.lock:
+        cache.actor_versions = {int(scope[len(ACTOR_SCOPE_PREFIX) :]): version for scope, version in rows}
+        cache.changed_actors.clear()
+        cache.actor_versions_checked_at = now
+
+
+def actor_version_is_current(db: Session, actor_id: int, version: int) -> bool:
+    """
+    Vrai si l'acteur n'a pas changé depuis `version`. Un acteur absent de la
+    liste n'a pas changé depuis l'émission de tout jeton encore valide.
+    """
+    cache = _cache_for(db.get_bind())
+    _sync_actor_versions(db, cache)
+    if actor_id in cache.changed_actors:
+        return False
+    return version >= cache.actor_versions.get(actor_id, 0)
+
+
+def get_cached_actor_auth(db: Session, actor_id: int) -> CachedActorAuth | None:
+    if settings.auth_role_cache_ttl_seconds <= 0:
+        return None
+    cache = _cache_for(db.get_bind())
+    version = _sync_version(db, cache)
+    hit = cache.entries.get(actor_id)
+    if not hit:
+        return None
+    entry, expires_at = hit
+    if entry.version != version or time.monotonic() >= expires_at:
+        with cache.lock:
+            cache.entries.pop(actor_id, None)
+        return None
+    return entry
+
+
+def store_actor_auth(
+    db: Session,
+    actor: Actor,
+    roles: list[tuple[str, datetime | None, datetime | None]],
+) -> CachedActorAuth:
+    cache = _cache_for(db.get_bind())
+    entry = CachedActorAuth(
+        actor_id=actor.id,
+        status=actor.status,
+        must_change_password=bool(actor.auth and actor.auth.must_change_password),
+        roles=tuple(CachedRole(code, valid_from, valid_to) for code, valid_from, valid_to in roles),
+        version=cache.version,
+    )
+    if settings.auth_role_cache_ttl_seconds > 0:
+        with cache.lock:
+            cache.entries[actor.id] = (entry, time.monotonic() + settings.auth_role_cache_ttl_seconds)
+    return entry
+
+
+def invalidate_actor(engine: Engine, actor_id: int) -> None:
+    cache = _cache_for(engine)
+    with cache.lock:
+        cache.entries.pop(actor_id, None)
+        cache.changed_actors.add(actor_id)
+        # Relire la version dès la prochaine requête sur ce worker.
+        cache.version_checked_at = 0.0
+
+
+def bump_cache_version(connection: Connection, scope: str) -> None:
+    """Incrémente la version partagée de `scope` dans la transaction courante."""
+    table = AuthCacheVersion.__table__
+    dialect_insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    statement = dialect_insert(table).values(scope=scope, version=1, updated_at=datetime.now(timezone.utc))
+    # Upsert : deux premières incrémentations concurrentes ne se heurtent pas sur la clé.
+    connection.execute(
+        statement.on_conflict_do_update(
+            index_elements=[table.c.scope],
+            set_={"version": table.c.version + 1, "updated_at": statement.excluded.updated_at},
+        )
+    )
+
+
+def bump_roles_version(connection: Connection) -> None:
+    bump_cache_version(connection, AUTH_ROLES_SCOPE)
+
+
+def _on_profile_change(connection: Connection, actor_id: int | None) -> None:
+    if actor_id is not None:
+        bump_cache_version(connection, f"{PROFILE_SCOPE_PREFIX}{actor_id}")
+
+
+def _on_auth_change(connection: Connection, actor_id: int | None) -> None:
+    if actor_id is None:
+        return
+    invalidate_actor(connection.engine, actor_id)
+    bump_roles_version(connection)
+    bump_cache_version(connection, actor_scope(actor_id))
+
+
+def _attr_changed(target, *names: str) -> bool:
+    state = inspect(target)
+    return any(state.attrs[name].history.has_changes() for name in names)
+
+
+@event.listens_for(ActorRole, "after_insert")
+@event.listens_for(ActorRole, "after_update")
+@event.listens_for(ActorRole, "after_delete")
+def _on_actor_role_change(_mapper, connection, target) -> None:
+    _on_auth_change(connection, target.actor_id)
+    _on_profile_change(connection, target.actor_id)
+
+
+@event.listens_for(Actor, "after_update")
+def _on_actor_update(_mapper, connection, target) -> None:
+    if _attr_changed(target, "status"):
+        _on_auth_change(connection, target.id)
+    if _attr_changed(target, *(column.key for column in Actor.__mapper__.column_attrs)):
+        _on_profile_change(connection, target.id)
+
+
+@event.listens_for(ActorAuth, "after_update")
+def _on_actor_auth_update(_mapper, connection, target) -> None:
+    if _attr_changed(target, "must_change_password", "is_active", "password_hash"):
+        _on_auth_change(connection, target.actor_id)
+    if _attr_changed(target, "must_change_password"):
+        _on_profile_change(connection, target.actor_id)
+
+
+@event.listens_for(ActorFiliere, "after_insert")
+@event.listens_for(ActorFiliere, "after_update")
+@event.listens_for(ActorFiliere, "after_delete")
+def _on_actor_filiere_change(_mapper, connection, target) -> None:
+    _on_profile_change(connection, target.actor_id)
+
+
+# Les imports de référentiel insèrent de nouvelles lignes versionnées sans toucher
+# aux profils existants : seules la modification et la suppression comptent.
+@event.listens_for(Region, "after_update")
+@event.listens_for(Region, "after_delete")
+@event.listens_for(District, "after_update")
+@event.listens_for(District, "after_delete")
+@event.listens_for(Commune, "after_update")
+@event.listens_for(Commune, "after_delete")
+@event.listens_for(Fokontany, "after_update")
+@event.listens_for(Fokontany, "after_delete")
+def _on_territory_change(_mapper, connection, _target) -> None:
+    bump_cache_version(connection, TERRITORY_SCOPE)
@@ -3,7 +3,7 @@ Référentiel des rôles MADAVOLA : 19 autorités/institutions avec niveaux et h
 Aligné sur le tableau des rôles et attributions (présentation).
 """
 
-from typing import TypedDict
+from typing import Iterable, TypedDict
 
 
 class RoleDefinition(TypedDict):
@@ -618,6 +618,25 @@ ROLE_DEFINITIONS: dict[str, RoleDefinition] = {
 }
 
 
+def _compile_permission_index(
+    definitions: dict[str, RoleDefinition],
+) -> tuple[dict[str, frozenset[str]], dict[str, frozenset[str]]]:
+    """Compile les permissions par rôle et l'index inverse permission → rôles."""
+    role_permissions: dict[str, frozenset[str]] = {}
+    permission_roles: dict[str, set[str]] = {}
+    for code, defn in definitions.items():
+        perms = frozenset(defn.get("permissions", []))
+        role_permissions[code] = perms
+        for perm in perms:
+            permission_roles.setdefault(perm, set()).add(code)
+    return role_permissions, {perm: frozenset(codes) for perm, codes in permission_roles.items()}
+
+
+# Index statique, compilé une fois à l'import : ROLE_DEFINITIONS est la seule
+# source des permissions (le catalogue RBAC en base n'en porte aucune).
+ROLE_PERMISSIONS, PERMISSION_ROLES = _compile_permission_index(ROLE_DEFINITIONS)
+
+
 def get_roles_for_level(level: str) -> list[str]:
     """Retourne les codes de rôles pour un niveau donné."""
     return [code for code, defn in ROLE_DEFINITIONS.items() if defn["level"] == level]
@@ -631,20 +650,23 @@ def get_permissions_for_role(role_code: str) -> list[str]:
     return list(defn.get("permissions", []))
 
 
-def has_permission(role_codes: list[str], permission: str) -> bool:
-    """Vérifie si au moins un des rôles de l'acteur possède la permission."""
+def permissions_for_roles(role_codes: Iterable[str]) -> frozenset[str]:
+    """Union des permissions d'un ensemble de rôles."""
+    index = ROLE_PERMISSIONS
+    perms: set[str] = set()
     for code in role_codes:
-        if permission in get_permissions_for_role(code):
-            return True
-    return False
+        perms.update(index.get(code, ()))
+    return frozenset(perms)
+
+
+def has_permission(role_codes: Iterable[str], permission: str) -> bool:
+    """Vérifie si au moins un des rôles de l'acteur possède la permission."""
+    return not PERMISSION_ROLES.get(permission, frozenset()).isdisjoint(role_codes)
 
 
 def roles_with_permission(permission: str) -> set[str]:
     """Retourne l'ensemble des codes de rôles ayant une permission donnée."""
-    return {
-        code for code, defn in ROLE_DEFINITIONS.items()
-        if permission in defn.get("permissions", [])
-    }
+    return set(PERMISSION_ROLES.get(permission, ()))
 
 
 def get_referential_for_front() -> list[dict]:
@@ -1,10 +1,15 @@
+import hashlib
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import or_
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session, joinedload
+from starlette.concurrency import run_in_threadpool
 
-from app.auth.dependencies import get_current_actor
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor, issue_access_token
+from app.auth.password_pool import password_pool
+from app.auth.revocation import mark_session_revoked
+from app.auth.role_cache import read_profile_versions
 from app.auth.schemas import (
     ActorProfile,
     ActorProfilePatch,
@@ -16,10 +21,10 @@ from app.auth.schemas import (
     TokenPair,
 )
 from app.auth.security import (
-    create_access_token,
     create_refresh_token,
     decode_token,
     hash_password,
+    password_needs_rehash,
     verify_password,
 )
 from app.audit.logger import write_audit
@@ -27,7 +32,6 @@ from app.common.errors import bad_request
 from app.core.config import settings
 from app.db import get_db
 from app.models.actor import Actor, ActorAuth, RefreshToken
-from app.models.actor_filiere import ActorFiliere
 from app.models.territory import Commune, District, Fokontany, Region
 
 router = APIRouter(prefix=f"{settings.api_prefix}/auth", tags=["auth"])
@@ -55,13 +59,7 @@ def _normalize_phone_mg(identifier: str) -> str | None:
     return None
 
 
-@router.post("/login", response_model=TokenPair)
-def login(payload: LoginRequest, db: Session = Depends(get_db)):
-    identifier = (payload.identifier or "").strip()
-    password = (payload.password or "").strip()
-    if not identifier or not password:
-        raise bad_request("identifiants_invalides")
-
+def _find_login_actor(db: Session, identifier: str) -> Actor | None:
     conditions = [
         Actor.email == identifier,
         Actor.telephone == identifier,
@@ -69,19 +67,23 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)):
     normalized = _normalize_phone_mg(identifier)
     if normalized:
         conditions.append(Actor.telephone == normalized)
-    actor = db.query(Actor).filter(or_(*conditions)).first()
-    if not actor or not actor.auth:
-        raise bad_request("identifiants_invalides")
-    if actor.status != "active":
-        raise bad_request("compte_inactif")
-    if not verify_password(password, actor.auth.password_hash):
-        raise bad_request("identifiants_invalides")
-    if not actor.auth.is_active:
-        raise bad_request("auth_desactivee")
+    return db.query(Actor).options(joinedload(Actor.auth)).filter(or_(*conditions)).first()
+
 
-    access_token = create_access_token(actor.id)
+def _complete_login(db: Session, actor: Actor, new_password_hash: str | None) -> TokenPair:
     refresh_token, token_id, expires_at = create_refresh_token(actor.id)
+    access_token = issue_access_token(db, actor.id, token_id)
     actor.auth.last_login_at = datetime.now(timezone.utc)
+    if new_password_hash:
+        # UPDATE direct : même mot de passe, nouveau coût. Les événements ORM
+        # d'ActorAuth le prendraient pour une rotation (caches de rôles vidés,
+        # jetons autoportants de l'acteur renvoyés vers la base).
+        db.execute(
+            update(ActorAuth)
+            .where(ActorAuth.id == actor.auth.id)
+            .values(password_hash=new_password_hash)
+            .execution_options(synchronize_session=False)
+        )
     db.add(
         RefreshToken(
             actor_id=actor.id,
@@ -97,6 +99,30 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)):
     )
 
 
+@router.post("/login", response_model=TokenPair)
+async def login(payload: LoginRequest, db: Session = Depends(get_db)):
+    # Endpoint asynchrone : l'accès base passe par le threadpool, bcrypt par le pool dédié.
+    identifier = (payload.identifier or "").strip()
+    password = (payload.password or "").strip()
+    if not identifier or not password:
+        raise bad_request("identifiants_invalides")
+
+    actor = await run_in_threadpool(_find_login_actor, db, identifier)
+    if not actor or not actor.auth:
+        raise bad_request("identifiants_invalides")
+    if actor.status != "active":
+        raise bad_request("compte_inactif")
+    password_hash = actor.auth.password_hash
+    if not await password_pool.verify(password, password_hash):
+        raise bad_request("identifiants_invalides")
+    if not actor.auth.is_active:
+        raise bad_request("auth_desactivee")
+
+    # Migration transparente du coût bcrypt vers `password_bcrypt_rounds`.
+    new_password_hash = await password_pool.hash(password) if password_needs_rehash(password_hash) else None
+    return await run_in_threadpool(_complete_login, db, actor, new_password_hash)
+
+
 @router.post("/refresh", response_model=TokenPair)
 def refresh(payload: RefreshRequest, db: Session = Depends(get_db)):
     try:
@@ -115,8 +141,8 @@ def refresh(payload: RefreshRequest, db: Session = Depends(get_db)):
     if expires_at < datetime.now(timezone.utc):
         raise bad_request("refresh_expire")
 
-    access_token = create_access_token(actor_id)
     refresh_token, new_token_id, expires_at = create_refresh_token(actor_id)
+    access_token = issue_access_token(db, actor_id, new_token_id)
     stored.revoked_at = datetime.now(timezone.utc)
     db.add(
         RefreshToken(
@@ -126,6 +152,7 @@ def refresh(payload: RefreshRequest, db: Session = Depends(get_db)):
         )
     )
     db.commit()
+    mark_session_revoked(db, token_id)
     return TokenPair(access_token=access_token, refresh_token=refresh_token)
 
 
@@ -140,40 +167,37 @@ def logout(payload: RefreshRequest, db: Session = Depends(get_db)):
     if stored and stored.revoked_at is None:
         stored.revoked_at = datetime.now(timezone.utc)
         db.commit()
+        mark_session_revoked(db, token_id)
     return {"status": "ok"}
 
 
-@router.get("/me", response_model=ActorProfile)
-def me(actor: Actor = Depends(get_current_actor), db: Session = Depends(get_db)):
-    # Optimize: Load all territory details in a single query using UNION or separate optimized queries
-    # Since territories are small, we can load them efficiently
-    region_info = None
-    district_info = None
-    commune_info = None
-    fokontany_info = None
-
-    # Load territories in parallel (optimized: single query per type)
-    if actor.region_id:
-        region = db.query(Region).filter_by(id=actor.region_id).first()
-        if region:
-            region_info = TerritoryInfo(id=region.id, code=region.code, name=region.name)
-
-    if actor.district_id:
-        district = db.query(District).filter_by(id=actor.district_id).first()
-        if district:
-            district_info = TerritoryInfo(id=district.id, code=district.code, name=district.name)
-
-    if actor.commune_id:
-        commune = db.query(Commune).filter_by(id=actor.commune_id).first()
-        if commune:
-            commune_info = TerritoryInfo(id=commune.id, code=commune.code, name=commune.name)
-
-    if actor.fokontany_id:
-        fokontany = db.query(Fokontany).filter_by(id=actor.fokontany_id).first()
-        if fokontany:
-            fokontany_info = TerritoryInfo(id=fokontany.id, code=fokontany.code or "", name=fokontany.name)
-
-    # Roles are already loaded via relationship (eager loading would be better but requires model change)
+def _territory_info(territory) -> TerritoryInfo | None:
+    if territory is None:
+        return None
+    return TerritoryInfo(id=territory.id, code=territory.code or "", name=territory.name)
+
+
+def _build_profile(db: Session, actor_id: int) -> ActorProfile:
+    # Une seule requête : territoires, auth, rôles et filières chargés par jointures.
+    actor = (
+        db.query(Actor)
+        .options(
+            joinedload(Actor.auth),
+            joinedload(Actor.region),
+            joinedload(Actor.district),
+            joinedload(Actor.commune),
+            joinedload(Actor.fokontany),
+            joinedload(Actor.roles),
+            joinedload(Actor.filieres),
+        )
+        .filter(Actor.id == actor_id)
+        .populate_existing()
+        .one_or_none()
+    )
+    if actor is None:
+        raise bad_request("compte_inactif")
+
+    roles = sorted(actor.roles, key=lambda role: role.id)
     roles_info = [
         ActorRoleInfo(
             id=role.id,
@@ -182,15 +206,15 @@ def me(actor: Actor = Depends(get_current_actor), db: Session = Depends(get_db))
             valid_from=role.valid_from,
             valid_to=role.valid_to,
         )
-        for role in actor.roles
+        for role in roles
     ]
     active_roles = [
         (role.role or "").strip().lower()
-        for role in actor.roles
+        for role in roles
         if (role.status or "active").strip().lower() == "active"
     ]
     if not active_roles:
-        active_roles = [(role.role or "").strip().lower() for role in actor.roles if (role.role or "").strip()]
+        active_roles = [(role.role or "").strip().lower() for role in roles if (role.role or "").strip()]
     primary_role = None
     for code in ROLE_PRIORITY:
         if code in active_roles:
@@ -198,16 +222,7 @@ def me(actor: Actor = Depends(get_current_actor), db: Session = Depends(get_db))
             break
     if primary_role is None and active_roles:
         primary_role = active_roles[0]
-    filieres = [
-        row[0]
-        for row in (
-            db.query(ActorFiliere.filiere)
-            .filter(ActorFiliere.actor_id == actor.id)
-            .order_by(ActorFiliere.filiere.asc())
-            .all()
-        )
-        if row[0]
-    ]
+    filieres = [item.filiere for item in actor.filieres if item.filiere]
     if not filieres:
         filieres = ["OR"]
 
@@ -228,10 +243,10 @@ def me(actor: Actor = Depends(get_current_actor), db: Session = Depends(get_db))
         nif=actor.nif,
         stat=actor.stat,
         rccm=actor.rccm,
-        region=region_info,
-        district=district_info,
-        commune=commune_info,
-        fokontany=fokontany_info,
+        region=_territory_info(actor.region),
+        district=_territory_info(actor.district),
+        commune=_territory_info(actor.commune),
+        fokontany=_territory_info(actor.fokontany),
         roles=roles_info,
         filieres=filieres,
         primary_role=primary_role,
@@ -240,6 +255,37 @@ def me(actor: Actor = Depends(get_current_actor), db: Session = Depends(get_db))
     )
 
 
+def _profile_etag(actor_id: int, versions: tuple[int, int]) -> str:
+    profile_version, territory_version = versions
+    digest = hashlib.sha256(f"{actor_id}:{profile_version}:{territory_version}".encode("utf-8"))
+    return '"' + digest.hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {item.strip().removeprefix("W/") for item in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+@router.get("/me", response_model=ActorProfile)
+def me(
+    request: Request,
+    response: Response,
+    auth: AuthContext = Depends(get_auth_context),
+    db: Session = Depends(get_db),
+):
+    # ETag tiré de la version du profil (incrémentée à chaque modification de
+    # l'acteur, de ses rôles ou de ses filières) et de celle du territoire
+    # (libellés affichés) : lu avant la requête jointe, un 304 ne charge pas le profil.
+    etag = _profile_etag(auth.actor_id, read_profile_versions(db, auth.actor_id))
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return _build_profile(db, auth.actor_id)
+
+
 @router.patch("/me", response_model=ActorProfile)
 def patch_me(
     payload: ActorProfilePatch,
@@ -320,7 +366,7 @@ def patch_me(
         },
     )
     db.commit()
-    return me(actor=actor, db=db)
+    return _build_profile(db, actor.id)
 
 
 @router.post("/change-password")
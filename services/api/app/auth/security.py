@@ -1,55 +1,63 @@
 from datetime import datetime, timedelta, timezone
 from uuid import uuid4
 
+import bcrypt
 import jwt
-from passlib.context import CryptContext
 
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_MAX_BYTES = 72
 
 
-def hash_password(password: str) -> str:
-    # Bcrypt has a 72-byte limit, truncate if necessary
-    password_bytes = password.encode('utf-8')
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-    plain = password_bytes.decode('utf-8')
-    try:
-        return pwd_context.hash(plain)
-    except Exception:
-        import bcrypt
+def _password_bytes(password: str) -> bytes:
+    # Bcrypt ne prend en compte que les 72 premiers octets.
+    return password.encode("utf-8")[:BCRYPT_MAX_BYTES]
+
 
-        return bcrypt.hashpw(password_bytes, bcrypt.gensalt()).decode("utf-8")
+def hash_password(password: str, rounds: int | None = None) -> str:
+    salt = bcrypt.gensalt(rounds=rounds or settings.password_bcrypt_rounds)
+    return bcrypt.hashpw(_password_bytes(password), salt).decode("utf-8")
 
 
 def verify_password(password: str, password_hash: str) -> bool:
+    """Vérifie un mot de passe contre un hash bcrypt ($2a$, $2b$ ou $2y$), en un seul calcul."""
     if not password or not password_hash:
         return False
-    password = password.strip()
-    password_hash = password_hash.strip()
-    # Handle both passlib format and raw bcrypt format
     try:
-        if pwd_context.verify(password, password_hash):
-            return True
-    except Exception:
-        pass
-    try:
-        import bcrypt
-        return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
-    except Exception:
+        return bcrypt.checkpw(_password_bytes(password.strip()), password_hash.strip().encode("utf-8"))
+    except ValueError:
         return False
 
 
-def create_access_token(actor_id: int, expires_minutes: int | None = None) -> str:
+def bcrypt_rounds(password_hash: str) -> int | None:
+    parts = (password_hash or "").strip().split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def password_needs_rehash(password_hash: str) -> bool:
+    return bcrypt_rounds(password_hash) != settings.password_bcrypt_rounds
+
+
+def create_access_token(
+    actor_id: int,
+    expires_minutes: int | None = None,
+    claims: dict | None = None,
+    not_after: datetime | None = None,
+) -> str:
     if expires_minutes is None:
         expires_minutes = settings.access_token_exp_minutes
     now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(minutes=expires_minutes)
+    if not_after is not None and not_after < expires_at:
+        expires_at = not_after
     payload = {
+        **(claims or {}),
         "sub": str(actor_id),
         "jti": uuid4().hex,
         "iat": int(now.timestamp()),
-        "exp": int((now + timedelta(minutes=expires_minutes)).timestamp()),
+        "exp": int(expires_at.timestamp()),
         "iss": settings.jwt_issuer,
     }
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
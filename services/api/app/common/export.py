@@ -0,0 +1,102 @@
+"""
+Exports en flux des grands journaux (NDJSON ou CSV, gzip en option).
+
+La requête est lue par paquets de `export_stream_batch_size` lignes avec un
+curseur côté serveur (`yield_per`) ; chaque paquet est encodé et envoyé
+aussitôt, la mémoire du worker reste donc bornée quel que soit le volume.
+Le flux ouvre sa propre session sur la base choisie par la requête : la
+session de la requête est fermée avant l'envoi de la réponse.
+"""
+
+import csv
+import io
+import zlib
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterator, Literal
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.common.errors import bad_request
+from app.common.responses import json_bytes
+from app.core.config import settings
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def date_bounds(date_from: date | None, date_to: date | None) -> tuple[datetime | None, datetime | None]:
+    """Bornes [début du premier jour, début du lendemain du dernier jour[ ; ouvertes si absentes."""
+    if date_from and date_to and date_from > date_to:
+        raise bad_request("intervalle_invalide")
+    start = datetime.combine(date_from, time.min, tzinfo=timezone.utc) if date_from else None
+    end = datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=timezone.utc) if date_to else None
+    return start, end
+
+
+def _batches(bind: Engine, statement: Select) -> Iterator[list]:
+    with Session(bind=bind) as db:
+        result = db.execute(statement.execution_options(yield_per=settings.export_stream_batch_size))
+        yield from result.partitions()
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _encode(fields: tuple[str, ...], batches: Iterator[list], fmt: ExportFormat) -> Iterator[bytes]:
+    if fmt == "ndjson":
+        for rows in batches:
+            yield b"".join(json_bytes(dict(zip(fields, row))) + b"\n" for row in rows)
+        return
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for rows in batches:
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # En-tête seul (aucune ligne).
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # conteneur gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_response(
+    bind: Engine,
+    statement: Select,
+    fields: tuple[str, ...],
+    *,
+    fmt: ExportFormat,
+    compress: bool,
+    name: str,
+) -> StreamingResponse:
+    """Réponse en flux des lignes de `statement`, colonnes nommées par `fields`."""
+    chunks = _encode(fields, _batches(bind, statement), fmt)
+    filename = f"{name}-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{fmt}"
+    media_type = MEDIA_TYPES[fmt]
+    if compress:
+        chunks = _gzip(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,14 +1,43 @@
-from typing import Generic, TypeVar
+"""
+Pagination des listes.
 
-from fastapi import Query
+Deux modes, sur le même tri (colonne de tri décroissante puis id) :
+- par curseur (keyset) : `cursor` = `next_cursor` de la page précédente ;
+  coût constant quelle que soit la profondeur ;
+- par page (`page`, OFFSET) : conservé pour les écrans existants.
+
+`total` : `exact` (COUNT), `estimate` (estimation du planificateur
+PostgreSQL, COUNT ailleurs) ou `none` (pas de comptage).
+
+Les listes qui renvoient un tableau JSON exposent `next_cursor` et le total
+dans les en-têtes `X-Next-Cursor` et `X-Total-Count`.
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Generic, Literal, TypeVar
+
+from fastapi import Query, Response
 from pydantic import BaseModel
+from sqlalchemy import tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query as OrmQuery
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.common.errors import bad_request
 
 T = TypeVar("T")
 
+TotalMode = Literal["none", "estimate", "exact"]
+
 
 class PaginationParams(BaseModel):
     page: int = 1
     page_size: int = 100
+    cursor: str | None = None
+    total: TotalMode = "exact"
 
     @property
     def offset(self) -> int:
@@ -22,24 +51,144 @@ class PaginationParams(BaseModel):
 def get_pagination(
     page: int = Query(1, ge=1, description="Page number (starts at 1)"),
     page_size: int = Query(100, ge=1, le=1000, description="Items per page (max 1000)"),
+    cursor: str | None = Query(None, description="Opaque cursor (next_cursor of the previous page)"),
+    total: TotalMode = Query("exact", description="Total count: exact, estimate or none"),
 ) -> PaginationParams:
-    return PaginationParams(page=page, page_size=page_size)
+    return PaginationParams(page=page, page_size=page_size, cursor=cursor, total=total)
+
+
+def get_cursor_pagination(
+    cursor: str | None = Query(None, description="Opaque cursor (X-Next-Cursor of the previous page)"),
+    page_size: int = Query(100, ge=1, le=1000, description="Items per page (max 1000)"),
+    total: TotalMode = Query("none", description="Total count: exact, estimate or none"),
+) -> PaginationParams:
+    return PaginationParams(page=1, page_size=page_size, cursor=cursor, total=total)
 
 
 class PaginatedResponse(BaseModel, Generic[T]):
     items: list[T]
-    total: int
+    total: int | None
     page: int
     page_size: int
-    total_pages: int
+    total_pages: int | None
+    next_cursor: str | None = None
 
     @classmethod
-    def create(cls, items: list, total: int, page: int, page_size: int):
-        total_pages = (total + page_size - 1) // page_size if total > 0 else 0
+    def create(cls, items: list, total: int | None, page: int, page_size: int, next_cursor: str | None = None):
+        if total is None:
+            total_pages = None
+        else:
+            total_pages = (total + page_size - 1) // page_size if total > 0 else 0
         return cls(
             items=items,
             total=total,
             page=page,
             page_size=page_size,
             total_pages=total_pages,
+            next_cursor=next_cursor,
         )
+
+
+# --- Curseurs -------------------------------------------------------------
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    if isinstance(sort_value, datetime):
+        value = {"t": sort_value.isoformat()}
+    else:
+        value = {"v": sort_value}
+    raw = json.dumps([value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Any, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+        sort_value = datetime.fromisoformat(value["t"]) if "t" in value else value["v"]
+        return sort_value, int(row_id)
+    except (ValueError, TypeError, KeyError):
+        raise bad_request("curseur_invalide")
+
+
+# --- Comptage ---------------------------------------------------------------
+
+
+class _ExplainJson(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement) -> None:
+        self.statement = statement
+
+
+@compiles(_ExplainJson, "postgresql")
+def _compile_explain_json(element, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def count_total(query: OrmQuery, mode: TotalMode) -> int | None:
+    if mode == "none":
+        return None
+    query = query.order_by(None)
+    if mode == "estimate" and query.session.get_bind().dialect.name == "postgresql":
+        plan = query.session.execute(_ExplainJson(query.statement)).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    return query.count()
+
+
+# --- Pagination keyset ------------------------------------------------------
+
+
+@dataclass
+class Page(Generic[T]):
+    rows: list[T]
+    next_cursor: str | None
+    total: int | None
+
+
+def paginate(
+    query: OrmQuery,
+    *,
+    sort_column,
+    id_column,
+    pagination: PaginationParams,
+    descending: bool = True,
+) -> Page:
+    """
+    Page de `query` triée par (`sort_column`, `id_column`), décroissants par défaut.
+
+    Avec un curseur, la page commence après la dernière ligne de la page
+    précédente (condition sur index, sans OFFSET) ; sinon `page` est appliqué.
+    Une ligne de plus est lue pour savoir s'il existe une page suivante.
+    """
+    total = count_total(query, pagination.total)
+    keys = (sort_column,) if sort_column is id_column else (sort_column, id_column)
+    ordered = query.order_by(*(key.desc() if descending else key.asc() for key in keys))
+    if pagination.cursor:
+        sort_value, row_id = decode_cursor(pagination.cursor)
+        if len(keys) == 1:
+            key, bound = id_column, row_id
+        else:
+            key, bound = tuple_(*keys), (sort_value, row_id)
+            # Redondant, mais lisible par le planificateur : élague les
+            # partitions mensuelles au-delà du curseur (created_at).
+            ordered = ordered.filter(sort_column <= sort_value if descending else sort_column >= sort_value)
+        ordered = ordered.filter(key < bound if descending else key > bound)
+    else:
+        ordered = ordered.offset(pagination.offset)
+    rows = ordered.limit(pagination.page_size + 1).all()
+    next_cursor = None
+    if len(rows) > pagination.page_size:
+        rows = rows[: pagination.page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return Page(rows=rows, next_cursor=next_cursor, total=total)
+
+
+def set_page_headers(response: Response, page: Page) -> None:
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    if page.total is not None:
+        response.headers["X-Total-Count"] = str(page.total)
@@ -1,5 +1,7 @@
 from datetime import datetime, timezone
 
+from app.core.metrics import PDF_RENDERED
+
 
 def build_receipt_number(prefix: str, entity_id: int) -> str:
     now = datetime.now(timezone.utc)
@@ -22,6 +24,7 @@ def build_simple_pdf(
     font_size: int = 12,
 ) -> bytes:
     # Minimal single-page PDF (Helvetica) to store a printable receipt/card.
+    PDF_RENDERED.inc()
     text = [title] + lines
     text_ops = ["BT", f"/F1 {font_size} Tf", f"{start_x} {start_y} Td"]
     for idx, line in enumerate(text):
@@ -0,0 +1,65 @@
+"""
+Réponses JSON rapides.
+
+`FastJSONResponse` (classe par défaut de l'application) sérialise avec
+orjson ; les dates UTC sont rendues en `Z`, comme par Pydantic.
+
+Les listes en lecture seule peuvent aller plus loin avec `RowProjection` :
+seules les colonnes du schéma de sortie sont lues et les lignes sont
+renvoyées en dictionnaires, sans instancier ni valider un modèle Pydantic
+par ligne. Le schéma reste déclaré en `response_model` pour OpenAPI.
+"""
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Query, Session
+
+from app.common.pagination import Page, set_page_headers
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"type non serialisable: {type(value).__name__}")
+
+
+def json_bytes(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return json_bytes(content)
+
+
+class RowProjection:
+    """
+    Colonnes de `model` nommées comme les champs de `schema`, plus les
+    colonnes `extra` (tri de pagination) qui ne sont pas renvoyées.
+    """
+
+    def __init__(self, schema: type[BaseModel], model, *extra) -> None:
+        self.fields = tuple(schema.model_fields)
+        self.columns = [getattr(model, name) for name in self.fields]
+        self.columns += [column for column in extra if column.key not in self.fields]
+
+    def query(self, db: Session) -> Query:
+        return db.query(*self.columns)
+
+    def select(self) -> Select:
+        return select(*self.columns)
+
+    def dicts(self, rows) -> list[dict]:
+        fields = self.fields
+        return [dict(zip(fields, row)) for row in rows]
+
+    def response(self, page: Page) -> FastJSONResponse:
+        # Réponse renvoyée telle quelle : les en-têtes de page y sont posés ici.
+        response = FastJSONResponse(self.dicts(page.rows))
+        set_page_headers(response, page)
+        return response
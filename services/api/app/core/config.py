@@ -16,13 +16,56 @@ class Settings(BaseSettings):
     postgres_db: str = "madavola"
     postgres_host: str = "localhost"
     postgres_port: int = 5432
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 0
+    read_database_url: str = ""
+    read_replica_max_lag_seconds: float = 10.0
+    read_replica_lag_check_seconds: float = 5.0
+    read_after_write_seconds: float = 15.0
+    sql_instrumentation_enabled: bool = True
+    sql_query_budget: int = 50
+    sql_repeated_statement_threshold: int = 10
+    prometheus_multiproc_dir: str = ""
+    metrics_token: str | None = None
     api_prefix: str = "/api/v1"
     jwt_secret: str
     jwt_algorithm: str = "HS256"
     jwt_issuer: str = "madavola"
     access_token_exp_minutes: int = 60
     refresh_token_exp_days: int = 14
+    auth_role_cache_ttl_seconds: int = 60
+    auth_role_cache_version_poll_seconds: float = 5.0
+    lot_credentials_cache_ttl_seconds: int = 30
+    auth_stateless_access_tokens: bool = False
+    auth_revocation_refresh_seconds: float = 5.0
+    password_bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64
+    schema_startup_mode: str = "auto"
     document_storage_dir: str = "data/uploads"
+    document_job_poll_seconds: float = 2.0
+    document_job_batch_size: int = 20
+    document_job_max_attempts: int = 5
+    document_job_retry_seconds: float = 30.0
+    document_job_lock_timeout_seconds: float = 300.0
+    integrity_check_workers: int = 0
+    integrity_check_chunk_size: int = 5000
+    integrity_check_slice_records: int = 200000
+    integrity_check_max_reported_breaks: int = 1000
+    export_stream_batch_size: int = 2000
+    partition_months_ahead: int = 3
+    partition_retention_months: int = 0
+    partition_archive_schema: str = "archive"
+    partition_maintenance_interval_seconds: int = 3600
+    activity_rollup_interval_seconds: int = 600
+    activity_rollup_max_days_per_run: int = 31
+    activity_rollup_redo_days: int = 1
+    dashboard_cache_ttl_seconds: int = 60
+    dashboard_cache_max_entries: int = 2048
     webhook_shared_secret: str | None = None
     webhook_ip_allowlist: str | None = None
     card_qr_signing_secret: str | None = None
@@ -0,0 +1,164 @@
+"""
+Métriques Prometheus (exposées sur /metrics).
+
+- latence HTTP par gabarit de route, méthode et statut (histogramme) ;
+- jauges du pool de connexions, mises à jour en fin de requête ;
+- compteurs métier : lots créés par filière, factures émises, lignes
+  d'audit, PDF générés, webhooks reçus/traités.
+
+Les compteurs métier issus de la base ne sont incrémentés qu'après le
+commit de la transaction (événements de session), jamais sur un rollback.
+
+Avec plusieurs workers uvicorn, `prometheus_multiproc_dir` pointe vers un
+répertoire partagé (vidé au déploiement) : chaque worker y écrit ses
+valeurs et /metrics agrège l'ensemble, quel que soit le worker interrogé.
+"""
+
+import os
+import time
+
+from app.core.config import settings
+
+if settings.prometheus_multiproc_dir:
+    # Doit être défini avant l'import de prometheus_client.
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.prometheus_multiproc_dir)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from fastapi import Request  # noqa: E402
+from prometheus_client import REGISTRY  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.common.errors import unauthorized  # noqa: E402
+from app.models.audit import AuditLog  # noqa: E402
+from app.models.invoice import Invoice  # noqa: E402
+from app.models.lot import Lot  # noqa: E402
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+HTTP_REQUEST_DURATION = Histogram(
+    "madavola_http_request_duration_seconds",
+    "Durée des requêtes HTTP",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+DB_POOL_IN_USE = Gauge("madavola_db_pool_in_use", "Connexions utilisées", multiprocess_mode="livesum")
+DB_POOL_CHECKED_IN = Gauge("madavola_db_pool_checked_in", "Connexions libres", multiprocess_mode="livesum")
+DB_POOL_OVERFLOW = Gauge("madavola_db_pool_overflow", "Connexions en débordement", multiprocess_mode="livesum")
+DB_POOL_SIZE = Gauge("madavola_db_pool_size", "Taille configurée du pool", multiprocess_mode="livesum")
+DB_POOL_TIMEOUTS = Gauge(
+    "madavola_db_pool_timeouts", "Attentes de connexion expirées depuis le démarrage", multiprocess_mode="livesum"
+)
+LOTS_CREATED = Counter("madavola_lots_created_total", "Lots créés", ["filiere"])
+INVOICES_ISSUED = Counter("madavola_invoices_issued_total", "Factures émises", ["filiere"])
+AUDIT_ROWS_WRITTEN = Counter("madavola_audit_rows_written_total", "Lignes d'audit écrites", ["entity_type"])
+PDF_RENDERED = Counter("madavola_pdf_rendered_total", "Documents PDF générés")
+WEBHOOKS_RECEIVED = Counter("madavola_webhooks_received_total", "Webhooks de paiement reçus", ["provider"])
+WEBHOOKS_PROCESSED = Counter(
+    "madavola_webhooks_processed_total", "Webhooks de paiement traités", ["provider", "result"]
+)
+DASHBOARD_CACHE_REQUESTS = Counter(
+    "madavola_dashboard_cache_requests_total", "Lectures du cache des dashboards et rapports", ["endpoint", "result"]
+)
+
+
+def require_metrics_token(request: Request) -> None:
+    """Jeton `metrics_token` (Bearer) exigé s'il est défini : /metrics et /health/* d'exploitation."""
+    if settings.metrics_token and request.headers.get("authorization") != f"Bearer {settings.metrics_token}":
+        raise unauthorized()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def _update_pool_gauges() -> None:
+    from app.db import engine
+
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return
+    DB_POOL_IN_USE.set(pool.checkedout())
+    DB_POOL_CHECKED_IN.set(pool.checkedin())
+    DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+    DB_POOL_SIZE.set(pool.size())
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        DB_POOL_TIMEOUTS.set(metrics.timeouts)
+
+
+def _label(value: str | None) -> str:
+    return (value or "inconnu")[:40]
+
+
+# --- Compteurs métier après commit ----------------------------------------
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_business_events(session, _flush_context) -> None:
+    pending = session.info.setdefault("metrics_pending", [])
+    for obj in session.new:
+        if isinstance(obj, Lot):
+            pending.append((LOTS_CREATED, _label(obj.filiere)))
+        elif isinstance(obj, Invoice):
+            pending.append((INVOICES_ISSUED, _label(obj.filiere)))
+        elif isinstance(obj, AuditLog):
+            pending.append((AUDIT_ROWS_WRITTEN, _label(obj.entity_type)))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_business_events(session) -> None:
+    for counter, label in session.info.pop("metrics_pending", ()):
+        counter.labels(label).inc()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_business_events(session) -> None:
+    session.info.pop("metrics_pending", None)
+
+
+# --- Middleware HTTP -----------------------------------------------------
+
+
+class PrometheusMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status_holder = {"status": 500}
+
+        async def send_with_status(message) -> None:
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.labels(scope.get("method", ""), route, str(status_holder["status"])).observe(
+                time.perf_counter() - started
+            )
+            _update_pool_gauges()
@@ -0,0 +1,220 @@
+"""
+Partitions mensuelles (PostgreSQL) de inventory_ledger et audit_logs.
+
+Les tables marquées `info={"partition_by_month": <colonne>}` sont
+partitionnées par mois sur cette colonne (migration 0039), avec une
+partition `<table>_default` ; SQLite les garde en tables simples. Ici :
+- création des partitions jusqu'à `partition_months_ahead` mois après le mois
+  courant ; les lignes déjà tombées dans la partition par défaut pour ce mois
+  y sont déplacées ;
+- détachement des partitions de plus de `partition_retention_months` mois
+  (0 = conservation illimitée), rangées dans le schéma
+  `partition_archive_schema` où elles restent lisibles. Les tables marquées
+  `"partition_retention": False` (inventory_ledger, registre légal des stocks
+  relu par la réconciliation et les rollups) ne sont jamais détachées.
+
+Les requêtes filtrées sur `created_at` ne lisent que les partitions utiles.
+Le worker lance la maintenance toutes les
+`partition_maintenance_interval_seconds` ; à la main :
+  python -m app.core.partitions status|maintain
+"""
+
+import logging
+import re
+import sys
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app import models  # noqa: F401  (enregistre toutes les tables dans Base.metadata)
+from app.core.config import settings
+from app.models.base import Base
+
+logger = logging.getLogger(__name__)
+
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+@dataclass
+class PartitionReport:
+    table: str
+    partitioned: bool
+    partitions: list[str] = field(default_factory=list)
+    created: list[str] = field(default_factory=list)
+    detached: list[str] = field(default_factory=list)
+    default_rows: int = 0
+
+
+def partitioned_tables() -> list[tuple[str, str]]:
+    """(table, colonne de partition) des modèles marqués."""
+    return sorted(
+        (table.name, table.info["partition_by_month"])
+        for table in Base.metadata.tables.values()
+        if "partition_by_month" in table.info
+    )
+
+
+def retention_applies(table: str) -> bool:
+    """Faux pour les tables exclues de la rétention (`"partition_retention": False`)."""
+    return Base.metadata.tables[table].info.get("partition_retention", True)
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def partition_month(table: str, name: str) -> date | None:
+    if not name.startswith(f"{table}_p"):
+        return None
+    match = _PARTITION_SUFFIX.search(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    return bool(
+        conn.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+                "WHERE c.relname = :table AND c.relnamespace = 'public'::regnamespace"
+            ),
+            {"table": table},
+        ).scalar()
+    )
+
+
+def list_partitions(conn: Connection, table: str) -> list[str]:
+    return list(
+        conn.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits i "
+                "JOIN pg_class child ON child.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:table AS regclass) ORDER BY child.relname"
+            ),
+            {"table": f"public.{table}"},
+        ).scalars()
+    )
+
+
+def _create_month(conn: Connection, table: str, column: str, month: date) -> str:
+    name = partition_name(table, month)
+    bounds = (month.isoformat(), add_months(month, 1).isoformat())
+    default = f"{table}_default"
+    moved = conn.execute(
+        text(f"SELECT COUNT(*) FROM {default} WHERE {column} >= :start AND {column} < :end"),
+        {"start": bounds[0], "end": bounds[1]},
+    ).scalar()
+    if not moved:
+        conn.execute(
+            text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ('{bounds[0]}') TO ('{bounds[1]}')")
+        )
+        return name
+    # Une partition ne peut pas être attachée tant que la partition par défaut
+    # contient des lignes de sa plage : elles sont déplacées dans la même transaction.
+    conn.execute(text(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE"))
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {default} WHERE {column} >= :start AND {column} < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"start": bounds[0], "end": bounds[1]},
+    )
+    conn.execute(
+        text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{bounds[0]}') TO ('{bounds[1]}')")
+    )
+    logger.info("partition %s: %s ligne(s) reprises de %s", name, moved, default)
+    return name
+
+
+def maintain_table(conn: Connection, table: str, column: str, today: date | None = None) -> PartitionReport:
+    """Crée les partitions à venir et détache les anciennes ; l'appelant valide."""
+    report = PartitionReport(table=table, partitioned=is_partitioned(conn, table))
+    if not report.partitioned:
+        return report
+    conn.execute(text("SET LOCAL TIME ZONE 'UTC'"))
+    current = month_start(today or datetime.now(timezone.utc).date())
+    existing = set(list_partitions(conn, table))
+    for offset in range(settings.partition_months_ahead + 1):
+        month = add_months(current, offset)
+        if partition_name(table, month) not in existing:
+            report.created.append(_create_month(conn, table, column, month))
+    retention = settings.partition_retention_months if retention_applies(table) else 0
+    if retention > 0:
+        oldest_kept = add_months(current, -retention)
+        archive = settings.partition_archive_schema
+        if archive:
+            conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{archive}"'))
+        for name in sorted(existing):
+            month = partition_month(table, name)
+            if month is None or month >= oldest_kept:
+                continue
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            if archive:
+                conn.execute(text(f'ALTER TABLE {name} SET SCHEMA "{archive}"'))
+            report.detached.append(name)
+    report.partitions = list_partitions(conn, table)
+    report.default_rows = conn.execute(text(f"SELECT COUNT(*) FROM {table}_default")).scalar() or 0
+    return report
+
+
+def maintain_partitions(engine: Engine, today: date | None = None) -> list[PartitionReport]:
+    """Maintenance de toutes les tables partitionnées, une transaction par table."""
+    if engine.dialect.name != "postgresql":
+        return []
+    reports = []
+    for table, column in partitioned_tables():
+        with engine.begin() as conn:
+            reports.append(maintain_table(conn, table, column, today))
+    return reports
+
+
+def partition_status(engine: Engine) -> list[PartitionReport]:
+    if engine.dialect.name != "postgresql":
+        return []
+    reports = []
+    with engine.connect() as conn:
+        for table, _column in partitioned_tables():
+            report = PartitionReport(table=table, partitioned=is_partitioned(conn, table))
+            if report.partitioned:
+                report.partitions = list_partitions(conn, table)
+                report.default_rows = conn.execute(text(f"SELECT COUNT(*) FROM {table}_default")).scalar() or 0
+            reports.append(report)
+    return reports
+
+
+def main(argv: list[str]) -> int:
+    from app.db import engine
+
+    command = argv[1] if len(argv) > 1 else "status"
+    if command not in {"status", "maintain"}:
+        print("usage: python -m app.core.partitions status|maintain")
+        return 2
+    reports = maintain_partitions(engine) if command == "maintain" else partition_status(engine)
+    if not reports:
+        print("partitionnement: PostgreSQL uniquement, rien a faire")
+        return 0
+    for report in reports:
+        if not report.partitioned:
+            print(f"{report.table}: non partitionnee (alembic upgrade head)")
+            continue
+        print(f"{report.table}: {len(report.partitions)} partition(s), {report.default_rows} ligne(s) hors plage")
+        for name in report.created:
+            print(f"  creee: {name}")
+        for name in report.detached:
+            print(f"  detachee: {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,387 @@
+"""
+Contrôle du schéma au démarrage par empreinte.
+
+Le rattrapage de schéma (tables optionnelles, colonnes historiques ajoutées
+hors migration, catalogue RBAC initial) n'est plus exécuté par chaque
+worker : il est appliqué une fois (`python -m app.core.schema sync`), qui
+enregistre l'empreinte des modèles et de la tête alembic dans
+`schema_state`. `sync` ne fait rien si l'empreinte enregistrée est déjà la
+bonne : relancé à chaque démarrage du conteneur, il ne pose aucun verrou.
+
+Au démarrage, un worker compare l'empreinte enregistrée à celle des modèles
+chargés et la révision de `alembic_version` à la tête des migrations
+livrées :
+- identiques : aucun DDL ;
+- différentes : échec immédiat avec l'indication de migration (`check`)
+  ou rattrapage (`sync`). Le mode `auto` (défaut) rattrape les bases SQLite
+  de développement et échoue sur les autres.
+
+Les nouvelles tables et colonnes passent par une migration alembic, jamais
+par OPTIONAL_TABLES ni LEGACY_COLUMNS.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.auth.roles_config import ROLE_DEFINITIONS
+from app.core.config import settings
+from app.ledger.balances import rebuild_stock_balances
+from app.models.actor_filiere import ActorFiliere
+from app.models.actor import ActorKYC, ActorWallet, CommuneProfile
+from app.models.admin import SchemaState
+from app.models.lot import StockBalance
+from app.models.or_compliance import (
+    CollectorAffiliationAgreement,
+    CollectorCard,
+    CollectorCardDocument,
+    CollectorCardFeeSplit,
+    CollectorRegister,
+    CollectorSemiAnnualReport,
+    ComplianceNotification,
+    ComptoirLicense,
+    KaraBolamenaCard,
+    KaraProductionLog,
+    OrTariffConfig,
+)
+from app.models.pierre import (
+    ActorAuthorization,
+    ExportColis,
+    ExportSeal,
+    ExportValidationStep,
+    FeePolicy,
+    PierreTransformationEvent,
+    PierreTransformationLink,
+    ProductCatalog,
+)
+from app.models.bois import (
+    ChecklistPolicy,
+    EssenceCatalog,
+    RulePolicy,
+    TransportRecord,
+    TransportRecordItem,
+    WorkflowApproval,
+)
+from app.models.rbac import RoleCatalog
+from app.models.emergency import EmergencyAlert
+from app.models.communication import ContactRequest, DirectMessage
+from app.models.marketplace import MarketplaceOffer
+from app import models  # noqa: F401  (enregistre toutes les tables dans Base.metadata)
+from app.models.base import Base
+from app.rbac.catalog import invalidate_role_catalog
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_STATE_KEY = "app"
+MIGRATION_HINT = "alembic upgrade head && python -m app.core.schema sync"
+
+# Tables historiques créées hors migration si absentes ; liste close : les
+# nouvelles tables passent par une migration alembic.
+OPTIONAL_TABLES = (
+    RoleCatalog,
+    ActorKYC,
+    ActorWallet,
+    CommuneProfile,
+    ActorFiliere,
+    OrTariffConfig,
+    KaraBolamenaCard,
+    KaraProductionLog,
+    CollectorCard,
+    CollectorCardDocument,
+    CollectorAffiliationAgreement,
+    CollectorRegister,
+    CollectorSemiAnnualReport,
+    ComptoirLicense,
+    CollectorCardFeeSplit,
+    ComplianceNotification,
+    ProductCatalog,
+    ActorAuthorization,
+    FeePolicy,
+    ExportColis,
+    ExportSeal,
+    ExportValidationStep,
+    PierreTransformationEvent,
+    PierreTransformationLink,
+    EssenceCatalog,
+    RulePolicy,
+    ChecklistPolicy,
+    TransportRecord,
+    TransportRecordItem,
+    WorkflowApproval,
+    EmergencyAlert,
+    ContactRequest,
+    DirectMessage,
+    MarketplaceOffer,
+)
+
+ALEMBIC_VERSIONS_DIR = Path(__file__).resolve().parents[2] / "alembic" / "versions"
+_REVISION_LINE = re.compile(r"^(revision|down_revision)\s*=\s*[\"']([^\"']+)[\"']", re.MULTILINE)
+
+# Colonnes historiques ajoutées hors migration (PostgreSQL uniquement) ; liste close.
+LEGACY_COLUMNS = (
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS sous_filiere VARCHAR(30)",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS product_catalog_id INTEGER",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS attributes_json TEXT",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS wood_essence_id INTEGER",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS wood_form VARCHAR(40)",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS volume_m3 NUMERIC(14,4)",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS lot_number VARCHAR(120)",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS traceability_id VARCHAR(120)",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS origin_reference VARCHAR(160)",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS previous_block_hash VARCHAR(64)",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS current_block_hash VARCHAR(64)",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS trace_payload_json TEXT",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS wood_classification VARCHAR(30)",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS cites_laf_status VARCHAR(20)",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS cites_ndf_status VARCHAR(20)",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS cites_international_status VARCHAR(20)",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS destruction_status VARCHAR(20)",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS destruction_requested_at TIMESTAMPTZ",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS destruction_validated_at TIMESTAMPTZ",
+    "ALTER TABLE lots ADD COLUMN IF NOT EXISTS destruction_evidence_json TEXT",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS filiere VARCHAR(20)",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS region_code VARCHAR(20)",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS origin_reference VARCHAR(160)",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS lot_references_json TEXT",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS quantity_total NUMERIC(14,4)",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS unit VARCHAR(20)",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS unit_price_avg NUMERIC(14,2)",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS subtotal_ht NUMERIC(14,2)",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS taxes_json TEXT",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS taxes_total NUMERIC(14,2)",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS total_ttc NUMERIC(14,2)",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS invoice_hash VARCHAR(64)",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS previous_invoice_hash VARCHAR(64)",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS internal_signature VARCHAR(64)",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS trace_payload_json TEXT",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS receipt_number VARCHAR(80)",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS receipt_document_id INTEGER",
+    "ALTER TABLE invoices ADD COLUMN IF NOT EXISTS is_immutable BOOLEAN DEFAULT TRUE",
+)
+
+# Mesures du dernier démarrage, exposées par /health/startup.
+startup_metrics: dict = {}
+
+
+class SchemaOutOfDateError(RuntimeError):
+    pass
+
+
+def alembic_head() -> str | None:
+    """Révision de tête des migrations livrées (lue dans les fichiers, sans alembic)."""
+    revisions: set[str] = set()
+    parents: set[str] = set()
+    for path in ALEMBIC_VERSIONS_DIR.glob("*.py"):
+        values = dict(_REVISION_LINE.findall(path.read_text(encoding="utf-8")))
+        if "revision" in values:
+            revisions.add(values["revision"])
+        if "down_revision" in values:
+            parents.add(values["down_revision"])
+    heads = sorted(revisions - parents)
+    return heads[0] if len(heads) == 1 else None
+
+
+def read_alembic_revision(conn: Connection) -> str | None:
+    if not inspect(conn).has_table("alembic_version"):
+        return None
+    return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def schema_fingerprint() -> str:
+    """Empreinte des modèles SQLAlchemy chargés, du rattrapage hors migration et de la tête alembic."""
+    tables = []
+    for table in sorted(Base.metadata.tables.values(), key=lambda item: item.name):
+        columns = [[column.name, str(column.type), bool(column.nullable)] for column in table.columns]
+        tables.append([table.name, sorted(columns)])
+    payload = json.dumps(
+        {"tables": tables, "legacy_columns": LEGACY_COLUMNS, "alembic_head": alembic_head()},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _migrations_applied(engine: Engine, revision: str | None) -> bool:
+    # Bases SQLite de développement : schéma issu de create_all, sans alembic.
+    if revision is None and engine.dialect.name == "sqlite":
+        return True
+    return revision is not None and revision == alembic_head()
+
+
+def read_stored_fingerprint(conn: Connection) -> str | None:
+    if not inspect(conn).has_table(SchemaState.__tablename__):
+        return None
+    return conn.execute(
+        text("SELECT fingerprint FROM schema_state WHERE key = :key"),
+        {"key": SCHEMA_STATE_KEY},
+    ).scalar()
+
+
+def _record_fingerprint(conn: Connection, fingerprint: str) -> None:
+    now = datetime.now(timezone.utc)
+    updated = conn.execute(
+        text("UPDATE schema_state SET fingerprint = :fingerprint, applied_at = :now WHERE key = :key"),
+        {"fingerprint": fingerprint, "now": now, "key": SCHEMA_STATE_KEY},
+    )
+    if not updated.rowcount:
+        conn.execute(
+            text("INSERT INTO schema_state (key, fingerprint, applied_at) VALUES (:key, :fingerprint, :now)"),
+            {"fingerprint": fingerprint, "now": now, "key": SCHEMA_STATE_KEY},
+        )
+
+
+def _seed_role_catalog(conn: Connection) -> None:
+    existing_roles = conn.execute(text("SELECT COUNT(*) FROM rbac_role_catalog")).scalar() or 0
+    if existing_roles == 0:
+        rows = []
+        for idx, (code, defn) in enumerate(sorted(ROLE_DEFINITIONS.items()), start=1):
+            if code.startswith("pierre_"):
+                scope = "PIERRE"
+                category = "PIERRE"
+            elif code.startswith("bois_"):
+                scope = "BOIS"
+                category = "BOIS"
+            elif code in {"orpailleur", "collecteur", "comptoir_operator", "comptoir_compliance", "comptoir_director", "com", "com_admin", "com_agent", "gue", "gue_or_agent", "douanes_agent", "raffinerie_agent", "lab_bgglm", "mines_region_agent", "bijoutier"}:
+                scope = "OR"
+                category = "OR"
+            else:
+                scope = "OR,PIERRE,BOIS"
+                category = "Administration"
+            rows.append(
+                {
+                    "code": code,
+                    "label": " ".join(x.capitalize() for x in code.split("_") if x),
+                    "description": defn.get("description", ""),
+                    "category": category,
+                    "filiere_scope_csv": scope,
+                    "display_order": idx,
+                }
+            )
+        for row in rows:
+            conn.execute(
+                text(
+                    "INSERT INTO rbac_role_catalog (code,label,description,category,filiere_scope_csv,display_order,is_active) "
+                    "VALUES (:code,:label,:description,:category,:filiere_scope_csv,:display_order,true) "
+                    "ON CONFLICT (code) DO NOTHING"
+                ),
+                row,
+            )
+        invalidate_role_catalog()
+
+def sync_schema(engine: Engine, *, force: bool = False) -> str | None:
+    """
+    Applique le rattrapage de schéma puis enregistre l'empreinte ; None (aucun
+    DDL) si l'empreinte enregistrée est déjà celle des modèles.
+    """
+    fingerprint = schema_fingerprint()
+    with engine.connect() as conn:
+        stored = read_stored_fingerprint(conn)
+        revision = read_alembic_revision(conn)
+    if not _migrations_applied(engine, revision):
+        raise SchemaOutOfDateError(
+            "migrations_non_appliquees: révision {} en base, {} attendue. Exécuter : {}".format(
+                revision or "absente", alembic_head(), MIGRATION_HINT
+            )
+        )
+    if stored == fingerprint and not force:
+        return None
+    is_sqlite = engine.dialect.name == "sqlite"
+    # Une table de soldes créée ici part du registre existant.
+    backfill_balances = not inspect(engine).has_table(StockBalance.__tablename__)
+    if is_sqlite:
+        Base.metadata.create_all(bind=engine, checkfirst=True)
+    for model in OPTIONAL_TABLES:
+        model.__table__.create(bind=engine, checkfirst=True)
+    if backfill_balances:
+        with Session(engine) as db:
+            rebuild_stock_balances(db)
+            db.commit()
+    with engine.begin() as conn:
+        _seed_role_catalog(conn)
+        if not is_sqlite:
+            for statement in LEGACY_COLUMNS:
+                conn.execute(text(statement))
+        _record_fingerprint(conn, fingerprint)
+    return fingerprint
+
+
+def check_schema(engine: Engine, mode: str | None = None) -> str:
+    """Vérifie l'empreinte du schéma ; retourne "ok" ou "synced"."""
+    mode = mode or settings.schema_startup_mode
+    expected = schema_fingerprint()
+    with engine.connect() as conn:
+        stored = read_stored_fingerprint(conn)
+        revision = read_alembic_revision(conn)
+    migrated = _migrations_applied(engine, revision)
+    if stored == expected and migrated:
+        return "ok"
+    if migrated and (mode == "sync" or (mode == "auto" and engine.dialect.name == "sqlite")):
+        sync_schema(engine)
+        return "synced"
+    if not migrated:
+        raise SchemaOutOfDateError(
+            "migrations_non_appliquees: révision {} en base, {} attendue. Exécuter : {}".format(
+                revision or "absente", alembic_head(), MIGRATION_HINT
+            )
+        )
+    raise SchemaOutOfDateError(
+        "schema_non_a_jour: empreinte {} attendue, {} en base. Exécuter : {}".format(
+            expected[:12], (stored or "absente")[:12], MIGRATION_HINT
+        )
+    )
+
+
+def run_startup_check(engine: Engine, app_started_at: float) -> dict:
+    started = time.perf_counter()
+    status = check_schema(engine)
+    finished = time.perf_counter()
+    startup_metrics.update(
+        {
+            "schema_status": status,
+            "schema_check_seconds": round(finished - started, 4),
+            "startup_seconds": round(finished - app_started_at, 4),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+        }
+    )
+    logger.info(
+        "startup schema=%s schema_check=%.3fs total=%.3fs",
+        status,
+        startup_metrics["schema_check_seconds"],
+        startup_metrics["startup_seconds"],
+    )
+    return startup_metrics
+
+
+def main(argv: list[str]) -> int:
+    from app.db import engine
+
+    command = argv[1] if len(argv) > 1 else "check"
+    if command == "sync":
+        try:
+            fingerprint = sync_schema(engine, force="--force" in argv)
+        except SchemaOutOfDateError as exc:
+            print(str(exc), file=sys.stderr)
+            return 1
+        print(f"schema synchronise ({fingerprint[:12]})" if fingerprint else "schema deja a jour")
+        return 0
+    if command == "check":
+        try:
+            print(f"schema {check_schema(engine, mode='check')}")
+        except SchemaOutOfDateError as exc:
+            print(str(exc), file=sys.stderr)
+            return 1
+        return 0
+    print("usage: python -m app.core.schema [check|sync [--force]]", file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
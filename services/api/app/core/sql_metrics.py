@@ -0,0 +1,218 @@
+"""
+Instrumentation SQL par requête HTTP.
+
+Un middleware ASGI ouvre un compteur par requête (contextvar) ; des
+événements SQLAlchemy sur tous les moteurs y ajoutent chaque instruction
+exécutée et sa durée. En fin de requête :
+- l'en-tête `Server-Timing` expose le nombre d'instructions et le temps base ;
+- un avertissement est journalisé si la route dépasse `sql_query_budget`
+  instructions, ou exécute la même forme d'instruction plus de
+  `sql_repeated_statement_threshold` fois (signature d'un N+1) ;
+- les compteurs sont agrégés par gabarit de route (`/lots/{lot_id}`) pour
+  `/health/sql-metrics`.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*(?:\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+))*\s*\)")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Forme normalisée d'une instruction (littéraux et listes IN repliés)."""
+    shape = _PLACEHOLDER_LIST_RE.sub("(?)", statement)
+    shape = _NUMBER_RE.sub("?", shape)
+    return _SPACES_RE.sub(" ", shape).strip()
+
+
+class RequestSqlStats:
+    __slots__ = ("count", "db_seconds", "shapes")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.db_seconds = 0.0
+        self.shapes: Counter[str] = Counter()
+
+    def add(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.db_seconds += elapsed
+        self.shapes[statement_shape(statement)] += 1
+
+    def most_repeated(self) -> tuple[str, int] | None:
+        if not self.shapes:
+            return None
+        return self.shapes.most_common(1)[0]
+
+    def server_timing(self, total_seconds: float) -> str:
+        return 'db;dur={:.1f};desc="{} queries", app;dur={:.1f}'.format(
+            self.db_seconds * 1000,
+            self.count,
+            total_seconds * 1000,
+        )
+
+
+_current: ContextVar[RequestSqlStats | None] = ContextVar("sql_request_stats", default=None)
+
+
+def current_sql_stats() -> RequestSqlStats | None:
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault("sql_metrics_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current.get()
+    if stats is None:
+        return
+    started = conn.info.get("sql_metrics_started")
+    if not started:
+        return
+    stats.add(statement, time.perf_counter() - started.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context) -> None:
+    # after_cursor_execute n'est pas appelé sur erreur : retirer le départ
+    # empilé, sans quoi la liste grandit sur la connexion du pool et décale
+    # les mesures suivantes. La requête en échec compte quand même.
+    conn = context.connection
+    started = conn.info.get("sql_metrics_started") if conn is not None else None
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats = _current.get()
+    if stats is not None and context.statement:
+        stats.add(context.statement, elapsed)
+
+
+class RouteSqlMetrics:
+    """Agrégats par (méthode, gabarit de route)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: dict[tuple[str, str], dict] = {}
+
+    def record(self, method: str, route: str, stats: RequestSqlStats, total_seconds: float, flags: set[str]) -> None:
+        with self._lock:
+            entry = self._routes.setdefault(
+                (method, route),
+                {
+                    "requests": 0,
+                    "queries_total": 0,
+                    "queries_max": 0,
+                    "db_seconds_total": 0.0,
+                    "seconds_total": 0.0,
+                    "budget_exceeded": 0,
+                    "repeated_statements": 0,
+                },
+            )
+            entry["requests"] += 1
+            entry["queries_total"] += stats.count
+            entry["queries_max"] = max(entry["queries_max"], stats.count)
+            entry["db_seconds_total"] += stats.db_seconds
+            entry["seconds_total"] += total_seconds
+            if "budget" in flags:
+                entry["budget_exceeded"] += 1
+            if "repeated" in flags:
+                entry["repeated_statements"] += 1
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            items = [((method, route), dict(entry)) for (method, route), entry in self._routes.items()]
+        rows = []
+        for (method, route), entry in sorted(items, key=lambda item: -item[1]["queries_total"]):
+            requests = entry["requests"] or 1
+            rows.append(
+                {
+                    "method": method,
+                    "route": route,
+                    **entry,
+                    "db_seconds_total": round(entry["db_seconds_total"], 4),
+                    "seconds_total": round(entry["seconds_total"], 4),
+                    "queries_avg": round(entry["queries_total"] / requests, 2),
+                }
+            )
+        return rows
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_sql_metrics = RouteSqlMetrics()
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _check_request(method: str, route: str, stats: RequestSqlStats) -> set[str]:
+    flags: set[str] = set()
+    if settings.sql_query_budget > 0 and stats.count > settings.sql_query_budget:
+        flags.add("budget")
+        logger.warning(
+            "sql_query_budget_exceeded route=%s %s queries=%d budget=%d",
+            method,
+            route,
+            stats.count,
+            settings.sql_query_budget,
+        )
+    repeated = stats.most_repeated()
+    if repeated and settings.sql_repeated_statement_threshold > 0 and repeated[1] > settings.sql_repeated_statement_threshold:
+        flags.add("repeated")
+        logger.warning(
+            "sql_repeated_statement route=%s %s count=%d statement=%s",
+            method,
+            route,
+            repeated[1],
+            repeated[0][:300],
+        )
+    return flags
+
+
+class SqlInstrumentationMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not settings.sql_instrumentation_enabled:
+            await self.app(scope, receive, send)
+            return
+        stats = RequestSqlStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            method = scope.get("method", "")
+            route = _route_template(scope)
+            flags = _check_request(method, route, stats)
+            route_sql_metrics.record(method, route, stats, time.perf_counter() - started, flags)
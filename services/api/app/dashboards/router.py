@@ -1,31 +1,39 @@
-from datetime import date, datetime, time, timezone
+from datetime import date, datetime, timezone
 
 from fastapi import APIRouter, Depends
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.audit.logger import write_audit
-from app.auth.dependencies import get_current_actor, get_actor_role_codes, require_permission
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor, require_permission
 from app.auth.roles_config import (
     PERM_DASHBOARD_NATIONAL,
     PERM_DASHBOARD_REGIONAL,
     PERM_ALERTES_STRATEGIQUES,
     PERM_ADMIN_COMMUNE,
-    has_permission,
 )
 from app.common.errors import bad_request
 from app.core.config import settings
-from app.db import get_db
+from app.db import get_db, get_read_db
 from app.models.admin import SystemConfig
 from app.models.actor import Actor
 from app.models.export import ExportDossier
-from app.models.lot import InventoryLedger
 from app.models.territory import Region
-from app.models.transaction import TradeTransaction
+from app.reports.cache import cached_aggregates
+from app.reports.rollups import (
+    Granularity,
+    SeriesGroup,
+    SeriesMetric,
+    activity_series,
+    activity_totals,
+    distinct_lots_through,
+    series_buckets,
+)
 from app.dashboards.schemas import (
     DashboardNationalOut,
     DashboardRegionalOut,
     DashboardCommuneOut,
+    DashboardTimeseriesOut,
     AlerteItem,
     HomeWidgetsOut,
     InstitutionalMessageIn,
@@ -33,56 +41,54 @@ from app.dashboards.schemas import (
 
 router = APIRouter(prefix=f"{settings.api_prefix}/dashboards", tags=["dashboards"])
 
+# Au-delà, une granularité plus large (10 000 jours ne se dessinent pas).
+_MAX_SERIES_BUCKETS = 1000
+
 
 def _get_config(db: Session, key: str) -> SystemConfig | None:
     return db.query(SystemConfig).filter(SystemConfig.key == key).first()
 
 
-def _date_range(date_from: date | None, date_to: date | None) -> tuple[datetime, datetime]:
+def _day_range(date_from: date | None, date_to: date | None) -> tuple[date, date]:
     if date_from and date_to and date_from > date_to:
         raise bad_request("intervalle_invalide")
-    start = datetime.combine(date_from or date.today(), time.min, tzinfo=timezone.utc)
-    end = datetime.combine(date_to or date.today(), time.max, tzinfo=timezone.utc)
-    return start, end
+    return date_from or date.today(), date_to or date.today()
+
+
+def _period_aggregates(db: Session, endpoint: str, first_day: date, last_day: date, **territory) -> dict:
+    """Volume, ventes et lots distincts de la période, en cache (app.reports.cache)."""
+
+    def compute() -> dict:
+        # Cumuls journaliers jusqu'au filigrane, tables brutes au-delà (app.reports.rollups).
+        activity = activity_totals(db, first_day, last_day, **territory)
+        return {
+            "volume_created": activity.volume_created,
+            "transactions_total": activity.transactions_total,
+            "nb_lots": distinct_lots_through(db, last_day, **territory),
+        }
+
+    return cached_aggregates(db, endpoint, first_day, last_day, compute, **territory)
 
 
 @router.get("/national", response_model=DashboardNationalOut)
 def dashboard_national(
     date_from: date | None = None,
     date_to: date | None = None,
-    db: Session = Depends(get_db),
-    current_actor: Actor = Depends(require_permission(PERM_DASHBOARD_NATIONAL)),
+    db: Session = Depends(get_read_db),
+    _current_actor: Actor = Depends(require_permission(PERM_DASHBOARD_NATIONAL)),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     """Dashboard stratégique national : indicateurs agrégés et alertes. PR, PM, admin, dirigeant, MMRS, MEF, BFM, etc."""
-    start_dt, end_dt = _date_range(date_from, date_to)
-
-    volume_created = (
-        db.query(func.coalesce(func.sum(InventoryLedger.quantity_delta), 0))
-        .filter(InventoryLedger.movement_type == "create")
-        .filter(InventoryLedger.created_at >= start_dt, InventoryLedger.created_at <= end_dt)
-        .scalar()
-        or 0
-    )
-    transactions_total = (
-        db.query(func.coalesce(func.sum(TradeTransaction.total_amount), 0))
-        .filter(TradeTransaction.created_at >= start_dt, TradeTransaction.created_at <= end_dt)
-        .scalar()
-        or 0
-    )
+    first_day, last_day = _day_range(date_from, date_to)
+
+    aggregates = _period_aggregates(db, "dashboards.national", first_day, last_day)
     nb_acteurs = db.query(func.count(Actor.id)).filter(Actor.status == "active").scalar() or 0
-    nb_lots = (
-        db.query(func.count(func.distinct(InventoryLedger.lot_id)))
-        .filter(InventoryLedger.created_at <= end_dt)
-        .scalar()
-        or 0
-    )
     nb_exports_en_attente = (
         db.query(func.count(ExportDossier.id)).filter(ExportDossier.status == "submitted").scalar() or 0
     )
 
     alertes: list[AlerteItem] = []
-    role_codes = get_actor_role_codes(current_actor, db)
-    if has_permission(role_codes, PERM_ALERTES_STRATEGIQUES):
+    if auth.has_permission(PERM_ALERTES_STRATEGIQUES):
         # Placeholder : alertes stratégiques (à brancher sur règles métier réelles)
         alertes = [
             AlerteItem(
@@ -95,10 +101,8 @@ def dashboard_national(
         ]
 
     return DashboardNationalOut(
-        volume_created=float(volume_created),
-        transactions_total=float(transactions_total),
         nb_acteurs=nb_acteurs,
-        nb_lots=nb_lots,
+        **aggregates,
         nb_exports_en_attente=nb_exports_en_attente,
         alertes_strategiques=alertes,
     )
@@ -109,60 +113,33 @@ def dashboard_regional(
     region_id: int,
     date_from: date | None = None,
     date_to: date | None = None,
-    db: Session = Depends(get_db),
-    current_actor: Actor = Depends(get_current_actor),
+    db: Session = Depends(get_read_db),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     """Dashboard régional : indicateurs par région. Gouverneur, admin, dirigeant (filtre par région si rôle region)."""
-    role_codes = get_actor_role_codes(current_actor, db)
-    if not has_permission(role_codes, PERM_DASHBOARD_REGIONAL) and "admin" not in role_codes and "dirigeant" not in role_codes:
+    if not auth.has_permission(PERM_DASHBOARD_REGIONAL) and not auth.is_admin_like:
         raise bad_request("acces_refuse")
     # Si rôle "region", limiter à sa région
-    if "region" in role_codes and current_actor.region_id != region_id:
+    if auth.has_role("region") and auth.actor.region_id != region_id:
         raise bad_request("acces_refuse_region")
-    if "commune_agent" in role_codes and current_actor.region_id != region_id:
+    if auth.has_role("commune_agent") and auth.actor.region_id != region_id:
         raise bad_request("acces_refuse_region")
 
     region = db.query(Region).filter(Region.id == region_id).first()
     if not region:
         raise bad_request("region_introuvable")
 
-    start_dt, end_dt = _date_range(date_from, date_to)
+    first_day, last_day = _day_range(date_from, date_to)
 
-    volume_created = (
-        db.query(func.coalesce(func.sum(InventoryLedger.quantity_delta), 0))
-        .join(Actor, Actor.id == InventoryLedger.actor_id)
-        .filter(Actor.region_id == region_id)
-        .filter(InventoryLedger.movement_type == "create")
-        .filter(InventoryLedger.created_at >= start_dt, InventoryLedger.created_at <= end_dt)
-        .scalar()
-        or 0
-    )
-    transactions_total = (
-        db.query(func.coalesce(func.sum(TradeTransaction.total_amount), 0))
-        .join(Actor, Actor.id == TradeTransaction.seller_actor_id)
-        .filter(Actor.region_id == region_id)
-        .filter(TradeTransaction.created_at >= start_dt, TradeTransaction.created_at <= end_dt)
-        .scalar()
-        or 0
-    )
+    aggregates = _period_aggregates(db, "dashboards.regional", first_day, last_day, region_id=region_id)
     nb_acteurs = db.query(func.count(Actor.id)).filter(Actor.region_id == region_id, Actor.status == "active").scalar() or 0
-    nb_lots = (
-        db.query(func.count(func.distinct(InventoryLedger.lot_id)))
-        .join(Actor, Actor.id == InventoryLedger.actor_id)
-        .filter(Actor.region_id == region_id)
-        .filter(InventoryLedger.created_at <= end_dt)
-        .scalar()
-        or 0
-    )
 
     return DashboardRegionalOut(
         region_id=region.id,
         region_code=region.code,
         region_name=region.name,
-        volume_created=float(volume_created),
-        transactions_total=float(transactions_total),
         nb_acteurs=nb_acteurs,
-        nb_lots=nb_lots,
+        **aggregates,
     )
 
 
@@ -171,65 +148,114 @@ def dashboard_commune(
     commune_id: int,
     date_from: date | None = None,
     date_to: date | None = None,
-    db: Session = Depends(get_db),
-    current_actor: Actor = Depends(get_current_actor),
+    db: Session = Depends(get_read_db),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     """Dashboard communal : indicateurs par commune. Agent commune (sa commune), admin, dirigeant."""
     from app.models.territory import Commune
 
-    role_codes = get_actor_role_codes(current_actor, db)
-    if not has_permission(role_codes, PERM_ADMIN_COMMUNE) and "admin" not in role_codes and "dirigeant" not in role_codes:
+    if not auth.has_permission(PERM_ADMIN_COMMUNE) and not auth.is_admin_like:
         raise bad_request("acces_refuse")
-    if "commune_agent" in role_codes and current_actor.commune_id != commune_id:
+    if auth.has_role("commune_agent") and auth.actor.commune_id != commune_id:
         raise bad_request("acces_refuse_commune")
 
     commune = db.query(Commune).filter(Commune.id == commune_id).first()
     if not commune:
         raise bad_request("commune_introuvable")
 
-    start_dt, end_dt = _date_range(date_from, date_to)
+    first_day, last_day = _day_range(date_from, date_to)
 
-    volume_created = (
-        db.query(func.coalesce(func.sum(InventoryLedger.quantity_delta), 0))
-        .join(Actor, Actor.id == InventoryLedger.actor_id)
-        .filter(Actor.commune_id == commune_id)
-        .filter(InventoryLedger.movement_type == "create")
-        .filter(InventoryLedger.created_at >= start_dt, InventoryLedger.created_at <= end_dt)
-        .scalar()
-        or 0
-    )
-    transactions_total = (
-        db.query(func.coalesce(func.sum(TradeTransaction.total_amount), 0))
-        .join(Actor, Actor.id == TradeTransaction.seller_actor_id)
-        .filter(Actor.commune_id == commune_id)
-        .filter(TradeTransaction.created_at >= start_dt, TradeTransaction.created_at <= end_dt)
-        .scalar()
-        or 0
-    )
+    aggregates = _period_aggregates(db, "dashboards.commune", first_day, last_day, commune_id=commune_id)
     nb_acteurs = db.query(func.count(Actor.id)).filter(Actor.commune_id == commune_id, Actor.status == "active").scalar() or 0
-    nb_lots = (
-        db.query(func.count(func.distinct(InventoryLedger.lot_id)))
-        .join(Actor, Actor.id == InventoryLedger.actor_id)
-        .filter(Actor.commune_id == commune_id)
-        .filter(InventoryLedger.created_at <= end_dt)
-        .scalar()
-        or 0
-    )
 
     return DashboardCommuneOut(
         commune_id=commune.id,
         commune_code=commune.code,
         commune_name=commune.name,
-        volume_created=float(volume_created),
-        transactions_total=float(transactions_total),
         nb_acteurs=nb_acteurs,
-        nb_lots=nb_lots,
+        **aggregates,
+    )
+
+
+@router.get("/timeseries", response_model=DashboardTimeseriesOut)
+def dashboard_timeseries(
+    metric: SeriesMetric = "volume_created",
+    granularity: Granularity = "day",
+    group_by: SeriesGroup | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    region_id: int | None = None,
+    commune_id: int | None = None,
+    db: Session = Depends(get_read_db),
+    auth: AuthContext = Depends(get_auth_context),
+):
+    """Séries par jour, semaine ou mois pour les graphiques, en un appel. Même périmètre que les dashboards."""
+    from app.models.territory import Commune
+
+    if not auth.has_permission(PERM_DASHBOARD_NATIONAL) and not auth.is_admin_like:
+        if auth.has_permission(PERM_DASHBOARD_REGIONAL):
+            if auth.has_any_role({"region", "commune_agent"}) and region_id not in (None, auth.actor.region_id):
+                raise bad_request("acces_refuse_region")
+            region_id = region_id or auth.actor.region_id
+        elif auth.has_permission(PERM_ADMIN_COMMUNE):
+            if auth.has_role("commune_agent") and commune_id not in (None, auth.actor.commune_id):
+                raise bad_request("acces_refuse_commune")
+            commune_id = commune_id or auth.actor.commune_id
+        else:
+            raise bad_request("acces_refuse")
+
+    first_day, last_day = _day_range(date_from, date_to)
+    if len(series_buckets(first_day, last_day, granularity)) > _MAX_SERIES_BUCKETS:
+        raise bad_request("trop_de_tranches", {"max": _MAX_SERIES_BUCKETS})
+
+    def compute() -> dict:
+        result = activity_series(
+            db,
+            metric,
+            granularity,
+            first_day,
+            last_day,
+            group_by=group_by,
+            region_id=region_id,
+            commune_id=commune_id,
+        )
+        ids = [key for key in result.series if key is not None]
+        labels: dict = {}
+        if group_by == "region":
+            labels = dict(db.query(Region.id, Region.name).filter(Region.id.in_(ids)))
+        elif group_by == "commune":
+            labels = dict(db.query(Commune.id, Commune.name).filter(Commune.id.in_(ids)))
+        return {
+            "buckets": result.buckets,
+            "series": [
+                {"key": key, "label": labels.get(key, key if group_by == "filiere" else None), "values": values}
+                for key, values in result.series.items()
+            ],
+        }
+
+    series = cached_aggregates(
+        db,
+        "dashboards.timeseries",
+        first_day,
+        last_day,
+        compute,
+        region_id=region_id,
+        commune_id=commune_id,
+        variant=(metric, granularity, group_by),
+    )
+    return DashboardTimeseriesOut(
+        metric=metric,
+        granularity=granularity,
+        group_by=group_by,
+        date_from=first_day,
+        date_to=last_day,
+        **series,
     )
 
 
 @router.get("/home-widgets", response_model=HomeWidgetsOut)
 def home_widgets(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _current_actor: Actor = Depends(get_current_actor),
 ):
     price_row = _get_config(db, "gold_price_value")
@@ -266,11 +292,11 @@ def home_widgets(
 def publish_institutional_message(
     payload: InstitutionalMessageIn,
     db: Session = Depends(get_db),
-    current_actor: Actor = Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    role_codes = get_actor_role_codes(current_actor, db)
-    if set(role_codes).isdisjoint({"admin", "dirigeant", "president", "pr"}):
+    if not auth.has_any_role({"admin", "dirigeant", "president", "pr"}):
         raise bad_request("acces_refuse")
+    current_actor = auth.actor
     message_text = (payload.message or "").strip()
     if not message_text:
         raise bad_request("message_obligatoire")
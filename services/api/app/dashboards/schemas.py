@@ -53,3 +53,19 @@ class HomeWidgetsOut(BaseModel):
 
 class InstitutionalMessageIn(BaseModel):
     message: str
+
+
+class TimeseriesSerieOut(BaseModel):
+    key: int | str | None = None
+    label: str | None = None
+    values: list[float]
+
+
+class DashboardTimeseriesOut(BaseModel):
+    metric: str
+    granularity: str
+    group_by: str | None = None
+    date_from: date
+    date_to: date
+    buckets: list[date]
+    series: list[TimeseriesSerieOut]
@@ -1,18 +1,127 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import logging
+import threading
+import time
+
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from app.core.config import settings
+from app.ledger import balances  # noqa: F401  (soldes de stock tenus à chaque flush)
 
-# Force UTF-8 to avoid accent encoding issues (PostgreSQL)
-_connect_args = {}
-if "postgresql" in settings.database_url:
-    _connect_args["options"] = "-c client_encoding=UTF8"
+logger = logging.getLogger(__name__)
 
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    connect_args=_connect_args,
-)
+
+class PoolMetrics:
+    """Compteurs d'attente et de saturation du pool de connexions."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, waited: float, timed_out: bool) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 4),
+                "wait_seconds_max": round(self.wait_seconds_max, 4),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool qui mesure le temps d'attente d'une connexion disponible."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started, timed_out=False)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/") in {"sqlite:", "sqlite+pysqlite:"})
+
+
+def create_db_engine(url: str):
+    connect_args = {}
+    if "postgresql" in url:
+        # Force UTF-8 to avoid accent encoding issues (PostgreSQL)
+        options = ["-c client_encoding=UTF8"]
+        if settings.db_statement_timeout_ms > 0:
+            options.append(f"-c statement_timeout={settings.db_statement_timeout_ms}")
+        connect_args["options"] = " ".join(options)
+    elif url.startswith("sqlite"):
+        connect_args["check_same_thread"] = False
+    if _is_memory_sqlite(url):
+        # Base en mémoire : pool par défaut de SQLAlchemy (une seule connexion).
+        return create_engine(url, connect_args=connect_args)
+    return create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=connect_args,
+    )
+
+
+def _pool_info(pool) -> dict:
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            {
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_in": pool.checkedin(),
+                "in_use": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "timeout_seconds": pool.timeout(),
+            }
+        )
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status.update(metrics.snapshot())
+    return status
+
+
+def pool_status(bind=None) -> dict:
+    status = _pool_info((bind or engine).pool)
+    if bind is None and read_engine is not None:
+        status["replica"] = {**_pool_info(read_engine.pool), **replica_status()}
+    return status
+
+
+engine = create_db_engine(settings.database_url)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 
@@ -22,3 +131,140 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# --- Réplique de lecture -------------------------------------------------
+#
+# Les endpoints de lecture lourde (dashboards, rapports, ledger, listes,
+# verify) utilisent `get_read_db`. La session qu'il fournit choisit sa base à
+# la première requête SQL : la réplique, sauf si
+# - aucune réplique n'est configurée (`read_database_url` vide) ;
+# - le client demande la primaire (en-tête `X-Read-Consistency: primary`) ;
+# - l'acteur a écrit récemment sur ce worker (`read_after_write_seconds`) ;
+# - la réplique est en retard de plus de `read_replica_max_lag_seconds`
+#   ou injoignable (retard relu au plus toutes les
+#   `read_replica_lag_check_seconds`).
+
+_REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class _ReplicaState:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.lag_seconds: float | None = None
+        self.checked_at = 0.0
+        self.recent_writes: dict[int, float] = {}
+
+
+_replica = _ReplicaState()
+read_engine = None
+ReadSessionLocal = None
+
+
+class ReplicaRoutingSession(Session):
+    """Session de lecture ; la base (réplique ou primaire) est choisie au premier accès."""
+
+    def __init__(self, *args, primary_bind=None, request: Request | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.primary_bind = primary_bind
+        self.request = request
+        self._chosen_bind = None
+
+    def get_bind(self, mapper=None, **kwargs):
+        if self._chosen_bind is None:
+            self._chosen_bind = self.primary_bind if _must_read_primary(self.request) else read_engine
+        return self._chosen_bind
+
+
+def configure_read_replica(url: str | None) -> None:
+    global read_engine, ReadSessionLocal
+    if read_engine is not None:
+        read_engine.dispose()
+    read_engine = create_db_engine(url) if url else None
+    ReadSessionLocal = (
+        sessionmaker(bind=read_engine, class_=ReplicaRoutingSession, autoflush=False, autocommit=False)
+        if read_engine is not None
+        else None
+    )
+    with _replica.lock:
+        _replica.lag_seconds = None
+        _replica.checked_at = 0.0
+
+
+def _measure_replica_lag() -> float | None:
+    if read_engine is None:
+        return None
+    if read_engine.dialect.name != "postgresql":
+        return 0.0
+    with read_engine.connect() as conn:
+        return float(conn.execute(_REPLICA_LAG_SQL).scalar() or 0)
+
+
+def replica_lag_seconds() -> float | None:
+    now = time.monotonic()
+    if now - _replica.checked_at < settings.read_replica_lag_check_seconds:
+        return _replica.lag_seconds
+    try:
+        lag = _measure_replica_lag()
+    except Exception:
+        logger.warning("replica de lecture injoignable, lectures sur la primaire", exc_info=True)
+        lag = None
+    with _replica.lock:
+        _replica.lag_seconds = lag
+        _replica.checked_at = now
+    return lag
+
+
+def replica_status() -> dict:
+    return {
+        "lag_seconds": _replica.lag_seconds,
+        "max_lag_seconds": settings.read_replica_max_lag_seconds,
+        "recent_writers": len(_replica.recent_writes),
+    }
+
+
+def mark_recent_write(actor_id: int) -> None:
+    """Les lectures de cet acteur passent par la primaire pendant `read_after_write_seconds`."""
+    if read_engine is None:
+        return
+    now = time.monotonic()
+    with _replica.lock:
+        _replica.recent_writes[actor_id] = now + settings.read_after_write_seconds
+        if len(_replica.recent_writes) > 10000:
+            _replica.recent_writes = {key: until for key, until in _replica.recent_writes.items() if until > now}
+
+
+def _wrote_recently(request: Request | None) -> bool:
+    auth_context = getattr(request.state, "auth_context", None) if request is not None else None
+    if auth_context is None:
+        return False
+    until = _replica.recent_writes.get(auth_context.actor_id)
+    return until is not None and until > time.monotonic()
+
+
+def _must_read_primary(request: Request | None) -> bool:
+    if read_engine is None:
+        return True
+    if request is not None and request.headers.get("x-read-consistency", "").lower() == "primary":
+        return True
+    if _wrote_recently(request):
+        return True
+    lag = replica_lag_seconds()
+    return lag is None or lag > settings.read_replica_max_lag_seconds
+
+
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    if ReadSessionLocal is None:
+        yield db
+        return
+    read_db = ReadSessionLocal(primary_bind=db.get_bind(), request=request)
+    try:
+        yield read_db
+    finally:
+        read_db.close()
+
+
+configure_read_replica(settings.read_database_url)
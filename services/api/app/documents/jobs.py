@@ -0,0 +1,207 @@
+"""
+File de rendu des PDF générés (reçus, factures, cartes).
+
+Les endpoints n'écrivent plus de fichier : `queue_pdf_document` crée le
+`Document` en statut `pending` et un `DocumentJob`, dans la transaction de
+l'opération métier. Le worker (`python -m app.documents.worker`) réclame les
+jobs dus avec `FOR UPDATE SKIP LOCKED` — plusieurs workers ne prennent jamais
+le même job —, génère le PDF, l'écrit sur disque et passe le document à
+`ready`. Un échec est retenté avec un délai doublé à chaque tentative ; après
+`document_job_max_attempts`, le document passe à `failed`. Un job `running`
+dont le worker a disparu est repris après `document_job_lock_timeout_seconds`.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.common.receipts import build_simple_pdf
+from app.core.config import settings
+from app.models.document import Document, DocumentJob
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def queue_pdf_document(
+    db: Session,
+    *,
+    doc_type: str,
+    owner_actor_id: int,
+    related_entity_type: str,
+    related_entity_id: str,
+    filename: str,
+    title: str,
+    lines: list[str],
+    pdf_options: dict | None = None,
+    document: Document | None = None,
+) -> Document:
+    """
+    Met en file le rendu d'un PDF et renvoie son `Document` (statut `pending`).
+
+    Avec `document`, le document existant est régénéré : ses jobs encore en
+    attente sont annulés. Pas de flush : l'appelant flushe s'il a besoin de l'id.
+    """
+    storage_path = str(Path(settings.document_storage_dir) / filename)
+    if document is None:
+        document = Document(sha256="")
+        db.add(document)
+    elif document.id is not None:
+        db.query(DocumentJob).filter(
+            DocumentJob.document_id == document.id,
+            DocumentJob.status == "pending",
+        ).update({DocumentJob.status: "cancelled"}, synchronize_session=False)
+    document.doc_type = doc_type
+    document.owner_actor_id = owner_actor_id
+    document.related_entity_type = related_entity_type
+    document.related_entity_id = related_entity_id
+    document.storage_path = storage_path
+    document.original_filename = filename
+    document.status = "pending"
+    payload = {"title": title, "lines": [str(line) for line in lines], "options": pdf_options or {}}
+    db.add(
+        DocumentJob(
+            document=document,
+            kind="simple_pdf",
+            payload_json=json.dumps(payload, ensure_ascii=True),
+            status="pending",
+        )
+    )
+    return document
+
+
+def _claimable(now: datetime):
+    stale_before = now - timedelta(seconds=settings.document_job_lock_timeout_seconds)
+    return or_(
+        and_(DocumentJob.status == "pending", DocumentJob.run_after <= now),
+        and_(DocumentJob.status == "running", DocumentJob.locked_at < stale_before),
+    )
+
+
+def claim_jobs(db: Session, *, worker_id: str = DEFAULT_WORKER_ID, limit: int | None = None) -> list[int]:
+    """Réserve jusqu'à `limit` jobs dus et valide la réservation."""
+    now = datetime.now(timezone.utc)
+    jobs = (
+        db.query(DocumentJob)
+        .filter(_claimable(now))
+        .order_by(DocumentJob.id.asc())
+        .limit(limit or settings.document_job_batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for job in jobs:
+        job.status = "running"
+        job.locked_by = worker_id
+        job.locked_at = now
+        job.attempts = (job.attempts or 0) + 1
+    job_ids = [job.id for job in jobs]
+    db.commit()
+    return job_ids
+
+
+def _render(job: DocumentJob) -> bytes:
+    if job.kind != "simple_pdf":
+        raise ValueError(f"type de job inconnu: {job.kind}")
+    payload = json.loads(job.payload_json)
+    return build_simple_pdf(payload["title"], payload["lines"], **payload.get("options", {}))
+
+
+def _write_atomic(path: Path, content: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+
+
+def _is_superseded(db: Session, job: DocumentJob) -> bool:
+    newer = (
+        db.query(DocumentJob.id)
+        .filter(
+            DocumentJob.document_id == job.document_id,
+            DocumentJob.id > job.id,
+            DocumentJob.status.in_(["pending", "running"]),
+        )
+        .first()
+    )
+    return newer is not None
+
+
+def run_job(db: Session, job_id: int) -> str:
+    """Exécute un job réservé ; renvoie son statut final (`done`, `pending`, `failed`, `cancelled`)."""
+    job = db.get(DocumentJob, job_id)
+    if job is None or job.status != "running":
+        return job.status if job is not None else "cancelled"
+    now = datetime.now(timezone.utc)
+    if _is_superseded(db, job):
+        job.status = "cancelled"
+        job.finished_at = now
+        db.commit()
+        return job.status
+    document = job.document
+    try:
+        content = _render(job)
+        _write_atomic(Path(document.storage_path), content)
+    except Exception as exc:
+        logger.warning("document_job_failed job=%s attempt=%s", job.id, job.attempts, exc_info=True)
+        job.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+        job.locked_by = None
+        job.locked_at = None
+        if job.attempts >= settings.document_job_max_attempts:
+            job.status = "failed"
+            job.finished_at = now
+            document.status = "failed"
+        else:
+            job.status = "pending"
+            delay = settings.document_job_retry_seconds * (2 ** (job.attempts - 1))
+            job.run_after = now + timedelta(seconds=delay)
+        db.commit()
+        return job.status
+    document.sha256 = hashlib.sha256(content).hexdigest()
+    document.status = "ready"
+    job.status = "done"
+    job.finished_at = now
+    job.last_error = None
+    db.commit()
+    return job.status
+
+
+def process_pending_jobs(db: Session, *, worker_id: str = DEFAULT_WORKER_ID, limit: int | None = None) -> int:
+    """Réserve puis exécute un lot de jobs ; renvoie le nombre de jobs traités."""
+    job_ids = claim_jobs(db, worker_id=worker_id, limit=limit)
+    for job_id in job_ids:
+        run_job(db, job_id)
+    return len(job_ids)
+
+
+def render_document_now(db: Session, document: Document, *, worker_id: str = DEFAULT_WORKER_ID) -> bool:
+    """
+    Rend tout de suite un document encore en file (téléchargement avant le
+    passage du worker). Renvoie False si un worker le traite déjà.
+    """
+    now = datetime.now(timezone.utc)
+    job = (
+        db.query(DocumentJob)
+        .filter(DocumentJob.document_id == document.id, _claimable(now) | (DocumentJob.status == "pending"))
+        .order_by(DocumentJob.id.desc())
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if job is None:
+        return False
+    job.status = "running"
+    job.locked_by = worker_id
+    job.locked_at = now
+    job.attempts = (job.attempts or 0) + 1
+    job_id = job.id
+    db.commit()
+    run_job(db, job_id)
+    db.refresh(document)
+    return document.status == "ready"
@@ -6,16 +6,21 @@ from fastapi import APIRouter, Depends, File, Form, UploadFile
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_actor
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor
 from app.common.errors import bad_request
+from app.common.pagination import PaginationParams, get_cursor_pagination, paginate
+from app.common.responses import RowProjection
 from app.core.config import settings
-from app.db import get_db
+from app.db import get_db, get_read_db
+from app.documents.jobs import render_document_now
 from app.documents.schemas import DocumentOut
-from app.models.actor import Actor, ActorRole
+from app.models.actor import Actor
 from app.models.document import Document
 
 router = APIRouter(prefix=f"{settings.api_prefix}/documents", tags=["documents"])
 
+DOCUMENT_ROWS = RowProjection(DocumentOut, Document, Document.created_at)
+
 
 @router.post("", response_model=DocumentOut, status_code=201)
 def upload_document(
@@ -26,11 +31,12 @@ def upload_document(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     actor = db.query(Actor).filter_by(id=owner_actor_id).first()
     if not actor:
         raise bad_request("acteur_invalide")
-    if not _is_admin(db, current_actor.id) and owner_actor_id != current_actor.id:
+    if not auth.is_admin_like and owner_actor_id != current_actor.id:
         raise bad_request("acces_refuse")
     if not file.filename:
         raise bad_request("fichier_obligatoire")
@@ -70,6 +76,7 @@ def upload_document(
         storage_path=document.storage_path,
         original_filename=document.original_filename,
         sha256=document.sha256,
+        status=document.status,
     )
 
 
@@ -79,11 +86,13 @@ def list_documents(
     related_entity_type: str | None = None,
     related_entity_id: str | None = None,
     doc_type: str | None = None,
-    db: Session = Depends(get_db),
+    pagination: PaginationParams = Depends(get_cursor_pagination),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    query = db.query(Document)
-    if not _is_admin(db, current_actor.id):
+    query = DOCUMENT_ROWS.query(db)
+    if not auth.is_admin_like:
         query = query.filter(Document.owner_actor_id == current_actor.id)
         if owner_actor_id and owner_actor_id != current_actor.id:
             return []
@@ -95,20 +104,8 @@ def list_documents(
         query = query.filter(Document.related_entity_id == related_entity_id)
     if doc_type:
         query = query.filter(Document.doc_type == doc_type)
-    documents = query.order_by(Document.created_at.desc()).all()
-    return [
-        DocumentOut(
-            id=doc.id,
-            doc_type=doc.doc_type,
-            owner_actor_id=doc.owner_actor_id,
-            related_entity_type=doc.related_entity_type,
-            related_entity_id=doc.related_entity_id,
-            storage_path=doc.storage_path,
-            original_filename=doc.original_filename,
-            sha256=doc.sha256,
-        )
-        for doc in documents
-    ]
+    page = paginate(query, sort_column=Document.created_at, id_column=Document.id, pagination=pagination)
+    return DOCUMENT_ROWS.response(page)
 
 
 @router.get("/{document_id}", response_model=DocumentOut)
@@ -116,11 +113,12 @@ def get_document(
     document_id: int,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     document = db.query(Document).filter_by(id=document_id).first()
     if not document:
         raise bad_request("document_introuvable")
-    if not _is_admin(db, current_actor.id) and document.owner_actor_id != current_actor.id:
+    if not auth.is_admin_like and document.owner_actor_id != current_actor.id:
         raise bad_request("acces_refuse")
     return DocumentOut(
         id=document.id,
@@ -131,6 +129,7 @@ def get_document(
         storage_path=document.storage_path,
         original_filename=document.original_filename,
         sha256=document.sha256,
+        status=document.status,
     )
 
 
@@ -139,12 +138,17 @@ def download_document(
     document_id: int,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     document = db.query(Document).filter_by(id=document_id).first()
     if not document:
         raise bad_request("document_introuvable")
-    if not _is_admin(db, current_actor.id) and document.owner_actor_id != current_actor.id:
+    if not auth.is_admin_like and document.owner_actor_id != current_actor.id:
         raise bad_request("acces_refuse")
+    if document.status == "pending" and not render_document_now(db, document):
+        raise bad_request("document_en_preparation")
+    if document.status == "failed":
+        raise bad_request("document_generation_echouee")
     path = Path(document.storage_path)
     if not path.exists():
         raise bad_request("fichier_introuvable")
@@ -153,12 +157,3 @@ def download_document(
         media_type="application/octet-stream",
         filename=document.original_filename,
     )
-
-
-def _is_admin(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role.in_(["admin", "dirigeant"]))
-        .first()
-        is not None
-    )
@@ -10,3 +10,4 @@ class DocumentOut(BaseModel):
     storage_path: str
     original_filename: str
     sha256: str
+    status: str = "ready"
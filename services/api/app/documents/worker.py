@@ -0,0 +1,113 @@
+"""
+Worker de rendu des documents PDF.
+
+Entre deux passes, il avance aussi d'une tranche les vérifications
+d'intégrité demandées (`POST /admin/integrity-checks`) et, toutes les
+`partition_maintenance_interval_seconds`, entretient les partitions
+mensuelles (app.core.partitions) ; toutes les
+`activity_rollup_interval_seconds`, il agrège les jours clos des
+dashboards (app.reports.rollups).
+
+Usage:
+  python -m app.documents.worker          # boucle (Docker : service `worker`)
+  python -m app.documents.worker --once   # traite les jobs dus puis s'arrête
+"""
+
+import logging
+import signal
+import sys
+import time
+
+from app.core.config import settings
+from app.core.partitions import maintain_partitions
+from app.db import SessionLocal, engine
+from app.documents.jobs import DEFAULT_WORKER_ID, process_pending_jobs
+from app.integrity.chains import process_pending_checks
+from app.reports.rollups import roll_up_activity
+
+logger = logging.getLogger(__name__)
+
+
+def run_once(worker_id: str = DEFAULT_WORKER_ID) -> int:
+    """Traite les jobs dus jusqu'à vider la file ; renvoie le nombre traité."""
+    total = 0
+    db = SessionLocal()
+    try:
+        while True:
+            processed = process_pending_jobs(db, worker_id=worker_id)
+            total += processed
+            if processed < settings.document_job_batch_size:
+                return total
+    finally:
+        db.close()
+
+
+def run_integrity_slice(worker_id: str = DEFAULT_WORKER_ID) -> bool:
+    db = SessionLocal()
+    try:
+        return process_pending_checks(db, worker_id=worker_id)
+    finally:
+        db.close()
+
+
+def run_partition_maintenance() -> None:
+    for report in maintain_partitions(engine):
+        if report.created or report.detached:
+            logger.info(
+                "partitions %s: creees %s, detachees %s", report.table, report.created, report.detached
+            )
+
+
+def run_activity_rollups() -> None:
+    db = SessionLocal()
+    try:
+        rolled = roll_up_activity(db, max_days=settings.activity_rollup_max_days_per_run)
+        if rolled:
+            logger.info("cumuls journaliers: %s jour(s) agreges jusqu'au %s", len(rolled), rolled[-1])
+    finally:
+        db.close()
+
+
+def _periodic_tasks():
+    return (
+        ("partitions", settings.partition_maintenance_interval_seconds, run_partition_maintenance),
+        ("cumuls", settings.activity_rollup_interval_seconds, run_activity_rollups),
+    )
+
+
+def main(argv: list[str]) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    if "--once" in argv[1:]:
+        print(f"documents rendus: {run_once()}")
+        return 0
+    stopping = False
+
+    def _stop(_signum, _frame) -> None:
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    logger.info("document worker %s demarre", DEFAULT_WORKER_ID)
+    next_runs: dict[str, float] = {}
+    while not stopping:
+        for name, interval, task in _periodic_tasks():
+            if time.monotonic() < next_runs.get(name, 0.0):
+                continue
+            next_runs[name] = time.monotonic() + interval
+            try:
+                task()
+            except Exception:
+                logger.exception("document worker: erreur de la tache periodique %s", name)
+        try:
+            processed = run_once() + int(run_integrity_slice())
+        except Exception:
+            logger.exception("document worker: erreur de traitement")
+            processed = 0
+        if not processed:
+            time.sleep(settings.document_job_poll_seconds)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
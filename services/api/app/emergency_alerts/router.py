@@ -1,19 +1,19 @@
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 
 from app.audit.logger import write_audit
-from app.auth.dependencies import get_current_actor
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor
 from app.common.errors import bad_request
+from app.common.pagination import PaginationParams, get_cursor_pagination, paginate, set_page_headers
 from app.core.config import settings
-from app.db import get_db
+from app.db import get_db, get_read_db
 from app.emergency_alerts.schemas import (
     EmergencyAlertCreate,
     EmergencyAlertOut,
     EmergencyAlertStatusUpdate,
 )
-from app.models.actor import ActorRole
 from app.models.emergency import EmergencyAlert
 
 router = APIRouter(prefix=f"{settings.api_prefix}/emergency-alerts", tags=["emergency-alerts"])
@@ -33,15 +33,6 @@ CONTROL_ROLES = {
 }
 
 
-def _has_any_role(db: Session, actor_id: int, roles: set[str]) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role.in_(roles), ActorRole.status == "active")
-        .first()
-        is not None
-    )
-
-
 @router.post("", response_model=EmergencyAlertOut, status_code=201)
 def create_emergency_alert(
     payload: EmergencyAlertCreate,
@@ -88,23 +79,21 @@ def create_emergency_alert(
 
 @router.get("", response_model=list[EmergencyAlertOut])
 def list_emergency_alerts(
+    response: Response,
     status: str | None = None,
     target_service: str | None = None,
-    db: Session = Depends(get_db),
+    pagination: PaginationParams = Depends(get_cursor_pagination),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     query = db.query(EmergencyAlert)
-    can_control = _has_any_role(db, current_actor.id, CONTROL_ROLES)
+    can_control = auth.has_any_role(CONTROL_ROLES)
     if not can_control:
         query = query.filter(EmergencyAlert.actor_id == current_actor.id)
     else:
-        role_rows = (
-            db.query(ActorRole.role)
-            .filter(ActorRole.actor_id == current_actor.id, ActorRole.status == "active")
-            .all()
-        )
-        role_codes = {row[0] for row in role_rows}
-        if role_codes.isdisjoint({"admin", "dirigeant"}):
+        role_codes = auth.role_codes
+        if not auth.is_admin_like:
             allowed_targets = {"institutionnel"}
             if "police" in role_codes:
                 allowed_targets.update({"police", "both"})
@@ -119,7 +108,9 @@ def list_emergency_alerts(
         query = query.filter(EmergencyAlert.status == status)
     if target_service:
         query = query.filter(EmergencyAlert.target_service == target_service)
-    rows = query.order_by(EmergencyAlert.created_at.desc()).limit(300).all()
+    page = paginate(query, sort_column=EmergencyAlert.created_at, id_column=EmergencyAlert.id, pagination=pagination)
+    set_page_headers(response, page)
+    rows = page.rows
     return [EmergencyAlertOut.model_validate(row) for row in rows]
 
 
@@ -129,8 +120,9 @@ def update_emergency_alert_status(
     payload: EmergencyAlertStatusUpdate,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    if not _has_any_role(db, current_actor.id, CONTROL_ROLES):
+    if not auth.has_any_role(CONTROL_ROLES):
         raise bad_request("acces_refuse")
 
     row = db.query(EmergencyAlert).filter_by(id=alert_id).first()
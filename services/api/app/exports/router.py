@@ -1,20 +1,23 @@
 from datetime import date, datetime, timedelta, timezone
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from pydantic import BaseModel
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_actor, require_roles
+from app.auth.dependencies import AuthContext, get_auth_context, require_roles
 from app.audit.logger import write_audit
 from app.common.errors import bad_request
+from app.common.pagination import PaginationParams, get_cursor_pagination, paginate, set_page_headers
 from app.common.receipts import build_qr_value
 from app.core.config import settings
-from app.db import get_db
+from app.db import get_db, get_read_db
 from app.exports.schemas import ExportCreate, ExportOut, ExportStatusUpdate, ExportLotLink
+from app.lots.lineage import MAX_LINEAGE_DEPTH, build_lineage
+from app.lots.schemas import LotLineageOut
 from app.models.export import ExportDossier, ExportLot
 from app.models.gold_ops import ExportChecklistItem, ExportValidation, ForexRepatriation, LotTestCertificate
-from app.models.actor import Actor, ActorRole
+from app.models.actor import Actor
 from app.models.lot import Lot
 from app.models.tax import TaxRecord
 from app.models.pierre import ActorAuthorization, ExportSeal, ExportValidationStep
@@ -84,68 +87,18 @@ class ExportValidateIn(BaseModel):
     pv_document_id: int | None = None
 
 
-def _is_admin(db: Session, actor_id: int) -> bool:
-    role = (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role == "admin")
-        .filter(ActorRole.status == "active")
-        .first()
-    )
-    return role is not None
-
-
-def _is_dirigeant(db: Session, actor_id: int) -> bool:
-    role = (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role == "dirigeant")
-        .filter(ActorRole.status == "active")
-        .first()
-    )
-    return role is not None
-
-
-def _is_commune_agent(db: Session, actor_id: int) -> bool:
-    role = (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role == "commune_agent")
-        .filter(ActorRole.status == "active")
-        .first()
-    )
-    return role is not None
-
-
-def _has_any_role(db: Session, actor_id: int, roles: set[str]) -> bool:
-    role = (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role.in_(roles), ActorRole.status == "active")
-        .first()
-    )
-    return role is not None
-
-
-def _can_access_export(db: Session, current_actor: Actor, export: ExportDossier) -> bool:
-    if _is_admin(db, current_actor.id) or _is_dirigeant(db, current_actor.id):
+def _can_access_export(db: Session, auth: AuthContext, export: ExportDossier) -> bool:
+    if auth.has_any_role({"admin", "dirigeant", "com", "gue", "analyse_certification"}):
         return True
-    if _has_any_role(db, current_actor.id, {"com", "gue", "analyse_certification"}):
-        return True
-    if _is_commune_agent(db, current_actor.id):
+    if auth.has_role("commune_agent"):
         creator = db.query(Actor).filter_by(id=export.created_by_actor_id).first()
-        if creator and creator.commune_id == current_actor.commune_id:
+        if creator and creator.commune_id == auth.actor.commune_id:
             return True
-    if export.created_by_actor_id == current_actor.id:
+    if export.created_by_actor_id == auth.actor_id:
         return True
     return False
 
 
-def _active_roles(db: Session, actor_id: int) -> set[str]:
-    rows = (
-        db.query(ActorRole.role)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.status == "active")
-        .all()
-    )
-    return {row[0] for row in rows}
-
-
 def _ensure_active_authorization(db: Session, actor_id: int, filiere: str) -> None:
     now = datetime.now(timezone.utc)
     auth = (
@@ -163,8 +116,8 @@ def _ensure_active_authorization(db: Session, actor_id: int, filiere: str) -> No
         raise bad_request("autorisation_expiree")
 
 
-def _assert_creator_allowed_for_export(db: Session, actor_id: int) -> None:
-    roles = _active_roles(db, actor_id)
+def _assert_creator_allowed_for_export(auth: AuthContext) -> None:
+    roles = auth.role_codes
     if "orpailleur" in roles and roles.isdisjoint({"collecteur", "comptoir_operator", "comptoir_compliance", "comptoir_director", "bijoutier", "admin", "dirigeant"}):
         raise bad_request("export_direct_orpailleur_interdit")
 
@@ -304,8 +257,9 @@ def create_export(
     payload: ExportCreate,
     db: Session = Depends(get_db),
     current_actor=Depends(require_roles(EXPORT_ROLES)),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    _assert_creator_allowed_for_export(db, current_actor.id)
+    _assert_creator_allowed_for_export(auth)
     destination_label = payload.destination
     if payload.destination_commune_id is not None:
         destination_commune = _get_active_commune_by_id(db, payload.destination_commune_id)
@@ -342,20 +296,23 @@ def create_export(
 
 @router.get("", response_model=list[ExportOut])
 def list_exports(
+    response: Response,
     status: str | None = Query(None),
     date_from: date | None = Query(None),
     date_to: date | None = Query(None),
     created_by_actor_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    pagination: PaginationParams = Depends(get_cursor_pagination),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(require_roles(EXPORT_ROLES)),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     query = db.query(ExportDossier)
 
-    is_admin = _is_admin(db, current_actor.id)
-    is_dirigeant = _is_dirigeant(db, current_actor.id)
-    is_commune_agent = _is_commune_agent(db, current_actor.id)
+    is_admin = auth.has_role("admin")
+    is_dirigeant = auth.has_role("dirigeant")
+    is_commune_agent = auth.has_role("commune_agent")
 
-    is_export_authority = _has_any_role(db, current_actor.id, {"com", "gue", "analyse_certification"})
+    is_export_authority = auth.has_any_role({"com", "gue", "analyse_certification"})
 
     if not (is_admin or is_dirigeant or is_export_authority):
         if is_commune_agent:
@@ -376,7 +333,9 @@ def list_exports(
                 raise bad_request("acces_refuse")
         query = query.filter(ExportDossier.created_by_actor_id == created_by_actor_id)
 
-    dossiers = query.order_by(ExportDossier.created_at.desc()).all()
+    page = paginate(query, sort_column=ExportDossier.created_at, id_column=ExportDossier.id, pagination=pagination)
+    set_page_headers(response, page)
+    dossiers = page.rows
     return [ExportOut.model_validate(d) for d in dossiers]
 
 
@@ -385,21 +344,43 @@ def get_export(
     export_id: int,
     db: Session = Depends(get_db),
     current_actor=Depends(require_roles(EXPORT_ROLES)),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     dossier = db.query(ExportDossier).filter_by(id=export_id).first()
     if not dossier:
         raise bad_request("export_introuvable")
-    if not _can_access_export(db, current_actor, dossier):
+    if not _can_access_export(db, auth, dossier):
         raise bad_request("acces_refuse")
     return ExportOut.model_validate(dossier)
 
 
+@router.get("/{export_id}/lineage", response_model=LotLineageOut)
+def get_export_lineage(
+    export_id: int,
+    depth: int = Query(MAX_LINEAGE_DEPTH, ge=1, le=MAX_LINEAGE_DEPTH),
+    db: Session = Depends(get_read_db),
+    current_actor=Depends(require_roles(EXPORT_ROLES)),
+    auth: AuthContext = Depends(get_auth_context),
+):
+    dossier = db.query(ExportDossier).filter_by(id=export_id).first()
+    if not dossier:
+        raise bad_request("export_introuvable")
+    if not _can_access_export(db, auth, dossier):
+        raise bad_request("acces_refuse")
+    lot_ids = [
+        row.lot_id
+        for row in db.query(ExportLot.lot_id).filter(ExportLot.export_dossier_id == export_id).order_by(ExportLot.lot_id)
+    ]
+    return build_lineage(db, lot_ids, direction="up", depth=depth)
+
+
 @router.patch("/{export_id}/status", response_model=ExportOut)
 def update_export_status(
     export_id: int,
     payload: ExportStatusUpdate,
     db: Session = Depends(get_db),
     current_actor=Depends(require_roles(EXPORT_ROLES)),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     dossier = db.query(ExportDossier).filter_by(id=export_id).first()
     if not dossier:
@@ -409,15 +390,15 @@ def update_export_status(
     if payload.status not in valid_statuses:
         raise bad_request("statut_invalide", {"valid_statuses": list(valid_statuses)})
 
-    is_admin = _is_admin(db, current_actor.id)
-    is_dirigeant = _is_dirigeant(db, current_actor.id)
+    is_admin = auth.has_role("admin")
+    is_dirigeant = auth.has_role("dirigeant")
 
     if payload.status in {"approved", "rejected"}:
-        active_roles = _active_roles(db, current_actor.id)
+        active_roles = auth.role_codes
         if not active_roles.intersection(EXPORT_APPROVERS):
             raise bad_request("role_insuffisant", {"required": sorted(EXPORT_APPROVERS)})
 
-    if not _can_access_export(db, current_actor, dossier):
+    if not _can_access_export(db, auth, dossier):
         raise bad_request("acces_refuse")
 
     if payload.status == "submitted":
@@ -452,6 +433,7 @@ def link_lots_to_export(
     payload: list[ExportLotLink],
     db: Session = Depends(get_db),
     current_actor=Depends(require_roles(EXPORT_ROLES)),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     dossier = db.query(ExportDossier).filter_by(id=export_id).first()
     if not dossier:
@@ -460,7 +442,7 @@ def link_lots_to_export(
     if dossier.status != "draft":
         raise bad_request("export_non_modifiable", {"current_status": dossier.status})
 
-    if not _can_access_export(db, current_actor, dossier):
+    if not _can_access_export(db, auth, dossier):
         raise bad_request("acces_refuse")
 
     for link in payload:
@@ -553,11 +535,12 @@ def submit_export_dossier(
     payload: ExportSubmitIn,
     db: Session = Depends(get_db),
     current_actor=Depends(require_roles(EXPORT_ROLES)),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     dossier = db.query(ExportDossier).filter_by(id=export_id).first()
     if not dossier:
         raise bad_request("export_introuvable")
-    if not _can_access_export(db, current_actor, dossier):
+    if not _can_access_export(db, auth, dossier):
         raise bad_request("acces_refuse")
     if dossier.status not in {"draft", "submitted"}:
         raise bad_request("transition_export_invalide")
@@ -575,6 +558,7 @@ def validate_export_step(
     payload: ExportValidateIn,
     db: Session = Depends(get_db),
     current_actor=Depends(require_roles(EXPORT_ROLES)),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     dossier = db.query(ExportDossier).filter_by(id=export_id).first()
     if not dossier:
@@ -585,7 +569,7 @@ def validate_export_step(
         raise bad_request("step_invalide")
     if decision not in {"approved", "rejected"}:
         raise bad_request("decision_invalide")
-    if not _can_access_export(db, current_actor, dossier):
+    if not _can_access_export(db, auth, dossier):
         raise bad_request("acces_refuse")
 
     db.add(
@@ -625,4 +609,3 @@ def validate_export_step(
     db.commit()
     db.refresh(dossier)
     return ExportOut.model_validate(dossier)
-
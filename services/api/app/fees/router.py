@@ -1,20 +1,17 @@
-import hashlib
-from pathlib import Path
-
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_actor, get_optional_actor
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor, get_optional_actor, get_optional_auth_context
 from app.common.errors import bad_request
+from app.common.pagination import PaginationParams, get_cursor_pagination, paginate, set_page_headers
 from app.common.card_identity import build_receipt_number
-from app.common.receipts import build_simple_pdf
+from app.documents.jobs import queue_pdf_document
 from app.core.config import settings
-from app.db import get_db
+from app.db import get_db, get_read_db
 from datetime import datetime, timezone
 
 from app.fees.schemas import FeeActorMarkPaid, FeeCreate, FeeOut, FeePaymentInitiate, FeePaymentOut, FeeStatusUpdate
-from app.models.actor import Actor, ActorRole
-from app.models.document import Document
+from app.models.actor import Actor
 from app.models.fee import Fee
 from app.models.or_compliance import CollectorCard, KaraBolamenaCard
 from app.models.payment import Payment, PaymentProvider, PaymentRequest
@@ -29,8 +26,9 @@ def create_fee(
     payload: FeeCreate,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    if not _is_admin(db, current_actor.id) and not _is_commune_agent(db, current_actor.id):
+    if not auth.is_admin_like and not auth.has_role("commune_agent"):
         raise bad_request("acces_refuse")
     actor = db.query(Actor).filter_by(id=payload.actor_id).first()
     if not actor:
@@ -38,7 +36,7 @@ def create_fee(
     commune = _get_active_commune_by_id(db, payload.commune_id)
     if not commune:
         raise bad_request("commune_invalide")
-    if _is_commune_agent(db, current_actor.id) and current_actor.commune_id != payload.commune_id:
+    if auth.has_role("commune_agent") and current_actor.commune_id != payload.commune_id:
         raise bad_request("acces_refuse")
 
     existing = (
@@ -80,14 +78,17 @@ def create_fee(
 
 @router.get("", response_model=list[FeeOut])
 def list_fees(
+    response: Response,
     actor_id: int | None = None,
-    db: Session = Depends(get_db),
+    pagination: PaginationParams = Depends(get_cursor_pagination),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     query = db.query(Fee)
-    if _is_admin(db, current_actor.id):
+    if auth.is_admin_like:
         pass
-    elif _is_commune_agent(db, current_actor.id):
+    elif auth.has_role("commune_agent"):
         query = query.filter(Fee.commune_id == current_actor.commune_id)
         if actor_id:
             query = query.filter(Fee.actor_id == actor_id)
@@ -97,7 +98,9 @@ def list_fees(
         query = query.filter(Fee.actor_id == current_actor.id)
     if actor_id:
         query = query.filter(Fee.actor_id == actor_id)
-    fees = query.order_by(Fee.created_at.desc()).all()
+    page = paginate(query, sort_column=Fee.created_at, id_column=Fee.id, pagination=pagination)
+    set_page_headers(response, page)
+    fees = page.rows
     return [
         FeeOut(
             id=fee.id,
@@ -120,13 +123,14 @@ def get_fee(
     fee_id: int,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     fee = db.query(Fee).filter_by(id=fee_id).first()
     if not fee:
         raise bad_request("frais_introuvable")
-    if _is_admin(db, current_actor.id):
+    if auth.is_admin_like:
         pass
-    elif _is_commune_agent(db, current_actor.id):
+    elif auth.has_role("commune_agent"):
         if fee.commune_id != current_actor.commune_id:
             raise bad_request("acces_refuse")
     else:
@@ -152,13 +156,14 @@ def initiate_opening_fee_payment(
     payload: FeePaymentInitiate,
     db: Session = Depends(get_db),
     current_actor=Depends(get_optional_actor),
+    auth: AuthContext | None = Depends(get_optional_auth_context),
 ):
     fee = db.query(Fee).filter_by(id=fee_id).first()
     if not fee:
         raise bad_request("frais_introuvable")
     if fee.status != "pending":
         raise bad_request("frais_invalide")
-    if current_actor and not _is_admin(db, current_actor.id) and fee.actor_id != current_actor.id:
+    if current_actor and not auth.is_admin_like and fee.actor_id != current_actor.id:
         raise bad_request("acces_refuse")
 
     provider = db.query(PaymentProvider).filter_by(code=payload.provider_code).first()
@@ -217,13 +222,14 @@ def update_fee_status(
     payload: FeeStatusUpdate,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     fee = db.query(Fee).filter_by(id=fee_id).first()
     if not fee:
         raise bad_request("frais_introuvable")
-    if not _is_admin(db, current_actor.id) and not _is_commune_agent(db, current_actor.id):
+    if not auth.is_admin_like and not auth.has_role("commune_agent"):
         raise bad_request("acces_refuse")
-    if _is_commune_agent(db, current_actor.id) and current_actor.commune_id != fee.commune_id:
+    if auth.has_role("commune_agent") and current_actor.commune_id != fee.commune_id:
         raise bad_request("acces_refuse")
 
     new_status = (payload.status or "").strip().lower()
@@ -257,11 +263,12 @@ def actor_mark_fee_paid(
     payload: FeeActorMarkPaid,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     fee = db.query(Fee).filter_by(id=fee_id).first()
     if not fee:
         raise bad_request("frais_introuvable")
-    if fee.actor_id != current_actor.id and not _is_admin(db, current_actor.id):
+    if fee.actor_id != current_actor.id and not auth.is_admin_like:
         raise bad_request("acces_refuse")
     if fee.status == "cancelled":
         raise bad_request("frais_invalide")
@@ -287,24 +294,6 @@ def actor_mark_fee_paid(
     )
 
 
-def _is_admin(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role.in_(["admin", "dirigeant"]))
-        .first()
-        is not None
-    )
-
-
-def _is_commune_agent(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role == "commune_agent")
-        .first()
-        is not None
-    )
-
-
 def _get_commune_msisdn(db: Session, commune_id: int) -> str | None:
     commune = _get_active_commune_by_id(db, commune_id)
     return commune.mobile_money_msisdn if commune else None
@@ -344,23 +333,16 @@ def _ensure_fee_receipt_document(db: Session, fee: Fee, actor_id: int, payment_r
         f"Date paiement: {now.isoformat()}",
         f"Reference paiement: {payment_ref or '-'}",
     ]
-    content = build_simple_pdf("MADAVOLA - Recu frais", lines)
-    storage_dir = Path(settings.document_storage_dir)
-    storage_dir.mkdir(parents=True, exist_ok=True)
-    filename = f"{receipt_number}.pdf"
-    storage_path = storage_dir / filename
-    storage_path.write_bytes(content)
-    sha256 = hashlib.sha256(content).hexdigest()
-    document = Document(
+    document = queue_pdf_document(
+        db,
         doc_type="receipt",
         owner_actor_id=fee.actor_id,
         related_entity_type="fee",
         related_entity_id=str(fee.id),
-        storage_path=str(storage_path),
-        original_filename=filename,
-        sha256=sha256,
+        filename=f"{receipt_number}.pdf",
+        title="MADAVOLA - Recu frais",
+        lines=lines,
     )
-    db.add(document)
     db.flush()
     fee.receipt_number = receipt_number
     fee.receipt_document_id = document.id
@@ -2,8 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from app.auth.password_pool import password_pool
 from app.core.config import settings
-from app.db import get_db
+from app.core.metrics import require_metrics_token
+from app.core.schema import startup_metrics
+from app.core.sql_metrics import route_sql_metrics
+from app.db import get_db, pool_status
 
 router = APIRouter(prefix=f"{settings.api_prefix}", tags=["admin"])
 
@@ -23,3 +27,23 @@ def ready(db: Session = Depends(get_db)):
             detail={"message": "db_indisponible"},
         ) from exc
     return {"status": "ready"}
+
+
+@router.get("/health/password-pool", dependencies=[Depends(require_metrics_token)])
+def password_pool_health():
+    return password_pool.stats()
+
+
+@router.get("/health/startup", dependencies=[Depends(require_metrics_token)])
+def startup_health():
+    return startup_metrics
+
+
+@router.get("/health/db-pool", dependencies=[Depends(require_metrics_token)])
+def db_pool_health():
+    return pool_status()
+
+
+@router.get("/health/sql-metrics", dependencies=[Depends(require_metrics_token)])
+def sql_metrics_health():
+    return {"routes": route_sql_metrics.snapshot()}
@@ -1,13 +1,13 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_actor
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor
 from app.audit.logger import write_audit
 from app.common.errors import bad_request
+from app.common.pagination import PaginationParams, get_cursor_pagination, paginate, set_page_headers
 from app.core.config import settings
-from app.db import get_db
+from app.db import get_db, get_read_db
 from app.inspections.schemas import InspectionCreate, InspectionOut
-from app.models.actor import ActorRole
 from app.models.geo import GeoPoint
 from app.models.penalty import Inspection
 
@@ -19,8 +19,9 @@ def create_inspection(
     payload: InspectionCreate,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    if not _is_inspector(db, current_actor.id):
+    if not _is_inspector(auth):
         raise bad_request("acces_refuse")
     if payload.geo_point_id:
         geo = db.query(GeoPoint).filter_by(id=payload.geo_point_id).first()
@@ -62,13 +63,18 @@ def create_inspection(
 
 @router.get("", response_model=list[InspectionOut])
 def list_inspections(
-    db: Session = Depends(get_db),
+    response: Response,
+    pagination: PaginationParams = Depends(get_cursor_pagination),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     query = db.query(Inspection)
-    if not _is_admin(db, current_actor.id):
+    if not auth.is_admin_like:
         query = query.filter(Inspection.inspector_actor_id == current_actor.id)
-    inspections = query.order_by(Inspection.created_at.desc()).all()
+    page = paginate(query, sort_column=Inspection.created_at, id_column=Inspection.id, pagination=pagination)
+    set_page_headers(response, page)
+    inspections = page.rows
     return [
         InspectionOut(
             id=i.id,
@@ -84,22 +90,5 @@ def list_inspections(
     ]
 
 
-def _is_inspector(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(
-            ActorRole.actor_id == actor_id,
-            ActorRole.role.in_(["controleur", "admin", "dirigeant", "mmrs", "dgd", "police", "gendarmerie", "forets"]),
-        )
-        .first()
-        is not None
-    )
-
-
-def _is_admin(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role.in_(["admin", "dirigeant"]))
-        .first()
-        is not None
-    )
+def _is_inspector(auth: AuthContext) -> bool:
+    return auth.has_any_role({"controleur", "admin", "dirigeant", "mmrs", "dgd", "police", "gendarmerie", "forets"})
@@ -0,0 +1,283 @@
+"""
+Vérification en masse des chaînes de hash.
+
+- lots : `current_block_hash` = hash de `trace_payload_json`, dont
+  `previous_block_hash` et `lot_id` doivent correspondre à la ligne ;
+- factures : `invoice_hash` = hash de `trace_payload_json`, signature
+  interne valide, et `previous_invoice_hash` = `GENESIS` ou hash d'une
+  facture existante. Le maillon est vérifié par recherche du hash référencé
+  (index `ix_invoices_invoice_hash`, une requête par bloc) : il est écrit
+  d'après la dernière facture par (issue_date, id), ou complété plus tard,
+  et ne suit donc pas l'ordre des ids.
+
+Une vérification (`IntegrityCheckRun`) lit la table par blocs sur l'id,
+recalcule les hash dans un pool de processus et enregistre après chaque
+bloc le point de reprise (dernier id) et les ruptures avec leur position. Un run interrompu reprend à ce point : par
+le worker (run `running` sans nouvelles depuis
+`document_job_lock_timeout_seconds`) ou par `python -m app.integrity.verify --run`.
+"""
+
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.common.card_identity import sha256_hex, verify_hmac_sha256
+from app.common.traceability import canonical_json, compute_chain_hash
+from app.core.config import settings
+from app.documents.jobs import DEFAULT_WORKER_ID
+from app.models.audit import IntegrityCheckRun
+from app.models.invoice import Invoice
+from app.models.lot import Lot
+
+logger = logging.getLogger(__name__)
+
+TARGETS = ("lots", "invoices")
+GENESIS = "GENESIS"
+
+_IN_CHUNK = 500
+
+
+# --- Vérification d'un bloc (exécutée dans les processus du pool) -----------
+
+
+def verify_lot_rows(rows: list[tuple]) -> list[tuple[int, str | None]]:
+    """(id, current_block_hash, previous_block_hash, trace_payload_json) -> (id, rupture | None | "skip")."""
+    results = []
+    for lot_id, current_hash, previous_hash, payload_json in rows:
+        if not current_hash and not payload_json:
+            results.append((lot_id, "skip"))
+            continue
+        if not current_hash or not payload_json:
+            results.append((lot_id, "payload_manquant"))
+            continue
+        try:
+            payload = json.loads(payload_json)
+        except ValueError:
+            results.append((lot_id, "payload_illisible"))
+            continue
+        if compute_chain_hash(payload) != current_hash:
+            results.append((lot_id, "hash_invalide"))
+        elif payload.get("previous_block_hash") != previous_hash:
+            results.append((lot_id, "precedent_incoherent"))
+        elif payload.get("lot_id") != lot_id:
+            results.append((lot_id, "lot_incoherent"))
+        else:
+            results.append((lot_id, None))
+    return results
+
+
+def verify_invoice_rows(rows: list[tuple], signing_secret: str) -> list[tuple[int, str | None]]:
+    """(id, invoice_hash, previous_invoice_hash, internal_signature, trace_payload_json) -> (id, rupture | None | "skip")."""
+    results = []
+    for invoice_id, invoice_hash, previous_hash, signature, payload_json in rows:
+        if not invoice_hash:
+            results.append((invoice_id, "skip"))
+            continue
+        if not payload_json:
+            results.append((invoice_id, "payload_manquant"))
+            continue
+        try:
+            payload = json.loads(payload_json)
+        except ValueError:
+            results.append((invoice_id, "payload_illisible"))
+            continue
+        if sha256_hex(canonical_json(payload)) != invoice_hash:
+            results.append((invoice_id, "hash_invalide"))
+        elif payload.get("previous_invoice_hash") != previous_hash:
+            results.append((invoice_id, "precedent_incoherent"))
+        elif not verify_hmac_sha256(signing_secret, invoice_hash, signature):
+            results.append((invoice_id, "signature_invalide"))
+        else:
+            results.append((invoice_id, None))
+    return results
+
+
+def _verify_chunk(target: str, rows: list[tuple], signing_secret: str) -> list[tuple[int, str | None]]:
+    if target == "lots":
+        return verify_lot_rows(rows)
+    return verify_invoice_rows(rows, signing_secret)
+
+
+# --- Lecture par blocs ------------------------------------------------------
+
+
+def _fetch_chunk(db: Session, target: str, after_id: int, limit: int) -> list[tuple]:
+    if target == "lots":
+        statement = select(Lot.id, Lot.current_block_hash, Lot.previous_block_hash, Lot.trace_payload_json).where(
+            Lot.id > after_id
+        ).order_by(Lot.id)
+    else:
+        statement = select(
+            Invoice.id,
+            Invoice.invoice_hash,
+            Invoice.previous_invoice_hash,
+            Invoice.internal_signature,
+            Invoice.trace_payload_json,
+        ).where(Invoice.id > after_id).order_by(Invoice.id)
+    return [tuple(row) for row in db.execute(statement.limit(limit)).all()]
+
+
+def _known_invoice_hashes(db: Session, rows: list[tuple]) -> set[str]:
+    """Hash précédents du bloc qui existent en base (GENESIS exclu)."""
+    referenced = sorted({row[2] for row in rows if row[1] and row[2] and row[2] != GENESIS})
+    known: set[str] = set()
+    for offset in range(0, len(referenced), _IN_CHUNK):
+        known.update(
+            db.execute(
+                select(Invoice.invoice_hash).where(Invoice.invoice_hash.in_(referenced[offset : offset + _IN_CHUNK]))
+            ).scalars()
+        )
+    return known
+
+
+# --- Runs ---------------------------------------------------------------------
+
+
+def create_check_runs(db: Session, target: str, *, requested_by_actor_id: int | None = None) -> list[IntegrityCheckRun]:
+    """Crée les runs `pending` (un par table pour `all`) ; l'appelant valide."""
+    targets = TARGETS if target == "all" else (target,)
+    runs = [IntegrityCheckRun(target=item, status="pending", requested_by_actor_id=requested_by_actor_id) for item in targets]
+    db.add_all(runs)
+    return runs
+
+
+def claim_check_run(db: Session, *, worker_id: str = DEFAULT_WORKER_ID, run_id: int | None = None) -> int | None:
+    """Réserve un run en attente ou abandonné (ou `run_id`) et valide la réservation."""
+    now = datetime.now(timezone.utc)
+    stale_before = now - timedelta(seconds=settings.document_job_lock_timeout_seconds)
+    query = db.query(IntegrityCheckRun)
+    if run_id is not None:
+        query = query.filter(IntegrityCheckRun.id == run_id, IntegrityCheckRun.status != "completed")
+    else:
+        query = query.filter(
+            or_(
+                IntegrityCheckRun.status == "pending",
+                (IntegrityCheckRun.status == "running") & (IntegrityCheckRun.locked_at < stale_before),
+            )
+        )
+    run = query.order_by(IntegrityCheckRun.id.asc()).with_for_update(skip_locked=True).first()
+    if run is None:
+        return None
+    run.status = "running"
+    run.locked_by = worker_id
+    run.locked_at = now
+    run.last_error = None
+    run.started_at = run.started_at or now
+    claimed_id = run.id
+    db.commit()
+    return claimed_id
+
+
+def _record_chunk(
+    run: IntegrityCheckRun,
+    rows: list[tuple],
+    results: list[tuple[int, str | None]],
+    breaks: list,
+    known_hashes: set[str],
+) -> None:
+    """Applique les résultats d'un bloc au run (positions, ruptures, point de reprise)."""
+    position = run.records_checked
+    for row, (record_id, reason) in zip(rows, results):
+        position += 1
+        if reason == "skip":
+            run.records_skipped += 1
+            continue
+        detail = {}
+        if run.target == "invoices" and reason is None and row[2] != GENESIS and row[2] not in known_hashes:
+            reason = "chaine_rompue"
+            detail = {"found": row[2]}
+        if reason is None:
+            continue
+        run.breaks_count += 1
+        if len(breaks) < settings.integrity_check_max_reported_breaks:
+            breaks.append({"id": record_id, "position": position, "reason": reason, **detail})
+    run.records_checked = position
+    run.last_id = rows[-1][0]
+
+
+def execute_check_run(
+    db: Session,
+    run_id: int,
+    *,
+    max_records: int | None = None,
+    workers: int | None = None,
+) -> str:
+    """
+    Poursuit un run réservé jusqu'à la fin de la table ou `max_records`
+    enregistrements ; renvoie son statut (`completed`, `pending` s'il reste des
+    lignes, `failed`). Les blocs sont vérifiés en parallèle mais appliqués dans
+    l'ordre, le point de reprise étant validé après chacun.
+    """
+    run = db.get(IntegrityCheckRun, run_id)
+    if run is None or run.status != "running":
+        return run.status if run is not None else "failed"
+    target = run.target
+    workers = workers if workers is not None else (settings.integrity_check_workers or os.cpu_count() or 1)
+    chunk_size = settings.integrity_check_chunk_size
+    signing_secret = settings.card_qr_signing_secret or settings.jwt_secret
+    breaks = json.loads(run.breaks_json) if run.breaks_json else []
+    after_id = run.last_id
+    remaining = max_records
+    exhausted = False
+    in_flight: deque = deque()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while True:
+            while not exhausted and len(in_flight) < workers * 2 and (remaining is None or remaining > 0):
+                limit = chunk_size if remaining is None else min(chunk_size, remaining)
+                rows = _fetch_chunk(db, target, after_id, limit)
+                if not rows:
+                    exhausted = True
+                    break
+                after_id = rows[-1][0]
+                if remaining is not None:
+                    remaining -= len(rows)
+                known = _known_invoice_hashes(db, rows) if target == "invoices" else set()
+                if executor is not None:
+                    in_flight.append((rows, known, executor.submit(_verify_chunk, target, rows, signing_secret)))
+                else:
+                    in_flight.append((rows, known, _verify_chunk(target, rows, signing_secret)))
+            if not in_flight:
+                break
+            rows, known, pending = in_flight.popleft()
+            results = pending.result() if executor is not None else pending
+            _record_chunk(run, rows, results, breaks, known)
+            run.breaks_json = json.dumps(breaks, ensure_ascii=True)
+            run.locked_at = datetime.now(timezone.utc)
+            db.commit()
+    except Exception as exc:
+        logger.exception("integrity_check_failed run=%s", run_id)
+        db.rollback()
+        run = db.get(IntegrityCheckRun, run_id)
+        run.status = "failed"
+        run.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+        run.locked_by = None
+        db.commit()
+        return run.status
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    run.locked_by = None
+    if exhausted:
+        run.status = "completed"
+        run.finished_at = datetime.now(timezone.utc)
+    else:
+        run.status = "pending"
+        run.locked_at = None
+    db.commit()
+    return run.status
+
+
+def process_pending_checks(db: Session, *, worker_id: str = DEFAULT_WORKER_ID) -> bool:
+    """Avance d'une tranche (`integrity_check_slice_records`) le premier run dû."""
+    run_id = claim_check_run(db, worker_id=worker_id)
+    if run_id is None:
+        return False
+    execute_check_run(db, run_id, max_records=settings.integrity_check_slice_records)
+    return True
@@ -0,0 +1,63 @@
+"""
+Vérification des chaînes de hash (lots, factures).
+
+Usage:
+  python -m app.integrity.verify --target all          # nouveaux runs, jusqu'au bout
+  python -m app.integrity.verify --target lots --workers 8
+  python -m app.integrity.verify --run 12              # reprend le run 12
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.integrity.chains import TARGETS, claim_check_run, create_check_runs, execute_check_run
+from app.models.audit import IntegrityCheckRun
+
+
+def _run_to_end(db, run_id: int, workers: int | None) -> IntegrityCheckRun:
+    if claim_check_run(db, run_id=run_id) is None:
+        raise SystemExit(f"run {run_id} introuvable, termine ou deja pris")
+    started = time.perf_counter()
+    execute_check_run(db, run_id, workers=workers)
+    run = db.get(IntegrityCheckRun, run_id)
+    elapsed = time.perf_counter() - started
+    rate = run.records_checked / elapsed * 60 if elapsed > 0 else 0
+    print(
+        f"run {run.id} {run.target}: {run.status} - {run.records_checked} verifies, "
+        f"{run.records_skipped} sans hash, {run.breaks_count} ruptures ({rate:,.0f}/min)"
+    )
+    if run.last_error:
+        print(f"  erreur: {run.last_error}")
+    return run
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Verification des chaines de hash")
+    parser.add_argument("--target", choices=(*TARGETS, "all"), default="all")
+    parser.add_argument("--run", type=int, help="reprendre ce run a son point de reprise")
+    parser.add_argument("--workers", type=int, default=None, help=f"processus (defaut: {settings.integrity_check_workers or 'un par coeur'})")
+    args = parser.parse_args(argv[1:])
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    db = SessionLocal()
+    try:
+        if args.run:
+            run_ids = [args.run]
+        else:
+            runs = create_check_runs(db, args.target)
+            db.commit()
+            run_ids = [run.id for run in runs]
+        results = [_run_to_end(db, run_id, args.workers) for run_id in run_ids]
+    finally:
+        db.close()
+    if any(run.status != "completed" for run in results):
+        return 2
+    return 1 if any(run.breaks_count for run in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,35 +1,39 @@
 import json
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_actor
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor
 from app.common.errors import bad_request
+from app.common.pagination import PaginationParams, get_cursor_pagination, paginate, set_page_headers
 from app.core.config import settings
-from app.db import get_db
+from app.db import get_db, get_read_db
 from app.invoices.schemas import InvoiceOut
 from app.models.invoice import Invoice
-from app.models.actor import ActorRole
 
 router = APIRouter(prefix=f"{settings.api_prefix}/invoices", tags=["documents"])
 
 
 @router.get("", response_model=list[InvoiceOut])
 def list_invoices(
+    response: Response,
     transaction_id: int | None = None,
-    db: Session = Depends(get_db),
+    pagination: PaginationParams = Depends(get_cursor_pagination),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     query = db.query(Invoice)
     if transaction_id:
         query = query.filter(Invoice.transaction_id == transaction_id)
-    invoices = query.order_by(Invoice.issue_date.desc()).all()
-    if not _is_admin(db, current_actor.id):
-        invoices = [
-            inv
-            for inv in invoices
-            if current_actor.id in (inv.seller_actor_id, inv.buyer_actor_id)
-        ]
+    if not auth.is_admin_like:
+        query = query.filter(
+            or_(Invoice.seller_actor_id == current_actor.id, Invoice.buyer_actor_id == current_actor.id)
+        )
+    page = paginate(query, sort_column=Invoice.issue_date, id_column=Invoice.id, pagination=pagination)
+    set_page_headers(response, page)
+    invoices = page.rows
     return [_to_invoice_out(inv) for inv in invoices]
 
 
@@ -38,25 +42,17 @@ def get_invoice(
     invoice_id: int,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     invoice = db.query(Invoice).filter_by(id=invoice_id).first()
     if not invoice:
         raise bad_request("facture_introuvable")
-    if not _is_admin(db, current_actor.id):
+    if not auth.is_admin_like:
         if current_actor.id not in (invoice.seller_actor_id, invoice.buyer_actor_id):
             raise bad_request("acces_refuse")
     return _to_invoice_out(invoice)
 
 
-def _is_admin(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role.in_(["admin", "dirigeant"]))
-        .first()
-        is not None
-    )
-
-
 def _parse_json_list(raw: str | None) -> list:
     if not raw:
         return []
@@ -4,12 +4,12 @@ from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_actor, require_roles
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor, require_roles
 from app.common.card_identity import verify_hmac_sha256
 from app.common.errors import bad_request
 from app.core.config import settings
-from app.db import get_db
-from app.models.actor import Actor, ActorRole
+from app.db import get_db, get_read_db
+from app.models.actor import Actor
 from app.models.or_compliance import CollectorCard, KaraBolamenaCard
 from app.models.territory import Commune
 
@@ -39,17 +39,8 @@ class KarabolaLinkUserIn(BaseModel):
     actor_id: int
 
 
-def _is_admin_like(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(
-            ActorRole.actor_id == actor_id,
-            ActorRole.status == "active",
-            ActorRole.role.in_(["admin", "dirigeant", "com_admin", "com_agent", "commune_agent", "commune"]),
-        )
-        .first()
-        is not None
-    )
+def _is_admin_like(auth: AuthContext) -> bool:
+    return auth.has_any_role({"admin", "dirigeant", "com_admin", "com_agent", "commune_agent", "commune"})
 
 
 def _display_status(raw: str | None) -> str:
@@ -112,11 +103,12 @@ def _verify_card_payload(db: Session, card_ref: str) -> dict:
 def list_karabola_cards(
     actor_id: int | None = None,
     status: str | None = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     target_actor_id = actor_id or current_actor.id
-    if target_actor_id != current_actor.id and not _is_admin_like(db, current_actor.id):
+    if target_actor_id != current_actor.id and not _is_admin_like(auth):
         raise bad_request("acces_refuse")
     wanted_status = (status or "").strip().lower() or None
     out: list[KarabolaCardOut] = []
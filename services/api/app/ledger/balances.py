@@ -0,0 +1,147 @@
+"""
+Soldes de stock matérialisés (`stock_balances`).
+
+`inventory_ledger` est en ajout seul ; chaque mouvement ajoute son delta au
+solde (acteur, lot) dans la même transaction :
+- mouvements ajoutés à la session : regroupés par flush (événement
+  `after_flush`), un UPSERT par flush ;
+- insertions groupées (`insert(InventoryLedger)`) : via `add_ledger_rows`,
+  qui ne passe pas par le flush.
+
+Les soldes se lisent alors par clé au lieu de `SUM(quantity_delta)`.
+`python -m app.ledger.reconcile` recalcule les soldes depuis le registre,
+affiche les écarts et, avec `--apply`, reconstruit la table.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import and_, delete, event, func, insert, literal, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models.lot import InventoryLedger, StockBalance
+
+# Tolérance des comparaisons (Numeric(14, 4), flottants sous SQLite).
+BALANCE_TOLERANCE = Decimal("0.00005")
+
+
+def _upsert(connection: Connection, deltas: dict[tuple[int, int], Decimal]) -> None:
+    if not deltas:
+        return
+    table = StockBalance.__table__
+    dialect_insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    statement = dialect_insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.actor_id, table.c.lot_id],
+        set_={
+            "quantity": table.c.quantity + statement.excluded.quantity,
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+    now = datetime.now(timezone.utc)
+    # Ordre fixe : deux transactions concurrentes verrouillent les soldes dans le même ordre.
+    connection.execute(
+        statement,
+        [
+            {"actor_id": actor_id, "lot_id": lot_id, "quantity": quantity, "updated_at": now}
+            for (actor_id, lot_id), quantity in sorted(deltas.items())
+        ],
+    )
+
+
+def _add_delta(deltas: dict[tuple[int, int], Decimal], actor_id: int, lot_id: int, quantity) -> None:
+    deltas[(actor_id, lot_id)] += Decimal(str(quantity))
+
+
+def add_ledger_rows(db: Session, rows: list[dict]) -> None:
+    """Insertion groupée de mouvements et mise à jour des soldes correspondants."""
+    if not rows:
+        return
+    db.execute(insert(InventoryLedger), rows)
+    deltas: dict[tuple[int, int], Decimal] = defaultdict(Decimal)
+    for row in rows:
+        _add_delta(deltas, row["actor_id"], row["lot_id"], row["quantity_delta"])
+    _upsert(db.connection(), deltas)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_flushed_movements(session: Session, _flush_context) -> None:
+    # `session.new` liste encore les objets insérés par ce flush.
+    deltas: dict[tuple[int, int], Decimal] = defaultdict(Decimal)
+    for obj in session.new:
+        if isinstance(obj, InventoryLedger):
+            _add_delta(deltas, obj.actor_id, obj.lot_id, obj.quantity_delta)
+    _upsert(session.connection(), deltas)
+
+
+# --- Réconciliation -----------------------------------------------------------
+
+
+@dataclass
+class BalanceDrift:
+    actor_id: int
+    lot_id: int
+    ledger_quantity: float
+    stored_quantity: float | None
+
+
+def _ledger_sums():
+    return (
+        select(
+            InventoryLedger.actor_id,
+            InventoryLedger.lot_id,
+            func.sum(InventoryLedger.quantity_delta).label("quantity"),
+        )
+        .group_by(InventoryLedger.actor_id, InventoryLedger.lot_id)
+        .subquery("ledger_sums")
+    )
+
+
+def diff_stock_balances(db: Session) -> list[BalanceDrift]:
+    """Écarts entre `stock_balances` et les sommes du registre."""
+    sums = _ledger_sums()
+    joined = and_(StockBalance.actor_id == sums.c.actor_id, StockBalance.lot_id == sums.c.lot_id)
+    wrong_or_missing = (
+        select(sums.c.actor_id, sums.c.lot_id, sums.c.quantity, StockBalance.quantity)
+        .outerjoin(StockBalance, joined)
+        .where(
+            (StockBalance.quantity.is_(None))
+            | (func.abs(sums.c.quantity - StockBalance.quantity) > BALANCE_TOLERANCE)
+        )
+    )
+    orphaned = (
+        select(StockBalance.actor_id, StockBalance.lot_id, literal(0), StockBalance.quantity)
+        .outerjoin(sums, joined)
+        .where(sums.c.actor_id.is_(None))
+    )
+    drifts = [
+        BalanceDrift(
+            actor_id=actor_id,
+            lot_id=lot_id,
+            ledger_quantity=float(ledger or 0),
+            stored_quantity=float(stored) if stored is not None else None,
+        )
+        for statement in (wrong_or_missing, orphaned)
+        for actor_id, lot_id, ledger, stored in db.execute(statement).all()
+    ]
+    return sorted(drifts, key=lambda drift: (drift.actor_id, drift.lot_id))
+
+
+def rebuild_stock_balances(db: Session) -> int:
+    """Recalcule toute la table depuis le registre ; l'appelant valide."""
+    if db.get_bind().dialect.name == "postgresql":
+        # Les écritures concurrentes attendent la fin de la reconstruction.
+        db.execute(text("LOCK TABLE stock_balances IN EXCLUSIVE MODE"))
+    db.execute(delete(StockBalance))
+    sums = _ledger_sums()
+    result = db.execute(
+        insert(StockBalance).from_select(
+            ["actor_id", "lot_id", "quantity", "updated_at"],
+            select(sums.c.actor_id, sums.c.lot_id, sums.c.quantity, literal(datetime.now(timezone.utc))),
+        )
+    )
+    return result.rowcount
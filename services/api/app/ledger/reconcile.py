@@ -0,0 +1,39 @@
+"""
+Réconciliation des soldes de stock avec le registre.
+
+Usage:
+  python -m app.ledger.reconcile            # affiche les écarts (code 1 s'il y en a)
+  python -m app.ledger.reconcile --apply    # reconstruit stock_balances
+"""
+
+import argparse
+import sys
+
+from app.db import SessionLocal
+from app.ledger.balances import diff_stock_balances, rebuild_stock_balances
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Reconciliation de stock_balances avec inventory_ledger")
+    parser.add_argument("--apply", action="store_true", help="reconstruire la table depuis le registre")
+    args = parser.parse_args(argv[1:])
+
+    db = SessionLocal()
+    try:
+        drifts = diff_stock_balances(db)
+        for drift in drifts:
+            stored = "absent" if drift.stored_quantity is None else f"{drift.stored_quantity:g}"
+            print(f"acteur {drift.actor_id} lot {drift.lot_id}: registre {drift.ledger_quantity:g}, solde {stored}")
+        print(f"{len(drifts)} ecart(s)")
+        if args.apply:
+            rebuilt = rebuild_stock_balances(db)
+            db.commit()
+            print(f"stock_balances reconstruite ({rebuilt} soldes)")
+            return 0
+    finally:
+        db.close()
+    return 1 if drifts else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
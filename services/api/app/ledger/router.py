@@ -1,27 +1,34 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import func
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_actor
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor
 from app.common.errors import bad_request
+from app.common.export import ExportFormat, date_bounds, export_response
+from app.common.pagination import PaginationParams, get_cursor_pagination, paginate
+from app.common.responses import RowProjection
 from app.core.config import settings
-from app.db import get_db
+from app.db import get_read_db
 from app.ledger.schemas import LedgerBalanceOut, LedgerEntryOut
-from app.models.actor import ActorRole
-from app.models.lot import InventoryLedger
+from app.models.lot import InventoryLedger, StockBalance
 
 router = APIRouter(prefix=f"{settings.api_prefix}/ledger", tags=["lots"])
 
+LEDGER_ENTRY_ROWS = RowProjection(LedgerEntryOut, InventoryLedger)
+
 
 @router.get("", response_model=list[LedgerEntryOut])
 def list_ledger(
     actor_id: int | None = None,
     lot_id: int | None = None,
-    db: Session = Depends(get_db),
+    pagination: PaginationParams = Depends(get_cursor_pagination),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    query = db.query(InventoryLedger)
-    if not _is_admin(db, current_actor.id):
+    query = LEDGER_ENTRY_ROWS.query(db)
+    if not auth.is_admin_like:
         query = query.filter(InventoryLedger.actor_id == current_actor.id)
         if actor_id and actor_id != current_actor.id:
             return []
@@ -29,43 +36,71 @@ def list_ledger(
         query = query.filter(InventoryLedger.actor_id == actor_id)
     if lot_id:
         query = query.filter(InventoryLedger.lot_id == lot_id)
-    entries = query.order_by(InventoryLedger.created_at.desc()).all()
-    return [
-        LedgerEntryOut(
-            id=e.id,
-            actor_id=e.actor_id,
-            lot_id=e.lot_id,
-            movement_type=e.movement_type,
-            quantity_delta=float(e.quantity_delta),
-            ref_event_type=e.ref_event_type,
-            ref_event_id=e.ref_event_id,
-            created_at=e.created_at,
-        )
-        for e in entries
-    ]
+    page = paginate(
+        query,
+        sort_column=InventoryLedger.created_at,
+        id_column=InventoryLedger.id,
+        pagination=pagination,
+    )
+    return LEDGER_ENTRY_ROWS.response(page)
+
+
+@router.get("/export")
+def export_ledger(
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    gzip: bool = False,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    actor_id: int | None = None,
+    lot_id: int | None = None,
+    movement_type: str | None = None,
+    db: Session = Depends(get_read_db),
+    current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
+):
+    """Mouvements en flux (NDJSON ou CSV), par id croissant ; voir app.common.export."""
+    if not auth.is_admin_like:
+        if actor_id and actor_id != current_actor.id:
+            raise bad_request("acces_refuse")
+        actor_id = current_actor.id
+    start, end = date_bounds(date_from, date_to)
+    statement = LEDGER_ENTRY_ROWS.select()
+    if actor_id:
+        statement = statement.where(InventoryLedger.actor_id == actor_id)
+    if lot_id:
+        statement = statement.where(InventoryLedger.lot_id == lot_id)
+    if movement_type:
+        statement = statement.where(InventoryLedger.movement_type == movement_type)
+    if start:
+        statement = statement.where(InventoryLedger.created_at >= start)
+    if end:
+        statement = statement.where(InventoryLedger.created_at < end)
+    return export_response(
+        db.get_bind(),
+        statement.order_by(InventoryLedger.id),
+        LEDGER_ENTRY_ROWS.fields,
+        fmt=export_format,
+        compress=gzip,
+        name="ledger",
+    )
 
 
 @router.get("/balance", response_model=list[LedgerBalanceOut])
 def ledger_balance(
     actor_id: int | None = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    if not _is_admin(db, current_actor.id):
+    if not auth.is_admin_like:
         if actor_id and actor_id != current_actor.id:
             return []
         actor_id = current_actor.id
-    query = (
-        db.query(
-            InventoryLedger.actor_id,
-            InventoryLedger.lot_id,
-            func.sum(InventoryLedger.quantity_delta).label("quantity"),
-        )
-        .group_by(InventoryLedger.actor_id, InventoryLedger.lot_id)
-    )
+    # Soldes matérialisés (app.ledger.balances) : lecture par clé, sans agrégation.
+    query = db.query(StockBalance.actor_id, StockBalance.lot_id, StockBalance.quantity)
     if actor_id:
-        query = query.filter(InventoryLedger.actor_id == actor_id)
-    results = query.all()
+        query = query.filter(StockBalance.actor_id == actor_id)
+    results = query.order_by(StockBalance.actor_id, StockBalance.lot_id).all()
     return [
         LedgerBalanceOut(
             actor_id=r.actor_id,
@@ -74,12 +109,3 @@ def ledger_balance(
         )
         for r in results
     ]
-
-
-def _is_admin(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role.in_(["admin", "dirigeant"]))
-        .first()
-        is not None
-    )
@@ -0,0 +1,203 @@
+"""
+Référence d'origine et code région d'un acteur, pour numéroter ses lots.
+
+`ActorCredentials` mémorise les résolutions le temps d'une requête (les N
+enfants d'une division ne relisent ni les cartes ni la région) et s'appuie
+sur un cache partagé entre requêtes, de durée
+`lot_credentials_cache_ttl_seconds` (0 = désactivé).
+
+Invalidation, comme pour le cache des rôles :
+- locale et immédiate via les événements ORM sur KaraBolamenaCard,
+  CollectorCard, ActorAuthorization et Actor.region_id ;
+- entre workers via la version LOT_CREDENTIALS_SCOPE (table
+  auth_cache_versions), incrémentée dans la transaction de la mutation et
+  relue au plus toutes les `auth_role_cache_version_poll_seconds`.
+"""
+
+import threading
+import time
+import weakref
+
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.auth.role_cache import bump_cache_version, read_cache_version
+from app.core.config import settings
+from app.models.actor import Actor
+from app.models.or_compliance import CollectorCard, KaraBolamenaCard
+from app.models.pierre import ActorAuthorization
+from app.models.territory import Region
+
+LOT_CREDENTIALS_SCOPE = "lot_credentials"
+
+_REGION = "__region__"
+
+
+class _EngineCache:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # (actor_id, filière | _REGION) -> (valeur, expiration)
+        self.entries: dict[tuple[int, str], tuple[str | None, float]] = {}
+        self.version = 0
+        self.version_checked_at = 0.0
+
+
+_caches: "weakref.WeakKeyDictionary[Engine, _EngineCache]" = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def _cache_for(engine: Engine) -> _EngineCache:
+    cache = _caches.get(engine)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.setdefault(engine, _EngineCache())
+    return cache
+
+
+def _sync_version(db: Session, cache: _EngineCache) -> None:
+    now = time.monotonic()
+    if now - cache.version_checked_at < settings.auth_role_cache_version_poll_seconds:
+        return
+    version = read_cache_version(db, LOT_CREDENTIALS_SCOPE)
+    with cache.lock:
+        if version != cache.version:
+            cache.entries.clear()
+            cache.version = version
+        cache.version_checked_at = now
+
+
+def actor_region_code(db: Session, actor_id: int) -> str | None:
+    actor = db.query(Actor).filter(Actor.id == actor_id).first()
+    if not actor or not actor.region_id:
+        return None
+    region = db.query(Region).filter(Region.id == actor.region_id).first()
+    return region.code if region else None
+
+
+def resolve_origin_reference(db: Session, actor_id: int, filiere: str) -> str:
+    target_filiere = (filiere or "").strip().upper()
+    if target_filiere == "OR":
+        kara = (
+            db.query(KaraBolamenaCard)
+            .filter(KaraBolamenaCard.actor_id == actor_id)
+            .filter(KaraBolamenaCard.status.in_(["active", "validated"]))
+            .order_by(KaraBolamenaCard.id.desc())
+            .first()
+        )
+        if kara and kara.card_number:
+            return f"KARABOLA:{kara.card_number}"
+        collector = (
+            db.query(CollectorCard)
+            .filter(CollectorCard.actor_id == actor_id)
+            .filter(CollectorCard.status.in_(["active", "validated"]))
+            .order_by(CollectorCard.id.desc())
+            .first()
+        )
+        if collector and collector.card_number:
+            return f"KARABOLA:{collector.card_number}"
+
+    auth = (
+        db.query(ActorAuthorization)
+        .filter(
+            ActorAuthorization.actor_id == actor_id,
+            ActorAuthorization.filiere == target_filiere,
+            ActorAuthorization.status == "active",
+        )
+        .order_by(ActorAuthorization.valid_to.desc(), ActorAuthorization.id.desc())
+        .first()
+    )
+    if auth and auth.numero:
+        return f"PERMIS:{auth.numero}"
+    return f"PERMIS:ACTOR-{actor_id}"
+
+
+class ActorCredentials:
+    """Résolutions d'un acteur pour une requête, adossées au cache partagé."""
+
+    def __init__(self, db: Session, actor_id: int) -> None:
+        self.db = db
+        self.actor_id = actor_id
+        self._values: dict[str, str | None] = {}
+
+    def _get(self, key: str, load):
+        if key in self._values:
+            return self._values[key]
+        ttl = settings.lot_credentials_cache_ttl_seconds
+        if ttl <= 0:
+            value = load()
+        else:
+            cache = _cache_for(self.db.get_bind())
+            _sync_version(self.db, cache)
+            hit = cache.entries.get((self.actor_id, key))
+            if hit and time.monotonic() < hit[1]:
+                value = hit[0]
+            else:
+                value = load()
+                with cache.lock:
+                    cache.entries[(self.actor_id, key)] = (value, time.monotonic() + ttl)
+        self._values[key] = value
+        return value
+
+    def region_code(self) -> str | None:
+        return self._get(_REGION, lambda: actor_region_code(self.db, self.actor_id))
+
+    def origin_reference(self, filiere: str) -> str:
+        key = (filiere or "").strip().upper()
+        return self._get(key, lambda: resolve_origin_reference(self.db, self.actor_id, key))
+
+
+def invalidate_actor_credentials(engine: Engine, actor_id: int) -> None:
+    cache = _cache_for(engine)
+    with cache.lock:
+        for key in [key for key in cache.entries if key[0] == actor_id]:
+            del cache.entries[key]
+        cache.version_checked_at = 0.0
+
+
+def _on_credentials_change(connection: Connection, actor_id: int | None) -> None:
+    if actor_id is None:
+        return
+    invalidate_actor_credentials(connection.engine, actor_id)
+    bump_cache_version(connection, LOT_CREDENTIALS_SCOPE)
+
+
+def _attr_changed(target, *names: str) -> bool:
+    state = inspect(target)
+    return any(state.attrs[name].history.has_changes() for name in names)
+
+
+def _previous_actor_id(target) -> int | None:
+    deleted = inspect(target).attrs.actor_id.history.deleted
+    return deleted[0] if deleted else None
+
+
+@event.listens_for(KaraBolamenaCard, "after_insert")
+@event.listens_for(KaraBolamenaCard, "after_delete")
+@event.listens_for(CollectorCard, "after_insert")
+@event.listens_for(CollectorCard, "after_delete")
+@event.listens_for(ActorAuthorization, "after_insert")
+@event.listens_for(ActorAuthorization, "after_delete")
+def _on_credential_row_change(_mapper, connection, target) -> None:
+    _on_credentials_change(connection, target.actor_id)
+
+
+@event.listens_for(KaraBolamenaCard, "after_update")
+@event.listens_for(CollectorCard, "after_update")
+def _on_card_update(_mapper, connection, target) -> None:
+    if _attr_changed(target, "status", "card_number", "actor_id"):
+        _on_credentials_change(connection, target.actor_id)
+        _on_credentials_change(connection, _previous_actor_id(target))
+
+
+@event.listens_for(ActorAuthorization, "after_update")
+def _on_authorization_update(_mapper, connection, target) -> None:
+    if _attr_changed(target, "status", "numero", "filiere", "valid_to", "actor_id"):
+        _on_credentials_change(connection, target.actor_id)
+        _on_credentials_change(connection, _previous_actor_id(target))
+
+
+@event.listens_for(Actor, "after_update")
+def _on_actor_region_update(_mapper, connection, target) -> None:
+    if _attr_changed(target, "region_id"):
+        _on_credentials_change(connection, target.id)
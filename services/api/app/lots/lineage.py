@@ -0,0 +1,187 @@
+"""
+Généalogie des lots (ascendants / descendants).
+
+Les filiations sont réparties entre plusieurs sources ; elles sont réunies
+en une relation d'arêtes (ancêtre -> descendant, quantité transmise) puis
+parcourues par une CTE récursive, en une seule requête. La relation est
+inlinée (sous-requête, pas CTE) dans chaque terme pour que PostgreSQL
+applique la jointure sur les index de chaque source :
+- `Lot.parent_lot_id` : lot dérivé d'un autre (division, cession partielle,
+  transformation OR) ; le parent est toujours antérieur à l'enfant ;
+- mouvements `consolidate_out` du registre : lot fusionné dans le lot
+  consolidé, apparié au mouvement `consolidate_in` de ce dernier par
+  `(movement_type, ref_event_id)` (index, sans conversion de `ref_event_id`) ;
+- `LotLink` : transformations bois ;
+- `PierreTransformationLink` : entrées -> sorties d'une même transformation.
+"""
+
+from dataclasses import dataclass
+from typing import Literal
+
+from sqlalchemy import Numeric, String, cast, literal, select, union_all
+from sqlalchemy.orm import Session, aliased
+
+from app.lots.schemas import LotLineageEdge, LotLineageNode, LotLineageOut
+from app.models.lot import InventoryLedger, Lot, LotLink
+from app.models.pierre import PierreTransformationLink
+
+Direction = Literal["up", "down"]
+
+MAX_LINEAGE_DEPTH = 50
+
+
+@dataclass
+class LineageEdge:
+    ancestor_lot_id: int
+    descendant_lot_id: int
+    relation_type: str
+    quantity: float
+    depth: int
+
+
+def _edges():
+    quantity_type = Numeric(14, 4)
+    relation_type = String(40)
+    derived = select(
+        Lot.parent_lot_id.label("ancestor_id"),
+        Lot.id.label("descendant_id"),
+        cast(literal("derivation"), relation_type).label("relation_type"),
+        cast(Lot.quantity, quantity_type).label("quantity"),
+    ).where(Lot.parent_lot_id.is_not(None), Lot.parent_lot_id < Lot.id)
+    merged = aliased(InventoryLedger)
+    into = aliased(InventoryLedger)
+    consolidated = (
+        select(
+            merged.lot_id.label("ancestor_id"),
+            into.lot_id.label("descendant_id"),
+            cast(literal("consolidation"), relation_type).label("relation_type"),
+            cast(-merged.quantity_delta, quantity_type).label("quantity"),
+        )
+        .join(into, into.ref_event_id == merged.ref_event_id)
+        .where(
+            merged.movement_type == "consolidate_out",
+            merged.ref_event_type == "consolidation",
+            into.movement_type == "consolidate_in",
+            into.ref_event_type == "consolidation",
+        )
+    )
+    linked = select(
+        LotLink.parent_lot_id.label("ancestor_id"),
+        LotLink.child_lot_id.label("descendant_id"),
+        cast(LotLink.relation_type, relation_type).label("relation_type"),
+        cast(LotLink.quantity_from_child, quantity_type).label("quantity"),
+    )
+    pierre_in = aliased(PierreTransformationLink)
+    pierre_out = aliased(PierreTransformationLink)
+    pierre = (
+        select(
+            pierre_in.lot_id.label("ancestor_id"),
+            pierre_out.lot_id.label("descendant_id"),
+            cast(literal("transformation"), relation_type).label("relation_type"),
+            cast(pierre_out.quantity, quantity_type).label("quantity"),
+        )
+        .join(pierre_out, pierre_out.transformation_event_id == pierre_in.transformation_event_id)
+        .where(pierre_in.link_type == "input", pierre_out.link_type == "output")
+    )
+    return union_all(derived, consolidated, linked, pierre).subquery("lot_lineage_edges")
+
+
+def lineage_edges(db: Session, lot_ids: list[int], *, direction: Direction, depth: int) -> list[LineageEdge]:
+    """
+    Arêtes atteintes depuis `lot_ids` en `depth` niveaux au plus : vers les
+    origines (`up`) ou vers les lots issus (`down`). Une arête atteinte par
+    plusieurs chemins n'est rendue qu'une fois, à sa profondeur minimale.
+    """
+    if not lot_ids or depth < 1:
+        return []
+    def _ends(edges):
+        # `up` : on remonte de descendant vers ancêtre ; `down` : l'inverse.
+        if direction == "up":
+            return edges.c.descendant_id, edges.c.ancestor_id
+        return edges.c.ancestor_id, edges.c.descendant_id
+
+    seed = _edges()
+    near, far = _ends(seed)
+    walk = (
+        select(
+            seed.c.ancestor_id,
+            seed.c.descendant_id,
+            seed.c.relation_type,
+            seed.c.quantity,
+            far.label("frontier_id"),
+            literal(1).label("depth"),
+        )
+        .where(near.in_(lot_ids))
+        .cte("lot_lineage_walk", recursive=True)
+    )
+    step = _edges()
+    near, far = _ends(step)
+    walk = walk.union_all(
+        select(
+            step.c.ancestor_id,
+            step.c.descendant_id,
+            step.c.relation_type,
+            step.c.quantity,
+            far,
+            walk.c.depth + 1,
+        )
+        .join(walk, near == walk.c.frontier_id)
+        .where(walk.c.depth < depth)
+    )
+    rows = db.execute(
+        select(
+            walk.c.ancestor_id,
+            walk.c.descendant_id,
+            walk.c.relation_type,
+            walk.c.quantity,
+            walk.c.depth,
+        ).order_by(walk.c.depth, walk.c.ancestor_id, walk.c.descendant_id)
+    ).all()
+    seen: dict[tuple[int, int, str], LineageEdge] = {}
+    for ancestor_id, descendant_id, relation, quantity, level in rows:
+        key = (ancestor_id, descendant_id, relation)
+        if key not in seen:
+            seen[key] = LineageEdge(
+                ancestor_lot_id=ancestor_id,
+                descendant_lot_id=descendant_id,
+                relation_type=relation,
+                quantity=float(quantity or 0),
+                depth=level,
+            )
+    return list(seen.values())
+
+
+def lineage_lots(db: Session, root_ids: list[int], edges: list[LineageEdge]) -> list[tuple[Lot, int]]:
+    """Lots du graphe (racines comprises) avec leur profondeur minimale."""
+    depths = dict.fromkeys(root_ids, 0)
+    # Les arêtes arrivent par profondeur croissante : la première vue est la plus courte.
+    for edge in edges:
+        depths.setdefault(edge.ancestor_lot_id, edge.depth)
+        depths.setdefault(edge.descendant_lot_id, edge.depth)
+    lots = db.query(Lot).filter(Lot.id.in_(list(depths))).all()
+    return sorted(((lot, depths[lot.id]) for lot in lots), key=lambda item: (item[1], item[0].id))
+
+
+def build_lineage(db: Session, root_ids: list[int], *, direction: Direction, depth: int) -> LotLineageOut:
+    edges = lineage_edges(db, root_ids, direction=direction, depth=depth)
+    return LotLineageOut(
+        root_lot_ids=root_ids,
+        direction=direction,
+        depth=depth,
+        nodes=[
+            LotLineageNode(
+                lot_id=lot.id,
+                lot_number=lot.lot_number,
+                traceability_id=lot.traceability_id,
+                filiere=lot.filiere,
+                product_type=lot.product_type,
+                unit=lot.unit,
+                quantity=float(lot.quantity),
+                status=lot.status,
+                current_owner_actor_id=lot.current_owner_actor_id,
+                depth=level,
+            )
+            for lot, level in lineage_lots(db, root_ids, edges)
+        ],
+        edges=[LotLineageEdge(**vars(edge)) for edge in edges],
+    )
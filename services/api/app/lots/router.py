@@ -1,34 +1,48 @@
-import hashlib
 import json
-from pathlib import Path
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_actor
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor
+from app.auth.roles_config import PERM_BOIS_CONTROL, PERM_CONTROLE_EXPORT, PERM_PIERRE_CONTROL, PERM_PROFIL_CONTROLEUR
 from app.audit.logger import write_audit
 from app.common.errors import bad_request
-from app.common.pagination import PaginatedResponse, PaginationParams, get_pagination
-from app.common.receipts import build_receipt_number, build_simple_pdf
+from app.common.pagination import PaginatedResponse, PaginationParams, get_pagination, paginate
+from app.common.receipts import build_receipt_number
 from app.common.traceability import build_lot_number, build_traceability_id, canonical_json, compute_chain_hash
 from app.core.config import settings
-from app.db import get_db
-from app.lots.schemas import LotConsolidate, LotCreate, LotOut, LotSplit, LotTransfer, LotWoodClassificationPatch
+from app.db import get_db, get_read_db
+from app.documents.jobs import queue_pdf_document
+from app.ledger.balances import add_ledger_rows
+from app.lots.credentials import ActorCredentials
+from app.lots.lineage import MAX_LINEAGE_DEPTH, Direction, build_lineage
+from app.lots.schemas import (
+    LotBatchCreate,
+    LotBatchItemResult,
+    LotBatchResult,
+    LotConsolidate,
+    LotCreate,
+    LotLineageOut,
+    LotOut,
+    LotSplit,
+    LotTransfer,
+    LotWoodClassificationPatch,
+)
 from app.models.actor import Actor
-from app.models.actor import ActorRole
 from app.models.document import Document
 from app.models.geo import GeoPoint
 from app.models.gold_ops import TransportEvent
 from app.models.lot import InventoryLedger, Lot
-from app.models.or_compliance import CollectorCard, KaraBolamenaCard
 from app.models.payment import PaymentRequest
-from app.models.territory import Region
 from app.or_compliance.rules import can_declare_or_lot, can_trade_or
 from app.models.pierre import ActorAuthorization, ProductCatalog
 from app.models.bois import ChecklistPolicy, EssenceCatalog
 
 router = APIRouter(prefix=f"{settings.api_prefix}/lots", tags=["lots"])
 
+LINEAGE_PERMISSIONS = (PERM_PROFIL_CONTROLEUR, PERM_CONTROLE_EXPORT, PERM_BOIS_CONTROL, PERM_PIERRE_CONTROL)
+
 WOOD_CLASSIFICATIONS = {
     "LEGAL_EXPORTABLE",
     "LEGAL_NON_EXPORTABLE",
@@ -39,15 +53,6 @@ CITES_STATUSES = {"not_required", "required", "pending", "approved", "rejected"}
 DESTRUCTION_STATUSES = {"pending", "approved", "validated", "rejected", "destroyed"}
 
 
-def _active_roles(db: Session, actor_id: int) -> set[str]:
-    rows = (
-        db.query(ActorRole.role)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.status == "active")
-        .all()
-    )
-    return {row[0] for row in rows}
-
-
 def _ensure_active_authorization(db: Session, actor_id: int, filiere: str) -> None:
     now = lot_now()
     auth = (
@@ -65,43 +70,6 @@ def _ensure_active_authorization(db: Session, actor_id: int, filiere: str) -> No
         raise bad_request("autorisation_expiree")
 
 
-def _check_required_docs(
-    db: Session,
-    actor_id: int,
-    filiere: str,
-    operation: str,
-    category: str | None,
-    document_ids: list[int],
-) -> None:
-    policy = (
-        db.query(ChecklistPolicy)
-        .filter(
-            ChecklistPolicy.filiere == filiere,
-            ChecklistPolicy.operation == operation,
-            ChecklistPolicy.status == "active",
-            ChecklistPolicy.effective_from <= lot_now(),
-        )
-        .order_by(ChecklistPolicy.id.desc())
-        .first()
-    )
-    if not policy:
-        return
-    if category and policy.category and policy.category != category:
-        return
-    required_doc_types = json.loads(policy.required_doc_types_json or "[]")
-    if not required_doc_types:
-        return
-    docs = (
-        db.query(Document.doc_type)
-        .filter(Document.id.in_(document_ids), Document.owner_actor_id == actor_id)
-        .all()
-    )
-    present = {d[0] for d in docs}
-    missing = [doc_type for doc_type in required_doc_types if doc_type not in present]
-    if missing:
-        raise bad_request("checklist_incomplete", {"missing_doc_types": missing})
-
-
 def _infer_wood_classification(essence: EssenceCatalog, payload: LotCreate) -> str:
     attrs = payload.attributes or {}
     illegal_flag = bool(attrs.get("illegal_flag")) or bool(attrs.get("illegal"))
@@ -137,18 +105,161 @@ def _parse_destruction_evidence(raw: str | None) -> list[str]:
         return []
 
 
-@router.post("", response_model=LotOut, status_code=201)
-def create_lot(
-    payload: LotCreate,
-    db: Session = Depends(get_db),
-    current_actor=Depends(get_current_actor),
-):
-    if current_actor.id != payload.declared_by_actor_id:
-        raise bad_request("acces_refuse")
-    geo = db.query(GeoPoint).filter_by(id=payload.declare_geo_point_id).first()
-    if not geo:
+class _DeclarationLookups:
+    """
+    Référentiels consultés pour valider les déclarations de lots d'un acteur.
+
+    Sans `prefetch`, chaque valeur est lue à la demande (déclaration unitaire) ;
+    `prefetch` charge en une requête par table tout ce dont un lot de
+    déclarations a besoin (POST /lots/batch).
+    """
+
+    def __init__(self, db: Session, actor_id: int) -> None:
+        self.db = db
+        self.actor_id = actor_id
+        self._actor: Actor | None = None
+        self._actor_loaded = False
+        self._geo_ids: dict[int, bool] = {}
+        self._products: dict[int, ProductCatalog | None] = {}
+        self._essences: dict[int, EssenceCatalog | None] = {}
+        self._authorizations: dict[str, bool] = {}
+        self._or_declaration: tuple[bool, str | None] | None = None
+        self._checklist_policies: dict[tuple[str, str], ChecklistPolicy | None] = {}
+        self._owned_doc_types: dict[int, str | None] = {}
+
+    def prefetch(self, payloads: list[LotCreate]) -> None:
+        now = lot_now()
+        geo_ids = {p.declare_geo_point_id for p in payloads} - set(self._geo_ids)
+        if geo_ids:
+            found = {row[0] for row in self.db.query(GeoPoint.id).filter(GeoPoint.id.in_(geo_ids)).all()}
+            self._geo_ids.update({geo_id: geo_id in found for geo_id in geo_ids})
+        product_ids = {p.product_catalog_id for p in payloads if p.product_catalog_id} - set(self._products)
+        if product_ids:
+            rows = (
+                self.db.query(ProductCatalog)
+                .filter(ProductCatalog.id.in_(product_ids), ProductCatalog.status == "active")
+                .all()
+            )
+            by_id = {row.id: row for row in rows}
+            self._products.update({product_id: by_id.get(product_id) for product_id in product_ids})
+        essence_ids = {p.wood_essence_id for p in payloads if p.wood_essence_id} - set(self._essences)
+        if essence_ids:
+            rows = (
+                self.db.query(EssenceCatalog)
+                .filter(EssenceCatalog.id.in_(essence_ids), EssenceCatalog.status == "active")
+                .all()
+            )
+            by_id = {row.id: row for row in rows}
+            self._essences.update({essence_id: by_id.get(essence_id) for essence_id in essence_ids})
+        filieres = {p.filiere for p in payloads if p.filiere in {"PIERRE", "BOIS"}} - set(self._authorizations)
+        if filieres:
+            active = {
+                row[0]
+                for row in self.db.query(ActorAuthorization.filiere)
+                .filter(
+                    ActorAuthorization.actor_id == self.actor_id,
+                    ActorAuthorization.filiere.in_(filieres),
+                    ActorAuthorization.status == "active",
+                    ActorAuthorization.valid_from <= now,
+                    ActorAuthorization.valid_to >= now,
+                )
+                .distinct()
+                .all()
+            }
+            self._authorizations.update({filiere: filiere in active for filiere in filieres})
+        document_ids = {doc_id for p in payloads for doc_id in (p.document_ids or [])} - set(self._owned_doc_types)
+        if document_ids:
+            rows = (
+                self.db.query(Document.id, Document.doc_type)
+                .filter(Document.id.in_(document_ids), Document.owner_actor_id == self.actor_id)
+                .all()
+            )
+            by_id = {row[0]: row[1] for row in rows}
+            self._owned_doc_types.update({doc_id: by_id.get(doc_id) for doc_id in document_ids})
+
+    @property
+    def actor(self) -> Actor | None:
+        if not self._actor_loaded:
+            self._actor = self.db.query(Actor).filter_by(id=self.actor_id).first()
+            self._actor_loaded = True
+        return self._actor
+
+    def geo_exists(self, geo_point_id: int) -> bool:
+        if geo_point_id not in self._geo_ids:
+            self._geo_ids[geo_point_id] = (
+                self.db.query(GeoPoint.id).filter_by(id=geo_point_id).first() is not None
+            )
+        return self._geo_ids[geo_point_id]
+
+    def product(self, product_id: int) -> ProductCatalog | None:
+        if product_id not in self._products:
+            self._products[product_id] = (
+                self.db.query(ProductCatalog).filter_by(id=product_id, status="active").first()
+            )
+        return self._products[product_id]
+
+    def essence(self, essence_id: int) -> EssenceCatalog | None:
+        if essence_id not in self._essences:
+            self._essences[essence_id] = (
+                self.db.query(EssenceCatalog).filter_by(id=essence_id, status="active").first()
+            )
+        return self._essences[essence_id]
+
+    def has_active_authorization(self, filiere: str) -> bool:
+        if filiere not in self._authorizations:
+            try:
+                _ensure_active_authorization(self.db, self.actor_id, filiere)
+            except HTTPException:
+                self._authorizations[filiere] = False
+            else:
+                self._authorizations[filiere] = True
+        return self._authorizations[filiere]
+
+    def or_declaration(self) -> tuple[bool, str | None]:
+        if self._or_declaration is None:
+            self._or_declaration = can_declare_or_lot(self.db, self.actor_id)
+        return self._or_declaration
+
+    def missing_doc_types(self, filiere: str, operation: str, category: str | None, document_ids: list[int]) -> list[str]:
+        key = (filiere, operation)
+        if key not in self._checklist_policies:
+            self._checklist_policies[key] = (
+                self.db.query(ChecklistPolicy)
+                .filter(
+                    ChecklistPolicy.filiere == filiere,
+                    ChecklistPolicy.operation == operation,
+                    ChecklistPolicy.status == "active",
+                    ChecklistPolicy.effective_from <= lot_now(),
+                )
+                .order_by(ChecklistPolicy.id.desc())
+                .first()
+            )
+        policy = self._checklist_policies[key]
+        if not policy:
+            return []
+        if category and policy.category and policy.category != category:
+            return []
+        required_doc_types = json.loads(policy.required_doc_types_json or "[]")
+        if not required_doc_types:
+            return []
+        unknown = [doc_id for doc_id in document_ids if doc_id not in self._owned_doc_types]
+        if unknown:
+            rows = (
+                self.db.query(Document.id, Document.doc_type)
+                .filter(Document.id.in_(unknown), Document.owner_actor_id == self.actor_id)
+                .all()
+            )
+            by_id = {row[0]: row[1] for row in rows}
+            self._owned_doc_types.update({doc_id: by_id.get(doc_id) for doc_id in unknown})
+        present = {self._owned_doc_types[doc_id] for doc_id in document_ids} - {None}
+        return [doc_type for doc_type in required_doc_types if doc_type not in present]
+
+
+def _validate_lot_declaration(lookups: _DeclarationLookups, payload: LotCreate, auth: AuthContext) -> dict:
+    """Contrôles métier d'une déclaration ; renvoie les champs bois/CITES déduits."""
+    if not lookups.geo_exists(payload.declare_geo_point_id):
         raise bad_request("gps_obligatoire")
-    actor = db.query(Actor).filter_by(id=payload.declared_by_actor_id).first()
+    actor = lookups.actor
     if not actor:
         raise bad_request("acteur_invalide")
     if actor.status != "active":
@@ -156,30 +267,17 @@ def create_lot(
     if payload.filiere == "OR" and payload.unit not in {"g", "kg", "akotry"}:
         raise bad_request("unite_non_autorisee")
     if payload.filiere == "OR":
-        allowed, reason = can_declare_or_lot(db, actor.id)
+        allowed, reason = lookups.or_declaration()
         if not allowed:
             raise bad_request(reason or "or_declaration_bloquee")
     if payload.filiere == "PIERRE":
-        if actor.status != "active":
-            raise bad_request("compte_inactif")
         if not payload.sous_filiere:
             raise bad_request("sous_filiere_obligatoire")
-        auth = (
-            db.query(ActorAuthorization.id)
-            .filter(
-                ActorAuthorization.actor_id == actor.id,
-                ActorAuthorization.filiere == "PIERRE",
-                ActorAuthorization.status == "active",
-                ActorAuthorization.valid_from <= lot_now(),
-                ActorAuthorization.valid_to >= lot_now(),
-            )
-            .first()
-        )
-        if not auth:
+        if not lookups.has_active_authorization("PIERRE"):
             raise bad_request("autorisation_expiree")
         if not payload.product_catalog_id:
             raise bad_request("product_catalog_obligatoire")
-        product = db.query(ProductCatalog).filter_by(id=payload.product_catalog_id, status="active").first()
+        product = lookups.product(payload.product_catalog_id)
         if not product:
             raise bad_request("catalog_produit_introuvable")
         if product.filiere != "PIERRE":
@@ -194,11 +292,13 @@ def create_lot(
         missing = sorted([key for key in required_attrs if key not in incoming_attrs or incoming_attrs.get(key) in (None, "", [])])
         if missing:
             raise bad_request("attributs_catalogue_manquants", {"missing": missing})
-    wood_classification = None
-    cites_laf_status = None
-    cites_ndf_status = None
-    cites_international_status = None
 
+    wood_fields = {
+        "wood_classification": None,
+        "cites_laf_status": None,
+        "cites_ndf_status": None,
+        "cites_international_status": None,
+    }
     if payload.filiere == "BOIS":
         allowed_roles = {
             "admin",
@@ -211,14 +311,15 @@ def create_lot(
             "bois_exportateur",
             "bois_admin_central",
         }
-        if _active_roles(db, actor.id).isdisjoint(allowed_roles):
+        if not auth.has_any_role(allowed_roles):
             raise bad_request("role_insuffisant")
-        _ensure_active_authorization(db, actor.id, "BOIS")
+        if not lookups.has_active_authorization("BOIS"):
+            raise bad_request("autorisation_expiree")
         if not payload.wood_essence_id:
             raise bad_request("wood_essence_obligatoire")
         if not payload.wood_form:
             raise bad_request("wood_form_obligatoire")
-        essence = db.query(EssenceCatalog).filter_by(id=payload.wood_essence_id, status="active").first()
+        essence = lookups.essence(payload.wood_essence_id)
         if not essence:
             raise bad_request("essence_introuvable")
         if payload.wood_form not in {"tronc", "grume", "billon", "planche", "lot_scie", "produit_fini"}:
@@ -227,95 +328,180 @@ def create_lot(
             raise bad_request("unite_non_autorisee")
         if payload.unit == "m3" and payload.volume_m3 is None:
             raise bad_request("volume_m3_obligatoire")
-        _check_required_docs(
-            db=db,
-            actor_id=actor.id,
-            filiere="BOIS",
-            operation="declaration",
-            category=essence.categorie,
-            document_ids=payload.document_ids or [],
-        )
+        missing_docs = lookups.missing_doc_types("BOIS", "declaration", essence.categorie, payload.document_ids or [])
+        if missing_docs:
+            raise bad_request("checklist_incomplete", {"missing_doc_types": missing_docs})
         wood_classification = _infer_wood_classification(essence, payload)
-        requires_cites = bool(essence.requires_cites)
-        cites_laf_status = "required" if requires_cites else "not_required"
-        cites_ndf_status = "required" if requires_cites else "not_required"
-        cites_international_status = "required" if requires_cites else "not_required"
-
-    lot = Lot(
-        filiere=payload.filiere,
-        sous_filiere=payload.sous_filiere,
-        product_catalog_id=payload.product_catalog_id,
-        wood_essence_id=payload.wood_essence_id,
-        wood_form=payload.wood_form,
-        volume_m3=payload.volume_m3,
-        attributes_json=json.dumps(payload.attributes or {}, ensure_ascii=True),
-        product_type=payload.product_type,
-        unit=payload.unit,
-        quantity=payload.quantity,
-        declared_by_actor_id=payload.declared_by_actor_id,
-        current_owner_actor_id=payload.declared_by_actor_id,
-        status="suspect" if wood_classification == "ILLEGAL" else "available",
-        declare_geo_point_id=payload.declare_geo_point_id,
-        notes=payload.notes,
-        photo_urls_json=json.dumps(payload.photo_urls, ensure_ascii=True),
-        wood_classification=wood_classification,
-        cites_laf_status=cites_laf_status,
-        cites_ndf_status=cites_ndf_status,
-        cites_international_status=cites_international_status,
-    )
-    db.add(lot)
+        cites_status = "required" if bool(essence.requires_cites) else "not_required"
+        wood_fields = {
+            "wood_classification": wood_classification,
+            "cites_laf_status": cites_status,
+            "cites_ndf_status": cites_status,
+            "cites_international_status": cites_status,
+        }
+    return wood_fields
+
+
+def _declare_lots(db: Session, actor_id: int, declarations: list[tuple[LotCreate, dict]]) -> list[Lot]:
+    """
+    Insère des lots validés avec leur mouvement de stock, leur empreinte et
+    leur reçu (mis en file de rendu). Les INSERT sont groupés (un par table et par flush) ; numéros,
+    empreintes et QR sont calculés en mémoire. Le commit reste à l'appelant.
+    """
+    lots = [
+        Lot(
+            filiere=payload.filiere,
+            sous_filiere=payload.sous_filiere,
+            product_catalog_id=payload.product_catalog_id,
+            wood_essence_id=payload.wood_essence_id,
+            wood_form=payload.wood_form,
+            volume_m3=payload.volume_m3,
+            attributes_json=json.dumps(payload.attributes or {}, ensure_ascii=True),
+            product_type=payload.product_type,
+            unit=payload.unit,
+            quantity=payload.quantity,
+            declared_by_actor_id=actor_id,
+            current_owner_actor_id=actor_id,
+            status="suspect" if wood_fields["wood_classification"] == "ILLEGAL" else "available",
+            declare_geo_point_id=payload.declare_geo_point_id,
+            notes=payload.notes,
+            photo_urls_json=json.dumps(payload.photo_urls, ensure_ascii=True),
+            **wood_fields,
+        )
+        for payload, wood_fields in declarations
+    ]
+    db.add_all(lots)
     db.flush()
-    origin_ref = _resolve_origin_reference(db, actor_id=actor.id, filiere=payload.filiere)
-    lot.origin_reference = origin_ref
-    lot.lot_number = build_lot_number(
-        region_code=_actor_region_code(db, actor.id),
-        permit_ref=origin_ref.split(":", 1)[-1],
-        lot_id=lot.id,
-    )
-    lot.traceability_id = build_traceability_id(
-        lot_number=lot.lot_number,
-        origin_ref=origin_ref,
-        lot_id=lot.id,
-    )
-    lot.declaration_receipt_number = build_receipt_number("LOT", lot.id)
-    db.add(
-        InventoryLedger(
-            actor_id=payload.declared_by_actor_id,
+
+    credentials = ActorCredentials(db, actor_id)
+    for lot in lots:
+        origin_ref = credentials.origin_reference(lot.filiere)
+        lot.origin_reference = origin_ref
+        lot.lot_number = build_lot_number(
+            region_code=credentials.region_code(),
+            permit_ref=origin_ref.split(":", 1)[-1],
             lot_id=lot.id,
-            movement_type="create",
-            quantity_delta=payload.quantity,
-            ref_event_type="lot",
-            ref_event_id=str(lot.id),
         )
-    )
-    db.flush()
-    _refresh_lot_trace(
+        lot.traceability_id = build_traceability_id(
+            lot_number=lot.lot_number,
+            origin_ref=origin_ref,
+            lot_id=lot.id,
+        )
+        lot.declaration_receipt_number = build_receipt_number("LOT", lot.id)
+        _refresh_lot_trace(
+            db,
+            lot,
+            event_type="create",
+            event_ref=str(lot.id),
+            previous_hash=None,
+            history=[f"create:lot:{lot.id}"],
+        )
+    # Insertion groupée sans relecture des clés : une seule instruction (plus les soldes).
+    add_ledger_rows(
         db,
-        lot,
-        event_type="create",
-        event_ref=str(lot.id),
-        previous_hash=None,
+        [
+            {
+                "actor_id": actor_id,
+                "lot_id": lot.id,
+                "movement_type": "create",
+                "quantity_delta": lot.quantity,
+                "ref_event_type": "lot",
+                "ref_event_id": str(lot.id),
+            }
+            for lot in lots
+        ],
     )
-    lot.declaration_receipt_document_id = _create_lot_receipt_document(db, lot)
-    write_audit(
-        db,
-        actor_id=payload.declared_by_actor_id,
-        action="lot_created",
-        entity_type="lot",
-        entity_id=str(lot.id),
-        meta={"quantity": str(payload.quantity), "unit": payload.unit, "receipt": lot.declaration_receipt_number},
+    cursors = dict(
+        db.query(InventoryLedger.lot_id, func.max(InventoryLedger.id))
+        .filter(InventoryLedger.lot_id.in_([lot.id for lot in lots]))
+        .group_by(InventoryLedger.lot_id)
+        .all()
     )
+    for lot in lots:
+        lot.trace_ledger_cursor = cursors.get(lot.id)
+    documents = [_queue_lot_receipt_document(db, lot) for lot in lots]
+    db.flush()
+    for lot, doc in zip(lots, documents):
+        lot.declaration_receipt_document_id = doc.id
+        write_audit(
+            db,
+            actor_id=actor_id,
+            action="lot_created",
+            entity_type="lot",
+            entity_id=str(lot.id),
+            meta={"quantity": str(lot.quantity), "unit": lot.unit, "receipt": lot.declaration_receipt_number},
+        )
+    return lots
+
+
+@router.post("", response_model=LotOut, status_code=201)
+def create_lot(
+    payload: LotCreate,
+    db: Session = Depends(get_db),
+    current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
+):
+    if current_actor.id != payload.declared_by_actor_id:
+        raise bad_request("acces_refuse")
+    lookups = _DeclarationLookups(db, payload.declared_by_actor_id)
+    wood_fields = _validate_lot_declaration(lookups, payload, auth)
+    lot = _declare_lots(db, payload.declared_by_actor_id, [(payload, wood_fields)])[0]
     db.commit()
     db.refresh(lot)
     return _to_lot_out(lot)
 
 
+@router.post("/batch", response_model=LotBatchResult)
+def create_lots_batch(
+    payload: LotBatchCreate,
+    db: Session = Depends(get_db),
+    current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
+):
+    """
+    Déclare plusieurs lots en une transaction (retour de campagne terrain).
+
+    Chaque déclaration est validée comme POST /lots, avec des lectures
+    groupées ; les déclarations refusées sont rapportées avec leur code
+    d'erreur et n'empêchent pas l'enregistrement des autres.
+    """
+    lookups = _DeclarationLookups(db, current_actor.id)
+    lookups.prefetch(payload.lots)
+    results: list[LotBatchItemResult] = []
+    accepted: list[tuple[int, LotCreate, dict]] = []
+    for index, item in enumerate(payload.lots):
+        try:
+            if current_actor.id != item.declared_by_actor_id:
+                raise bad_request("acces_refuse")
+            accepted.append((index, item, _validate_lot_declaration(lookups, item, auth)))
+        except HTTPException as exc:
+            detail = exc.detail if isinstance(exc.detail, dict) else {"message": str(exc.detail)}
+            results.append(
+                LotBatchItemResult(
+                    index=index,
+                    status="rejected",
+                    error=detail.get("message"),
+                    details=detail.get("details"),
+                )
+            )
+    if accepted:
+        lots = _declare_lots(db, current_actor.id, [(item, wood_fields) for _, item, wood_fields in accepted])
+        # Réponses construites avant le commit : évite un rechargement par lot.
+        results.extend(
+            LotBatchItemResult(index=index, status="created", lot=_to_lot_out(lot))
+            for (index, _, _), lot in zip(accepted, lots)
+        )
+        db.commit()
+    results.sort(key=lambda result: result.index)
+    return LotBatchResult(created=len(accepted), rejected=len(payload.lots) - len(accepted), items=results)
+
+
 @router.get("", response_model=PaginatedResponse[LotOut])
 def list_lots(
     owner_actor_id: int | None = None,
     status: str | None = None,
     pagination: PaginationParams = Depends(get_pagination),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(get_current_actor),
 ):
     query = db.query(Lot)
@@ -328,15 +514,9 @@ def list_lots(
     if status:
         query = query.filter(Lot.status == status)
 
-    total = query.count()
-    lots = (
-        query.order_by(Lot.declared_at.desc())
-        .offset(pagination.offset)
-        .limit(pagination.limit)
-        .all()
-    )
-    items = [_to_lot_out(lot) for lot in lots]
-    return PaginatedResponse.create(items, total, pagination.page, pagination.page_size)
+    page = paginate(query, sort_column=Lot.declared_at, id_column=Lot.id, pagination=pagination)
+    items = [_to_lot_out(lot) for lot in page.rows]
+    return PaginatedResponse.create(items, page.total, pagination.page, pagination.page_size, page.next_cursor)
 
 
 @router.get("/{lot_id}", response_model=LotOut)
@@ -353,6 +533,24 @@ def get_lot(
     return _to_lot_out(lot)
 
 
+@router.get("/{lot_id}/lineage", response_model=LotLineageOut)
+def get_lot_lineage(
+    lot_id: int,
+    direction: Direction = Query("up"),
+    depth: int = Query(10, ge=1, le=MAX_LINEAGE_DEPTH),
+    db: Session = Depends(get_read_db),
+    current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
+):
+    lot = db.query(Lot).filter_by(id=lot_id).first()
+    if not lot:
+        raise bad_request("lot_introuvable")
+    can_control = auth.is_admin_like or any(auth.has_permission(perm) for perm in LINEAGE_PERMISSIONS)
+    if lot.current_owner_actor_id != current_actor.id and not can_control:
+        raise bad_request("acces_refuse")
+    return build_lineage(db, [lot.id], direction=direction, depth=depth)
+
+
 @router.post("/{lot_id}/transfer", response_model=LotOut)
 def transfer_lot(
     lot_id: int,
@@ -478,9 +676,10 @@ def consolidate_lots(
     )
     db.add(parent)
     db.flush()
-    parent.origin_reference = lots[0].origin_reference or _resolve_origin_reference(db, actor_id=current_actor.id, filiere=lots[0].filiere)
+    credentials = ActorCredentials(db, current_actor.id)
+    parent.origin_reference = lots[0].origin_reference or credentials.origin_reference(lots[0].filiere)
     parent.lot_number = build_lot_number(
-        region_code=_actor_region_code(db, current_actor.id),
+        region_code=credentials.region_code(),
         permit_ref=(parent.origin_reference or "").split(":", 1)[-1],
         lot_id=parent.id,
     )
@@ -499,7 +698,6 @@ def consolidate_lots(
     child_traces: list[tuple[Lot, str | None]] = []
     for lot in lots:
         previous_hash = lot.current_block_hash
-        lot.parent_lot_id = parent.id
         lot.status = "consolidated"
         db.add(
             InventoryLedger(
@@ -570,6 +768,7 @@ def split_lot(
         raise bad_request("quantites_invalides")
     children = []
     parent_previous_hash = lot.current_block_hash
+    credentials = ActorCredentials(db, current_actor.id)
     for qty in payload.quantities:
         child = Lot(
             filiere=lot.filiere,
@@ -600,9 +799,9 @@ def split_lot(
         )
         db.add(child)
         db.flush()
-        child.origin_reference = lot.origin_reference or _resolve_origin_reference(db, actor_id=current_actor.id, filiere=lot.filiere)
+        child.origin_reference = lot.origin_reference or credentials.origin_reference(lot.filiere)
         child.lot_number = build_lot_number(
-            region_code=_actor_region_code(db, current_actor.id),
+            region_code=credentials.region_code(),
             permit_ref=(child.origin_reference or "").split(":", 1)[-1],
             lot_id=child.id,
         )
@@ -669,15 +868,15 @@ def patch_wood_classification(
     payload: LotWoodClassificationPatch,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     lot = db.query(Lot).filter_by(id=lot_id).first()
     if not lot:
         raise bad_request("lot_introuvable")
     if lot.filiere != "BOIS":
         raise bad_request("lot_non_bois")
-    roles = _active_roles(db, current_actor.id)
     allowed = {"admin", "dirigeant", "forets", "bois_admin_central", "bois_controleur", "bois_douanes"}
-    if roles.isdisjoint(allowed):
+    if not auth.has_any_role(allowed):
         raise bad_request("acces_refuse")
 
     now = lot_now()
@@ -767,64 +966,46 @@ def _parse_photo_urls(raw: str | None) -> list[str]:
         return []
 
 
-def _actor_region_code(db: Session, actor_id: int) -> str | None:
-    actor = db.query(Actor).filter(Actor.id == actor_id).first()
-    if not actor or not actor.region_id:
+TRACE_HISTORY_LIMIT = 8
+
+
+def _ledger_ref(row) -> str:
+    return f"{row.movement_type}:{row.ref_event_type}:{row.ref_event_id}"
+
+
+def _previous_trace_history(lot: Lot) -> list[str] | None:
+    if lot.trace_ledger_cursor is None or not lot.trace_payload_json:
         return None
-    region = db.query(Region).filter(Region.id == actor.region_id).first()
-    return region.code if region else None
-
-
-def _resolve_origin_reference(db: Session, actor_id: int, filiere: str) -> str:
-    target_filiere = (filiere or "").strip().upper()
-    if target_filiere == "OR":
-        kara = (
-            db.query(KaraBolamenaCard)
-            .filter(KaraBolamenaCard.actor_id == actor_id)
-            .filter(KaraBolamenaCard.status.in_(["active", "validated"]))
-            .order_by(KaraBolamenaCard.id.desc())
-            .first()
-        )
-        if kara and kara.card_number:
-            return f"KARABOLA:{kara.card_number}"
-        collector = (
-            db.query(CollectorCard)
-            .filter(CollectorCard.actor_id == actor_id)
-            .filter(CollectorCard.status.in_(["active", "validated"]))
-            .order_by(CollectorCard.id.desc())
-            .first()
-        )
-        if collector and collector.card_number:
-            return f"KARABOLA:{collector.card_number}"
+    try:
+        history = json.loads(lot.trace_payload_json).get("history")
+    except (ValueError, AttributeError):
+        return None
+    return history if isinstance(history, list) else None
 
-    auth = (
-        db.query(ActorAuthorization)
-        .filter(
-            ActorAuthorization.actor_id == actor_id,
-            ActorAuthorization.filiere == target_filiere,
-            ActorAuthorization.status == "active",
-        )
-        .order_by(ActorAuthorization.valid_to.desc(), ActorAuthorization.id.desc())
-        .first()
-    )
-    if auth and auth.numero:
-        return f"PERMIS:{auth.numero}"
-    return f"PERMIS:ACTOR-{actor_id}"
 
+def _lot_history_tail(db: Session, lot: Lot, limit: int = TRACE_HISTORY_LIMIT) -> list[str]:
+    """
+    Dernières références du ledger du lot, sans relire tout l'historique.
 
-def _lot_history_refs(db: Session, lot_id: int, limit: int = 6) -> list[str]:
-    rows = (
-        db.query(InventoryLedger)
-        .filter(InventoryLedger.lot_id == lot_id)
-        .order_by(InventoryLedger.created_at.asc(), InventoryLedger.id.asc())
-        .all()
-    )
-    refs = [
-        f"{row.movement_type}:{row.ref_event_type}:{row.ref_event_id}"
-        for row in rows
-    ]
-    if len(refs) <= limit:
-        return refs
+    La queue enregistrée dans l'empreinte précédente est complétée par les
+    seuls mouvements postérieurs à `trace_ledger_cursor` (dernier id de ledger
+    déjà intégré). Sans curseur (lots antérieurs), le ledger est relu une fois.
+    """
+    tail = _previous_trace_history(lot)
+    query = db.query(
+        InventoryLedger.id,
+        InventoryLedger.movement_type,
+        InventoryLedger.ref_event_type,
+        InventoryLedger.ref_event_id,
+    ).filter(InventoryLedger.lot_id == lot.id)
+    if tail is None:
+        tail = []
+    else:
+        query = query.filter(InventoryLedger.id > lot.trace_ledger_cursor)
+    rows = query.order_by(InventoryLedger.created_at.asc(), InventoryLedger.id.asc()).all()
+    if rows:
+        lot.trace_ledger_cursor = max(row.id for row in rows)
+    refs = tail + [_ledger_ref(row) for row in rows]
     return refs[-limit:]
 
 
@@ -835,9 +1016,11 @@ def _refresh_lot_trace(
     event_type: str,
     event_ref: str,
     previous_hash: str | None,
+    history: list[str] | None = None,
 ) -> None:
     prior_hash = previous_hash or lot.current_block_hash or "GENESIS"
-    history = _lot_history_refs(db, lot.id, limit=8)
+    if history is None:
+        history = _lot_history_tail(db, lot)
     payload = {
         "lot_id": lot.id,
         "lot_number": lot.lot_number,
@@ -879,10 +1062,19 @@ def _refresh_lot_trace(
 
 
 def _create_lot_receipt_document(db: Session, lot: Lot) -> int:
-    storage_dir = Path(settings.document_storage_dir)
-    storage_dir.mkdir(parents=True, exist_ok=True)
-    filename = f"{lot.declaration_receipt_number}.pdf"
-    content = build_simple_pdf(
+    doc = _queue_lot_receipt_document(db, lot)
+    db.flush()
+    return doc.id
+
+
+def _queue_lot_receipt_document(db: Session, lot: Lot) -> Document:
+    return queue_pdf_document(
+        db,
+        doc_type="lot_receipt",
+        owner_actor_id=lot.declared_by_actor_id,
+        related_entity_type="lot",
+        related_entity_id=str(lot.id),
+        filename=f"{lot.declaration_receipt_number}.pdf",
         title="Recu de declaration de lot",
         lines=[
             f"Numero: {lot.declaration_receipt_number}",
@@ -897,21 +1089,6 @@ def _create_lot_receipt_document(db: Session, lot: Lot) -> int:
             f"QR: {lot.qr_code}",
         ],
     )
-    storage_path = storage_dir / filename
-    storage_path.write_bytes(content)
-    sha256 = hashlib.sha256(content).hexdigest()
-    doc = Document(
-        doc_type="lot_receipt",
-        owner_actor_id=lot.declared_by_actor_id,
-        related_entity_type="lot",
-        related_entity_id=str(lot.id),
-        storage_path=str(storage_path),
-        original_filename=filename,
-        sha256=sha256,
-    )
-    db.add(doc)
-    db.flush()
-    return doc.id
 
 
 def _to_lot_out(lot: Lot) -> LotOut:
@@ -63,6 +63,24 @@ class LotOut(BaseModel):
     destruction_evidence_urls: list[str] = []
 
 
+class LotBatchCreate(BaseModel):
+    lots: list[LotCreate] = Field(min_length=1, max_length=1000)
+
+
+class LotBatchItemResult(BaseModel):
+    index: int
+    status: str
+    lot: LotOut | None = None
+    error: str | None = None
+    details: dict | None = None
+
+
+class LotBatchResult(BaseModel):
+    created: int
+    rejected: int
+    items: list[LotBatchItemResult]
+
+
 class LotTransfer(BaseModel):
     new_owner_actor_id: int
     payment_request_id: int
@@ -79,6 +97,35 @@ class LotSplit(BaseModel):
     quantities: list[float]
 
 
+class LotLineageNode(BaseModel):
+    lot_id: int
+    lot_number: str | None = None
+    traceability_id: str | None = None
+    filiere: str
+    product_type: str
+    unit: str
+    quantity: float
+    status: str
+    current_owner_actor_id: int
+    depth: int
+
+
+class LotLineageEdge(BaseModel):
+    ancestor_lot_id: int
+    descendant_lot_id: int
+    relation_type: str
+    quantity: float
+    depth: int
+
+
+class LotLineageOut(BaseModel):
+    root_lot_ids: list[int]
+    direction: str
+    depth: int
+    nodes: list[LotLineageNode]
+    edges: list[LotLineageEdge]
+
+
 class LotWoodClassificationPatch(BaseModel):
     wood_classification: str | None = None
     cites_laf_status: str | None = None
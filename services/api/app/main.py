@@ -1,15 +1,21 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.db import engine
+from app.db import engine, mark_recent_write
 from app.core.config import settings
-from sqlalchemy import text
+from app.core.schema import run_startup_check
+from app.core.metrics import PrometheusMiddleware, mark_process_dead, render_metrics, require_metrics_token
+from app.core.sql_metrics import SqlInstrumentationMiddleware
+from app.common.responses import FastJSONResponse
 from app.actors.router import router as actors_router
 from app.admin.router import router as admin_router
 from app.audit.router import router as audit_router
 from app.approvals.router import router as approvals_router
 from app.catalog.router import router as catalog_router
 from app.actor_authorizations.router import router as actor_authorizations_router
+from app.auth.password_pool import password_pool
 from app.auth.router import router as auth_router
 from app.dashboards.router import router as dashboards_router
 from app.documents.router import router as documents_router
@@ -43,56 +49,33 @@ from app.transports.router import router as transports_router
 from app.verify.router import router as verify_router
 from app.violations.router import router as violations_router
 from app.wood_catalog.router import router as wood_catalog_router
-from app.models.actor_filiere import ActorFiliere
-from app.models.actor import ActorKYC, ActorWallet, CommuneProfile
-from app.models.or_compliance import (
-    CollectorAffiliationAgreement,
-    CollectorCard,
-    CollectorCardDocument,
-    CollectorCardFeeSplit,
-    CollectorRegister,
-    CollectorSemiAnnualReport,
-    ComplianceNotification,
-    ComptoirLicense,
-    KaraBolamenaCard,
-    KaraProductionLog,
-    OrTariffConfig,
-)
-from app.models.pierre import (
-    ActorAuthorization,
-    ExportColis,
-    ExportSeal,
-    ExportValidationStep,
-    FeePolicy,
-    PierreTransformationEvent,
-    PierreTransformationLink,
-    ProductCatalog,
-)
-from app.models.bois import (
-    ChecklistPolicy,
-    EssenceCatalog,
-    RulePolicy,
-    TransportRecord,
-    TransportRecordItem,
-    WorkflowApproval,
-)
-from app.models.rbac import RoleCatalog
-from app.models.emergency import EmergencyAlert
-from app.models.communication import ContactRequest, DirectMessage
-from app.models.marketplace import MarketplaceOffer
-from app.models.base import Base
-from app.auth.roles_config import ROLE_DEFINITIONS
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="MADAVOLA API", version="v1")
+    app_started_at = time.perf_counter()
+    app = FastAPI(title="MADAVOLA API", version="v1", default_response_class=FastJSONResponse)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count"],
     )
+
+    @app.middleware("http")
+    async def route_reads_after_write(request: Request, call_next):
+        response = await call_next(request)
+        # Après une écriture réussie, les lectures de l'acteur restent un temps sur la primaire.
+        if request.method not in {"GET", "HEAD", "OPTIONS"} and response.status_code < 400:
+            auth_context = getattr(request.state, "auth_context", None)
+            if auth_context is not None:
+                mark_recent_write(auth_context.actor_id)
+        return response
+
+    # Ajoutés en dernier : enveloppent les autres middlewares.
+    app.add_middleware(SqlInstrumentationMiddleware)
+    app.add_middleware(PrometheusMiddleware)
     app.include_router(auth_router)
     app.include_router(admin_router)
     app.include_router(audit_router)
@@ -146,119 +129,19 @@ def create_app() -> FastAPI:
             "ready": f"{settings.api_prefix}/ready",
         }
 
+    @app.get("/metrics", tags=["system"], include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+    def metrics():
+        content, content_type = render_metrics()
+        return Response(content=content, media_type=content_type)
+
     @app.on_event("startup")
-    def ensure_optional_tables() -> None:
-        if settings.database_url.startswith("sqlite"):
-            Base.metadata.create_all(bind=engine, checkfirst=True)
-        RoleCatalog.__table__.create(bind=engine, checkfirst=True)
-        ActorKYC.__table__.create(bind=engine, checkfirst=True)
-        ActorWallet.__table__.create(bind=engine, checkfirst=True)
-        CommuneProfile.__table__.create(bind=engine, checkfirst=True)
-        ActorFiliere.__table__.create(bind=engine, checkfirst=True)
-        OrTariffConfig.__table__.create(bind=engine, checkfirst=True)
-        KaraBolamenaCard.__table__.create(bind=engine, checkfirst=True)
-        KaraProductionLog.__table__.create(bind=engine, checkfirst=True)
-        CollectorCard.__table__.create(bind=engine, checkfirst=True)
-        CollectorCardDocument.__table__.create(bind=engine, checkfirst=True)
-        CollectorAffiliationAgreement.__table__.create(bind=engine, checkfirst=True)
-        CollectorRegister.__table__.create(bind=engine, checkfirst=True)
-        CollectorSemiAnnualReport.__table__.create(bind=engine, checkfirst=True)
-        ComptoirLicense.__table__.create(bind=engine, checkfirst=True)
-        CollectorCardFeeSplit.__table__.create(bind=engine, checkfirst=True)
-        ComplianceNotification.__table__.create(bind=engine, checkfirst=True)
-        ProductCatalog.__table__.create(bind=engine, checkfirst=True)
-        ActorAuthorization.__table__.create(bind=engine, checkfirst=True)
-        FeePolicy.__table__.create(bind=engine, checkfirst=True)
-        ExportColis.__table__.create(bind=engine, checkfirst=True)
-        ExportSeal.__table__.create(bind=engine, checkfirst=True)
-        ExportValidationStep.__table__.create(bind=engine, checkfirst=True)
-        PierreTransformationEvent.__table__.create(bind=engine, checkfirst=True)
-        PierreTransformationLink.__table__.create(bind=engine, checkfirst=True)
-        EssenceCatalog.__table__.create(bind=engine, checkfirst=True)
-        RulePolicy.__table__.create(bind=engine, checkfirst=True)
-        ChecklistPolicy.__table__.create(bind=engine, checkfirst=True)
-        TransportRecord.__table__.create(bind=engine, checkfirst=True)
-        TransportRecordItem.__table__.create(bind=engine, checkfirst=True)
-        WorkflowApproval.__table__.create(bind=engine, checkfirst=True)
-        EmergencyAlert.__table__.create(bind=engine, checkfirst=True)
-        ContactRequest.__table__.create(bind=engine, checkfirst=True)
-        DirectMessage.__table__.create(bind=engine, checkfirst=True)
-        MarketplaceOffer.__table__.create(bind=engine, checkfirst=True)
-        with engine.begin() as conn:
-            existing_roles = conn.execute(text("SELECT COUNT(*) FROM rbac_role_catalog")).scalar() or 0
-            if existing_roles == 0:
-                rows = []
-                for idx, (code, defn) in enumerate(sorted(ROLE_DEFINITIONS.items()), start=1):
-                    if code.startswith("pierre_"):
-                        scope = "PIERRE"
-                        category = "PIERRE"
-                    elif code.startswith("bois_"):
-                        scope = "BOIS"
-                        category = "BOIS"
-                    elif code in {"orpailleur", "collecteur", "comptoir_operator", "comptoir_compliance", "comptoir_director", "com", "com_admin", "com_agent", "gue", "gue_or_agent", "douanes_agent", "raffinerie_agent", "lab_bgglm", "mines_region_agent", "bijoutier"}:
-                        scope = "OR"
-                        category = "OR"
-                    else:
-                        scope = "OR,PIERRE,BOIS"
-                        category = "Administration"
-                    rows.append(
-                        {
-                            "code": code,
-                            "label": " ".join(x.capitalize() for x in code.split("_") if x),
-                            "description": defn.get("description", ""),
-                            "category": category,
-                            "filiere_scope_csv": scope,
-                            "display_order": idx,
-                        }
-                    )
-                for row in rows:
-                    conn.execute(
-                        text(
-                            "INSERT INTO rbac_role_catalog (code,label,description,category,filiere_scope_csv,display_order,is_active) "
-                            "VALUES (:code,:label,:description,:category,:filiere_scope_csv,:display_order,true) "
-                            "ON CONFLICT (code) DO NOTHING"
-                        ),
-                        row,
-                    )
-            if not settings.database_url.startswith("sqlite"):
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS sous_filiere VARCHAR(30)"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS product_catalog_id INTEGER"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS attributes_json TEXT"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS wood_essence_id INTEGER"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS wood_form VARCHAR(40)"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS volume_m3 NUMERIC(14,4)"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS lot_number VARCHAR(120)"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS traceability_id VARCHAR(120)"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS origin_reference VARCHAR(160)"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS previous_block_hash VARCHAR(64)"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS current_block_hash VARCHAR(64)"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS trace_payload_json TEXT"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS wood_classification VARCHAR(30)"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS cites_laf_status VARCHAR(20)"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS cites_ndf_status VARCHAR(20)"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS cites_international_status VARCHAR(20)"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS destruction_status VARCHAR(20)"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS destruction_requested_at TIMESTAMPTZ"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS destruction_validated_at TIMESTAMPTZ"))
-                conn.execute(text("ALTER TABLE lots ADD COLUMN IF NOT EXISTS destruction_evidence_json TEXT"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS filiere VARCHAR(20)"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS region_code VARCHAR(20)"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS origin_reference VARCHAR(160)"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS lot_references_json TEXT"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS quantity_total NUMERIC(14,4)"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS unit VARCHAR(20)"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS unit_price_avg NUMERIC(14,2)"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS subtotal_ht NUMERIC(14,2)"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS taxes_json TEXT"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS taxes_total NUMERIC(14,2)"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS total_ttc NUMERIC(14,2)"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS invoice_hash VARCHAR(64)"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS previous_invoice_hash VARCHAR(64)"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS internal_signature VARCHAR(64)"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS trace_payload_json TEXT"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS receipt_number VARCHAR(80)"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS receipt_document_id INTEGER"))
-                conn.execute(text("ALTER TABLE invoices ADD COLUMN IF NOT EXISTS is_immutable BOOLEAN DEFAULT TRUE"))
+    def check_schema_on_startup() -> None:
+        run_startup_check(engine, app_started_at)
+
+    @app.on_event("shutdown")
+    def release_worker_resources() -> None:
+        password_pool.shutdown()
+        mark_process_dead()
 
     return app
 
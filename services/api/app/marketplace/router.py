@@ -1,29 +1,21 @@
 from datetime import datetime, timedelta, timezone
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_actor
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor
 from app.common.errors import bad_request
+from app.common.pagination import PaginationParams, get_cursor_pagination, paginate, set_page_headers
 from app.core.config import settings
-from app.db import get_db
+from app.db import get_db, get_read_db
 from app.marketplace.schemas import MarketplaceOfferCreate, MarketplaceOfferOut
-from app.models.actor import Actor, ActorRole
+from app.models.actor import Actor
 from app.models.lot import Lot
 from app.models.marketplace import MarketplaceOffer
 
 router = APIRouter(prefix=f"{settings.api_prefix}/marketplace/offers", tags=["marketplace"])
 
 
-def _is_admin(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole.id)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role.in_(["admin", "dirigeant"]), ActorRole.status == "active")
-        .first()
-        is not None
-    )
-
-
 def _offer_out(db: Session, row: MarketplaceOffer) -> MarketplaceOfferOut:
     actor = db.query(Actor).filter(Actor.id == row.actor_id).first()
     return MarketplaceOfferOut(
@@ -99,6 +91,7 @@ def create_offer(
 
 @router.get("", response_model=list[MarketplaceOfferOut])
 def list_offers(
+    response: Response,
     offer_type: str | None = None,
     filiere: str | None = None,
     commune_id: int | None = None,
@@ -107,8 +100,10 @@ def list_offers(
     min_quantity: float | None = None,
     max_quantity: float | None = None,
     status: str | None = "active",
-    db: Session = Depends(get_db),
+    pagination: PaginationParams = Depends(get_cursor_pagination),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     query = db.query(MarketplaceOffer)
     if status:
@@ -127,9 +122,11 @@ def list_offers(
         query = query.filter(MarketplaceOffer.quantity >= min_quantity)
     if max_quantity is not None:
         query = query.filter(MarketplaceOffer.quantity <= max_quantity)
-    if not _is_admin(db, current_actor.id) and status and status != "active":
+    if not auth.is_admin_like and status and status != "active":
         query = query.filter(MarketplaceOffer.actor_id == current_actor.id)
-    rows = query.order_by(MarketplaceOffer.created_at.desc()).limit(500).all()
+    page = paginate(query, sort_column=MarketplaceOffer.created_at, id_column=MarketplaceOffer.id, pagination=pagination)
+    set_page_headers(response, page)
+    rows = page.rows
     return [_offer_out(db, row) for row in rows]
 
 
@@ -138,11 +135,12 @@ def close_offer(
     offer_id: int,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     row = db.query(MarketplaceOffer).filter(MarketplaceOffer.id == offer_id).first()
     if not row:
         raise bad_request("offre_introuvable")
-    if row.actor_id != current_actor.id and not _is_admin(db, current_actor.id):
+    if row.actor_id != current_actor.id and not auth.is_admin_like:
         raise bad_request("acces_refuse")
     row.status = "closed"
     db.commit()
@@ -1,14 +1,15 @@
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_actor
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor
 from app.common.errors import bad_request
+from app.common.pagination import PaginationParams, get_cursor_pagination, paginate, set_page_headers
 from app.core.config import settings
 from app.db import get_db
-from app.models.actor import Actor, ActorRole
+from app.models.actor import Actor
 from app.models.communication import ContactRequest, DirectMessage
 from app.messages.schemas import (
     ContactDecisionIn,
@@ -21,15 +22,6 @@ from app.messages.schemas import (
 router = APIRouter(prefix=f"{settings.api_prefix}/messages", tags=["messages"])
 
 
-def _is_admin(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole.id)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role.in_(["admin", "dirigeant"]), ActorRole.status == "active")
-        .first()
-        is not None
-    )
-
-
 def _actor_name(actor: Actor | None) -> str | None:
     if not actor:
         return None
@@ -120,7 +112,9 @@ def create_contact_request(
 
 @router.get("/contacts", response_model=list[ContactRequestOut])
 def list_contacts(
+    response: Response,
     status: str | None = None,
+    pagination: PaginationParams = Depends(get_cursor_pagination),
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
 ):
@@ -129,7 +123,9 @@ def list_contacts(
     )
     if status:
         query = query.filter(ContactRequest.status == status)
-    rows = query.order_by(ContactRequest.created_at.desc()).limit(300).all()
+    page = paginate(query, sort_column=ContactRequest.created_at, id_column=ContactRequest.id, pagination=pagination)
+    set_page_headers(response, page)
+    rows = page.rows
     return [_to_contact_out(db, row) for row in rows]
 
 
@@ -160,6 +156,7 @@ def send_message(
     payload: DirectMessageCreate,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     receiver = db.query(Actor).filter(Actor.id == payload.receiver_actor_id).first()
     if not receiver:
@@ -170,7 +167,7 @@ def send_message(
     if not message_body:
         raise bad_request("message_invalide")
     contact = _accepted_contact_between(db, current_actor.id, payload.receiver_actor_id)
-    if not contact and not _is_admin(db, current_actor.id):
+    if not contact and not auth.is_admin_like:
         raise bad_request("contact_non_autorise")
     row = DirectMessage(
         contact_request_id=contact.id if contact else None,
@@ -186,7 +183,9 @@ def send_message(
 
 @router.get("", response_model=list[DirectMessageOut])
 def list_messages(
+    response: Response,
     with_actor_id: int | None = None,
+    pagination: PaginationParams = Depends(get_cursor_pagination),
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
 ):
@@ -200,5 +199,7 @@ def list_messages(
                 and_(DirectMessage.sender_actor_id == with_actor_id, DirectMessage.receiver_actor_id == current_actor.id),
             )
         )
-    rows = query.order_by(DirectMessage.created_at.desc()).limit(500).all()
+    page = paginate(query, sort_column=DirectMessage.created_at, id_column=DirectMessage.id, pagination=pagination)
+    set_page_headers(response, page)
+    rows = page.rows
     return [_to_message_out(db, row) for row in rows]
@@ -21,3 +21,4 @@ from app.models import territory  # noqa: F401
 from app.models import tax  # noqa: F401
 from app.models import transaction  # noqa: F401
 from app.models import rbac  # noqa: F401
+from app.models import rollup  # noqa: F401
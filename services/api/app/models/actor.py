@@ -44,6 +44,12 @@ class Actor(Base):
     auth = relationship("ActorAuth", back_populates="actor", uselist=False)
     kyc_records = relationship("ActorKYC", back_populates="actor", foreign_keys="ActorKYC.actor_id")
     wallets = relationship("ActorWallet", back_populates="actor")
+    # Relations en lecture seule pour le chargement groupé du profil (/auth/me).
+    region = relationship("Region", viewonly=True)
+    district = relationship("District", viewonly=True)
+    commune = relationship("Commune", viewonly=True)
+    fokontany = relationship("Fokontany", viewonly=True)
+    filieres = relationship("ActorFiliere", viewonly=True, order_by="ActorFiliere.filiere")
     # geo_points relationship removed temporarily due to ambiguous foreign key issue
     # Can be re-added later with proper foreign_keys specification if needed
 
@@ -82,7 +88,15 @@ class RefreshToken(Base):
     actor_id = Column(Integer, ForeignKey("actors.id"), nullable=False)
     token_id = Column(String(64), nullable=False, unique=True)
     expires_at = Column(DateTime(timezone=True), nullable=False)
-    revoked_at = Column(DateTime(timezone=True))
+    revoked_at = Column(DateTime(timezone=True), index=True)
+
+
+class AuthCacheVersion(Base):
+    __tablename__ = "auth_cache_versions"
+
+    scope = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
 
 
 class ActorKYC(Base):
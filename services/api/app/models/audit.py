@@ -8,6 +8,8 @@ from app.models.base import Base
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    # PostgreSQL : partitions mensuelles (migration 0039, app.core.partitions).
+    __table_args__ = {"info": {"partition_by_month": "created_at"}}
 
     id = Column(Integer, primary_key=True)
     actor_id = Column(Integer, ForeignKey("actors.id"), nullable=True)
@@ -19,3 +21,27 @@ class AuditLog(Base):
     created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
 
     actor = relationship("Actor")
+
+
+class IntegrityCheckRun(Base):
+    """Vérification en masse d'une chaîne de hash (lots ou factures), reprenable."""
+
+    __tablename__ = "integrity_check_runs"
+
+    id = Column(Integer, primary_key=True)
+    target = Column(String(20), nullable=False)  # lots|invoices
+    # pending, running, completed, failed
+    status = Column(String(20), nullable=False, default="pending", index=True)
+    requested_by_actor_id = Column(Integer, ForeignKey("actors.id"))
+    # Point de reprise : dernier id vérifié.
+    last_id = Column(Integer, nullable=False, default=0)
+    records_checked = Column(Integer, nullable=False, default=0)
+    records_skipped = Column(Integer, nullable=False, default=0)
+    breaks_count = Column(Integer, nullable=False, default=0)
+    breaks_json = Column(Text)
+    locked_by = Column(String(80))
+    locked_at = Column(DateTime(timezone=True))
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
@@ -1,6 +1,7 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import relationship
 
 from app.models.base import Base
 
@@ -16,4 +17,27 @@ class Document(Base):
     storage_path = Column(String(255), nullable=False)
     original_filename = Column(String(255), nullable=False)
     sha256 = Column(String(64), nullable=False)
+    # pending (PDF en file de rendu), ready, failed
+    status = Column(String(20), nullable=False, default="ready", server_default="ready")
     created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+
+class DocumentJob(Base):
+    __tablename__ = "document_jobs"
+    __table_args__ = (Index("ix_document_jobs_status_run_after", "status", "run_after"),)
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
+    kind = Column(String(30), nullable=False, default="simple_pdf")
+    payload_json = Column(Text, nullable=False)
+    # pending, running, done, failed, cancelled
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    run_after = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    locked_by = Column(String(80))
+    locked_at = Column(DateTime(timezone=True))
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    finished_at = Column(DateTime(timezone=True))
+
+    document = relationship("Document")
@@ -28,7 +28,8 @@ class Invoice(Base):
     taxes_json = Column(Text)
     taxes_total = Column(Numeric(14, 2))
     total_ttc = Column(Numeric(14, 2))
-    invoice_hash = Column(String(64))
+    # Indexé : la vérification de chaîne recherche les hash précédents référencés.
+    invoice_hash = Column(String(64), index=True)
     previous_invoice_hash = Column(String(64))
     internal_signature = Column(String(64))
     trace_payload_json = Column(Text)
@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, Numeric, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, Numeric, String, Text
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
@@ -8,6 +8,7 @@ from app.models.base import Base
 
 class Lot(Base):
     __tablename__ = "lots"
+    __table_args__ = (Index("ix_lots_parent_lot_id", "parent_lot_id"),)
 
     id = Column(Integer, primary_key=True)
     filiere = Column(String(20), nullable=False, default="OR")
@@ -37,6 +38,8 @@ class Lot(Base):
     previous_block_hash = Column(String(64))
     current_block_hash = Column(String(64))
     trace_payload_json = Column(Text)
+    # Dernier id d'InventoryLedger intégré à l'historique de trace_payload_json.
+    trace_ledger_cursor = Column(Integer)
     wood_classification = Column(String(30))
     cites_laf_status = Column(String(20))
     cites_ndf_status = Column(String(20))
@@ -51,6 +54,10 @@ class Lot(Base):
 
 class LotLink(Base):
     __tablename__ = "lot_links"
+    __table_args__ = (
+        Index("ix_lot_links_parent_lot_id", "parent_lot_id"),
+        Index("ix_lot_links_child_lot_id", "child_lot_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     parent_lot_id = Column(Integer, ForeignKey("lots.id"), nullable=False)
@@ -61,6 +68,13 @@ class LotLink(Base):
 
 class InventoryLedger(Base):
     __tablename__ = "inventory_ledger"
+    __table_args__ = (
+        Index("ix_inventory_ledger_lot_id_id", "lot_id", "id"),
+        Index("ix_inventory_ledger_movement_ref", "movement_type", "ref_event_id"),
+        # PostgreSQL : partitions mensuelles (migration 0039, app.core.partitions).
+        # Registre légal des stocks : jamais détaché par la rétention (réconciliation, rollups).
+        {"info": {"partition_by_month": "created_at", "partition_retention": False}},
+    )
 
     id = Column(Integer, primary_key=True)
     actor_id = Column(Integer, ForeignKey("actors.id"), nullable=False)
@@ -70,3 +84,15 @@ class InventoryLedger(Base):
     ref_event_type = Column(String(50), nullable=False)
     ref_event_id = Column(String(50), nullable=False)
     created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+
+class StockBalance(Base):
+    """Solde de `inventory_ledger` par (acteur, lot), tenu à jour à chaque mouvement."""
+
+    __tablename__ = "stock_balances"
+    __table_args__ = (Index("ix_stock_balances_lot_id", "lot_id"),)
+
+    actor_id = Column(Integer, ForeignKey("actors.id"), primary_key=True)
+    lot_id = Column(Integer, ForeignKey("lots.id"), primary_key=True)
+    quantity = Column(Numeric(14, 4), nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, Numeric, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, Numeric, String, Text
 
 from app.models.base import Base
 
@@ -111,6 +111,10 @@ class PierreTransformationEvent(Base):
 
 class PierreTransformationLink(Base):
     __tablename__ = "pierre_transformation_links"
+    __table_args__ = (
+        Index("ix_pierre_transformation_links_event_id", "transformation_event_id"),
+        Index("ix_pierre_transformation_links_lot_id", "lot_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     transformation_event_id = Column(Integer, ForeignKey("pierre_transformation_events.id"), nullable=False)
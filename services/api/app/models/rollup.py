@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Date, DateTime, Index, Integer, Numeric, String
+
+from app.models.base import Base
+
+
+class DailyActivityRollup(Base):
+    """
+    Activité d'une journée (UTC) par filière et par acteur, avec sa
+    géographie : agrégats lus par les dashboards et les rapports.
+    """
+
+    __tablename__ = "daily_activity_rollups"
+    __table_args__ = (
+        Index("ix_daily_activity_rollups_region_day", "region_id", "day"),
+        Index("ix_daily_activity_rollups_commune_day", "commune_id", "day"),
+        Index("ix_daily_activity_rollups_actor_day", "actor_id", "day"),
+    )
+
+    day = Column(Date, primary_key=True)
+    filiere = Column(String(20), primary_key=True)
+    region_id = Column(Integer, primary_key=True)
+    district_id = Column(Integer, primary_key=True)
+    commune_id = Column(Integer, primary_key=True)
+    actor_id = Column(Integer, primary_key=True)
+    # Somme des mouvements `create` du registre.
+    volume_created = Column(Numeric(18, 4), nullable=False, default=0)
+    ledger_movements = Column(Integer, nullable=False, default=0)
+    # Ventes de l'acteur (vendeur), filière du premier lot de la transaction.
+    transactions_total = Column(Numeric(18, 2), nullable=False, default=0)
+    transactions_count = Column(Integer, nullable=False, default=0)
+    # Lots vus pour la première fois ce jour-là (au niveau national, dans la
+    # région, dans la commune) : leur somme jusqu'à J donne les lots distincts.
+    lots_first_seen = Column(Integer, nullable=False, default=0)
+    lots_first_seen_region = Column(Integer, nullable=False, default=0)
+    lots_first_seen_commune = Column(Integer, nullable=False, default=0)
+
+
+class DailyRegionRollup(Base):
+    """Mêmes cumuls par (jour, filière, région) : lectures nationales et régionales."""
+
+    __tablename__ = "daily_region_rollups"
+    __table_args__ = (Index("ix_daily_region_rollups_region_day", "region_id", "day"),)
+
+    day = Column(Date, primary_key=True)
+    filiere = Column(String(20), primary_key=True)
+    region_id = Column(Integer, primary_key=True)
+    volume_created = Column(Numeric(18, 4), nullable=False, default=0)
+    ledger_movements = Column(Integer, nullable=False, default=0)
+    transactions_total = Column(Numeric(18, 2), nullable=False, default=0)
+    transactions_count = Column(Integer, nullable=False, default=0)
+    lots_first_seen = Column(Integer, nullable=False, default=0)
+    lots_first_seen_region = Column(Integer, nullable=False, default=0)
+
+
+class RollupWatermark(Base):
+    """Dernier jour entièrement agrégé d'une table de cumul."""
+
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String(50), primary_key=True)
+    rolled_through = Column(Date, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
@@ -1,11 +1,12 @@
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 
 from app.auth.dependencies import get_current_actor, require_roles
 from app.audit.logger import write_audit
 from app.common.errors import bad_request
+from app.common.pagination import PaginationParams, get_cursor_pagination, paginate, set_page_headers
 from app.core.config import settings
 from app.db import get_db
 from app.models.or_compliance import ComplianceNotification
@@ -62,7 +63,9 @@ def _make_notifications_for_authorizations(db: Session, thresholds: list[int], a
 
 @router.get("")
 def list_notifications(
+    response: Response,
     actor_id: int | None = None,
+    pagination: PaginationParams = Depends(get_cursor_pagination),
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
 ):
@@ -73,7 +76,9 @@ def list_notifications(
         query = query.filter(ComplianceNotification.actor_id == actor_id)
     else:
         query = query.filter(ComplianceNotification.actor_id == current_actor.id)
-    rows = query.order_by(ComplianceNotification.sent_at.desc()).all()
+    page = paginate(query, sort_column=ComplianceNotification.sent_at, id_column=ComplianceNotification.id, pagination=pagination)
+    set_page_headers(response, page)
+    rows = page.rows
     return [
         {
             "id": row.id,
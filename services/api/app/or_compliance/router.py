@@ -1,16 +1,14 @@
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
-import hashlib
 import json
-from pathlib import Path
 
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from app.audit.logger import write_audit
-from app.auth.dependencies import get_current_actor, require_roles
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor, load_active_role_codes, require_roles
 from app.common.errors import bad_request
-from app.common.receipts import build_simple_pdf
+from app.documents.jobs import queue_pdf_document
 from app.common.card_identity import (
     build_card_number,
     build_prefixed_uid,
@@ -19,8 +17,8 @@ from app.common.card_identity import (
     sign_hmac_sha256,
 )
 from app.core.config import settings
-from app.db import get_db
-from app.models.actor import Actor, ActorRole
+from app.db import get_db, get_read_db
+from app.models.actor import Actor
 from app.models.document import Document
 from app.models.fee import Fee
 from app.models.or_compliance import (
@@ -311,14 +309,14 @@ def render_card_side(
     side: str = "front",
     card_type: str = "kara_bolamena",
     db: Session = Depends(get_db),
-    current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     resolved = _load_card_by_type(db, card_type, card_id)
     if not resolved:
         raise bad_request("carte_introuvable")
     kind, card = resolved
     actor_id = card.actor_id
-    if not _is_actor_allowed_for_card(db, current_actor.id, actor_id):
+    if not _is_actor_allowed_for_card(db, auth, actor_id):
         raise bad_request("acces_refuse")
     _ensure_card_documents(db, card, kind)
     db.commit()
@@ -410,7 +408,7 @@ def list_kara_cards(
     actor_id: int | None = None,
     status: str | None = None,
     commune_id: int | None = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(get_current_actor),
 ):
     query = db.query(KaraBolamenaCard)
@@ -542,7 +540,7 @@ def request_collector_card(
         raise bad_request("acteur_invalide")
     if actor.status != "active":
         raise bad_request("compte_inactif")
-    actor_roles = _active_roles(db, payload.actor_id)
+    actor_roles = load_active_role_codes(db, payload.actor_id)
     if actor_roles.isdisjoint({"collecteur", "bijoutier"}):
         raise bad_request("role_collecteur_requis")
     active_or_pending = (
@@ -619,7 +617,7 @@ def list_collector_cards(
     actor_id: int | None = None,
     status: str | None = None,
     commune_id: int | None = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(get_current_actor),
 ):
     query = db.query(CollectorCard)
@@ -857,7 +855,7 @@ def submit_collector_affiliation(
         raise bad_request("acteur_invalide")
     if affiliate.status != "active":
         raise bad_request("acteur_invalide")
-    affiliate_roles = _active_roles(db, affiliate.id)
+    affiliate_roles = load_active_role_codes(db, affiliate.id)
     if payload.affiliate_type == "comptoir" and affiliate_roles.isdisjoint(COMPTOIR_ROLE_SET):
         raise bad_request("acteur_affiliation_invalide")
     if payload.affiliate_type == "bijouterie" and "bijoutier" not in affiliate_roles:
@@ -921,7 +919,7 @@ def create_comptoir_license(
         raise bad_request("compte_inactif")
     if (actor.type_personne or "").strip().lower() != "morale":
         raise bad_request("type_personne_invalide")
-    if _active_roles(db, actor.id).isdisjoint(COMPTOIR_ROLE_SET):
+    if load_active_role_codes(db, actor.id).isdisjoint(COMPTOIR_ROLE_SET):
         raise bad_request("role_comptoir_requis")
     now = datetime.now(timezone.utc)
     existing = (
@@ -1070,33 +1068,17 @@ def _load_card_by_type(db: Session, card_type: str, card_id: int):
     return None
 
 
-def _is_actor_allowed_for_card(db: Session, requester_actor_id: int, owner_actor_id: int) -> bool:
-    if requester_actor_id == owner_actor_id:
+def _is_actor_allowed_for_card(db: Session, auth: AuthContext, owner_actor_id: int) -> bool:
+    if auth.actor_id == owner_actor_id:
         return True
-    if (
-        db.query(ActorRole.id)
-        .filter(ActorRole.actor_id == requester_actor_id, ActorRole.role.in_(["admin", "dirigeant", "com", "com_admin", "com_agent"]))
-        .first()
-        is not None
-    ):
+    if auth.has_any_role({"admin", "dirigeant", "com", "com_admin", "com_agent"}):
         return True
-    requester = db.query(Actor).filter_by(id=requester_actor_id).first()
+    if not auth.has_role("commune_agent"):
+        return False
     owner = db.query(Actor).filter_by(id=owner_actor_id).first()
-    if not requester or not owner:
+    if not owner:
         return False
-    return (
-        requester.commune_id == owner.commune_id
-        and db.query(ActorRole.id).filter(ActorRole.actor_id == requester_actor_id, ActorRole.role == "commune_agent").first() is not None
-    )
-
-
-def _active_roles(db: Session, actor_id: int) -> set[str]:
-    rows = (
-        db.query(ActorRole.role)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.status == "active")
-        .all()
-    )
-    return {row[0] for row in rows}
+    return auth.actor.commune_id == owner.commune_id
 
 
 def _is_bijoutier_card(card: CollectorCard) -> bool:
@@ -1217,91 +1199,67 @@ def _ensure_card_documents(db: Session, card, card_type: str) -> None:
         f"Verification: {settings.api_prefix}/verify/card/{verified_ref}",
     ]
     # ISO/IEC 7810 ID-1 (85.60 x 53.98 mm) in PDF points.
-    page_width_pt = 243
-    page_height_pt = 153
-    front_bytes = build_simple_pdf(
-        "MADAVOLA - Carte OR",
-        front_lines,
-        page_width_pt=page_width_pt,
-        page_height_pt=page_height_pt,
-        start_x=10,
-        start_y=140,
-        line_height=10,
-        font_size=8,
-    )
-    back_bytes = build_simple_pdf(
-        "MADAVOLA - Verification",
-        back_lines,
-        page_width_pt=page_width_pt,
-        page_height_pt=page_height_pt,
-        start_x=10,
-        start_y=140,
-        line_height=10,
-        font_size=8,
-    )
-
+    card_layout = {
+        "page_width_pt": 243,
+        "page_height_pt": 153,
+        "start_x": 10,
+        "start_y": 140,
+        "line_height": 10,
+        "font_size": 8,
+    }
     owner_actor_id = card.actor_id
-    front_doc_id = _upsert_document_blob(
+    front_doc_id = _queue_card_document(
         db,
         existing_document_id=card.front_document_id,
         doc_type="card_front",
         owner_actor_id=owner_actor_id,
-        related_entity_type="card",
         related_entity_id=f"{card_type}:{card.id}:front",
         filename=f"card-{card_type}-{card.id}-front.pdf",
-        content=front_bytes,
+        title="MADAVOLA - Carte OR",
+        lines=front_lines,
+        pdf_options=card_layout,
     )
-    back_doc_id = _upsert_document_blob(
+    back_doc_id = _queue_card_document(
         db,
         existing_document_id=card.back_document_id,
         doc_type="card_back",
         owner_actor_id=owner_actor_id,
-        related_entity_type="card",
         related_entity_id=f"{card_type}:{card.id}:back",
         filename=f"card-{card_type}-{card.id}-back.pdf",
-        content=back_bytes,
+        title="MADAVOLA - Verification",
+        lines=back_lines,
+        pdf_options=card_layout,
     )
     card.front_document_id = front_doc_id
     card.back_document_id = back_doc_id
 
 
-def _upsert_document_blob(
+def _queue_card_document(
     db: Session,
     *,
     existing_document_id: int | None,
     doc_type: str,
     owner_actor_id: int,
-    related_entity_type: str,
     related_entity_id: str,
     filename: str,
-    content: bytes,
+    title: str,
+    lines: list[str],
+    pdf_options: dict,
 ) -> int:
-    storage_dir = Path(settings.document_storage_dir)
-    storage_dir.mkdir(parents=True, exist_ok=True)
-    path = storage_dir / filename
-    path.write_bytes(content)
-    sha256 = hashlib.sha256(content).hexdigest()
     document = db.query(Document).filter_by(id=existing_document_id).first() if existing_document_id else None
-    if not document:
-        document = Document(
-            doc_type=doc_type,
-            owner_actor_id=owner_actor_id,
-            related_entity_type=related_entity_type,
-            related_entity_id=related_entity_id,
-            storage_path=str(path),
-            original_filename=filename,
-            sha256=sha256,
-        )
-        db.add(document)
-        db.flush()
-        return int(document.id)
-    document.doc_type = doc_type
-    document.owner_actor_id = owner_actor_id
-    document.related_entity_type = related_entity_type
-    document.related_entity_id = related_entity_id
-    document.storage_path = str(path)
-    document.original_filename = filename
-    document.sha256 = sha256
+    document = queue_pdf_document(
+        db,
+        doc_type=doc_type,
+        owner_actor_id=owner_actor_id,
+        related_entity_type="card",
+        related_entity_id=related_entity_id,
+        filename=filename,
+        title=title,
+        lines=lines,
+        pdf_options=pdf_options,
+        document=document,
+    )
+    db.flush()
     return int(document.id)
 
 
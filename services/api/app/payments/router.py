@@ -1,13 +1,13 @@
 from datetime import datetime, timezone
 import hashlib
 import json
-from pathlib import Path
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 
 from app.common.errors import bad_request
+from app.common.pagination import PaginationParams, get_cursor_pagination, paginate, set_page_headers
 from app.common.card_identity import (
     build_invoice_number,
     build_receipt_number,
@@ -16,14 +16,15 @@ from app.common.card_identity import (
     sign_hmac_sha256,
 )
 from app.core.config import settings
-from app.db import get_db
+from app.core.metrics import WEBHOOKS_PROCESSED, WEBHOOKS_RECEIVED
+from app.documents.jobs import queue_pdf_document
+from app.db import get_db, get_read_db
 from app.audit.logger import write_audit
-from app.auth.dependencies import get_current_actor
-from app.models.actor import Actor, ActorRole
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor
+from app.models.actor import Actor
 from app.models.admin import SystemConfig
 from app.models.fee import Fee
 from app.models.invoice import Invoice
-from app.models.document import Document
 from app.models.lot import InventoryLedger, Lot
 from app.models.or_compliance import CollectorCard, KaraBolamenaCard
 from app.models.payment import Payment, PaymentProvider, PaymentRequest, WebhookInbox
@@ -37,15 +38,25 @@ from app.payments.schemas import (
     PaymentRequestOut,
     WebhookPayload,
 )
-from app.common.receipts import build_qr_value, build_simple_pdf
+from app.common.receipts import build_qr_value
 
 router = APIRouter(prefix=f"{settings.api_prefix}/payments", tags=["payments"])
 
+# Libellés fermés du compteur de webhooks : le statut vient du fournisseur et ne
+# doit pas créer de séries Prometheus à sa guise.
+WEBHOOK_RESULTS = frozenset({"success", "failed", "pending"})
+
+
+def _webhook_result(status: str | None) -> str:
+    return status if status in WEBHOOK_RESULTS else "other"
+
+
 @router.post("/initiate", response_model=PaymentInitiateResponse, status_code=201)
 def initiate_payment(
     payload: PaymentInitiate,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     provider = db.query(PaymentProvider).filter_by(code=payload.provider_code).first()
     if not provider or not provider.enabled:
@@ -55,7 +66,7 @@ def initiate_payment(
     payee = db.query(Actor).filter_by(id=payload.payee_actor_id).first()
     if not payer or not payee:
         raise bad_request("acteur_invalide")
-    if not _is_admin(db, current_actor.id) and payload.payer_actor_id != current_actor.id:
+    if not auth.is_admin_like and payload.payer_actor_id != current_actor.id:
         raise bad_request("acces_refuse")
 
     fee = None
@@ -131,7 +142,9 @@ def initiate_payment(
 async def webhook(provider_code: str, request: Request, db: Session = Depends(get_db)):
     provider = db.query(PaymentProvider).filter_by(code=provider_code).first()
     if not provider:
+        WEBHOOKS_RECEIVED.labels("inconnu").inc()
         raise bad_request("provider_inconnu")
+    WEBHOOKS_RECEIVED.labels(provider.code).inc()
 
     if settings.webhook_shared_secret:
         secret = request.headers.get("X-Webhook-Secret")
@@ -157,6 +170,7 @@ async def webhook(provider_code: str, request: Request, db: Session = Depends(ge
         .first()
     )
     if existing:
+        WEBHOOKS_PROCESSED.labels(provider.code, "idempotent").inc()
         return {"status": "ok", "idempotent": True}
 
     inbox = WebhookInbox(
@@ -224,19 +238,23 @@ async def webhook(provider_code: str, request: Request, db: Session = Depends(ge
             )
 
     db.commit()
+    WEBHOOKS_PROCESSED.labels(provider.code, _webhook_result(parsed.status)).inc()
     return {"status": "ok", "idempotent": False}
 
 
 @router.get("", response_model=list[PaymentRequestOut])
 def list_payments(
+    response: Response,
     payer_actor_id: int | None = None,
     payee_actor_id: int | None = None,
     status: str | None = None,
-    db: Session = Depends(get_db),
+    pagination: PaginationParams = Depends(get_cursor_pagination),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     query = db.query(PaymentRequest)
-    if not _is_admin(db, current_actor.id):
+    if not auth.is_admin_like:
         query = query.filter(
             (PaymentRequest.payer_actor_id == current_actor.id)
             | (PaymentRequest.payee_actor_id == current_actor.id)
@@ -251,7 +269,9 @@ def list_payments(
         query = query.filter(PaymentRequest.payee_actor_id == payee_actor_id)
     if status:
         query = query.filter(PaymentRequest.status == status)
-    payments = query.order_by(PaymentRequest.created_at.desc()).all()
+    page = paginate(query, sort_column=PaymentRequest.created_at, id_column=PaymentRequest.id, pagination=pagination)
+    set_page_headers(response, page)
+    payments = page.rows
     return [
         PaymentRequestOut(
             id=p.id,
@@ -276,11 +296,12 @@ def get_payment(
     payment_id: int,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     payment = db.query(PaymentRequest).filter_by(id=payment_id).first()
     if not payment:
         raise bad_request("paiement_introuvable")
-    if not _is_admin(db, current_actor.id):
+    if not auth.is_admin_like:
         if current_actor.id not in (payment.payer_actor_id, payment.payee_actor_id):
             raise bad_request("acces_refuse")
     return PaymentRequestOut(
@@ -304,11 +325,12 @@ def get_payment_status(
     external_ref: str,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     payment = db.query(PaymentRequest).filter_by(external_ref=external_ref).first()
     if not payment:
         raise bad_request("paiement_introuvable")
-    if not _is_admin(db, current_actor.id):
+    if not auth.is_admin_like:
         if current_actor.id not in (payment.payer_actor_id, payment.payee_actor_id):
             raise bad_request("acces_refuse")
     return PaymentRequestOut(
@@ -327,15 +349,6 @@ def get_payment_status(
     )
 
 
-def _is_admin(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role.in_(["admin", "dirigeant"]))
-        .first()
-        is not None
-    )
-
-
 def _get_signup_activation_mode(db: Session) -> str:
     cfg = db.query(SystemConfig).filter(SystemConfig.key == "signup_activation_mode").first()
     value = (cfg.value or "").strip().lower() if cfg else ""
@@ -372,23 +385,16 @@ def _ensure_fee_receipt_document(db: Session, fee: Fee, payment_request: Payment
         f"Reference externe: {payment_request.external_ref}",
         f"Date confirmation: {now.isoformat()}",
     ]
-    content = build_simple_pdf("MADAVOLA - Recu paiement", lines)
-    storage_dir = Path(settings.document_storage_dir)
-    storage_dir.mkdir(parents=True, exist_ok=True)
-    filename = f"{receipt_number}.pdf"
-    storage_path = storage_dir / filename
-    storage_path.write_bytes(content)
-    sha256 = hashlib.sha256(content).hexdigest()
-    doc = Document(
+    doc = queue_pdf_document(
+        db,
         doc_type="receipt",
         owner_actor_id=fee.actor_id,
         related_entity_type="fee",
         related_entity_id=str(fee.id),
-        storage_path=str(storage_path),
-        original_filename=filename,
-        sha256=sha256,
+        filename=f"{receipt_number}.pdf",
+        title="MADAVOLA - Recu paiement",
+        lines=lines,
     )
-    db.add(doc)
     db.flush()
     fee.receipt_number = receipt_number
     fee.receipt_document_id = doc.id
@@ -516,9 +522,15 @@ def _ensure_invoice_receipt_document(
     if invoice.receipt_document_id and invoice.receipt_number:
         return
     receipt_number = build_receipt_number(invoice.id, now=now)
-    receipt_pdf = build_simple_pdf(
-        "MADAVOLA - Recu transaction",
-        [
+    doc = queue_pdf_document(
+        db,
+        doc_type="receipt",
+        owner_actor_id=payment_request.payer_actor_id,
+        related_entity_type="invoice",
+        related_entity_id=str(invoice.id),
+        filename=f"{receipt_number}.pdf",
+        title="MADAVOLA - Recu transaction",
+        lines=[
             f"Recu: {receipt_number}",
             f"Facture: {invoice.invoice_number}",
             f"Transaction: {transaction.id}",
@@ -530,20 +542,6 @@ def _ensure_invoice_receipt_document(
             f"Date confirmation: {now.isoformat()}",
         ],
     )
-    receipt_filename = f"{receipt_number}.pdf"
-    receipt_path = Path(settings.document_storage_dir) / receipt_filename
-    receipt_path.parent.mkdir(parents=True, exist_ok=True)
-    receipt_path.write_bytes(receipt_pdf)
-    doc = Document(
-        doc_type="receipt",
-        owner_actor_id=payment_request.payer_actor_id,
-        related_entity_type="invoice",
-        related_entity_id=str(invoice.id),
-        storage_path=str(receipt_path),
-        original_filename=receipt_filename,
-        sha256=hashlib.sha256(receipt_pdf).hexdigest(),
-    )
-    db.add(doc)
     db.flush()
     invoice.receipt_number = receipt_number
     invoice.receipt_document_id = doc.id
@@ -590,9 +588,15 @@ def _finalize_transaction_success(db: Session, transaction: TradeTransaction, pa
         )
         db.add(invoice)
         db.flush()
-        invoice_pdf = build_simple_pdf(
-            "MADAVOLA - Facture transaction",
-            [
+        queue_pdf_document(
+            db,
+            doc_type="invoice",
+            owner_actor_id=transaction.seller_actor_id,
+            related_entity_type="invoice",
+            related_entity_id=str(invoice.id),
+            filename=f"{invoice_number}.pdf",
+            title="MADAVOLA - Facture transaction",
+            lines=[
                 f"Facture: {invoice_number}",
                 f"Transaction: {transaction.id}",
                 f"Vendeur: {transaction.seller_actor_id}",
@@ -608,21 +612,6 @@ def _finalize_transaction_success(db: Session, transaction: TradeTransaction, pa
                 f"Date: {now.isoformat()}",
             ],
         )
-        invoice_filename = f"{invoice_number}.pdf"
-        invoice_path = Path(settings.document_storage_dir) / invoice_filename
-        invoice_path.parent.mkdir(parents=True, exist_ok=True)
-        invoice_path.write_bytes(invoice_pdf)
-        db.add(
-            Document(
-                doc_type="invoice",
-                owner_actor_id=transaction.seller_actor_id,
-                related_entity_type="invoice",
-                related_entity_id=str(invoice.id),
-                storage_path=str(invoice_path),
-                original_filename=invoice_filename,
-                sha256=hashlib.sha256(invoice_pdf).hexdigest(),
-            )
-        )
     else:
         invoice.status = "paid"
         if invoice.filiere is None:
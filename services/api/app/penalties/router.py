@@ -1,13 +1,13 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_actor
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor
 from app.audit.logger import write_audit
 from app.common.errors import bad_request
+from app.common.pagination import PaginationParams, get_cursor_pagination, paginate, set_page_headers
 from app.core.config import settings
-from app.db import get_db
+from app.db import get_db, get_read_db
 from app.models.lot import InventoryLedger, Lot
-from app.models.actor import ActorRole
 from app.models.penalty import Penalty, ViolationCase
 from app.penalties.schemas import PenaltyCreate, PenaltyOut
 
@@ -19,8 +19,9 @@ def create_penalty(
     payload: PenaltyCreate,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    if not _is_inspector(db, current_actor.id):
+    if not _is_inspector(auth):
         raise bad_request("acces_refuse")
     violation = db.query(ViolationCase).filter_by(id=payload.violation_case_id).first()
     if not violation:
@@ -97,16 +98,21 @@ def create_penalty(
 
 @router.get("", response_model=list[PenaltyOut])
 def list_penalties(
+    response: Response,
     violation_case_id: int | None = None,
-    db: Session = Depends(get_db),
+    pagination: PaginationParams = Depends(get_cursor_pagination),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     query = db.query(Penalty)
-    if not _is_admin(db, current_actor.id) and not _is_inspector(db, current_actor.id):
+    if not auth.is_admin_like and not _is_inspector(auth):
         return []
     if violation_case_id is not None:
         query = query.filter(Penalty.violation_case_id == violation_case_id)
-    penalties = query.order_by(Penalty.id.desc()).all()
+    page = paginate(query, sort_column=Penalty.id, id_column=Penalty.id, pagination=pagination)
+    set_page_headers(response, page)
+    penalties = page.rows
     return [
         PenaltyOut(
             id=p.id,
@@ -120,22 +126,5 @@ def list_penalties(
     ]
 
 
-def _is_admin(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role.in_(["admin", "dirigeant"]))
-        .first()
-        is not None
-    )
-
-
-def _is_inspector(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(
-            ActorRole.actor_id == actor_id,
-            ActorRole.role.in_(["controleur", "admin", "dirigeant", "mmrs", "dgd", "police", "gendarmerie", "forets"]),
-        )
-        .first()
-        is not None
-    )
+def _is_inspector(auth: AuthContext) -> bool:
+    return auth.has_any_role({"controleur", "admin", "dirigeant", "mmrs", "dgd", "police", "gendarmerie", "forets"})
@@ -0,0 +1,77 @@
+"""
+Cache du catalogue RBAC (table rbac_role_catalog).
+
+Le catalogue change rarement : il est chargé une fois par moteur de base de
+données puis réutilisé, et invalidé dès qu'une ligne RoleCatalog est écrite.
+Il ne porte que les libellés et l'affichage des rôles : les permissions, et
+leur index compilé, viennent de ROLE_DEFINITIONS (app.auth.roles_config).
+"""
+
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models.rbac import RoleCatalog
+
+# Filet de sécurité pour les écritures faites par un autre worker.
+CATALOG_TTL_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class RoleCatalogEntry:
+    code: str
+    label: str
+    description: str
+    category: str
+    filiere_scope_csv: str
+    tags_csv: str | None
+    is_active: bool
+    display_order: int
+
+
+_lock = threading.Lock()
+_version = 0
+_cache: "weakref.WeakKeyDictionary[object, tuple[int, float, dict[str, RoleCatalogEntry]]]" = weakref.WeakKeyDictionary()
+
+
+def invalidate_role_catalog() -> None:
+    global _version
+    with _lock:
+        _version += 1
+
+
+def get_role_catalog(db: Session) -> dict[str, RoleCatalogEntry]:
+    engine = db.get_bind()
+    now = time.monotonic()
+    cached = _cache.get(engine)
+    if cached and cached[0] == _version and now - cached[1] < CATALOG_TTL_SECONDS:
+        return cached[2]
+
+    version = _version
+    entries: dict[str, RoleCatalogEntry] = {}
+    if inspect(engine).has_table(RoleCatalog.__tablename__):
+        for item in db.query(RoleCatalog).all():
+            entries[item.code] = RoleCatalogEntry(
+                code=item.code,
+                label=item.label,
+                description=item.description,
+                category=item.category,
+                filiere_scope_csv=item.filiere_scope_csv,
+                tags_csv=item.tags_csv,
+                is_active=bool(item.is_active),
+                display_order=int(item.display_order),
+            )
+    with _lock:
+        _cache[engine] = (version, now, entries)
+    return entries
+
+
+@event.listens_for(RoleCatalog, "after_insert")
+@event.listens_for(RoleCatalog, "after_update")
+@event.listens_for(RoleCatalog, "after_delete")
+def _on_role_catalog_change(_mapper, _connection, _target) -> None:
+    invalidate_role_catalog()
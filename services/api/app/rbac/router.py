@@ -1,15 +1,13 @@
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from sqlalchemy import inspect
 from sqlalchemy.orm import Session
 import logging
 
-from app.auth.dependencies import get_current_actor
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor
 from app.auth.roles_config import ROLE_DEFINITIONS, get_permissions_for_role, roles_with_permission
 from app.core.config import settings
 from app.db import get_db
-from app.models.actor import ActorRole
-from app.models.rbac import RoleCatalog
+from app.rbac.catalog import get_role_catalog
 
 router = APIRouter(prefix=f"{settings.api_prefix}/rbac", tags=["rbac"])
 logger = logging.getLogger(__name__)
@@ -197,33 +195,21 @@ def list_roles(
     include_admin_catalog: bool = False,
     db: Session = Depends(get_db),
     _actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     target = (filiere or "").strip().upper() or None
     raw_search = (search or "").strip().lower()
     target_category = (category or "").strip().lower()
     target_actor_type = (actor_type or "").strip().upper()
 
-    catalog_rows: dict[str, RoleCatalog] = {}
-    if inspect(db.bind).has_table(RoleCatalog.__tablename__):
-        for item in db.query(RoleCatalog).all():
-            catalog_rows[item.code] = item
+    catalog_rows = get_role_catalog(db)
 
     allowed_codes: set[str] | None = None
     if for_current_actor:
-        actor_roles = (
-            db.query(ActorRole.role)
-            .filter(
-                ActorRole.actor_id == _actor.id,
-                ActorRole.status == "active",
-            )
-            .all()
-        )
-        actor_codes = {r[0] for r in actor_roles}
-        is_admin_like = bool(actor_codes.intersection({"admin", "dirigeant"}))
-        if is_admin_like and include_admin_catalog:
+        if auth.is_admin_like and include_admin_catalog:
             allowed_codes = None
         else:
-            allowed_codes = actor_codes
+            allowed_codes = set(auth.role_codes)
 
     role_codes: list[str] = sorted(ROLE_DEFINITIONS.keys())
     if allowed_codes is not None:
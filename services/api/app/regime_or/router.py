@@ -4,13 +4,12 @@ from decimal import Decimal
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_actor, require_roles
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor, require_roles
 from app.audit.logger import write_audit
 from app.common.errors import bad_request, not_found
 from app.common.receipts import build_qr_value
 from app.core.config import settings
 from app.db import get_db
-from app.models.actor import ActorRole
 from app.models.geo import GeoPoint
 from app.models.gold_ops import (
     ExportChecklistItem,
@@ -48,15 +47,6 @@ from app.regime_or.schemas import (
 router = APIRouter(prefix=f"{settings.api_prefix}/or", tags=["regime_or"])
 
 
-def _has_role(db: Session, actor_id: int, roles: set[str]) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role.in_(roles), ActorRole.status == "active")
-        .first()
-        is not None
-    )
-
-
 @router.post("/legal-versions", response_model=LegalVersionOut, status_code=201)
 def create_legal_version(
     payload: LegalVersionCreate,
@@ -240,6 +230,7 @@ def create_transformation_event(
     current_actor=Depends(
         require_roles({"admin", "dirigeant", "raffinerie_operator", "raffinerie_supervisor", "raffinerie_conformite"})
     ),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     facility = db.query(TransformationFacility).filter_by(id=payload.facility_id).first()
     if not facility:
@@ -249,7 +240,7 @@ def create_transformation_event(
     valid_to = facility.valid_to.replace(tzinfo=None) if facility.valid_to.tzinfo else facility.valid_to
     if facility.status != "active" or not (valid_from <= now <= valid_to):
         raise bad_request("autorisation_transformation_invalide")
-    if current_actor.id != facility.operator_actor_id and not _has_role(db, current_actor.id, {"admin", "dirigeant"}):
+    if current_actor.id != facility.operator_actor_id and not auth.is_admin_like:
         raise bad_request("acces_refuse")
 
     lot = db.query(Lot).filter_by(id=payload.lot_input_id).first()
@@ -0,0 +1,169 @@
+"""
+Cache des agrégats de période des dashboards et rapports.
+
+Clé : endpoint, période (jours UTC) et périmètre territorial autorisé
+(région, commune ou acteur ; rien pour le national). Les contrôles d'accès
+sont faits avant la lecture du cache, et seuls les agrégats de période sont
+mis en cache (volume, ventes, lots distincts) : les compteurs courants
+(acteurs actifs, dossiers en attente, alertes) restent lus à chaque appel.
+
+- Période close (dernier jour antérieur aux `activity_rollup_redo_days`
+  derniers jours, que les rollups recalculent pour les écritures validées en
+  retard) : conservée sans expiration (au plus `dashboard_cache_max_entries`
+  entrées, LRU) tant que la génération des rollups (`auth_cache_versions`,
+  incrémentée quand un jour clos est recalculé, y compris par un autre
+  processus) n'a pas changé : une lecture par clé primaire à chaque accès.
+- Autre période : conservée `dashboard_cache_ttl_seconds`
+  et invalidée dès qu'un mouvement ou une vente arrive dans le périmètre et
+  la période. L'entrée retient le dernier id du registre et des transactions
+  au moment du calcul ; à chaque lecture, une requête indexée cherche une
+  ligne plus récente dans le périmètre. La vérification lit la base et vaut
+  donc aussi entre workers.
+
+Métrique : madavola_dashboard_cache_requests_total{endpoint, result}
+(hit, miss, stale).
+"""
+
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import DASHBOARD_CACHE_REQUESTS
+from app.models.lot import InventoryLedger
+from app.models.transaction import TradeTransaction
+from app.reports.rollups import day_bounds, read_rollup_generation, territory_scope
+
+
+@dataclass(frozen=True)
+class _Entry:
+    value: dict
+    # None : période close, sans expiration, vérifiée par `generation`.
+    expires_at: float | None
+    ledger_mark: int = 0
+    transaction_mark: int = 0
+    generation: int = 0
+
+
+class _EngineCache:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+
+
+_caches: "weakref.WeakKeyDictionary[Engine, _EngineCache]" = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def _cache_for(engine: Engine) -> _EngineCache:
+    cache = _caches.get(engine)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.setdefault(engine, _EngineCache())
+    return cache
+
+
+def clear_dashboard_cache(engine: Engine) -> None:
+    cache = _cache_for(engine)
+    with cache.lock:
+        cache.entries.clear()
+
+
+def _is_closed(last_day: date) -> bool:
+    """Période hors de la fenêtre des écritures tardives (cf. `activity_rollup_redo_days`)."""
+    today = datetime.now(timezone.utc).date()
+    return last_day < today - timedelta(days=max(settings.activity_rollup_redo_days, 0))
+
+
+def _marks(db: Session) -> tuple[int, int]:
+    return (
+        db.query(func.max(InventoryLedger.id)).scalar() or 0,
+        db.query(func.max(TradeTransaction.id)).scalar() or 0,
+    )
+
+
+def _landed_since(db: Session, entry: _Entry, first_day: date, last_day: date, territory: dict) -> bool:
+    """Mouvement ou vente enregistré après le calcul, dans la période et le périmètre."""
+    start, end = day_bounds(first_day, last_day)
+    # Lots distincts : cumul jusqu'à `last_day`, toute ligne antérieure compte.
+    ledger = territory_scope(
+        select(InventoryLedger.id).where(InventoryLedger.id > entry.ledger_mark, InventoryLedger.created_at < end),
+        InventoryLedger.actor_id,
+        **territory,
+    )
+    sales = territory_scope(
+        select(TradeTransaction.id).where(
+            TradeTransaction.id > entry.transaction_mark,
+            TradeTransaction.created_at >= start,
+            TradeTransaction.created_at < end,
+        ),
+        TradeTransaction.seller_actor_id,
+        **territory,
+    )
+    return any(db.execute(statement.limit(1)).first() for statement in (ledger, sales))
+
+
+def cached_aggregates(
+    db: Session,
+    endpoint: str,
+    first_day: date,
+    last_day: date,
+    compute: Callable[[], dict],
+    *,
+    region_id: int | None = None,
+    commune_id: int | None = None,
+    actor_id: int | None = None,
+    variant: tuple = (),
+) -> dict:
+    """
+    Agrégats de `compute()` pour la période et le périmètre, depuis le cache si
+    possible ; `variant` distingue les paramètres propres à l'endpoint.
+    """
+    if settings.dashboard_cache_ttl_seconds <= 0:
+        return compute()
+    territory = {"region_id": region_id, "commune_id": commune_id, "actor_id": actor_id}
+    key = (endpoint, first_day, last_day, region_id, commune_id, actor_id, *variant)
+    cache = _cache_for(db.get_bind())
+    with cache.lock:
+        entry = cache.entries.get(key)
+        if entry is not None:
+            cache.entries.move_to_end(key)
+    result = "miss"
+    if entry is not None:
+        if (entry.expires_at is None and entry.generation == read_rollup_generation(db)) or (
+            entry.expires_at is not None
+            and time.monotonic() < entry.expires_at
+            and not _landed_since(db, entry, first_day, last_day, territory)
+        ):
+            DASHBOARD_CACHE_REQUESTS.labels(endpoint, "hit").inc()
+            return entry.value
+        result = "stale"
+
+    if _is_closed(last_day):
+        # Génération lue avant le calcul : un recalcul concurrent invalide l'entrée.
+        generation = read_rollup_generation(db)
+        entry = _Entry(value=compute(), expires_at=None, generation=generation)
+    else:
+        # Repères lus avant le calcul : une écriture concurrente invalide l'entrée.
+        ledger_mark, transaction_mark = _marks(db)
+        entry = _Entry(
+            value=compute(),
+            expires_at=time.monotonic() + settings.dashboard_cache_ttl_seconds,
+            ledger_mark=ledger_mark,
+            transaction_mark=transaction_mark,
+        )
+    with cache.lock:
+        cache.entries[key] = entry
+        cache.entries.move_to_end(key)
+        while len(cache.entries) > settings.dashboard_cache_max_entries:
+            cache.entries.popitem(last=False)
+    DASHBOARD_CACHE_REQUESTS.labels(endpoint, result).inc()
+    return entry.value
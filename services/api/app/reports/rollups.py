@@ -0,0 +1,627 @@
+"""
+Cumuls journaliers d'activité (`daily_activity_rollups`).
+
+Une ligne par (jour UTC, filière, région, district, commune, acteur) :
+volume déclaré (mouvements `create`), ventes, nombre de mouvements et
+premières apparitions de lots (national, région, commune), avec la
+géographie de l'acteur au moment du calcul. `daily_region_rollups` reprend
+les mêmes cumuls par (jour, filière, région) : une année nationale se lit
+en quelques milliers de lignes, quel que soit le nombre d'acteurs.
+
+Les jours clos sont agrégés par le worker (toutes les
+`activity_rollup_interval_seconds`, au plus `activity_rollup_max_days_per_run`
+jours par passage) jusqu'au filigrane `rollup_watermarks` ; les
+`activity_rollup_redo_days` derniers jours agrégés sont recalculés à chaque
+passage pour les écritures validées en retard. Les lectures
+(`activity_totals`, `distinct_lots_through`) prennent les cumuls jusqu'au
+filigrane et complètent les jours suivants (aujourd'hui en général) depuis
+les tables brutes, sans parcourir l'historique.
+
+Les jours agrégés portent la géographie de l'acteur au moment du calcul.
+Un changement de région, district ou commune ramène le filigrane à la veille
+de la première activité de l'acteur, dans la même transaction : ces jours
+sont relus depuis les tables brutes (géographie courante) jusqu'à ce que le
+worker les ait recalculés. Le filigrane n'avance que d'un jour à la fois, un
+passage en cours ne l'écrase donc pas. Ce recul, comme tout recalcul d'un
+jour clos déjà agrégé (`--from`), incrémente la génération
+`ROLLUP_GENERATION_SCOPE` (`auth_cache_versions`) relue par le cache des
+dashboards avant de servir une période close. `activity_series` découpe une
+métrique en tranches (jour, semaine, mois) avec une requête groupée de
+chaque côté du filigrane.
+
+À la main : python -m app.reports.rollups [--from AAAA-MM-JJ]
+"""
+
+import sys
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Literal
+
+from sqlalchemy import (
+    Date,
+    DateTime,
+    Integer,
+    cast,
+    event,
+    func,
+    insert,
+    inspect,
+    literal,
+    literal_column,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Query, Session, aliased
+
+from app.auth.role_cache import bump_cache_version, read_cache_version
+from app.core.config import settings
+from app.core.partitions import add_months
+from app.models.actor import Actor
+from app.models.lot import InventoryLedger, Lot
+from app.models.rollup import DailyActivityRollup, DailyRegionRollup, RollupWatermark
+from app.models.transaction import TradeTransaction, TradeTransactionItem
+
+ACTIVITY_ROLLUP = "daily_activity"
+ROLLUP_GENERATION_SCOPE = "rollup_generation"
+
+# Clé du verrou consultatif PostgreSQL : un seul worker agrège un jour donné.
+_ROLLUP_LOCK_KEY = 0x524F4C4C
+
+_IN_CHUNK = 500
+
+
+def day_bounds(first: date, last: date) -> tuple[datetime, datetime]:
+    """[début de `first`, début du lendemain de `last`[ en UTC."""
+    start = datetime.combine(first, time.min, tzinfo=timezone.utc)
+    end = datetime.combine(last + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    return start, end
+
+
+def _utc_day(value: datetime) -> date:
+    return (value.astimezone(timezone.utc) if value.tzinfo else value).date()
+
+
+def rolled_through(db: Session) -> date | None:
+    return (
+        db.query(RollupWatermark.rolled_through).filter(RollupWatermark.name == ACTIVITY_ROLLUP).scalar()
+    )
+
+
+def read_rollup_generation(db: Session) -> int:
+    return read_cache_version(db, ROLLUP_GENERATION_SCOPE)
+
+
+def _set_watermark(db: Session, day: date) -> None:
+    if db.get(RollupWatermark, ACTIVITY_ROLLUP) is None:
+        db.add(RollupWatermark(name=ACTIVITY_ROLLUP, rolled_through=day))
+        return
+    # Jour suivant le filigrane seulement : un filigrane ramené en arrière
+    # pendant le passage (changement de géographie) n'est pas écrasé.
+    db.execute(
+        update(RollupWatermark)
+        .where(RollupWatermark.name == ACTIVITY_ROLLUP, RollupWatermark.rolled_through == day - timedelta(days=1))
+        .values(rolled_through=day, updated_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _rewind_watermark(connection: Connection, actor_id: int) -> None:
+    """Ramène le filigrane à la veille de la première activité de l'acteur."""
+    firsts = connection.execute(
+        select(
+            select(func.min(InventoryLedger.created_at)).where(InventoryLedger.actor_id == actor_id).scalar_subquery(),
+            select(func.min(TradeTransaction.created_at))
+            .where(TradeTransaction.seller_actor_id == actor_id)
+            .scalar_subquery(),
+        )
+    ).one()
+    days = [_utc_day(value) for value in firsts if value is not None]
+    if not days:
+        return
+    first_day = min(days)
+    connection.execute(
+        update(RollupWatermark.__table__)
+        .where(RollupWatermark.name == ACTIVITY_ROLLUP, RollupWatermark.rolled_through >= first_day)
+        .values(rolled_through=first_day - timedelta(days=1), updated_at=datetime.now(timezone.utc))
+    )
+    bump_cache_version(connection, ROLLUP_GENERATION_SCOPE)
+
+
+@event.listens_for(Actor, "after_update")
+def _on_actor_geography_change(_mapper, connection, target) -> None:
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in ("region_id", "district_id", "commune_id")):
+        _rewind_watermark(connection, target.id)
+
+
+# --- Agrégation d'un jour -------------------------------------------------------
+
+
+@dataclass
+class _Counters:
+    volume_created: Decimal = Decimal(0)
+    ledger_movements: int = 0
+    transactions_total: Decimal = Decimal(0)
+    transactions_count: int = 0
+    lots_first_seen: int = 0
+    lots_first_seen_region: int = 0
+    lots_first_seen_commune: int = 0
+
+
+def _earlier_presence(db: Session, lot_ids: list[int], before: datetime):
+    """Lots, (lot, région) et (lot, commune) déjà présents au registre avant `before`."""
+    lots: set[int] = set()
+    regions: set[tuple[int, int]] = set()
+    communes: set[tuple[int, int]] = set()
+    for offset in range(0, len(lot_ids), _IN_CHUNK):
+        rows = (
+            db.query(InventoryLedger.lot_id, Actor.region_id, Actor.commune_id)
+            .join(Actor, Actor.id == InventoryLedger.actor_id)
+            .filter(InventoryLedger.lot_id.in_(lot_ids[offset : offset + _IN_CHUNK]))
+            .filter(InventoryLedger.created_at < before)
+            .distinct()
+        )
+        for lot_id, region_id, commune_id in rows:
+            lots.add(lot_id)
+            regions.add((lot_id, region_id))
+            communes.add((lot_id, commune_id))
+    return lots, regions, communes
+
+
+def _transaction_filiere():
+    # Filière du premier lot vendu, comme pour la numérotation des factures.
+    return (
+        select(Lot.filiere)
+        .join(TradeTransactionItem, TradeTransactionItem.lot_id == Lot.id)
+        .where(TradeTransactionItem.transaction_id == TradeTransaction.id)
+        .order_by(TradeTransactionItem.id)
+        .limit(1)
+        .correlate(TradeTransaction)
+        .scalar_subquery()
+    )
+
+
+def compute_day(db: Session, day: date) -> list[dict]:
+    """Lignes de cumul du jour `day`, calculées depuis les tables brutes."""
+    start, end = day_bounds(day, day)
+    counters: dict[tuple, _Counters] = defaultdict(_Counters)
+
+    movements = (
+        db.query(
+            InventoryLedger.lot_id,
+            InventoryLedger.actor_id,
+            InventoryLedger.movement_type,
+            InventoryLedger.quantity_delta,
+            func.coalesce(Lot.filiere, "OR"),
+            Actor.region_id,
+            Actor.district_id,
+            Actor.commune_id,
+        )
+        .join(Actor, Actor.id == InventoryLedger.actor_id)
+        .outerjoin(Lot, Lot.id == InventoryLedger.lot_id)
+        .filter(InventoryLedger.created_at >= start, InventoryLedger.created_at < end)
+        .order_by(InventoryLedger.created_at, InventoryLedger.id)
+        .all()
+    )
+    seen_lots, seen_regions, seen_communes = _earlier_presence(
+        db, sorted({row[0] for row in movements}), start
+    )
+    for lot_id, actor_id, movement_type, quantity, filiere, region_id, district_id, commune_id in movements:
+        counter = counters[(filiere, region_id, district_id, commune_id, actor_id)]
+        counter.ledger_movements += 1
+        if movement_type == "create":
+            counter.volume_created += Decimal(str(quantity))
+        # Première apparition dans chaque périmètre : créditée à la première ligne du jour.
+        if lot_id not in seen_lots:
+            seen_lots.add(lot_id)
+            counter.lots_first_seen += 1
+        if (lot_id, region_id) not in seen_regions:
+            seen_regions.add((lot_id, region_id))
+            counter.lots_first_seen_region += 1
+        if (lot_id, commune_id) not in seen_communes:
+            seen_communes.add((lot_id, commune_id))
+            counter.lots_first_seen_commune += 1
+
+    sales = (
+        db.query(
+            func.coalesce(_transaction_filiere(), "OR"),
+            Actor.region_id,
+            Actor.district_id,
+            Actor.commune_id,
+            TradeTransaction.seller_actor_id,
+            TradeTransaction.total_amount,
+        )
+        .join(Actor, Actor.id == TradeTransaction.seller_actor_id)
+        .filter(TradeTransaction.created_at >= start, TradeTransaction.created_at < end)
+    )
+    for filiere, region_id, district_id, commune_id, actor_id, amount in sales:
+        counter = counters[(filiere, region_id, district_id, commune_id, actor_id)]
+        counter.transactions_total += Decimal(str(amount or 0))
+        counter.transactions_count += 1
+
+    keys = ("filiere", "region_id", "district_id", "commune_id", "actor_id")
+    return [{"day": day, **dict(zip(keys, key)), **asdict(counter)} for key, counter in sorted(counters.items())]
+
+
+def _region_rows(rows: list[dict]) -> list[dict]:
+    totals: dict[tuple, dict] = {}
+    summed = [column.key for column in DailyRegionRollup.__table__.columns if column.key not in {"day", "filiere", "region_id"}]
+    for row in rows:
+        key = (row["day"], row["filiere"], row["region_id"])
+        total = totals.setdefault(key, {"day": key[0], "filiere": key[1], "region_id": key[2], **dict.fromkeys(summed, 0)})
+        for name in summed:
+            total[name] += row[name]
+    return list(totals.values())
+
+
+def roll_day(db: Session, day: date) -> bool:
+    """Remplace les cumuls de `day` ; False si un autre worker agrège déjà. L'appelant valide."""
+    if db.get_bind().dialect.name == "postgresql":
+        if not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _ROLLUP_LOCK_KEY}).scalar():
+            return False
+    rows = compute_day(db, day)
+    for model, model_rows in ((DailyActivityRollup, rows), (DailyRegionRollup, _region_rows(rows))):
+        db.query(model).filter(model.day == day).delete(synchronize_session=False)
+        if model_rows:
+            db.execute(insert(model), model_rows)
+    return True
+
+
+def _first_activity_day(db: Session) -> date | None:
+    firsts = [
+        db.query(func.min(InventoryLedger.created_at)).scalar(),
+        db.query(func.min(TradeTransaction.created_at)).scalar(),
+    ]
+    days = [_utc_day(value) for value in firsts if value is not None]
+    return min(days) if days else None
+
+
+def roll_up_activity(
+    db: Session,
+    *,
+    today: date | None = None,
+    first_day: date | None = None,
+    max_days: int | None = None,
+) -> list[date]:
+    """
+    Agrège les jours clos depuis le filigrane (ou depuis `first_day`), un
+    commit par jour ; renvoie les jours agrégés.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    last_closed = today - timedelta(days=1)
+    through = rolled_through(db)
+    if first_day is None:
+        if through is None:
+            first_day = _first_activity_day(db) or today
+        else:
+            first_day = through + timedelta(days=1 - max(settings.activity_rollup_redo_days, 0))
+    rolled: list[date] = []
+    day = first_day
+    while day <= last_closed and (max_days is None or len(rolled) < max_days):
+        if not roll_day(db, day):
+            db.rollback()
+            break
+        _set_watermark(db, day)
+        db.commit()
+        rolled.append(day)
+        day += timedelta(days=1)
+    if through is None and not rolled and first_day > last_closed:
+        # Aucune activité passée : le filigrane part d'hier.
+        _set_watermark(db, last_closed)
+        db.commit()
+    settled = today - timedelta(days=max(settings.activity_rollup_redo_days, 0))
+    if through is not None and rolled and rolled[0] <= through and rolled[0] < settled:
+        # Jours clos déjà agrégés réécrits : les périodes closes en cache sont périmées.
+        bump_cache_version(db.connection(), ROLLUP_GENERATION_SCOPE)
+        db.commit()
+    return rolled
+
+
+# --- Lectures -----------------------------------------------------------------
+
+
+@dataclass
+class ActivityTotals:
+    volume_created: float
+    transactions_total: float
+
+
+def _rollup_model(*, region_id, commune_id, actor_id):
+    return DailyActivityRollup if commune_id is not None or actor_id is not None else DailyRegionRollup
+
+
+def _rollup_scope(query: Query, model, *, region_id, commune_id, actor_id) -> Query:
+    if region_id is not None:
+        query = query.filter(model.region_id == region_id)
+    if commune_id is not None:
+        query = query.filter(model.commune_id == commune_id)
+    if actor_id is not None:
+        query = query.filter(model.actor_id == actor_id)
+    return query
+
+
+def territory_scope(statement, actor_column, *, region_id, commune_id, actor_id, actor=Actor):
+    # `statement` : Query ou Select (`where` et `join` communs aux deux).
+    if region_id is not None or commune_id is not None:
+        statement = statement.join(actor, actor.id == actor_column)
+        if region_id is not None:
+            statement = statement.where(actor.region_id == region_id)
+        if commune_id is not None:
+            statement = statement.where(actor.commune_id == commune_id)
+    if actor_id is not None:
+        statement = statement.where(actor_column == actor_id)
+    return statement
+
+
+def _tail_from(through: date | None, date_from: date) -> date:
+    return date_from if through is None else max(date_from, through + timedelta(days=1))
+
+
+def activity_totals(
+    db: Session,
+    date_from: date,
+    date_to: date,
+    *,
+    region_id: int | None = None,
+    commune_id: int | None = None,
+    actor_id: int | None = None,
+) -> ActivityTotals:
+    """Volume déclaré et ventes du [date_from, date_to] (jours UTC inclus)."""
+    scope = {"region_id": region_id, "commune_id": commune_id, "actor_id": actor_id}
+    through = rolled_through(db)
+    volume = Decimal(0)
+    sales = Decimal(0)
+    if through is not None and date_from <= through:
+        model = _rollup_model(**scope)
+        rolled = _rollup_scope(
+            db.query(
+                func.coalesce(func.sum(model.volume_created), 0),
+                func.coalesce(func.sum(model.transactions_total), 0),
+            ).filter(model.day >= date_from, model.day <= min(date_to, through)),
+            model,
+            **scope,
+        ).one()
+        volume += Decimal(str(rolled[0]))
+        sales += Decimal(str(rolled[1]))
+    tail_from = _tail_from(through, date_from)
+    if tail_from <= date_to:
+        start, end = day_bounds(tail_from, date_to)
+        created = territory_scope(
+            db.query(func.coalesce(func.sum(InventoryLedger.quantity_delta), 0))
+            .filter(InventoryLedger.movement_type == "create")
+            .filter(InventoryLedger.created_at >= start, InventoryLedger.created_at < end),
+            InventoryLedger.actor_id,
+            **scope,
+        ).scalar()
+        sold = territory_scope(
+            db.query(func.coalesce(func.sum(TradeTransaction.total_amount), 0)).filter(
+                TradeTransaction.created_at >= start, TradeTransaction.created_at < end
+            ),
+            TradeTransaction.seller_actor_id,
+            **scope,
+        ).scalar()
+        volume += Decimal(str(created or 0))
+        sales += Decimal(str(sold or 0))
+    return ActivityTotals(volume_created=float(volume), transactions_total=float(sales))
+
+
+def distinct_lots_through(
+    db: Session, date_to: date, *, region_id: int | None = None, commune_id: int | None = None
+) -> int:
+    """Lots distincts passés au registre jusqu'au jour `date_to` inclus, dans le périmètre."""
+    scope = {"region_id": region_id, "commune_id": commune_id, "actor_id": None}
+    through = rolled_through(db)
+    count = 0
+    if through is not None:
+        model = _rollup_model(**scope)
+        if commune_id is not None:
+            column = model.lots_first_seen_commune
+        elif region_id is not None:
+            column = model.lots_first_seen_region
+        else:
+            column = model.lots_first_seen
+        count += (
+            _rollup_scope(
+                db.query(func.coalesce(func.sum(column), 0)).filter(model.day <= min(date_to, through)),
+                model,
+                **scope,
+            ).scalar()
+            or 0
+        )
+        if date_to <= through:
+            return int(count)
+    end = day_bounds(date_to, date_to)[1]
+    tail = territory_scope(
+        db.query(func.count(func.distinct(InventoryLedger.lot_id))).filter(InventoryLedger.created_at < end),
+        InventoryLedger.actor_id,
+        **scope,
+    )
+    if through is not None:
+        # Lots déjà comptés par les cumuls : présents dans le périmètre avant la fin du filigrane.
+        start = day_bounds(through + timedelta(days=1), date_to)[0]
+        earlier = aliased(InventoryLedger)
+        seen = territory_scope(
+            select(earlier.id).where(earlier.lot_id == InventoryLedger.lot_id, earlier.created_at < start),
+            earlier.actor_id,
+            actor=aliased(Actor),
+            **scope,
+        )
+        tail = tail.filter(InventoryLedger.created_at >= start).filter(~seen.exists())
+    return int(count + (tail.scalar() or 0))
+
+
+# --- Séries -------------------------------------------------------------------
+
+SeriesMetric = Literal["volume_created", "ledger_movements", "transactions_total", "transactions_count"]
+Granularity = Literal["day", "week", "month"]
+SeriesGroup = Literal["region", "commune", "filiere"]
+
+# Modificateurs SQLite de date() : semaine ISO (lundi) et mois.
+_SQLITE_BUCKETS = {"day": (), "week": ("weekday 0", "-6 days"), "month": ("start of month",)}
+
+
+@dataclass
+class ActivitySeries:
+    buckets: list[date]
+    # Une valeur par tranche, dans l'ordre de `buckets` ; clé None sans regroupement.
+    series: dict[int | str | None, list[float]]
+
+
+def bucket_start(day: date, granularity: Granularity) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def series_buckets(first_day: date, last_day: date, granularity: Granularity) -> list[date]:
+    """Débuts des tranches couvrant [first_day, last_day] ; la première est alignée."""
+    buckets = []
+    bucket = bucket_start(first_day, granularity)
+    while bucket <= last_day:
+        buckets.append(bucket)
+        if granularity == "month":
+            bucket = add_months(bucket, 1)
+        else:
+            bucket += timedelta(days=7 if granularity == "week" else 1)
+    return buckets
+
+
+def _bucket_column(db: Session, column, granularity: Granularity, *, timestamp: bool = False):
+    # Tranche calculée par la base, littéraux en clair : le même texte dans
+    # SELECT et GROUP BY (PostgreSQL refuse deux paramètres liés distincts).
+    if db.get_bind().dialect.name == "postgresql":
+        value = func.timezone(literal_column("'UTC'"), column) if timestamp else cast(column, DateTime())
+        return cast(func.date_trunc(literal_column(f"'{granularity}'"), value), Date)
+    return func.date(column, *(literal_column(f"'{modifier}'") for modifier in _SQLITE_BUCKETS[granularity]))
+
+
+def _as_day(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _rolled_series(db: Session, metric, granularity, group_by, first_day, last_day, scope) -> list[tuple]:
+    model = DailyActivityRollup if group_by == "commune" or scope["commune_id"] is not None else DailyRegionRollup
+    bucket = _bucket_column(db, model.day, granularity)
+    keys = []
+    if group_by == "filiere":
+        keys = [model.filiere]
+    elif group_by is not None:
+        keys = [getattr(model, f"{group_by}_id")]
+    query = _rollup_scope(
+        db.query(bucket, *keys, func.sum(getattr(model, metric))).filter(model.day >= first_day, model.day <= last_day),
+        model,
+        **scope,
+    )
+    return query.group_by(bucket, *keys).all()
+
+
+def _raw_series(db: Session, metric, granularity, group_by, first_day, last_day, scope) -> list[tuple]:
+    start, end = day_bounds(first_day, last_day)
+    if metric in ("volume_created", "ledger_movements"):
+        value = InventoryLedger.quantity_delta if metric == "volume_created" else literal(1, Integer)
+        rows = select(
+            InventoryLedger.created_at.label("created_at"),
+            InventoryLedger.actor_id.label("actor_id"),
+            value.label("value"),
+        ).where(InventoryLedger.created_at >= start, InventoryLedger.created_at < end)
+        if metric == "volume_created":
+            rows = rows.where(InventoryLedger.movement_type == "create")
+        if group_by == "filiere":
+            rows = rows.outerjoin(Lot, Lot.id == InventoryLedger.lot_id).add_columns(
+                func.coalesce(Lot.filiere, "OR").label("filiere")
+            )
+    else:
+        value = TradeTransaction.total_amount if metric == "transactions_total" else literal(1, Integer)
+        rows = select(
+            TradeTransaction.created_at.label("created_at"),
+            TradeTransaction.seller_actor_id.label("actor_id"),
+            value.label("value"),
+        ).where(TradeTransaction.created_at >= start, TradeTransaction.created_at < end)
+        if group_by == "filiere":
+            # Sous-requête corrélée dans une table dérivée : elle ne peut pas figurer dans le GROUP BY.
+            rows = rows.add_columns(func.coalesce(_transaction_filiere(), "OR").label("filiere"))
+    rows = rows.subquery()
+    bucket = _bucket_column(db, rows.c.created_at, granularity, timestamp=True)
+    keys = []
+    if group_by == "filiere":
+        keys = [rows.c.filiere]
+    elif group_by is not None:
+        keys = [getattr(Actor, f"{group_by}_id")]
+    query = db.query(bucket, *keys, func.sum(rows.c.value))
+    if group_by in ("region", "commune") or scope["region_id"] is not None or scope["commune_id"] is not None:
+        query = query.join(Actor, Actor.id == rows.c.actor_id)
+        if scope["region_id"] is not None:
+            query = query.filter(Actor.region_id == scope["region_id"])
+        if scope["commune_id"] is not None:
+            query = query.filter(Actor.commune_id == scope["commune_id"])
+    return query.group_by(bucket, *keys).all()
+
+
+def activity_series(
+    db: Session,
+    metric: SeriesMetric,
+    granularity: Granularity,
+    date_from: date,
+    date_to: date,
+    *,
+    group_by: SeriesGroup | None = None,
+    region_id: int | None = None,
+    commune_id: int | None = None,
+) -> ActivitySeries:
+    """
+    Série de `metric` par tranche sur [date_from, date_to] (jours UTC inclus),
+    une série par région, commune ou filière : une requête groupée sur les
+    cumuls jusqu'au filigrane, une sur les tables brutes au-delà, puis les
+    tranches sans activité complétées à zéro en un passage.
+    """
+    scope = {"region_id": region_id, "commune_id": commune_id, "actor_id": None}
+    through = rolled_through(db)
+    rows: list[tuple] = []
+    if through is not None and date_from <= through:
+        rows += _rolled_series(db, metric, granularity, group_by, date_from, min(date_to, through), scope)
+    tail_from = _tail_from(through, date_from)
+    if tail_from <= date_to:
+        rows += _raw_series(db, metric, granularity, group_by, tail_from, date_to, scope)
+
+    buckets = series_buckets(date_from, date_to, granularity)
+    position = {bucket: index for index, bucket in enumerate(buckets)}
+    series: dict[int | str | None, list[float]] = {}
+    for row in rows:
+        # Une tranche à cheval sur le filigrane reçoit une ligne de chaque requête.
+        key = row[1] if group_by else None
+        values = series.setdefault(key, [0.0] * len(buckets))
+        values[position[_as_day(row[0])]] += float(row[-1] or 0)
+    if group_by is None and not series:
+        series[None] = [0.0] * len(buckets)
+    ordered = sorted(series, key=lambda key: (key is None, key if key is not None else 0))
+    return ActivitySeries(buckets=buckets, series={key: series[key] for key in ordered})
+
+
+def main(argv: list[str]) -> int:
+    from app.db import SessionLocal
+
+    first_day = None
+    if "--from" in argv:
+        first_day = date.fromisoformat(argv[argv.index("--from") + 1])
+    db = SessionLocal()
+    try:
+        rolled = roll_up_activity(db, first_day=first_day)
+        print(f"jours agreges: {len(rolled)}" + (f" ({rolled[0]} -> {rolled[-1]})" if rolled else ""))
+        print(f"filigrane: {rolled_through(db)}")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,17 +1,16 @@
-from datetime import date, datetime, time, timezone
+from dataclasses import asdict
+from datetime import date
 
 from fastapi import APIRouter, Depends
-from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_actor, get_actor_role_codes
-from app.auth.roles_config import has_permission, PERM_DASHBOARD_NATIONAL, PERM_DASHBOARD_REGIONAL, PERM_ADMIN_COMMUNE
+from app.auth.dependencies import AuthContext, get_auth_context
+from app.auth.roles_config import PERM_DASHBOARD_NATIONAL, PERM_DASHBOARD_REGIONAL, PERM_ADMIN_COMMUNE
 from app.common.errors import bad_request
 from app.core.config import settings
-from app.db import get_db
-from app.models.actor import Actor, ActorRole
-from app.models.lot import InventoryLedger
-from app.models.transaction import TradeTransaction
+from app.db import get_read_db
+from app.reports.cache import cached_aggregates
+from app.reports.rollups import activity_totals
 from app.reports.schemas import ActorReportOut, CommuneReportOut, NationalReportOut
 
 router = APIRouter(prefix=f"{settings.api_prefix}/reports", tags=["reports"])
@@ -22,39 +21,16 @@ def report_commune(
     commune_id: int,
     date_from: date | None = None,
     date_to: date | None = None,
-    db: Session = Depends(get_db),
-    current_actor=Depends(get_current_actor),
+    db: Session = Depends(get_read_db),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    role_codes = get_actor_role_codes(current_actor, db)
-    if not _is_admin(db, current_actor.id) and not has_permission(role_codes, PERM_ADMIN_COMMUNE):
+    if not auth.is_admin_like and not auth.has_permission(PERM_ADMIN_COMMUNE):
         raise bad_request("acces_refuse")
-    if "commune_agent" in role_codes and current_actor.commune_id != commune_id:
+    if auth.has_role("commune_agent") and auth.actor.commune_id != commune_id:
         raise bad_request("acces_refuse")
-    start_dt, end_dt = _date_range(date_from, date_to)
-
-    volume_created = (
-        db.query(func.sum(InventoryLedger.quantity_delta))
-        .join(Actor, Actor.id == InventoryLedger.actor_id)
-        .filter(Actor.commune_id == commune_id)
-        .filter(InventoryLedger.movement_type == "create")
-        .filter(InventoryLedger.created_at >= start_dt, InventoryLedger.created_at <= end_dt)
-        .scalar()
-        or 0
-    )
-
-    transactions_total = (
-        db.query(func.sum(TradeTransaction.total_amount))
-        .join(Actor, Actor.id == TradeTransaction.seller_actor_id)
-        .filter(Actor.commune_id == commune_id)
-        .filter(TradeTransaction.created_at >= start_dt, TradeTransaction.created_at <= end_dt)
-        .scalar()
-        or 0
-    )
-
     return CommuneReportOut(
         commune_id=commune_id,
-        volume_created=float(volume_created),
-        transactions_total=float(transactions_total),
+        **_period_aggregates(db, "reports.commune", date_from, date_to, commune_id=commune_id),
     )
 
 
@@ -63,31 +39,14 @@ def report_actor(
     actor_id: int,
     date_from: date | None = None,
     date_to: date | None = None,
-    db: Session = Depends(get_db),
-    current_actor=Depends(get_current_actor),
+    db: Session = Depends(get_read_db),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    if not _is_admin(db, current_actor.id) and current_actor.id != actor_id:
+    if not auth.is_admin_like and auth.actor_id != actor_id:
         raise bad_request("acces_refuse")
-    start_dt, end_dt = _date_range(date_from, date_to)
-    volume_created = (
-        db.query(func.sum(InventoryLedger.quantity_delta))
-        .filter(InventoryLedger.actor_id == actor_id)
-        .filter(InventoryLedger.movement_type == "create")
-        .filter(InventoryLedger.created_at >= start_dt, InventoryLedger.created_at <= end_dt)
-        .scalar()
-        or 0
-    )
-    transactions_total = (
-        db.query(func.sum(TradeTransaction.total_amount))
-        .filter(TradeTransaction.seller_actor_id == actor_id)
-        .filter(TradeTransaction.created_at >= start_dt, TradeTransaction.created_at <= end_dt)
-        .scalar()
-        or 0
-    )
     return ActorReportOut(
         actor_id=actor_id,
-        volume_created=float(volume_created),
-        transactions_total=float(transactions_total),
+        **_period_aggregates(db, "reports.actor", date_from, date_to, actor_id=actor_id),
     )
 
 
@@ -95,53 +54,25 @@ def report_actor(
 def report_national(
     date_from: date | None = None,
     date_to: date | None = None,
-    db: Session = Depends(get_db),
-    current_actor=Depends(get_current_actor),
+    db: Session = Depends(get_read_db),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    role_codes = get_actor_role_codes(current_actor, db)
-    if not _is_admin(db, current_actor.id) and not has_permission(role_codes, PERM_DASHBOARD_NATIONAL):
+    if not auth.is_admin_like and not auth.has_permission(PERM_DASHBOARD_NATIONAL):
         raise bad_request("acces_refuse")
-    start_dt, end_dt = _date_range(date_from, date_to)
-    volume_created = (
-        db.query(func.sum(InventoryLedger.quantity_delta))
-        .filter(InventoryLedger.movement_type == "create")
-        .filter(InventoryLedger.created_at >= start_dt, InventoryLedger.created_at <= end_dt)
-        .scalar()
-        or 0
-    )
-    transactions_total = (
-        db.query(func.sum(TradeTransaction.total_amount))
-        .filter(TradeTransaction.created_at >= start_dt, TradeTransaction.created_at <= end_dt)
-        .scalar()
-        or 0
-    )
-    return NationalReportOut(
-        volume_created=float(volume_created),
-        transactions_total=float(transactions_total),
-    )
+    return NationalReportOut(**_period_aggregates(db, "reports.national", date_from, date_to))
 
 
-def _date_range(date_from: date | None, date_to: date | None) -> tuple[datetime, datetime]:
+def _day_range(date_from: date | None, date_to: date | None) -> tuple[date, date]:
     if date_from and date_to and date_from > date_to:
         raise bad_request("intervalle_invalide")
-    start = datetime.combine(date_from or date.today(), time.min, tzinfo=timezone.utc)
-    end = datetime.combine(date_to or date.today(), time.max, tzinfo=timezone.utc)
-    return start, end
+    return date_from or date.today(), date_to or date.today()
 
 
-def _is_admin(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role.in_(["admin", "dirigeant"]))
-        .first()
-        is not None
-    )
+def _period_aggregates(db: Session, endpoint: str, date_from: date | None, date_to: date | None, **territory) -> dict:
+    first_day, last_day = _day_range(date_from, date_to)
 
+    def compute() -> dict:
+        return asdict(activity_totals(db, first_day, last_day, **territory))
+
+    return cached_aggregates(db, endpoint, first_day, last_day, compute, **territory)
 
-def _is_commune_agent(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role == "commune_agent")
-        .first()
-        is not None
-    )
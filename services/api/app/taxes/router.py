@@ -2,21 +2,20 @@ from datetime import datetime, timezone
 from decimal import Decimal
 import hashlib
 import json
-from pathlib import Path
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.auth.dependencies import get_current_actor, require_roles
 from app.common.card_identity import build_invoice_number, build_receipt_number
 from app.common.errors import bad_request, conflict, not_found
-from app.common.receipts import build_simple_pdf
+from app.common.pagination import PaginationParams, get_cursor_pagination, paginate, set_page_headers
+from app.documents.jobs import queue_pdf_document
 from app.core.config import settings
-from app.db import get_db
+from app.db import get_db, get_read_db
 from app.models.admin import SystemConfig
 from app.models.actor import ActorRole
-from app.models.document import Document
 from app.models.gold_ops import LegalVersioning, TaxBreakdown
 from app.models.payment import PaymentRequest
 from app.models.tax import LocalMarketValue, TaxEventRegistry, TaxRecord
@@ -119,7 +118,7 @@ def list_tax_events(
     taxable_event_type: str | None = None,
     status: str | None = None,
     lot_id: int | None = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _actor=Depends(get_current_actor),
 ):
     query = db.query(TaxEventRegistry)
@@ -325,10 +324,12 @@ def create_taxes_for_event(
 
 @router.get("", response_model=list[TaxRecordOut])
 def list_taxes(
+    response: Response,
     taxable_event_type: str | None = None,
     taxable_event_id: str | None = None,
     status: str | None = None,
-    db: Session = Depends(get_db),
+    pagination: PaginationParams = Depends(get_cursor_pagination),
+    db: Session = Depends(get_read_db),
     _actor=Depends(get_current_actor),
 ):
     query = db.query(TaxRecord)
@@ -338,7 +339,9 @@ def list_taxes(
         query = query.filter(TaxRecord.taxable_event_id == taxable_event_id.strip())
     if status:
         query = query.filter(TaxRecord.status == status.upper())
-    rows = query.order_by(TaxRecord.id.asc()).all()
+    page = paginate(query, sort_column=TaxRecord.id, id_column=TaxRecord.id, pagination=pagination, descending=False)
+    set_page_headers(response, page)
+    rows = page.rows
     return [_to_record_out(item) for item in rows]
 
 
@@ -563,22 +566,16 @@ def _ensure_tax_event_invoice_document(db: Session, *, event: TaxEventRegistry,
             )
     for ref in breakdown.get("legal_basis", []):
         lines.append(f"Base legale: {ref}")
-    content = build_simple_pdf("MADAVOLA - Facture evenement fiscal", lines)
-    storage_dir = Path(settings.document_storage_dir)
-    storage_dir.mkdir(parents=True, exist_ok=True)
-    filename = f"{event.invoice_number}.pdf"
-    storage_path = storage_dir / filename
-    storage_path.write_bytes(content)
-    doc = Document(
+    doc = queue_pdf_document(
+        db,
         doc_type="invoice",
         owner_actor_id=event.payer_actor_id or event.created_by_actor_id or 0,
         related_entity_type="tax_event",
         related_entity_id=str(event.id),
-        storage_path=str(storage_path),
-        original_filename=filename,
-        sha256=hashlib.sha256(content).hexdigest(),
+        filename=f"{event.invoice_number}.pdf",
+        title="MADAVOLA - Facture evenement fiscal",
+        lines=lines,
     )
-    db.add(doc)
     db.flush()
     event.invoice_document_id = doc.id
 
@@ -599,22 +596,16 @@ def _ensure_tax_event_receipt_document(db: Session, event: TaxEventRegistry) ->
     ]
     for ref in _parse_json_list(event.legal_basis_json):
         lines.append(f"Base legale: {ref}")
-    content = build_simple_pdf("MADAVOLA - Recu evenement fiscal", lines)
-    storage_dir = Path(settings.document_storage_dir)
-    storage_dir.mkdir(parents=True, exist_ok=True)
-    filename = f"{event.receipt_number}.pdf"
-    storage_path = storage_dir / filename
-    storage_path.write_bytes(content)
-    doc = Document(
+    doc = queue_pdf_document(
+        db,
         doc_type="receipt",
         owner_actor_id=event.payer_actor_id or event.created_by_actor_id or 0,
         related_entity_type="tax_event",
         related_entity_id=str(event.id),
-        storage_path=str(storage_path),
-        original_filename=filename,
-        sha256=hashlib.sha256(content).hexdigest(),
+        filename=f"{event.receipt_number}.pdf",
+        title="MADAVOLA - Recu evenement fiscal",
+        lines=lines,
     )
-    db.add(doc)
     db.flush()
     event.receipt_document_id = doc.id
 
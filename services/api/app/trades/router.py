@@ -1,20 +1,18 @@
-import hashlib
 import json
-from pathlib import Path
 from decimal import Decimal
 from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_actor
+from app.auth.dependencies import get_current_actor, load_active_role_codes
 from app.common.errors import bad_request
 from app.common.card_identity import build_invoice_number, build_receipt_number, canonical_json, sha256_hex, sign_hmac_sha256
-from app.common.receipts import build_qr_value, build_simple_pdf
+from app.common.receipts import build_qr_value
+from app.documents.jobs import queue_pdf_document
 from app.core.config import settings
 from app.db import get_db
-from app.models.actor import Actor, ActorRole
-from app.models.document import Document
+from app.models.actor import Actor
 from app.models.invoice import Invoice
 from app.models.lot import InventoryLedger, Lot
 from app.models.payment import Payment, PaymentProvider, PaymentRequest
@@ -30,18 +28,9 @@ router = APIRouter(prefix=f"{settings.api_prefix}/trades", tags=["trades"])
 COMPTOIR_BUYER_ROLES = {"comptoir_operator", "comptoir_compliance", "comptoir_director", "comptoir"}
 
 
-def _roles(db: Session, actor_id: int) -> set[str]:
-    rows = (
-        db.query(ActorRole.role)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.status == "active")
-        .all()
-    )
-    return {r[0] for r in rows}
-
-
 def _ensure_pierre_trade_path(db: Session, seller_id: int, buyer_id: int) -> None:
-    seller_roles = _roles(db, seller_id)
-    buyer_roles = _roles(db, buyer_id)
+    seller_roles = load_active_role_codes(db, seller_id)
+    buyer_roles = load_active_role_codes(db, buyer_id)
     allowed = False
     if "pierre_exploitant" in seller_roles and "pierre_collecteur" in buyer_roles:
         allowed = True
@@ -56,8 +45,8 @@ def _ensure_pierre_trade_path(db: Session, seller_id: int, buyer_id: int) -> Non
 
 
 def _ensure_bois_trade_path(db: Session, seller_id: int, buyer_id: int) -> None:
-    seller_roles = _roles(db, seller_id)
-    buyer_roles = _roles(db, buyer_id)
+    seller_roles = load_active_role_codes(db, seller_id)
+    buyer_roles = load_active_role_codes(db, buyer_id)
     allowed = False
     if "bois_exploitant" in seller_roles and buyer_roles.intersection({"bois_collecteur", "bois_transformateur"}):
         allowed = True
@@ -77,8 +66,8 @@ def _ensure_or_trade_path(db: Session, seller_id: int, buyer_id: int) -> None:
     allowed, reason = can_trade_or(db, seller_id, buyer_id)
     if not allowed:
         raise bad_request(reason or "transaction_or_bloquee")
-    seller_roles = _roles(db, seller_id)
-    buyer_roles = _roles(db, buyer_id)
+    seller_roles = load_active_role_codes(db, seller_id)
+    buyer_roles = load_active_role_codes(db, buyer_id)
     if "orpailleur" in seller_roles and "collecteur" not in buyer_roles:
         raise bad_request("chaine_or_invalide", {"expected_buyer_role": "collecteur"})
     if "collecteur" in seller_roles and buyer_roles.isdisjoint(COMPTOIR_BUYER_ROLES.union({"bijoutier"})):
@@ -221,9 +210,15 @@ def _issue_trade_invoice_and_receipt(db: Session, tx: TradeTransaction) -> None:
         )
         db.add(invoice)
         db.flush()
-        invoice_pdf = build_simple_pdf(
-            "MADAVOLA - Facture transaction",
-            [
+        queue_pdf_document(
+            db,
+            doc_type="invoice",
+            owner_actor_id=tx.seller_actor_id,
+            related_entity_type="invoice",
+            related_entity_id=str(invoice.id),
+            filename=f"{invoice_number}.pdf",
+            title="MADAVOLA - Facture transaction",
+            lines=[
                 f"Facture: {invoice_number}",
                 f"Transaction: {tx.id}",
                 f"Vendeur: {tx.seller_actor_id}",
@@ -237,27 +232,18 @@ def _issue_trade_invoice_and_receipt(db: Session, tx: TradeTransaction) -> None:
                 f"Date: {now.isoformat()}",
             ],
         )
-        invoice_filename = f"{invoice_number}.pdf"
-        invoice_path = Path(settings.document_storage_dir) / invoice_filename
-        invoice_path.parent.mkdir(parents=True, exist_ok=True)
-        invoice_path.write_bytes(invoice_pdf)
-        db.add(
-            Document(
-                doc_type="invoice",
-                owner_actor_id=tx.seller_actor_id,
-                related_entity_type="invoice",
-                related_entity_id=str(invoice.id),
-                storage_path=str(invoice_path),
-                original_filename=invoice_filename,
-                sha256=hashlib.sha256(invoice_pdf).hexdigest(),
-            )
-        )
     invoice.status = "paid"
     if not invoice.receipt_document_id:
         receipt_number = build_receipt_number(invoice.id, now=now)
-        receipt_pdf = build_simple_pdf(
-            "MADAVOLA - Recu transaction",
-            [
+        doc = queue_pdf_document(
+            db,
+            doc_type="receipt",
+            owner_actor_id=tx.buyer_actor_id,
+            related_entity_type="invoice",
+            related_entity_id=str(invoice.id),
+            filename=f"{receipt_number}.pdf",
+            title="MADAVOLA - Recu transaction",
+            lines=[
                 f"Recu: {receipt_number}",
                 f"Facture: {invoice.invoice_number}",
                 f"Transaction: {tx.id}",
@@ -269,20 +255,6 @@ def _issue_trade_invoice_and_receipt(db: Session, tx: TradeTransaction) -> None:
                 f"Date confirmation: {now.isoformat()}",
             ],
         )
-        receipt_filename = f"{receipt_number}.pdf"
-        receipt_path = Path(settings.document_storage_dir) / receipt_filename
-        receipt_path.parent.mkdir(parents=True, exist_ok=True)
-        receipt_path.write_bytes(receipt_pdf)
-        doc = Document(
-            doc_type="receipt",
-            owner_actor_id=tx.buyer_actor_id,
-            related_entity_type="invoice",
-            related_entity_id=str(invoice.id),
-            storage_path=str(receipt_path),
-            original_filename=receipt_filename,
-            sha256=hashlib.sha256(receipt_pdf).hexdigest(),
-        )
-        db.add(doc)
         db.flush()
         invoice.receipt_number = receipt_number
         invoice.receipt_document_id = doc.id
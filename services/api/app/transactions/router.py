@@ -3,12 +3,12 @@ from decimal import Decimal
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_actor, get_optional_actor
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor, get_optional_actor, get_optional_auth_context, load_active_role_codes
 from app.common.errors import bad_request
-from app.common.pagination import PaginatedResponse, PaginationParams, get_pagination
+from app.common.pagination import PaginatedResponse, PaginationParams, get_pagination, paginate
 from app.core.config import settings
-from app.db import get_db
-from app.models.actor import Actor, ActorRole
+from app.db import get_db, get_read_db
+from app.models.actor import Actor
 from app.models.payment import Payment, PaymentProvider, PaymentRequest
 from app.models.invoice import Invoice
 from app.models.document import Document
@@ -35,12 +35,13 @@ def create_transaction(
     payload: TransactionCreate,
     db: Session = Depends(get_db),
     current_actor=Depends(get_optional_actor),
+    auth: AuthContext | None = Depends(get_optional_auth_context),
 ):
     seller = db.query(Actor).filter_by(id=payload.seller_actor_id).first()
     buyer = db.query(Actor).filter_by(id=payload.buyer_actor_id).first()
     if not seller or not buyer:
         raise bad_request("acteur_invalide")
-    if current_actor and not _is_admin(db, current_actor.id) and current_actor.id != payload.seller_actor_id:
+    if current_actor and not auth.is_admin_like and current_actor.id != payload.seller_actor_id:
         raise bad_request("acces_refuse")
     if not payload.items:
         raise bad_request("items_obligatoires")
@@ -71,8 +72,8 @@ def create_transaction(
         allowed, reason = can_trade_or(db, payload.seller_actor_id, payload.buyer_actor_id)
         if not allowed:
             raise bad_request(reason or "transaction_or_bloquee")
-        seller_roles = _get_actor_roles(db, payload.seller_actor_id)
-        buyer_roles = _get_actor_roles(db, payload.buyer_actor_id)
+        seller_roles = load_active_role_codes(db, payload.seller_actor_id)
+        buyer_roles = load_active_role_codes(db, payload.buyer_actor_id)
         if "orpailleur" in seller_roles and "collecteur" not in buyer_roles:
             raise bad_request("chaine_or_invalide", {"expected_buyer_role": "collecteur"})
         if "collecteur" in seller_roles and buyer_roles.isdisjoint({"comptoir_operator", "comptoir_compliance", "comptoir_director", "bijoutier"}):
@@ -126,11 +127,12 @@ def list_transactions(
     buyer_actor_id: int | None = None,
     status: str | None = None,
     pagination: PaginationParams = Depends(get_pagination),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     query = db.query(TradeTransaction)
-    if not _is_admin(db, current_actor.id):
+    if not auth.is_admin_like:
         query = query.filter(
             (TradeTransaction.seller_actor_id == current_actor.id)
             | (TradeTransaction.buyer_actor_id == current_actor.id)
@@ -146,12 +148,13 @@ def list_transactions(
     if status:
         query = query.filter(TradeTransaction.status == status)
     
-    # Count total
-    total = query.count()
-    
-    # Apply pagination
-    transactions = query.order_by(TradeTransaction.created_at.desc()).offset(pagination.offset).limit(pagination.limit).all()
-    
+    page = paginate(
+        query,
+        sort_column=TradeTransaction.created_at,
+        id_column=TradeTransaction.id,
+        pagination=pagination,
+    )
+
     items = [
         TransactionOut(
             id=txn.id,
@@ -161,10 +164,10 @@ def list_transactions(
             total_amount=float(txn.total_amount),
             currency=txn.currency,
         )
-        for txn in transactions
+        for txn in page.rows
     ]
     
-    return PaginatedResponse.create(items, total, pagination.page, pagination.page_size)
+    return PaginatedResponse.create(items, page.total, pagination.page, pagination.page_size, page.next_cursor)
 
 
 @router.get("/{transaction_id}", response_model=TransactionDetailOut)
@@ -172,6 +175,7 @@ def get_transaction(
     transaction_id: int,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     transaction = (
         db.query(TradeTransaction)
@@ -180,7 +184,7 @@ def get_transaction(
     )
     if not transaction:
         raise bad_request("transaction_introuvable")
-    if not _is_admin(db, current_actor.id):
+    if not auth.is_admin_like:
         if current_actor.id not in (transaction.seller_actor_id, transaction.buyer_actor_id):
             raise bad_request("acces_refuse")
     items = (
@@ -208,35 +212,18 @@ def get_transaction(
     )
 
 
-def _is_admin(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role.in_(["admin", "dirigeant"]))
-        .first()
-        is not None
-    )
-
-
-def _get_actor_roles(db: Session, actor_id: int) -> set[str]:
-    rows = (
-        db.query(ActorRole.role)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.status == "active")
-        .all()
-    )
-    return {row[0] for row in rows}
-
-
 @router.post("/{transaction_id}/initiate-payment", response_model=TransactionPaymentOut, status_code=201)
 def initiate_transaction_payment(
     transaction_id: int,
     payload: TransactionPaymentInitiate,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     transaction = db.query(TradeTransaction).filter_by(id=transaction_id).first()
     if not transaction or transaction.status != "pending_payment":
         raise bad_request("transaction_invalide")
-    if not _is_admin(db, current_actor.id):
+    if not auth.is_admin_like:
         if current_actor.id not in (transaction.seller_actor_id, transaction.buyer_actor_id):
             raise bad_request("acces_refuse")
 
@@ -287,11 +274,12 @@ def list_transaction_payments(
     transaction_id: int,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     transaction = db.query(TradeTransaction).filter_by(id=transaction_id).first()
     if not transaction:
         raise bad_request("transaction_introuvable")
-    if not _is_admin(db, current_actor.id):
+    if not auth.is_admin_like:
         if current_actor.id not in (transaction.seller_actor_id, transaction.buyer_actor_id):
             raise bad_request("acces_refuse")
     payments = (
@@ -320,11 +308,12 @@ def finalize_transaction(
     transaction_id: int,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     transaction = db.query(TradeTransaction).filter_by(id=transaction_id).first()
     if not transaction:
         raise bad_request("transaction_introuvable")
-    if not _is_admin(db, current_actor.id):
+    if not auth.is_admin_like:
         if current_actor.id not in (transaction.seller_actor_id, transaction.buyer_actor_id):
             raise bad_request("acces_refuse")
 
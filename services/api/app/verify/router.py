@@ -11,7 +11,7 @@ from sqlalchemy.orm import Session
 from app.common.card_identity import verify_hmac_sha256
 from app.common.errors import bad_request
 from app.core.config import settings
-from app.db import get_db
+from app.db import get_read_db
 from app.models.actor import Actor
 from app.models.invoice import Invoice
 from app.models.lot import InventoryLedger, Lot
@@ -23,7 +23,7 @@ router = APIRouter(prefix=f"{settings.api_prefix}/verify", tags=["verify"])
 
 
 @router.get("/actor/{actor_id}", response_model=ActorVerifyOut)
-def verify_actor(actor_id: int, db: Session = Depends(get_db)):
+def verify_actor(actor_id: int, db: Session = Depends(get_read_db)):
     actor = db.query(Actor).filter_by(id=actor_id).first()
     if not actor:
         raise bad_request("acteur_introuvable")
@@ -39,7 +39,7 @@ def verify_actor(actor_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/lot/{lot_id}", response_model=LotVerifyOut)
-def verify_lot(lot_id: int, db: Session = Depends(get_db)):
+def verify_lot(lot_id: int, db: Session = Depends(get_read_db)):
     lot = db.query(Lot).filter_by(id=lot_id).first()
     if not lot:
         raise bad_request("lot_introuvable")
@@ -80,7 +80,7 @@ def verify_lot(lot_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/invoice/{invoice_ref}", response_model=InvoiceVerifyOut)
-def verify_invoice(invoice_ref: str, db: Session = Depends(get_db)):
+def verify_invoice(invoice_ref: str, db: Session = Depends(get_read_db)):
     invoice = db.query(Invoice).filter(Invoice.invoice_number == invoice_ref).first()
     if not invoice and invoice_ref.isdigit():
         invoice = db.query(Invoice).filter(Invoice.id == int(invoice_ref)).first()
@@ -118,7 +118,7 @@ def verify_invoice(invoice_ref: str, db: Session = Depends(get_db)):
 
 
 @router.get("/card/{card_ref}")
-def verify_card(card_ref: str, db: Session = Depends(get_db)):
+def verify_card(card_ref: str, db: Session = Depends(get_read_db)):
     card_type = "kara_bolamena"
     card = db.query(KaraBolamenaCard).filter(KaraBolamenaCard.card_number == card_ref).first()
     if not card and card_ref.isdigit():
@@ -1,12 +1,12 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 
-from app.auth.dependencies import get_current_actor
+from app.auth.dependencies import AuthContext, get_auth_context, get_current_actor
 from app.audit.logger import write_audit
 from app.common.errors import bad_request
+from app.common.pagination import PaginationParams, get_cursor_pagination, paginate, set_page_headers
 from app.core.config import settings
-from app.db import get_db
-from app.models.actor import ActorRole
+from app.db import get_db, get_read_db
 from app.models.penalty import Inspection, ViolationCase
 from app.violations.schemas import ViolationCreate, ViolationOut
 
@@ -18,8 +18,9 @@ def create_violation(
     payload: ViolationCreate,
     db: Session = Depends(get_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
-    if not _is_inspector(db, current_actor.id):
+    if not _is_inspector(auth):
         raise bad_request("acces_refuse")
     inspection = db.query(Inspection).filter_by(id=payload.inspection_id).first()
     if not inspection:
@@ -54,16 +55,21 @@ def create_violation(
 
 @router.get("", response_model=list[ViolationOut])
 def list_violations(
+    response: Response,
     inspection_id: int | None = None,
-    db: Session = Depends(get_db),
+    pagination: PaginationParams = Depends(get_cursor_pagination),
+    db: Session = Depends(get_read_db),
     current_actor=Depends(get_current_actor),
+    auth: AuthContext = Depends(get_auth_context),
 ):
     query = db.query(ViolationCase)
-    if not _is_admin(db, current_actor.id) and not _is_inspector(db, current_actor.id):
+    if not auth.is_admin_like and not _is_inspector(auth):
         return []
     if inspection_id is not None:
         query = query.filter(ViolationCase.inspection_id == inspection_id)
-    violations = query.order_by(ViolationCase.id.desc()).all()
+    page = paginate(query, sort_column=ViolationCase.id, id_column=ViolationCase.id, pagination=pagination)
+    set_page_headers(response, page)
+    violations = page.rows
     return [
         ViolationOut(
             id=v.id,
@@ -77,22 +83,5 @@ def list_violations(
     ]
 
 
-def _is_admin(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(ActorRole.actor_id == actor_id, ActorRole.role.in_(["admin", "dirigeant"]))
-        .first()
-        is not None
-    )
-
-
-def _is_inspector(db: Session, actor_id: int) -> bool:
-    return (
-        db.query(ActorRole)
-        .filter(
-            ActorRole.actor_id == actor_id,
-            ActorRole.role.in_(["controleur", "admin", "dirigeant", "mmrs", "dgd", "police", "gendarmerie", "forets"]),
-        )
-        .first()
-        is not None
-    )
+def _is_inspector(auth: AuthContext) -> bool:
+    return auth.has_any_role({"controleur", "admin", "dirigeant", "mmrs", "dgd", "police", "gendarmerie", "forets"})
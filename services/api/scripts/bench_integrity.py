@@ -0,0 +1,102 @@
+"""Benchmark de la vérification des chaînes de hash des lots.
+
+Crée N lots chaînés sur une base SQLite temporaire puis les vérifie avec
+`app.integrity.chains`, en un processus puis avec le pool. Affiche le
+débit (enregistrements par minute) de chaque mode.
+
+Usage:
+  set PYTHONPATH=services/api
+  python services/api/scripts/bench_integrity.py --lots 200000 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp(prefix="madavola-bench-")
+os.environ.setdefault("JWT_SECRET", "bench-secret-key-at-least-32-characters-long")
+os.environ.setdefault("DATABASE_URL", f"sqlite+pysqlite:///{_tmpdir}/bench.db")
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.common.traceability import canonical_json, compute_chain_hash  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.integrity.chains import claim_check_run, create_check_runs, execute_check_run  # noqa: E402
+from app.models.actor import Actor  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.geo import GeoPoint  # noqa: E402
+from app.models.lot import Lot  # noqa: E402
+
+from bench_login import _seed  # noqa: E402
+
+
+def _seed_lots(session_factory, email: str, count: int) -> None:
+    db = session_factory()
+    actor_id = db.query(Actor.id).filter(Actor.email == email).scalar()
+    geo = GeoPoint(lat=-18.91, lon=47.52, accuracy_m=12)
+    db.add(geo)
+    db.flush()
+    rows = []
+    for lot_id in range(1, count + 1):
+        payload = {"lot_id": lot_id, "event_type": "declare", "history": [], "previous_block_hash": "GENESIS"}
+        rows.append(
+            {
+                "id": lot_id,
+                "filiere": "OR",
+                "product_type": "or_brut",
+                "unit": "g",
+                "quantity": 1,
+                "declared_by_actor_id": actor_id,
+                "current_owner_actor_id": actor_id,
+                "status": "available",
+                "declare_geo_point_id": geo.id,
+                "previous_block_hash": "GENESIS",
+                "current_block_hash": compute_chain_hash(payload),
+                "trace_payload_json": canonical_json(payload),
+            }
+        )
+        if len(rows) == 10000:
+            db.execute(insert(Lot), rows)
+            rows = []
+    if rows:
+        db.execute(insert(Lot), rows)
+    db.commit()
+    db.close()
+
+
+def _verify(session_factory, workers: int) -> float:
+    db = session_factory()
+    run = create_check_runs(db, "lots")[0]
+    db.commit()
+    claim_check_run(db, run_id=run.id)
+    started = time.perf_counter()
+    status = execute_check_run(db, run.id, workers=workers)
+    elapsed = time.perf_counter() - started
+    assert status == "completed", status
+    db.close()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lots", type=int, default=200000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    email = _seed(session_factory, 1)[0]
+    _seed_lots(session_factory, email, args.lots)
+
+    for workers in sorted({1, args.workers}):
+        elapsed = _verify(session_factory, workers)
+        print(f"{args.lots} lots, {workers} processus : {elapsed:.2f}s ({args.lots / elapsed * 60:,.0f}/min)")
+
+
+if __name__ == "__main__":
+    main()
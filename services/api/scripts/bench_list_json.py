@@ -0,0 +1,121 @@
+"""Benchmark des listes ledger et audit : modèles Pydantic contre projection.
+
+Crée N mouvements de stock et N entrées d'audit sur une base SQLite
+temporaire, puis construit la réponse JSON de N lignes de deux façons :
+- chemin par modèle : entités ORM -> un modèle par ligne -> validation et
+  sérialisation du `response_model` -> JSONResponse (chemin FastAPI) ;
+- projection : colonnes du schéma -> dictionnaires -> FastJSONResponse.
+
+Usage:
+  set PYTHONPATH=services/api
+  python services/api/scripts/bench_list_json.py --rows 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+_tmpdir = tempfile.mkdtemp(prefix="madavola-bench-")
+os.environ.setdefault("JWT_SECRET", "bench-secret-key-at-least-32-characters-long")
+os.environ.setdefault("DATABASE_URL", f"sqlite+pysqlite:///{_tmpdir}/bench.db")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.audit.schemas import AuditLogOut  # noqa: E402
+from app.common.responses import FastJSONResponse, RowProjection  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.ledger.schemas import LedgerEntryOut  # noqa: E402
+from app.models.audit import AuditLog  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.lot import InventoryLedger  # noqa: E402
+
+
+def _seed(session_factory, rows: int) -> None:
+    db = session_factory()
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    db.execute(
+        insert(InventoryLedger),
+        [
+            {
+                "actor_id": 1,
+                "lot_id": index % 500 + 1,
+                "movement_type": "create",
+                "quantity_delta": 1.25,
+                "ref_event_type": "lot",
+                "ref_event_id": str(index),
+                "created_at": start + timedelta(seconds=index),
+            }
+            for index in range(rows)
+        ],
+    )
+    db.execute(
+        insert(AuditLog),
+        [
+            {
+                "actor_id": 1,
+                "action": "lot_created",
+                "entity_type": "lot",
+                "entity_id": str(index),
+                "meta_json": '{"quantity": "1.25", "unit": "g"}',
+                "created_at": start + timedelta(seconds=index),
+            }
+            for index in range(rows)
+        ],
+    )
+    db.commit()
+    db.close()
+
+
+def _by_model(db, model, schema, rows: int) -> bytes:
+    entities = db.query(model).order_by(model.created_at.desc(), model.id.desc()).limit(rows).all()
+    items = [schema(**{name: getattr(entity, name) for name in schema.model_fields}) for entity in entities]
+    adapter = TypeAdapter(list[schema])
+    return JSONResponse(adapter.dump_python(adapter.validate_python(items), mode="json")).body
+
+
+def _by_projection(db, model, schema, rows: int) -> bytes:
+    projection = RowProjection(schema, model)
+    fetched = projection.query(db).order_by(model.created_at.desc(), model.id.desc()).limit(rows).all()
+    return FastJSONResponse(projection.dicts(fetched)).body
+
+
+def _time(fn, *args) -> float:
+    best = None
+    for _ in range(3):
+        started = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    _seed(session_factory, args.rows)
+
+    db = session_factory()
+    for label, model, schema in (("ledger", InventoryLedger, LedgerEntryOut), ("audit", AuditLog, AuditLogOut)):
+        by_model = _time(_by_model, db, model, schema, args.rows)
+        by_projection = _time(_by_projection, db, model, schema, args.rows)
+        print(
+            f"{label} ({args.rows} lignes) : modeles {by_model * 1000:.0f} ms, "
+            f"projection {by_projection * 1000:.0f} ms, gain x{by_model / by_projection:.1f}"
+        )
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
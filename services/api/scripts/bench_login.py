@@ -0,0 +1,161 @@
+"""Benchmark de capacité de /auth/login (connexions simultanées).
+
+Lance l'application en processus sur une base SQLite temporaire, crée N
+comptes puis envoie des vagues de connexions concurrentes. Affiche le débit,
+les latences p50/p95/max et l'état du pool bcrypt (`/health/password-pool`).
+
+Usage:
+  set PYTHONPATH=services/api
+  python services/api/scripts/bench_login.py --accounts 50 --concurrency 20 --rounds 3
+  (PASSWORD_HASH_WORKERS / PASSWORD_BCRYPT_ROUNDS pour comparer les réglages)
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone
+
+_tmpdir = tempfile.mkdtemp(prefix="madavola-bench-")
+os.environ.setdefault("JWT_SECRET", "bench-secret-key-at-least-32-characters-long")
+os.environ.setdefault("DOCUMENT_STORAGE_DIR", _tmpdir)
+os.environ.setdefault("DATABASE_URL", f"sqlite+pysqlite:///{_tmpdir}/bench.db")
+
+import httpx  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.auth.security import hash_password  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.db import get_db  # noqa: E402
+from app.main import create_app  # noqa: E402
+from app.models.actor import Actor, ActorAuth  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.territory import Commune, District, Region, TerritoryVersion  # noqa: E402
+
+PASSWORD = "bench-secret"
+
+
+def _seed(session_factory, accounts: int) -> list[str]:
+    db = session_factory()
+    try:
+        now = datetime.now(timezone.utc)
+        version = TerritoryVersion(
+            version_tag="bench",
+            source_filename="bench.xlsx",
+            checksum_sha256="bench",
+            status="active",
+            imported_at=now,
+            activated_at=now,
+        )
+        db.add(version)
+        db.flush()
+        region = Region(version_id=version.id, code="01", name="Analamanga", name_normalized="analamanga")
+        db.add(region)
+        db.flush()
+        district = District(
+            version_id=version.id, region_id=region.id, code="0101", name="Tana", name_normalized="tana"
+        )
+        db.add(district)
+        db.flush()
+        commune = Commune(
+            version_id=version.id, district_id=district.id, code="010101", name="Tana I", name_normalized="tana i"
+        )
+        db.add(commune)
+        db.flush()
+        password_hash = hash_password(PASSWORD)
+        emails = []
+        for index in range(accounts):
+            email = f"bench{index}@example.com"
+            actor = Actor(
+                type_personne="physique",
+                nom="Bench",
+                prenoms=str(index),
+                telephone=f"+26134{index:07d}",
+                email=email,
+                status="active",
+                region_id=region.id,
+                district_id=district.id,
+                commune_id=commune.id,
+                territory_version_id=version.id,
+                created_at=now,
+            )
+            db.add(actor)
+            db.flush()
+            db.add(ActorAuth(actor_id=actor.id, password_hash=password_hash, is_active=1))
+            emails.append(email)
+        db.commit()
+        return emails
+    finally:
+        db.close()
+
+
+async def _run(app, emails: list[str], concurrency: int, rounds: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    failures = 0
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one(email: str) -> None:
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    f"{settings.api_prefix}/auth/login",
+                    json={"identifier": email, "password": PASSWORD},
+                )
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(email) for _ in range(rounds) for email in emails))
+        elapsed = time.perf_counter() - started
+        pool = (await client.get(f"{settings.api_prefix}/health/password-pool")).json()
+
+    latencies.sort()
+    print(f"connexions: {len(latencies)} (echecs: {failures}) en {elapsed:.2f}s")
+    print(f"debit: {len(latencies) / elapsed:.1f} login/s")
+    print(
+        "latence: p50={:.0f}ms p95={:.0f}ms max={:.0f}ms".format(
+            statistics.median(latencies) * 1000,
+            latencies[int(len(latencies) * 0.95) - 1] * 1000,
+            latencies[-1] * 1000,
+        )
+    )
+    print(f"pool bcrypt: {pool}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    emails = _seed(session_factory, args.accounts)
+
+    app = create_app()
+
+    def _get_db_override():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = _get_db_override
+    asyncio.run(_run(app, emails, args.concurrency, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark POST /lots/batch contre N appels POST /lots.
+
+Lance l'application en processus sur une base SQLite temporaire, crée un
+compte orpailleur puis déclare N lots, d'abord un par un, puis en un seul
+appel /lots/batch. Affiche la durée de chaque méthode et le gain.
+
+Usage:
+  set PYTHONPATH=services/api
+  python services/api/scripts/bench_lot_batch.py --lots 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp(prefix="madavola-bench-")
+os.environ.setdefault("JWT_SECRET", "bench-secret-key-at-least-32-characters-long")
+os.environ.setdefault("DOCUMENT_STORAGE_DIR", _tmpdir)
+os.environ.setdefault("DATABASE_URL", f"sqlite+pysqlite:///{_tmpdir}/bench.db")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.db import get_db  # noqa: E402
+from app.main import create_app  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.geo import GeoPoint  # noqa: E402
+
+from bench_login import PASSWORD, _seed  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lots", type=int, default=500)
+    args = parser.parse_args()
+
+    engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    email = _seed(session_factory, 1)[0]
+    db = session_factory()
+    geo = GeoPoint(lat=-18.91, lon=47.52, accuracy_m=12)
+    db.add(geo)
+    db.commit()
+    geo_id = geo.id
+    db.close()
+
+    app = create_app()
+
+    def _get_db_override():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = _get_db_override
+    with TestClient(app) as client:
+        login = client.post(f"{settings.api_prefix}/auth/login", json={"identifier": email, "password": PASSWORD})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        actor_id = client.get(f"{settings.api_prefix}/auth/me", headers=headers).json()["id"]
+        item = {
+            "filiere": "OR",
+            "product_type": "or_brut",
+            "unit": "g",
+            "quantity": 1,
+            "declare_geo_point_id": geo_id,
+            "declared_by_actor_id": actor_id,
+        }
+
+        started = time.perf_counter()
+        for _ in range(args.lots):
+            assert client.post(f"{settings.api_prefix}/lots", headers=headers, json=item).status_code == 201
+        single = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = client.post(f"{settings.api_prefix}/lots/batch", headers=headers, json={"lots": [item] * args.lots})
+        batch = time.perf_counter() - started
+        assert response.json()["created"] == args.lots
+
+    print(f"{args.lots} x POST /lots : {single:.2f}s")
+    print(f"POST /lots/batch ({args.lots}) : {batch:.2f}s")
+    print(f"gain : x{single / batch:.1f}")
+
+
+if __name__ == "__main__":
+    main()
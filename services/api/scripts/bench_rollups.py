@@ -0,0 +1,189 @@
+"""Benchmark des dashboards : tables brutes contre cumuls journaliers.
+
+Crée une année de mouvements et de ventes (N par jour, répartis sur
+plusieurs communes) sur une base SQLite temporaire, agrège les jours clos,
+puis mesure le volume, les ventes et les lots distincts d'une année :
+- tables brutes : les requêtes d'avant sur inventory_ledger et trade_transactions ;
+- cumuls : `activity_totals` et `distinct_lots_through` (cumuls + jour courant).
+Puis la série quotidienne de l'année (graphique) : un appel `activity_totals`
+par jour, comme le front avant `/dashboards/timeseries`, contre `activity_series`.
+
+Usage:
+  set PYTHONPATH=services/api
+  python services/api/scripts/bench_rollups.py --per-day 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+_tmpdir = tempfile.mkdtemp(prefix="madavola-bench-")
+os.environ.setdefault("JWT_SECRET", "bench-secret-key-at-least-32-characters-long")
+os.environ.setdefault("DATABASE_URL", f"sqlite+pysqlite:///{_tmpdir}/bench.db")
+
+from sqlalchemy import Index, create_engine, func, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.models.actor import Actor  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.lot import InventoryLedger  # noqa: E402
+from app.models.transaction import TradeTransaction  # noqa: E402
+from app.reports.rollups import (  # noqa: E402
+    activity_series,
+    activity_totals,
+    day_bounds,
+    distinct_lots_through,
+    roll_up_activity,
+)
+
+ACTORS = 200
+COMMUNES = 20
+
+
+def _seed(session_factory, first_day: date, days: int, per_day: int) -> None:
+    db = session_factory()
+    db.execute(
+        insert(Actor),
+        [
+            {
+                "id": index + 1,
+                "type_personne": "physique",
+                "nom": f"Bench {index}",
+                "telephone": f"0349{index:06d}",
+                "status": "active",
+                "region_id": index % 4 + 1,
+                "district_id": index % 10 + 1,
+                "commune_id": index % COMMUNES + 1,
+                "territory_version_id": 1,
+                "created_at": datetime.now(timezone.utc),
+            }
+            for index in range(ACTORS)
+        ],
+    )
+    lot_id = 0
+    for offset in range(days):
+        start = datetime.combine(first_day + timedelta(days=offset), datetime.min.time(), tzinfo=timezone.utc)
+        ledger, sales = [], []
+        for index in range(per_day):
+            lot_id += 1
+            actor_id = (lot_id % ACTORS) + 1
+            created_at = start + timedelta(seconds=index * 86400 // per_day)
+            ledger.append(
+                {
+                    "actor_id": actor_id,
+                    "lot_id": lot_id,
+                    "movement_type": "create",
+                    "quantity_delta": 1.25,
+                    "ref_event_type": "lot",
+                    "ref_event_id": str(lot_id),
+                    "created_at": created_at,
+                }
+            )
+            sales.append(
+                {
+                    "seller_actor_id": actor_id,
+                    "buyer_actor_id": (actor_id % ACTORS) + 1,
+                    "status": "paid",
+                    "total_amount": 1000,
+                    "currency": "MGA",
+                    "created_at": created_at,
+                }
+            )
+        db.execute(insert(InventoryLedger), ledger)
+        db.execute(insert(TradeTransaction), sales)
+    db.commit()
+    db.close()
+
+
+def _raw(db, first_day: date, last_day: date, commune_id: int | None) -> tuple:
+    start, end = day_bounds(first_day, last_day)
+    volume = db.query(func.sum(InventoryLedger.quantity_delta)).filter(InventoryLedger.movement_type == "create")
+    sales = db.query(func.sum(TradeTransaction.total_amount))
+    lots = db.query(func.count(func.distinct(InventoryLedger.lot_id)))
+    if commune_id is not None:
+        volume = volume.join(Actor, Actor.id == InventoryLedger.actor_id).filter(Actor.commune_id == commune_id)
+        sales = sales.join(Actor, Actor.id == TradeTransaction.seller_actor_id).filter(Actor.commune_id == commune_id)
+        lots = lots.join(Actor, Actor.id == InventoryLedger.actor_id).filter(Actor.commune_id == commune_id)
+    return (
+        volume.filter(InventoryLedger.created_at >= start, InventoryLedger.created_at < end).scalar(),
+        sales.filter(TradeTransaction.created_at >= start, TradeTransaction.created_at < end).scalar(),
+        lots.filter(InventoryLedger.created_at < end).scalar(),
+    )
+
+
+def _rolled(db, first_day: date, last_day: date, commune_id: int | None) -> tuple:
+    totals = activity_totals(db, first_day, last_day, commune_id=commune_id)
+    return totals.volume_created, totals.transactions_total, distinct_lots_through(db, last_day, commune_id=commune_id)
+
+
+def _series_per_day(db, first_day: date, last_day: date) -> list[float]:
+    days = (last_day - first_day).days + 1
+    return [activity_totals(db, day, day).volume_created for day in (first_day + timedelta(days=n) for n in range(days))]
+
+
+def _series_grouped(db, first_day: date, last_day: date) -> list[float]:
+    return activity_series(db, "volume_created", "day", first_day, last_day).series[None]
+
+
+def _time(fn, *args) -> float:
+    best = None
+    for _ in range(3):
+        started = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--per-day", type=int, default=500)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    # Index posés par la migration 0016 en production (absents de create_all).
+    for index in (
+        Index("ix_inventory_ledger_created_at", InventoryLedger.created_at),
+        Index("ix_inventory_ledger_actor_created", InventoryLedger.actor_id, InventoryLedger.created_at),
+        Index("ix_trade_transactions_created_at", TradeTransaction.created_at),
+        Index("ix_trade_transactions_seller_created", TradeTransaction.seller_actor_id, TradeTransaction.created_at),
+    ):
+        index.create(bind=engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    today = datetime.now(timezone.utc).date()
+    first_day = today - timedelta(days=args.days - 1)
+    _seed(session_factory, first_day, args.days, args.per_day)
+    with engine.begin() as conn:
+        # Statistiques du planificateur, comme sur une base en service.
+        conn.exec_driver_sql("ANALYZE")
+
+    db = session_factory()
+    started = time.perf_counter()
+    roll_up_activity(db, today=today)
+    print(f"agregation initiale de {args.days} jours : {time.perf_counter() - started:.1f} s")
+    for label, commune_id in (("national", None), ("commune", 1)):
+        by_raw = _time(_raw, db, first_day, today, commune_id)
+        by_rollup = _time(_rolled, db, first_day, today, commune_id)
+        print(
+            f"{label} ({args.days} jours x {args.per_day}) : tables brutes {by_raw * 1000:.0f} ms, "
+            f"cumuls {by_rollup * 1000:.1f} ms, gain x{by_raw / by_rollup:.0f}"
+        )
+    per_day = _time(_series_per_day, db, first_day, today)
+    grouped = _time(_series_grouped, db, first_day, today)
+    assert _series_per_day(db, first_day, today) == _series_grouped(db, first_day, today)
+    print(
+        f"serie quotidienne ({args.days} tranches) : un appel par jour {per_day * 1000:.0f} ms, "
+        f"requete groupee {grouped * 1000:.1f} ms, gain x{per_day / grouped:.0f}"
+    )
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
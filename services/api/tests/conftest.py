@@ -7,13 +7,19 @@ from sqlalchemy.pool import StaticPool
 from sqlalchemy.orm import sessionmaker
 
 os.environ.setdefault("JWT_SECRET", "test-secret-key-at-least-32-characters-long")
-os.environ.setdefault("DOCUMENT_STORAGE_DIR", "services/api/tests/.tmp_uploads")
 
+from app.core.config import settings  # noqa: E402
 from app.db import get_db  # noqa: E402
 from app.main import create_app  # noqa: E402
 from app.models.base import Base  # noqa: E402
 
 
+@pytest.fixture(autouse=True)
+def _document_storage(tmp_path, monkeypatch):
+    # Pièces et PDF générés par les tests : hors du dépôt.
+    monkeypatch.setattr(settings, "document_storage_dir", str(tmp_path / "uploads"))
+
+
 @pytest.fixture()
 def db_session():
     engine = create_engine(
@@ -194,3 +194,23 @@ def test_get_actor_roles(client, db_session):
     )
     assert response.status_code == 200
     assert "roles" in response.json()
+
+
+def test_expired_role_is_ignored(client, db_session):
+    import_territory_excel(db_session, _build_excel(), "territory.xlsx", "v1")
+    agent = _create_actor(db_session, "010101", "commune_agent", "agent3")
+    role = db_session.query(ActorRole).filter_by(actor_id=agent.id, role="commune_agent").first()
+    role.valid_to = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    db_session.commit()
+
+    login = client.post(
+        "/api/v1/auth/login",
+        json={"identifier": agent.email, "password": "secret"},
+    )
+    token = login.json()["access_token"]
+    response = client.get(
+        "/api/v1/actors",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"]["message"] == "role_insuffisant"
@@ -3,9 +3,17 @@ import hashlib
 import re
 
 from app.auth.security import hash_password
+from app.common.card_identity import sha256_hex, sign_hmac_sha256
+from app.common.traceability import canonical_json, compute_chain_hash
+from app.core.config import settings
+from app.integrity.chains import claim_check_run, execute_check_run
 from app.models.actor import Actor, ActorAuth, ActorRole
 from app.models.admin import SystemConfig
+from app.models.geo import GeoPoint
+from app.models.invoice import Invoice
+from app.models.lot import Lot
 from app.models.territory import Commune, District, Region, TerritoryVersion
+from app.models.transaction import TradeTransaction
 
 
 def _seed_territory(db_session):
@@ -223,3 +231,129 @@ def test_admin_role_rbac_non_admin_forbidden(client, db_session):
         json={"role": "commune_agent"},
     )
     assert failed.status_code == 400
+
+
+def test_admin_role_revocation_invalidates_cached_roles(client, db_session):
+    from app.models.actor import AuthCacheVersion
+
+    region, district, commune, version = _seed_territory(db_session)
+    admin = _create_actor_with_role(db_session, region, district, commune, version, "admin@example.com", "admin")
+    agent = _create_actor_with_role(db_session, region, district, commune, version, "agent@example.com", "commune_agent")
+
+    admin_token = client.post(
+        "/api/v1/auth/login", json={"identifier": admin.email, "password": "secret"}
+    ).json()["access_token"]
+    agent_token = client.post(
+        "/api/v1/auth/login", json={"identifier": agent.email, "password": "secret"}
+    ).json()["access_token"]
+
+    # Premier appel : les rôles de l'agent sont mis en cache.
+    allowed = client.get("/api/v1/actors", headers={"Authorization": f"Bearer {agent_token}"})
+    assert allowed.status_code == 200
+
+    role_id = db_session.query(ActorRole).filter_by(actor_id=agent.id, role="commune_agent").first().id
+    revoked = client.delete(f"/api/v1/admin/roles/{role_id}", headers={"Authorization": f"Bearer {admin_token}"})
+    assert revoked.status_code == 204
+    assert db_session.query(AuthCacheVersion).filter_by(scope="actor_roles").first().version >= 1
+
+    denied = client.get("/api/v1/actors", headers={"Authorization": f"Bearer {agent_token}"})
+    assert denied.status_code == 400
+
+
+def test_integrity_check_reports_breaks_and_resumes(client, db_session, monkeypatch):
+    region, district, commune, version = _seed_territory(db_session)
+    admin = _create_actor_with_role(db_session, region, district, commune, version, "integrity@example.com", "admin")
+    geo = GeoPoint(lat=-18.91, lon=47.52, accuracy_m=12)
+    db_session.add(geo)
+    db_session.flush()
+
+    lots = []
+    for index in range(5):
+        lot = Lot(
+            filiere="OR",
+            product_type="or_brut",
+            unit="g",
+            quantity=1,
+            declared_by_actor_id=admin.id,
+            current_owner_actor_id=admin.id,
+            status="available",
+            declare_geo_point_id=geo.id,
+        )
+        db_session.add(lot)
+        db_session.flush()
+        if index == 4:
+            continue  # lot sans chaîne : ignoré
+        payload = {"lot_id": lot.id, "event_type": "declare", "history": [], "previous_block_hash": "GENESIS"}
+        lot.previous_block_hash = "GENESIS"
+        lot.current_block_hash = compute_chain_hash(payload)
+        lot.trace_payload_json = canonical_json(payload)
+        lots.append(lot)
+    lots[2].trace_payload_json = lots[2].trace_payload_json.replace('"declare"', '"falsifie"')
+
+    secret = settings.card_qr_signing_secret or settings.jwt_secret
+    tx = TradeTransaction(seller_actor_id=admin.id, buyer_actor_id=admin.id, total_amount=10, currency="MGA")
+    db_session.add(tx)
+    db_session.flush()
+    # Chaîne dans l'ordre d'émission 0, 1, 4, 3 (ids hors d'ordre) ; 2 pointe vers un hash inconnu.
+    chained_to = {0: "GENESIS", 1: 0, 2: "0" * 64, 4: 1, 3: 4}
+    issued = {0: 0, 1: 1, 2: 2, 4: 3, 3: 4}
+    payloads, hashes = {}, {}
+    for index in (0, 1, 2, 4, 3):
+        previous = chained_to[index]
+        payloads[index] = {
+            "transaction_id": tx.id,
+            "index": index,
+            "previous_invoice_hash": hashes[previous] if isinstance(previous, int) else previous,
+        }
+        hashes[index] = sha256_hex(canonical_json(payloads[index]))
+    invoices = []
+    for index in range(5):
+        invoice = Invoice(
+            invoice_number=f"INV-INTEGRITY-{index}",
+            transaction_id=tx.id,
+            seller_actor_id=admin.id,
+            buyer_actor_id=admin.id,
+            issue_date=datetime(2026, 1, 1 + issued[index], tzinfo=timezone.utc),
+            total_amount=10,
+            previous_invoice_hash=payloads[index]["previous_invoice_hash"],
+            invoice_hash=hashes[index],
+            internal_signature=sign_hmac_sha256(secret, hashes[index]),
+            trace_payload_json=canonical_json(payloads[index]),
+        )
+        db_session.add(invoice)
+        db_session.flush()
+        invoices.append(invoice)
+    db_session.commit()
+
+    token = client.post("/api/v1/auth/login", json={"identifier": admin.email, "password": "secret"}).json()[
+        "access_token"
+    ]
+    headers = {"Authorization": f"Bearer {token}"}
+    created = client.post("/api/v1/admin/integrity-checks", json={"target": "all"}, headers=headers)
+    assert created.status_code == 201
+    lots_run, invoices_run = created.json()
+    assert (lots_run["target"], lots_run["status"]) == ("lots", "pending")
+
+    # Première tranche interrompue après 3 lots, puis reprise au point enregistré.
+    monkeypatch.setattr(settings, "integrity_check_chunk_size", 2)
+    assert claim_check_run(db_session, run_id=lots_run["id"]) == lots_run["id"]
+    assert execute_check_run(db_session, lots_run["id"], max_records=3, workers=1) == "pending"
+    partial = client.get(f"/api/v1/admin/integrity-checks/{lots_run['id']}", headers=headers).json()
+    assert (partial["records_checked"], partial["last_id"]) == (3, lots[2].id)
+    assert claim_check_run(db_session, run_id=lots_run["id"]) == lots_run["id"]
+    assert execute_check_run(db_session, lots_run["id"], workers=2) == "completed"
+
+    assert claim_check_run(db_session, run_id=invoices_run["id"]) == invoices_run["id"]
+    assert execute_check_run(db_session, invoices_run["id"], workers=1) == "completed"
+
+    lots_report = client.get(f"/api/v1/admin/integrity-checks/{lots_run['id']}", headers=headers).json()
+    assert (lots_report["records_checked"], lots_report["records_skipped"]) == (5, 1)
+    assert lots_report["breaks"] == [
+        {"id": lots[2].id, "position": 3, "reason": "hash_invalide", "expected": None, "found": None}
+    ]
+    invoices_report = client.get(f"/api/v1/admin/integrity-checks/{invoices_run['id']}", headers=headers).json()
+    assert invoices_report["breaks_count"] == 1
+    assert invoices_report["breaks"][0]["id"] == invoices[2].id
+    assert invoices_report["breaks"][0]["position"] == 3
+    assert invoices_report["breaks"][0]["reason"] == "chaine_rompue"
+    assert invoices_report["breaks"][0]["found"] == "0" * 64
@@ -1,6 +1,18 @@
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import json
 
+from app.audit.schemas import AuditLogOut
 from app.auth.security import hash_password
+from app.common.responses import FastJSONResponse
+from app.core.partitions import (
+    add_months,
+    maintain_partitions,
+    partition_month,
+    partition_name,
+    partitioned_tables,
+    retention_applies,
+)
 from app.models.actor import Actor, ActorAuth, ActorRole
 from app.models.audit import AuditLog
 from app.models.geo import GeoPoint
@@ -169,3 +181,219 @@ def test_stock_coherence_endpoint_creates_alert(client, db_session):
     payload = response.json()
     assert payload["incoherent_count"] >= 1
     assert payload["alerts_created"] >= 1
+
+
+def test_audit_logs_cursor_pagination(client, db_session):
+    import_territory_excel(db_session, _build_excel(), "territory.xlsx", "v1")
+    actor = Actor(
+        type_personne="physique",
+        nom="Pager",
+        prenoms="Test",
+        telephone="0340000602",
+        email="audit-pager@example.com",
+        status="active",
+        region_id=1,
+        district_id=1,
+        commune_id=1,
+        territory_version_id=1,
+        created_at=datetime.now(timezone.utc),
+    )
+    db_session.add(actor)
+    db_session.flush()
+    db_session.add(ActorAuth(actor_id=actor.id, password_hash=hash_password("secret"), is_active=1))
+    db_session.add(ActorRole(actor_id=actor.id, role="admin", status="active"))
+    same_instant = datetime(2026, 1, 5, 8, 0, tzinfo=timezone.utc)
+    for index in range(7):
+        db_session.add(
+            AuditLog(
+                actor_id=actor.id,
+                action="page_test",
+                entity_type="pagination",
+                entity_id=str(index),
+                created_at=same_instant if index < 4 else datetime(2026, 1, index, 8, 0, tzinfo=timezone.utc),
+            )
+        )
+    db_session.commit()
+
+    token = client.post("/api/v1/auth/login", json={"identifier": actor.email, "password": "secret"}).json()[
+        "access_token"
+    ]
+    headers = {"Authorization": f"Bearer {token}"}
+    full = client.get("/api/v1/audit", params={"entity_type": "pagination"}, headers=headers)
+    assert full.status_code == 200
+    assert "X-Next-Cursor" not in full.headers
+    expected = [row["id"] for row in full.json()]
+    assert len(expected) == 7
+
+    seen = []
+    params = {"entity_type": "pagination", "page_size": 3, "total": "exact"}
+    while True:
+        page = client.get("/api/v1/audit", params=params, headers=headers)
+        assert page.status_code == 200
+        assert page.headers["X-Total-Count"] == "7"
+        seen.extend(row["id"] for row in page.json())
+        cursor = page.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params["cursor"] = cursor
+    assert seen == expected
+
+    invalid = client.get("/api/v1/audit", params={"cursor": "pas-un-curseur"}, headers=headers)
+    assert invalid.status_code == 400
+
+
+def test_audit_logs_projection_matches_schema_output(client, db_session):
+    import_territory_excel(db_session, _build_excel(), "territory.xlsx", "v1")
+    actor = Actor(
+        type_personne="physique",
+        nom="Projection",
+        prenoms="Test",
+        telephone="0340000603",
+        email="audit-projection@example.com",
+        status="active",
+        region_id=1,
+        district_id=1,
+        commune_id=1,
+        territory_version_id=1,
+        created_at=datetime.now(timezone.utc),
+    )
+    db_session.add(actor)
+    db_session.flush()
+    db_session.add(ActorAuth(actor_id=actor.id, password_hash=hash_password("secret"), is_active=1))
+    db_session.add(ActorRole(actor_id=actor.id, role="admin", status="active"))
+    db_session.add(
+        AuditLog(
+            actor_id=None,
+            action="projection_test",
+            entity_type="projection",
+            entity_id="1",
+            meta_json='{"note": "é"}',
+            created_at=datetime(2026, 1, 5, 8, 0, 1, 250000, tzinfo=timezone.utc),
+        )
+    )
+    db_session.commit()
+
+    token = client.post("/api/v1/auth/login", json={"identifier": actor.email, "password": "secret"}).json()[
+        "access_token"
+    ]
+    response = client.get(
+        "/api/v1/audit", params={"entity_type": "projection"}, headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    stored = db_session.query(AuditLog).filter_by(entity_type="projection").all()
+    assert response.json() == [
+        AuditLogOut.model_validate(log, from_attributes=True).model_dump(mode="json") for log in stored
+    ]
+
+    # Dates UTC et décimaux rendus comme par Pydantic.
+    aware = AuditLogOut(
+        id=1, action="a", entity_type="b", entity_id="c", created_at=stored[0].created_at.replace(tzinfo=timezone.utc)
+    )
+    rendered = FastJSONResponse([{**aware.model_dump(), "quantity": Decimal("2.5")}]).body
+    assert json.loads(rendered) == [{**aware.model_dump(mode="json"), "quantity": 2.5}]
+
+
+def test_audit_export_streams_own_logs_for_non_auditor(client, db_session):
+    import_territory_excel(db_session, _build_excel(), "territory.xlsx", "v1")
+    actor = Actor(
+        type_personne="physique",
+        nom="Export",
+        prenoms="Audit",
+        telephone="0340000604",
+        email="audit-export@example.com",
+        status="active",
+        region_id=1,
+        district_id=1,
+        commune_id=1,
+        territory_version_id=1,
+        created_at=datetime.now(timezone.utc),
+    )
+    db_session.add(actor)
+    db_session.flush()
+    db_session.add(ActorAuth(actor_id=actor.id, password_hash=hash_password("secret"), is_active=1))
+    for index, owner in enumerate([actor.id, None, actor.id]):
+        db_session.add(
+            AuditLog(
+                actor_id=owner,
+                action="export_test",
+                entity_type="export",
+                entity_id=str(index),
+                created_at=datetime(2026, 2, 1 + index, 9, 0, tzinfo=timezone.utc),
+            )
+        )
+    db_session.commit()
+
+    token = client.post("/api/v1/auth/login", json={"identifier": actor.email, "password": "secret"}).json()[
+        "access_token"
+    ]
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/api/v1/audit/export", params={"entity_type": "export"}, headers=headers)
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["entity_id"], row["created_at"]) for row in rows] == [
+        ("0", "2026-02-01T09:00:00"),
+        ("2", "2026-02-03T09:00:00"),
+    ]
+    assert client.get("/api/v1/audit/export", params={"actor_id": actor.id + 1}, headers=headers).status_code == 400
+
+
+def test_audit_logs_date_range_and_monthly_partitions(client, db_session):
+    import_territory_excel(db_session, _build_excel(), "territory.xlsx", "v1")
+    actor = Actor(
+        type_personne="physique",
+        nom="Partition",
+        prenoms="Test",
+        telephone="0340000605",
+        email="audit-partition@example.com",
+        status="active",
+        region_id=1,
+        district_id=1,
+        commune_id=1,
+        territory_version_id=1,
+        created_at=datetime.now(timezone.utc),
+    )
+    db_session.add(actor)
+    db_session.flush()
+    db_session.add(ActorAuth(actor_id=actor.id, password_hash=hash_password("secret"), is_active=1))
+    db_session.add(ActorRole(actor_id=actor.id, role="admin", status="active"))
+    for month, day in ((1, 31), (2, 1), (2, 14), (2, 28), (3, 1)):
+        db_session.add(
+            AuditLog(
+                actor_id=actor.id,
+                action="partition_test",
+                entity_type="partition",
+                entity_id=f"{month}-{day}",
+                created_at=datetime(2026, month, day, 23, 30, tzinfo=timezone.utc),
+            )
+        )
+    db_session.commit()
+
+    token = client.post("/api/v1/auth/login", json={"identifier": actor.email, "password": "secret"}).json()[
+        "access_token"
+    ]
+    headers = {"Authorization": f"Bearer {token}"}
+    params = {"entity_type": "partition", "date_from": "2026-02-01", "date_to": "2026-02-28", "page_size": 2}
+    seen = []
+    while True:
+        page = client.get("/api/v1/audit", params=params, headers=headers)
+        assert page.status_code == 200
+        seen.extend(row["entity_id"] for row in page.json())
+        if "X-Next-Cursor" not in page.headers:
+            break
+        params["cursor"] = page.headers["X-Next-Cursor"]
+    assert seen == ["2-28", "2-14", "2-1"]
+    inverted = client.get(
+        "/api/v1/audit", params={"date_from": "2026-03-01", "date_to": "2026-02-01"}, headers=headers
+    )
+    assert inverted.status_code == 400
+
+    # Partitions : tables marquées, noms mensuels ; aucune maintenance sous SQLite.
+    assert partitioned_tables() == [("audit_logs", "created_at"), ("inventory_ledger", "created_at")]
+    assert retention_applies("audit_logs")
+    assert not retention_applies("inventory_ledger")
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partition_name("audit_logs", date(2027, 2, 1)) == "audit_logs_p2027_02"
+    assert partition_month("audit_logs", "audit_logs_p2027_02") == date(2027, 2, 1)
+    assert partition_month("audit_logs", "audit_logs_default") is None
+    assert maintain_partitions(db_session.get_bind()) == []
@@ -1,5 +1,6 @@
 from datetime import datetime, timezone
 
+from app.auth.role_cache import AUTH_ROLES_SCOPE, bump_cache_version, read_actor_version, read_cache_version
 from app.auth.security import hash_password
 from app.models.actor import Actor, ActorAuth, ActorRole, RefreshToken
 from app.models.territory import Commune, District, Fokontany, Region, TerritoryVersion
@@ -229,3 +230,174 @@ def test_patch_me_profile_updates_identity_and_territory(client, db_session):
         json={"cin": "12345"},
     )
     assert invalid_cin.status_code == 400
+
+
+def test_stateless_access_token_claims_and_revocation(client, db_session, monkeypatch):
+    from app.auth.security import decode_token
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "auth_stateless_access_tokens", True)
+    actor = _create_actor(db_session)
+    db_session.add(ActorRole(actor_id=actor.id, role="acteur", status="active"))
+    db_session.commit()
+
+    tokens = client.post(
+        "/api/v1/auth/login",
+        json={"identifier": "test@example.com", "password": "secret"},
+    ).json()
+    claims = decode_token(tokens["access_token"])
+    assert claims["status"] == "active"
+    assert claims["roles"] == ["acteur"]
+    assert "actor_version" in claims
+    assert claims["sid"]
+
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+    logout = client.post("/api/v1/auth/logout", json={"refresh_token": tokens["refresh_token"]})
+    assert logout.status_code == 200
+    revoked = client.get("/api/v1/auth/me", headers=headers)
+    assert revoked.status_code == 400
+    assert revoked.json()["detail"]["message"] == "token_invalide"
+
+
+def test_stateless_access_token_stale_actor_version_rechecks_db(client, db_session, monkeypatch):
+    from app.auth.dependencies import _auth_context_from_claims
+    from app.auth.security import decode_token
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "auth_stateless_access_tokens", True)
+    actor = _create_actor(db_session)
+    token = client.post(
+        "/api/v1/auth/login",
+        json={"identifier": "test@example.com", "password": "secret"},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+    claims = decode_token(token)
+    # Un changement sur un autre acteur ne fait pas quitter le chemin autoportant.
+    other = Actor(
+        type_personne="physique",
+        nom="Autre",
+        telephone="0340000099",
+        status="active",
+        region_id=actor.region_id,
+        district_id=actor.district_id,
+        commune_id=actor.commune_id,
+        territory_version_id=actor.territory_version_id,
+        created_at=datetime.now(timezone.utc),
+    )
+    db_session.add(other)
+    db_session.flush()
+    db_session.add(ActorRole(actor_id=other.id, role="acteur", status="active"))
+    db_session.commit()
+    assert _auth_context_from_claims(db_session, claims) is not None
+
+    actor.status = "suspended"
+    db_session.commit()
+    assert _auth_context_from_claims(db_session, claims) is None
+    denied = client.get("/api/v1/auth/me", headers=headers)
+    assert denied.status_code == 400
+    assert denied.json()["detail"]["message"] == "compte_inactif"
+
+
+def test_login_rehashes_password_at_configured_cost(client, db_session, monkeypatch):
+    from app.auth.security import bcrypt_rounds
+    from app.core.config import settings
+
+    actor = _create_actor(db_session)
+    assert bcrypt_rounds(actor.auth.password_hash) == settings.password_bcrypt_rounds
+
+    monkeypatch.setattr(settings, "password_bcrypt_rounds", 4)
+    versions = (read_cache_version(db_session, AUTH_ROLES_SCOPE), read_actor_version(db_session, actor.id))
+    response = client.post(
+        "/api/v1/auth/login",
+        json={"identifier": "test@example.com", "password": "secret"},
+    )
+    assert response.status_code == 200
+    db_session.refresh(actor.auth)
+    assert bcrypt_rounds(actor.auth.password_hash) == 4
+    # Rehash au même mot de passe : pas une rotation, aucune version d'auth incrémentée.
+    assert (read_cache_version(db_session, AUTH_ROLES_SCOPE), read_actor_version(db_session, actor.id)) == versions
+
+    again = client.post(
+        "/api/v1/auth/login",
+        json={"identifier": "test@example.com", "password": "secret"},
+    )
+    assert again.status_code == 200
+    wrong = client.post(
+        "/api/v1/auth/login",
+        json={"identifier": "test@example.com", "password": "wrong"},
+    )
+    assert wrong.status_code == 400
+
+    stats = client.get("/api/v1/health/password-pool").json()
+    assert stats["completed"] >= 4
+    assert stats["queued"] == 0
+
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    assert client.get("/api/v1/health/password-pool").status_code == 401
+    protected = client.get("/api/v1/health/password-pool", headers={"Authorization": "Bearer scrape-secret"})
+    assert protected.status_code == 200
+
+
+def test_me_single_query_with_etag(client, db_session):
+    from sqlalchemy import event
+
+    actor = _create_actor(db_session)
+    db_session.add(ActorRole(actor_id=actor.id, role="acteur", status="active"))
+    db_session.commit()
+    token = client.post(
+        "/api/v1/auth/login",
+        json={"identifier": "test@example.com", "password": "secret"},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    first = client.get("/api/v1/auth/me", headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    statements = []
+    engine = db_session.get_bind()
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        cached = client.get("/api/v1/auth/me", headers={**headers, "If-None-Match": etag})
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 1
+    assert not [s for s in statements if "FROM actors" in s]
+
+    patched = client.patch("/api/v1/auth/me", headers=headers, json={"prenoms": "Nouveau"})
+    assert patched.status_code == 200
+    changed = client.get("/api/v1/auth/me", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["prenoms"] == "Nouveau"
+
+    db_session.add(ActorRole(actor_id=actor.id, role="orpailleur", status="active"))
+    db_session.commit()
+    with_role = client.get("/api/v1/auth/me", headers={**headers, "If-None-Match": changed.headers["etag"]})
+    assert with_role.status_code == 200
+    assert "orpailleur" in [role["role"] for role in with_role.json()["roles"]]
+
+    commune = db_session.get(Commune, actor.commune_id)
+    commune.name = "Commune renommée"
+    db_session.commit()
+    renamed = client.get("/api/v1/auth/me", headers={**headers, "If-None-Match": with_role.headers["etag"]})
+    assert renamed.status_code == 200
+    assert renamed.headers["etag"] != with_role.headers["etag"]
+    assert renamed.json()["commune"]["name"] == "Commune renommée"
+
+
+def test_cache_version_bump_upserts_scope(db_session):
+    connection = db_session.connection()
+    bump_cache_version(connection, "test_scope")
+    bump_cache_version(connection, "test_scope")
+    assert read_cache_version(db_session, "test_scope") == 2
@@ -6,7 +6,8 @@ from app.models.export import ExportDossier
 from app.models.geo import GeoPoint
 from app.models.lot import InventoryLedger, Lot
 from app.models.pierre import ActorAuthorization
-from app.models.bois import EssenceCatalog, WorkflowApproval
+from app.lots.router import _DeclarationLookups
+from app.models.bois import ChecklistPolicy, EssenceCatalog, WorkflowApproval
 from app.models.territory import Commune, District, Region, TerritoryVersion
 
 
@@ -479,3 +480,27 @@ def test_rbac_artisan_cannot_create_permit_and_controller_cannot_create_lot(clie
     )
     assert denied_lot.status_code == 400
     assert denied_lot.json()["detail"]["message"] == "role_insuffisant"
+
+
+def test_declaration_lookups_checklist_policy_per_filiere_and_operation(db_session):
+    effective_from = datetime.now(timezone.utc) - timedelta(days=1)
+    for filiere, operation, doc_types in (
+        ("BOIS", "declaration", '["permis_coupe"]'),
+        ("BOIS", "transport", '["laissez_passer"]'),
+    ):
+        db_session.add(
+            ChecklistPolicy(
+                filiere=filiere,
+                operation=operation,
+                required_doc_types_json=doc_types,
+                effective_from=effective_from,
+                status="active",
+                created_by_actor_id=1,
+            )
+        )
+    db_session.commit()
+
+    lookups = _DeclarationLookups(db_session, actor_id=1)
+    assert lookups.missing_doc_types("BOIS", "declaration", None, []) == ["permis_coupe"]
+    assert lookups.missing_doc_types("BOIS", "transport", None, []) == ["laissez_passer"]
+    assert lookups.missing_doc_types("PIERRE", "declaration", None, []) == []
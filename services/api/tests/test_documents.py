@@ -209,3 +209,61 @@ def test_get_document_rbac(client, db_session):
         headers={"Authorization": f"Bearer {token}"},
     )
     assert denied.status_code == 400
+
+
+def test_pdf_document_job_pipeline(db_session, tmp_path, monkeypatch):
+    import hashlib
+    from datetime import timedelta
+    from pathlib import Path
+
+    from app.core.config import settings
+    from app.documents import jobs
+    from app.models.document import DocumentJob
+
+    monkeypatch.setattr(settings, "document_storage_dir", str(tmp_path))
+
+    def queue(document=None):
+        doc = jobs.queue_pdf_document(
+            db_session,
+            doc_type="receipt",
+            owner_actor_id=1,
+            related_entity_type="fee",
+            related_entity_id="1",
+            filename="REC-0001.pdf",
+            title="MADAVOLA - Recu frais",
+            lines=["Recu: REC-0001"],
+            document=document,
+        )
+        db_session.commit()
+        return doc
+
+    doc = queue()
+    assert doc.status == "pending"
+    assert not Path(doc.storage_path).exists()
+
+    assert jobs.process_pending_jobs(db_session, worker_id="test") == 1
+    db_session.refresh(doc)
+    assert doc.status == "ready"
+    content = Path(doc.storage_path).read_bytes()
+    assert content.startswith(b"%PDF") and doc.sha256 == hashlib.sha256(content).hexdigest()
+
+    # Régénérations successives : seul le dernier rendu est exécuté.
+    queue(doc)
+    queue(doc)
+    statuses = [job.status for job in db_session.query(DocumentJob).order_by(DocumentJob.id).all()]
+    assert statuses == ["done", "cancelled", "pending"]
+    assert jobs.process_pending_jobs(db_session, worker_id="test") == 1
+
+    monkeypatch.setattr(settings, "document_job_max_attempts", 2)
+    monkeypatch.setattr(jobs, "_render", lambda job: (_ for _ in ()).throw(OSError("disque plein")))
+    queue(doc)
+    assert jobs.process_pending_jobs(db_session, worker_id="test") == 1
+    job = db_session.query(DocumentJob).order_by(DocumentJob.id.desc()).first()
+    assert (job.status, job.attempts) == ("pending", 1)
+    assert "disque plein" in job.last_error
+    assert jobs.process_pending_jobs(db_session, worker_id="test") == 0
+    job.run_after = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db_session.commit()
+    assert jobs.process_pending_jobs(db_session, worker_id="test") == 1
+    db_session.refresh(doc)
+    assert doc.status == "failed"
@@ -428,3 +428,51 @@ def test_export_approval_allowed_for_gue(client, db_session):
     )
     assert approved.status_code == 200
     assert approved.json()["status"] == "approved"
+
+
+def test_export_lineage_returns_provenance_tree(client, db_session):
+    from app.models.export import ExportLot
+    from app.models.geo import GeoPoint
+    from app.models.lot import Lot
+
+    region, district, commune, version = _seed_territory(db_session)
+    actor = _create_actor_with_role(db_session, region, district, commune, version, "lineage@example.com", "acteur")
+    geo = GeoPoint(lat=-18.91, lon=47.52, accuracy_m=12)
+    db_session.add(geo)
+    db_session.flush()
+
+    def _lot(quantity, parent=None):
+        lot = Lot(
+            filiere="OR",
+            product_type="or_brut",
+            unit="g",
+            quantity=quantity,
+            declared_by_actor_id=actor.id,
+            current_owner_actor_id=actor.id,
+            status="available",
+            declare_geo_point_id=geo.id,
+            parent_lot_id=parent.id if parent else None,
+        )
+        db_session.add(lot)
+        db_session.flush()
+        return lot
+
+    origin = _lot(10)
+    first = _lot(4, origin)
+    second = _lot(6, origin)
+    dossier = ExportDossier(status="draft", destination="Dubai", total_weight=10, created_by_actor_id=actor.id)
+    db_session.add(dossier)
+    db_session.flush()
+    for lot in (first, second):
+        db_session.add(ExportLot(export_dossier_id=dossier.id, lot_id=lot.id, quantity_in_export=lot.quantity))
+    db_session.commit()
+
+    token = client.post("/api/v1/auth/login", json={"identifier": actor.email, "password": "secret"}).json()[
+        "access_token"
+    ]
+    response = client.get(f"/api/v1/exports/{dossier.id}/lineage", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["root_lot_ids"] == [first.id, second.id]
+    assert {node["lot_id"] for node in body["nodes"]} == {origin.id, first.id, second.id}
+    assert sorted((e["descendant_lot_id"], e["quantity"]) for e in body["edges"]) == [(first.id, 4.0), (second.id, 6.0)]
@@ -6,3 +6,166 @@ def test_health_ready(client):
     ready = client.get("/api/v1/ready")
     assert ready.status_code == 200
     assert ready.json()["status"] == "ready"
+
+
+def test_schema_fingerprint_check_and_startup_metrics(client, db_session, monkeypatch):
+    import time
+
+    import pytest
+
+    from sqlalchemy import text
+
+    from app.core.config import settings
+    from app.core.schema import SchemaOutOfDateError, alembic_head, check_schema, run_startup_check, sync_schema
+    from app.models.admin import SchemaState
+
+    engine = db_session.get_bind()
+    with pytest.raises(SchemaOutOfDateError) as exc:
+        check_schema(engine, mode="check")
+    assert "python -m app.core.schema sync" in str(exc.value)
+
+    assert sync_schema(engine)
+    assert check_schema(engine, mode="check") == "ok"
+    # Déjà à jour : aucun DDL au redémarrage suivant.
+    assert sync_schema(engine) is None
+
+    # Base migrée par alembic : la révision doit être la tête livrée.
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        conn.execute(text("INSERT INTO alembic_version VALUES ('0001_territory')"))
+    with pytest.raises(SchemaOutOfDateError) as exc:
+        check_schema(engine, mode="auto")
+    assert "migrations_non_appliquees" in str(exc.value)
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE alembic_version SET version_num = :head"), {"head": alembic_head()})
+    assert check_schema(engine, mode="check") == "ok"
+
+    state = db_session.query(SchemaState).filter_by(key="app").one()
+    state.fingerprint = "0" * 64
+    db_session.commit()
+    with pytest.raises(SchemaOutOfDateError):
+        check_schema(engine, mode="check")
+    assert check_schema(engine, mode="auto") == "synced"
+
+    run_startup_check(engine, time.perf_counter())
+    metrics = client.get("/api/v1/health/startup").json()
+    assert metrics["schema_status"] == "ok"
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    assert client.get("/api/v1/health/startup").status_code == 401
+    monkeypatch.setattr(settings, "metrics_token", None)
+    assert metrics["startup_seconds"] >= metrics["schema_check_seconds"] >= 0
+
+
+def test_db_pool_settings_and_metrics(client, tmp_path, monkeypatch):
+    import pytest
+    from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+    from app.core.config import settings
+    from app.db import create_db_engine, pool_status
+
+    monkeypatch.setattr(settings, "db_pool_size", 1)
+    monkeypatch.setattr(settings, "db_max_overflow", 1)
+    monkeypatch.setattr(settings, "db_pool_timeout_seconds", 0.05)
+    monkeypatch.setattr(settings, "db_pool_pre_ping", False)
+    engine = create_db_engine(f"sqlite+pysqlite:///{tmp_path / 'pool.db'}")
+    try:
+        first = engine.connect()
+        second = engine.connect()
+        status = pool_status(engine)
+        assert status["pool_class"] == "InstrumentedQueuePool"
+        assert status["in_use"] == 2
+        assert status["overflow"] == 1
+        assert status["checkouts"] == 2
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+        assert pool_status(engine)["timeouts"] == 1
+        first.close()
+        second.close()
+        assert pool_status(engine)["in_use"] == 0
+    finally:
+        engine.dispose()
+
+    published = client.get("/api/v1/health/db-pool")
+    assert published.status_code == 200
+    assert "in_use" in published.json()
+
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    assert client.get("/api/v1/health/db-pool").status_code == 401
+    assert client.get("/api/v1/health/db-pool", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
+
+
+def test_sql_instrumentation_server_timing_and_n_plus_one(client, db_session, monkeypatch, caplog):
+    import logging
+
+    from app.core.config import settings
+    from app.core.sql_metrics import RequestSqlStats, _check_request, route_sql_metrics, statement_shape
+
+    route_sql_metrics.reset()
+    response = client.get("/api/v1/ready")
+    assert response.status_code == 200
+    assert 'desc="1 queries"' in response.headers["server-timing"]
+    routes = {(row["method"], row["route"]): row for row in client.get("/api/v1/health/sql-metrics").json()["routes"]}
+    assert routes[("GET", "/api/v1/ready")]["queries_total"] == 1
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    assert client.get("/api/v1/health/sql-metrics").status_code == 401
+    assert client.get("/api/v1/health/sql-metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
+    monkeypatch.setattr(settings, "metrics_token", None)
+
+    assert statement_shape("SELECT * FROM actors WHERE id IN (?, ?, ?) LIMIT 10") == statement_shape(
+        "SELECT * FROM actors WHERE id IN (?) LIMIT 1"
+    )
+
+    monkeypatch.setattr(settings, "sql_repeated_statement_threshold", 2)
+    stats = RequestSqlStats()
+    for _ in range(3):
+        stats.add("SELECT actors.nom FROM actors WHERE actors.id = ?", 0.001)
+    with caplog.at_level(logging.WARNING, logger="app.core.sql_metrics"):
+        flags = _check_request("GET", "/api/v1/messages", stats)
+    assert flags == {"repeated"}
+    assert "sql_repeated_statement" in caplog.text
+
+
+def test_sql_instrumentation_failed_statement_releases_timer(db_session):
+    import pytest
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    from app.core.sql_metrics import RequestSqlStats, _current
+
+    stats = RequestSqlStats()
+    token = _current.set(stats)
+    try:
+        with db_session.get_bind().connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM table_absente"))
+            assert not conn.info.get("sql_metrics_started")
+            conn.execute(text("SELECT 1"))
+            assert not conn.info.get("sql_metrics_started")
+    finally:
+        _current.reset(token)
+    assert stats.count == 2
+
+
+def test_prometheus_metrics_endpoint(client, db_session, monkeypatch):
+    from app.core.config import settings
+    from app.core.metrics import AUDIT_ROWS_WRITTEN
+    from app.models.audit import AuditLog
+
+    before = AUDIT_ROWS_WRITTEN.labels("metrics_test")._value.get()
+    db_session.add(AuditLog(action="test", entity_type="metrics_test", entity_id="1"))
+    db_session.flush()
+    db_session.rollback()
+    db_session.add(AuditLog(action="test", entity_type="metrics_test", entity_id="2"))
+    db_session.commit()
+    assert AUDIT_ROWS_WRITTEN.labels("metrics_test")._value.get() == before + 1
+
+    assert client.get("/api/v1/ready").status_code == 200
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    body = response.text
+    assert 'madavola_http_request_duration_seconds_count{method="GET",route="/api/v1/ready",status="200"}' in body
+    assert 'madavola_audit_rows_written_total{entity_type="metrics_test"}' in body
+
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
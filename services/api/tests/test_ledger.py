@@ -1,9 +1,16 @@
 from datetime import datetime, timezone
+import csv
+import gzip
+import io
+import json
 
 from app.auth.security import hash_password
+from app.core.config import settings
+from app.ledger.balances import diff_stock_balances, rebuild_stock_balances
+from app.ledger.schemas import LedgerEntryOut
 from app.models.actor import Actor, ActorAuth
 from app.models.geo import GeoPoint
-from app.models.lot import InventoryLedger, Lot
+from app.models.lot import InventoryLedger, Lot, StockBalance
 from app.models.territory import Commune, District, Region, TerritoryVersion
 
 
@@ -111,3 +118,189 @@ def test_ledger_list_and_balance(client, db_session):
     )
     assert balance.status_code == 200
     assert balance.json()[0]["quantity"] == 10.0
+
+
+def test_ledger_reads_use_replica_with_primary_fallback(client, db_session, tmp_path, monkeypatch):
+    import app.db as db_module
+    from app.models.base import Base
+
+    region, district, commune, version = _seed_territory(db_session)
+    actor = Actor(
+        type_personne="physique",
+        nom="Replica",
+        prenoms="Test",
+        telephone="0340009002",
+        email="replica@example.com",
+        status="active",
+        region_id=region.id,
+        district_id=district.id,
+        commune_id=commune.id,
+        territory_version_id=version.id,
+        created_at=datetime.now(timezone.utc),
+    )
+    db_session.add(actor)
+    db_session.flush()
+    db_session.add(ActorAuth(actor_id=actor.id, password_hash=hash_password("secret"), is_active=1))
+    db_session.add(
+        InventoryLedger(
+            actor_id=actor.id,
+            lot_id=1,
+            movement_type="create",
+            quantity_delta=5,
+            ref_event_type="lot",
+            ref_event_id="1",
+        )
+    )
+    db_session.commit()
+    token = client.post(
+        "/api/v1/auth/login",
+        json={"identifier": actor.email, "password": "secret"},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Réplique vide : les lectures qui y sont routées ne voient pas la ligne de la primaire.
+    db_module.configure_read_replica(f"sqlite+pysqlite:///{tmp_path / 'replica.db'}")
+    try:
+        Base.metadata.create_all(bind=db_module.read_engine)
+        assert client.get("/api/v1/ledger", headers=headers).json() == []
+        primary = client.get("/api/v1/ledger", headers={**headers, "X-Read-Consistency": "primary"})
+        assert len(primary.json()) == 1
+
+        patched = client.patch("/api/v1/auth/me", headers=headers, json={"prenoms": "Ecrit"})
+        assert patched.status_code == 200
+        assert len(client.get("/api/v1/ledger", headers=headers).json()) == 1
+
+        db_module._replica.recent_writes.clear()
+        monkeypatch.setattr(db_module, "_measure_replica_lag", lambda: 120.0)
+        db_module._replica.checked_at = 0.0
+        assert len(client.get("/api/v1/ledger", headers=headers).json()) == 1
+        assert client.get("/api/v1/health/db-pool").json()["replica"]["lag_seconds"] == 120.0
+    finally:
+        db_module.configure_read_replica(None)
+
+
+def test_stock_balances_follow_ledger_and_reconcile(client, db_session):
+    region, district, commune, version = _seed_territory(db_session)
+    actor = Actor(
+        type_personne="physique",
+        nom="Solde",
+        prenoms="Test",
+        telephone="0340009003",
+        email="balances@example.com",
+        status="active",
+        region_id=region.id,
+        district_id=district.id,
+        commune_id=commune.id,
+        territory_version_id=version.id,
+        created_at=datetime.now(timezone.utc),
+    )
+    db_session.add(actor)
+    db_session.flush()
+    db_session.add(ActorAuth(actor_id=actor.id, password_hash=hash_password("secret"), is_active=1))
+    geo = GeoPoint(lat=-18.91, lon=47.52, accuracy_m=12)
+    db_session.add(geo)
+    db_session.commit()
+    token = client.post("/api/v1/auth/login", json={"identifier": actor.email, "password": "secret"}).json()[
+        "access_token"
+    ]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Déclaration (insertion groupée) puis division (mouvements ajoutés à la session).
+    lot = client.post(
+        "/api/v1/lots",
+        headers=headers,
+        json={
+            "filiere": "OR",
+            "product_type": "or_brut",
+            "unit": "g",
+            "quantity": 10,
+            "declare_geo_point_id": geo.id,
+            "declared_by_actor_id": actor.id,
+        },
+    ).json()
+    split = client.post(f"/api/v1/lots/{lot['id']}/split", headers=headers, json={"quantities": [4.5, 5.5]})
+    assert split.status_code == 200
+    children = sorted(child["id"] for child in split.json())
+
+    balances = client.get("/api/v1/ledger/balance", headers=headers).json()
+    assert [(row["lot_id"], row["quantity"]) for row in balances] == [
+        (lot["id"], 0.0),
+        (children[0], 4.5),
+        (children[1], 5.5),
+    ]
+    assert diff_stock_balances(db_session) == []
+
+    stored = db_session.get(StockBalance, (actor.id, children[0]))
+    stored.quantity = 9
+    db_session.add(StockBalance(actor_id=actor.id, lot_id=999, quantity=1))
+    db_session.commit()
+    drifts = diff_stock_balances(db_session)
+    assert [(drift.lot_id, drift.ledger_quantity, drift.stored_quantity) for drift in drifts] == [
+        (children[0], 4.5, 9.0),
+        (999, 0.0, 1.0),
+    ]
+    rebuild_stock_balances(db_session)
+    db_session.commit()
+    assert diff_stock_balances(db_session) == []
+
+
+def test_ledger_export_streams_ndjson_and_gzip_csv(client, db_session, monkeypatch):
+    region, district, commune, version = _seed_territory(db_session)
+    actor = Actor(
+        type_personne="physique",
+        nom="Export",
+        prenoms="Test",
+        telephone="0340009004",
+        email="ledger-export@example.com",
+        status="active",
+        region_id=region.id,
+        district_id=district.id,
+        commune_id=commune.id,
+        territory_version_id=version.id,
+        created_at=datetime.now(timezone.utc),
+    )
+    db_session.add(actor)
+    db_session.flush()
+    db_session.add(ActorAuth(actor_id=actor.id, password_hash=hash_password("secret"), is_active=1))
+    for day in range(1, 6):
+        db_session.add(
+            InventoryLedger(
+                actor_id=actor.id,
+                lot_id=day,
+                movement_type="create",
+                quantity_delta=day + 0.5,
+                ref_event_type="lot",
+                ref_event_id=str(day),
+                created_at=datetime(2026, 3, day, 12, 0, tzinfo=timezone.utc),
+            )
+        )
+    db_session.commit()
+    token = client.post("/api/v1/auth/login", json={"identifier": actor.email, "password": "secret"}).json()[
+        "access_token"
+    ]
+    headers = {"Authorization": f"Bearer {token}"}
+    monkeypatch.setattr(settings, "export_stream_batch_size", 2)
+
+    ndjson = client.get(
+        "/api/v1/ledger/export", params={"date_from": "2026-03-02", "date_to": "2026-03-04"}, headers=headers
+    )
+    assert ndjson.status_code == 200
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    assert ndjson.headers["content-disposition"].endswith('.ndjson"')
+    rows = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [(row["lot_id"], row["quantity_delta"]) for row in rows] == [(2, 2.5), (3, 3.5), (4, 4.5)]
+
+    archive = client.get("/api/v1/ledger/export", params={"format": "csv", "gzip": "true"}, headers=headers)
+    assert archive.status_code == 200
+    assert archive.headers["content-type"] == "application/gzip"
+    lines = list(csv.reader(io.StringIO(gzip.decompress(archive.content).decode("utf-8"))))
+    assert lines[0] == list(LedgerEntryOut.model_fields)
+    assert [line[2] for line in lines[1:]] == ["1", "2", "3", "4", "5"]
+
+    empty = client.get("/api/v1/ledger/export", params={"format": "csv", "date_from": "2027-01-01"}, headers=headers)
+    assert empty.text.splitlines() == [",".join(LedgerEntryOut.model_fields)]
+    assert client.get("/api/v1/ledger/export", params={"actor_id": actor.id + 1}, headers=headers).status_code == 400
+    invalid = client.get(
+        "/api/v1/ledger/export", params={"date_from": "2026-03-04", "date_to": "2026-03-01"}, headers=headers
+    )
+    assert invalid.status_code == 400
@@ -2,10 +2,13 @@ from datetime import datetime, timezone
 from io import BytesIO
 
 import openpyxl
+from sqlalchemy import event
 
+from app.lots.credentials import ActorCredentials
 from app.models.actor import Actor, ActorAuth
 from app.models.geo import GeoPoint
 from app.models.gold_ops import TransportEvent
+from app.models.or_compliance import KaraBolamenaCard
 from app.models.payment import PaymentProvider, PaymentRequest
 from app.models.territory import Commune, District, Region, TerritoryVersion
 from app.auth.security import hash_password
@@ -243,3 +246,216 @@ def test_lot_consolidate_and_split(client, db_session):
         json={"quantities": [4, 6]},
     )
     assert split.status_code == 200
+
+    # Mouvements hors module lots (ventes, pénalités...) puis nouvel événement :
+    # l'historique incrémental doit égaler la relecture complète du ledger.
+    import json
+
+    from app.common.traceability import compute_chain_hash
+    from app.models.lot import InventoryLedger, Lot
+
+    child_id = split.json()[0]["id"]
+    for index in range(9):
+        db_session.add(
+            InventoryLedger(
+                actor_id=owner.id,
+                lot_id=child_id,
+                movement_type="adjust",
+                quantity_delta=0,
+                ref_event_type="test",
+                ref_event_id=str(index),
+            )
+        )
+    db_session.commit()
+    resplit = client.post(
+        f"/api/v1/lots/{child_id}/split",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"quantities": [1, 3]},
+    )
+    assert resplit.status_code == 200
+    db_session.expire_all()
+    child = db_session.query(Lot).filter(Lot.id == child_id).one()
+    rows = (
+        db_session.query(InventoryLedger)
+        .filter(InventoryLedger.lot_id == child_id)
+        .order_by(InventoryLedger.created_at.asc(), InventoryLedger.id.asc())
+        .all()
+    )
+    payload = json.loads(child.trace_payload_json)
+    assert payload["history"] == [f"{r.movement_type}:{r.ref_event_type}:{r.ref_event_id}" for r in rows][-8:]
+    assert child.trace_ledger_cursor == rows[-1].id
+    assert child.current_block_hash == compute_chain_hash(payload)
+
+    # Généalogie : lot1 + lot2 -> consolidé -> divisions -> re-division.
+    headers = {"Authorization": f"Bearer {token}"}
+    consolidated_id = consolidated.json()["id"]
+    grandchild_id = resplit.json()[0]["id"]
+    statements = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", _capture)
+    try:
+        up = client.get(f"/api/v1/lots/{grandchild_id}/lineage", headers=headers)
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", _capture)
+    assert up.status_code == 200
+    # Consolidations : `ref_event_id` comparé tel quel (index `(movement_type, ref_event_id)`).
+    lineage_sql = [s for s in statements if "lot_lineage_walk" in s]
+    assert lineage_sql and not [s for s in lineage_sql if "CAST(inventory_ledger" in s or "AS INTEGER" in s]
+    up_body = up.json()
+    assert {node["lot_id"]: node["depth"] for node in up_body["nodes"]} == {
+        grandchild_id: 0,
+        child_id: 1,
+        consolidated_id: 2,
+        lot1["id"]: 3,
+        lot2["id"]: 3,
+    }
+    edges = {(e["ancestor_lot_id"], e["descendant_lot_id"]): (e["relation_type"], e["quantity"]) for e in up_body["edges"]}
+    assert edges[(lot1["id"], consolidated_id)] == ("consolidation", 5.0)
+    assert edges[(consolidated_id, child_id)] == ("derivation", 4.0)
+    assert edges[(child_id, grandchild_id)] == ("derivation", 1.0)
+
+    shallow = client.get(f"/api/v1/lots/{grandchild_id}/lineage", params={"depth": 1}, headers=headers).json()
+    assert [(e["ancestor_lot_id"], e["descendant_lot_id"]) for e in shallow["edges"]] == [(child_id, grandchild_id)]
+
+    down = client.get(f"/api/v1/lots/{consolidated_id}/lineage", params={"direction": "down"}, headers=headers).json()
+    descendants = {node["lot_id"] for node in down["nodes"]} - {consolidated_id}
+    assert descendants == {item["id"] for item in split.json()} | {item["id"] for item in resplit.json()}
+
+
+def test_lot_batch_declaration(client, db_session):
+    from app.common.traceability import compute_chain_hash
+    from app.models.lot import InventoryLedger, Lot
+
+    region, district, commune, version = _seed_territory(db_session)
+    owner = Actor(
+        type_personne="physique",
+        nom="Batch",
+        prenoms="Lot",
+        telephone="0340008004",
+        email="batchlot@example.com",
+        status="active",
+        region_id=region.id,
+        district_id=district.id,
+        commune_id=commune.id,
+        territory_version_id=version.id,
+        created_at=datetime.now(timezone.utc),
+    )
+    db_session.add(owner)
+    db_session.flush()
+    db_session.add(ActorAuth(actor_id=owner.id, password_hash=hash_password("secret"), is_active=1))
+    geo = GeoPoint(lat=-18.91, lon=47.52, accuracy_m=12)
+    db_session.add(geo)
+    db_session.commit()
+
+    token = client.post(
+        "/api/v1/auth/login",
+        json={"identifier": owner.email, "password": "secret"},
+    ).json()["access_token"]
+    item = {
+        "filiere": "OR",
+        "product_type": "or_brut",
+        "unit": "g",
+        "quantity": 5,
+        "declare_geo_point_id": geo.id,
+        "declared_by_actor_id": owner.id,
+    }
+    response = client.post(
+        "/api/v1/lots/batch",
+        headers={"Authorization": f"Bearer {token}"},
+        json={
+            "lots": [
+                item,
+                {**item, "quantity": 7},
+                {**item, "declare_geo_point_id": geo.id + 999},
+                {**item, "unit": "m3"},
+                {**item, "quantity": 9},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["rejected"]) == (3, 2)
+    assert [entry["status"] for entry in body["items"]] == ["created", "created", "rejected", "rejected", "created"]
+    assert body["items"][2]["error"] == "gps_obligatoire"
+    assert body["items"][3]["error"] == "unite_non_autorisee"
+
+    created = [entry["lot"] for entry in body["items"] if entry["status"] == "created"]
+    assert [lot["quantity"] for lot in created] == [5, 7, 9]
+    assert len({lot["lot_number"] for lot in created}) == 3
+    assert all(lot["declaration_receipt_document_id"] for lot in created)
+
+    db_session.expire_all()
+    ledger = db_session.query(InventoryLedger).filter(InventoryLedger.actor_id == owner.id).all()
+    assert sorted(float(row.quantity_delta) for row in ledger) == [5, 7, 9]
+    stored = db_session.query(Lot).filter(Lot.id == created[0]["id"]).one()
+    assert stored.current_block_hash == compute_chain_hash(
+        {
+            "lot_id": stored.id,
+            "lot_number": stored.lot_number,
+            "traceability_id": stored.traceability_id,
+            "origin_reference": stored.origin_reference,
+            "event_type": "create",
+            "event_ref": str(stored.id),
+            "history": [f"create:lot:{stored.id}"],
+            "previous_block_hash": "GENESIS",
+        }
+    )
+
+
+def test_actor_credentials_cached_across_requests_and_invalidated(db_session):
+    region, district, commune, version = _seed_territory(db_session)
+    actor = Actor(
+        type_personne="physique",
+        nom="Orpailleur",
+        prenoms="Cache",
+        telephone="0340008090",
+        email="credentials@example.com",
+        status="active",
+        region_id=region.id,
+        district_id=district.id,
+        commune_id=commune.id,
+        territory_version_id=version.id,
+        created_at=datetime.now(timezone.utc),
+    )
+    db_session.add(actor)
+    db_session.commit()
+
+    first = ActorCredentials(db_session, actor.id)
+    assert first.origin_reference("OR") == f"PERMIS:ACTOR-{actor.id}"
+    assert first.region_code() == "01"
+
+    statements = []
+    engine = db_session.get_bind()
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        # Nouvelle requête : servi par le cache partagé, sans lecture.
+        second = ActorCredentials(db_session, actor.id)
+        for _ in range(5):
+            assert second.origin_reference("or") == f"PERMIS:ACTOR-{actor.id}"
+            assert second.region_code() == "01"
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+    assert [s for s in statements if "auth_cache_versions" not in s] == []
+
+    card = KaraBolamenaCard(
+        actor_id=actor.id,
+        commune_id=commune.id,
+        card_number="KB-0001",
+        unique_identifier="KB-UID-0001",
+        cin="101010101010",
+        status="active",
+    )
+    db_session.add(card)
+    db_session.commit()
+    assert ActorCredentials(db_session, actor.id).origin_reference("OR") == "KARABOLA:KB-0001"
+
+    card.status = "suspended"
+    db_session.commit()
+    assert ActorCredentials(db_session, actor.id).origin_reference("OR") == f"PERMIS:ACTOR-{actor.id}"
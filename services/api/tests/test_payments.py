@@ -249,3 +249,13 @@ def test_list_payments_rbac(client, db_session):
     )
     assert response.status_code == 200
     assert response.json() == []
+
+
+def test_webhook_result_label_is_bounded():
+    from app.payments.router import _webhook_result
+
+    assert _webhook_result("success") == "success"
+    assert _webhook_result("failed") == "failed"
+    assert _webhook_result("pending") == "pending"
+    assert _webhook_result("x" * 500) == "other"
+    assert _webhook_result(None) == "other"
@@ -141,3 +141,40 @@ def test_rbac_roles_filter_by_actor_type(client, db_session):
     rows = response.json()
     assert rows
     assert all(row["actor_type"] == "USAGER" for row in rows)
+
+
+def test_rbac_roles_catalog_update_invalidates_cache(client, db_session):
+    import_territory_excel(db_session, _build_excel(), "territory.xlsx", "v1")
+    admin = _create_actor(db_session, "admin", "rbaccache")
+    row = RoleCatalog(
+        code="bois_exploitant",
+        label="Bois Exploitant",
+        description="",
+        category="BOIS",
+        filiere_scope_csv="BOIS",
+        is_active=True,
+        display_order=1,
+    )
+    db_session.add(row)
+    db_session.commit()
+    login = client.post("/api/v1/auth/login", json={"identifier": admin.email, "password": "secret"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    first = client.get("/api/v1/rbac/roles", params={"search": "bois_exploitant"}, headers=headers)
+    assert [r["label"] for r in first.json() if r["code"] == "bois_exploitant"] == ["Bois Exploitant"]
+
+    row.label = "Exploitant forestier"
+    db_session.commit()
+    second = client.get("/api/v1/rbac/roles", params={"search": "bois_exploitant"}, headers=headers)
+    assert [r["label"] for r in second.json() if r["code"] == "bois_exploitant"] == ["Exploitant forestier"]
+
+
+def test_permission_index_matches_definitions():
+    from app.auth.roles_config import ROLE_DEFINITIONS, has_permission, roles_with_permission
+
+    for code, defn in ROLE_DEFINITIONS.items():
+        for perm in defn["permissions"]:
+            assert has_permission([code], perm)
+            assert code in roles_with_permission(perm)
+    assert not has_permission([], "audit_logs")
+    assert roles_with_permission("permission_inconnue") == set()
@@ -1,10 +1,24 @@
-from datetime import datetime, timezone
+from datetime import datetime, time, timedelta, timezone
+
+from prometheus_client import REGISTRY
+from sqlalchemy import event
 
 from app.auth.security import hash_password
+from app.core.config import settings
 from app.models.actor import Actor, ActorAuth, ActorRole
 from app.models.lot import InventoryLedger
+from app.models.rollup import DailyActivityRollup
 from app.models.territory import Commune, District, Region, TerritoryVersion
 from app.models.transaction import TradeTransaction
+from app.reports.cache import clear_dashboard_cache
+from app.reports.rollups import (
+    activity_totals,
+    bucket_start,
+    distinct_lots_through,
+    roll_up_activity,
+    rolled_through,
+    series_buckets,
+)
 
 
 def _seed_territory(db_session):
@@ -130,3 +144,416 @@ def test_report_national_requires_admin(client, db_session):
         headers={"Authorization": f"Bearer {token}"},
     )
     assert denied.status_code == 400
+
+
+def test_dashboards_read_daily_rollups_plus_live_tail(client, db_session):
+    region, district, commune, version = _seed_territory(db_session)
+    actors = []
+    for index, role in enumerate(("admin", "orpailleur")):
+        actor = Actor(
+            type_personne="physique",
+            nom="Rollup",
+            prenoms=role,
+            telephone=f"034000160{index}",
+            email=f"rollup-{role}@example.com",
+            status="active",
+            region_id=region.id,
+            district_id=district.id,
+            commune_id=commune.id,
+            territory_version_id=version.id,
+            created_at=datetime.now(timezone.utc),
+        )
+        db_session.add(actor)
+        db_session.flush()
+        db_session.add(ActorAuth(actor_id=actor.id, password_hash=hash_password("secret"), is_active=1))
+        db_session.add(ActorRole(actor_id=actor.id, role=role, status="active"))
+        actors.append(actor)
+    admin, miner = actors
+    today = datetime.now(timezone.utc).date()
+    first_day = today - timedelta(days=3)
+
+    def at(day, hour=10):
+        return datetime.combine(day, time(hour), tzinfo=timezone.utc)
+
+    movements = [
+        (miner, 1, "create", 5, first_day),
+        (miner, 2, "create", 2, first_day),
+        (miner, 1, "transfer_out", -5, first_day + timedelta(days=1)),
+        (admin, 1, "transfer_in", 5, first_day + timedelta(days=1)),
+        (miner, 3, "create", 1.5, today),
+    ]
+    for actor, lot_id, movement_type, quantity, day in movements:
+        db_session.add(
+            InventoryLedger(
+                actor_id=actor.id,
+                lot_id=lot_id,
+                movement_type=movement_type,
+                quantity_delta=quantity,
+                ref_event_type="lot",
+                ref_event_id=str(lot_id),
+                created_at=at(day),
+            )
+        )
+    for amount, day in ((1000, first_day), (250, first_day + timedelta(days=1)), (500, today)):
+        db_session.add(
+            TradeTransaction(
+                seller_actor_id=miner.id,
+                buyer_actor_id=admin.id,
+                status="paid",
+                total_amount=amount,
+                currency="MGA",
+                created_at=at(day),
+            )
+        )
+    db_session.commit()
+
+    token = client.post("/api/v1/auth/login", json={"identifier": admin.email, "password": "secret"}).json()[
+        "access_token"
+    ]
+    headers = {"Authorization": f"Bearer {token}"}
+    urls = [
+        f"/api/v1/dashboards/national?date_from={first_day}&date_to={today}",
+        f"/api/v1/dashboards/regional?region_id={region.id}&date_from={first_day}&date_to={today}",
+        f"/api/v1/dashboards/commune?commune_id={commune.id}&date_from={first_day + timedelta(days=1)}",
+        f"/api/v1/reports/actor?actor_id={miner.id}&date_from={first_day}&date_to={today}",
+    ]
+    raw = [client.get(url, headers=headers).json() for url in urls]
+    assert raw[0]["volume_created"] == 8.5
+    assert raw[0]["transactions_total"] == 1750
+    assert raw[0]["nb_lots"] == 3
+
+    rolled = roll_up_activity(db_session, today=today)
+    assert rolled == [first_day, first_day + timedelta(days=1), first_day + timedelta(days=2)]
+    assert rolled_through(db_session) == today - timedelta(days=1)
+    assert db_session.query(DailyActivityRollup).count() == 3
+    clear_dashboard_cache(db_session.get_bind())
+    assert [client.get(url, headers=headers).json() for url in urls] == raw
+
+    # Période entièrement agrégée : aucune lecture des tables brutes.
+    statements = []
+    engine = db_session.get_bind()
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        totals = activity_totals(db_session, first_day, today - timedelta(days=1), region_id=region.id)
+        lots = distinct_lots_through(db_session, today - timedelta(days=1), commune_id=commune.id)
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+    assert (totals.volume_created, totals.transactions_total, lots) == (7.0, 1250.0, 2)
+    assert not [s for s in statements if "inventory_ledger" in s or "trade_transactions" in s]
+
+    # Passage suivant : seul le dernier jour agrégé est recalculé.
+    assert roll_up_activity(db_session, today=today) == [today - timedelta(days=1)]
+
+
+def test_actor_move_rewinds_rollup_watermark(db_session):
+    region, district, commune, version = _seed_territory(db_session)
+    other_commune = Commune(
+        version_id=version.id,
+        district_id=district.id,
+        code="010102",
+        name="Antananarivo II",
+        name_normalized="antananarivo ii",
+    )
+    db_session.add(other_commune)
+    db_session.flush()
+    actor = Actor(
+        type_personne="physique",
+        nom="Move",
+        prenoms="Rollup",
+        telephone="0340001900",
+        email="move-rollup@example.com",
+        status="active",
+        region_id=region.id,
+        district_id=district.id,
+        commune_id=commune.id,
+        territory_version_id=version.id,
+        created_at=datetime.now(timezone.utc),
+    )
+    db_session.add(actor)
+    db_session.flush()
+    today = datetime.now(timezone.utc).date()
+    day = today - timedelta(days=2)
+    db_session.add(
+        InventoryLedger(
+            actor_id=actor.id,
+            lot_id=1,
+            movement_type="create",
+            quantity_delta=4,
+            ref_event_type="lot",
+            ref_event_id="1",
+            created_at=datetime.combine(day, time(9), tzinfo=timezone.utc),
+        )
+    )
+    db_session.commit()
+    roll_up_activity(db_session, today=today)
+
+    def volumes():
+        return [
+            activity_totals(db_session, day, day, commune_id=commune_id).volume_created
+            for commune_id in (commune.id, other_commune.id)
+        ]
+
+    assert volumes() == [4, 0]
+    assert rolled_through(db_session) == today - timedelta(days=1)
+
+    # Déménagement : le filigrane recule, les jours concernés sont relus depuis les tables brutes.
+    actor.commune_id = other_commune.id
+    db_session.commit()
+    assert rolled_through(db_session) == day - timedelta(days=1)
+    assert volumes() == [0, 4]
+
+    roll_up_activity(db_session, today=today)
+    assert rolled_through(db_session) == today - timedelta(days=1)
+    assert volumes() == [0, 4]
+
+
+def _cache_count(endpoint: str, result: str) -> float:
+    labels = {"endpoint": endpoint, "result": result}
+    return REGISTRY.get_sample_value("madavola_dashboard_cache_requests_total", labels) or 0.0
+
+
+def test_dashboard_cache_keeps_closed_ranges_and_invalidates_by_territory(client, db_session):
+    region, district, commune, version = _seed_territory(db_session)
+    other_commune = Commune(
+        version_id=version.id,
+        district_id=district.id,
+        code="010102",
+        name="Antananarivo II",
+        name_normalized="antananarivo ii",
+    )
+    db_session.add(other_commune)
+    db_session.flush()
+    actors = []
+    for index, (role, commune_id) in enumerate((("admin", commune.id), ("orpailleur", other_commune.id))):
+        actor = Actor(
+            type_personne="physique",
+            nom="Cache",
+            prenoms=role,
+            telephone=f"034000170{index}",
+            email=f"cache-{role}@example.com",
+            status="active",
+            region_id=region.id,
+            district_id=district.id,
+            commune_id=commune_id,
+            territory_version_id=version.id,
+            created_at=datetime.now(timezone.utc),
+        )
+        db_session.add(actor)
+        db_session.flush()
+        db_session.add(ActorAuth(actor_id=actor.id, password_hash=hash_password("secret"), is_active=1))
+        db_session.add(ActorRole(actor_id=actor.id, role=role, status="active"))
+        actors.append(actor)
+    admin, miner = actors
+    today = datetime.now(timezone.utc).date()
+    yesterday = today - timedelta(days=1)
+
+    def add_movement(actor, quantity, day):
+        db_session.add(
+            InventoryLedger(
+                actor_id=actor.id,
+                lot_id=int(quantity * 10),
+                movement_type="create",
+                quantity_delta=quantity,
+                ref_event_type="lot",
+                ref_event_id="cache",
+                created_at=datetime.combine(day, time(9), tzinfo=timezone.utc),
+            )
+        )
+        db_session.commit()
+
+    # Jours encore recalculés par les rollups (écritures tardives) : pas clos.
+    settled = yesterday - timedelta(days=max(settings.activity_rollup_redo_days, 0))
+    add_movement(admin, 2, settled)
+    token = client.post("/api/v1/auth/login", json={"identifier": admin.email, "password": "secret"}).json()[
+        "access_token"
+    ]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Période close : calculée une fois, servie ensuite sans expiration.
+    closed = f"/api/v1/reports/national?date_from={settled}&date_to={settled}"
+    hits = _cache_count("reports.national", "hit")
+    assert client.get(closed, headers=headers).json()["volume_created"] == 2
+    add_movement(admin, 3, settled)
+    assert client.get(closed, headers=headers).json()["volume_created"] == 2
+    assert _cache_count("reports.national", "hit") == hits + 1
+
+    # Hier reste ouvert : une écriture validée en retard invalide l'entrée.
+    late = f"/api/v1/reports/national?date_from={yesterday}&date_to={yesterday}"
+    assert client.get(late, headers=headers).json()["volume_created"] == 0
+    add_movement(admin, 4, yesterday)
+    assert client.get(late, headers=headers).json()["volume_created"] == 4
+
+    # Période en cours : une écriture dans une autre commune ne l'invalide pas.
+    live = f"/api/v1/dashboards/commune?commune_id={commune.id}&date_from={settled}"
+    first = client.get(live, headers=headers).json()
+    assert (first["volume_created"], first["nb_lots"]) == (9, 3)
+    add_movement(miner, 7, today)
+    hits = _cache_count("dashboards.commune", "hit")
+    assert client.get(live, headers=headers).json() == first
+    assert _cache_count("dashboards.commune", "hit") == hits + 1
+
+    # Écriture dans la commune : entrée périmée, recalculée.
+    stale = _cache_count("dashboards.commune", "stale")
+    add_movement(admin, 1, today)
+    refreshed = client.get(live, headers=headers).json()
+    assert (refreshed["volume_created"], refreshed["nb_lots"]) == (10, 4)
+    assert _cache_count("dashboards.commune", "stale") == stale + 1
+    national = client.get(f"/api/v1/dashboards/national?date_from={today}", headers=headers).json()
+    assert national["volume_created"] == 8
+
+
+def test_closed_cache_entry_follows_rollup_generation(client, db_session):
+    region, district, commune, version = _seed_territory(db_session)
+    admin = Actor(
+        type_personne="physique",
+        nom="Generation",
+        prenoms="admin",
+        telephone="0340001950",
+        email="generation-admin@example.com",
+        status="active",
+        region_id=region.id,
+        district_id=district.id,
+        commune_id=commune.id,
+        territory_version_id=version.id,
+        created_at=datetime.now(timezone.utc),
+    )
+    db_session.add(admin)
+    db_session.flush()
+    db_session.add(ActorAuth(actor_id=admin.id, password_hash=hash_password("secret"), is_active=1))
+    db_session.add(ActorRole(actor_id=admin.id, role="admin", status="active"))
+    today = datetime.now(timezone.utc).date()
+    settled = today - timedelta(days=1 + max(settings.activity_rollup_redo_days, 0))
+
+    def add_movement(lot_id, quantity):
+        db_session.add(
+            InventoryLedger(
+                actor_id=admin.id,
+                lot_id=lot_id,
+                movement_type="create",
+                quantity_delta=quantity,
+                ref_event_type="lot",
+                ref_event_id="generation",
+                created_at=datetime.combine(settled, time(9), tzinfo=timezone.utc),
+            )
+        )
+        db_session.commit()
+
+    add_movement(1, 2)
+    roll_up_activity(db_session, today=today)
+    token = client.post("/api/v1/auth/login", json={"identifier": admin.email, "password": "secret"}).json()[
+        "access_token"
+    ]
+    headers = {"Authorization": f"Bearer {token}"}
+    closed = f"/api/v1/reports/national?date_from={settled}&date_to={settled}"
+    assert client.get(closed, headers=headers).json()["volume_created"] == 2
+
+    # Écriture tardive dans un jour clos : l'entrée tient jusqu'au recalcul (`--from`).
+    add_movement(2, 3)
+    roll_up_activity(db_session, today=today)
+    assert client.get(closed, headers=headers).json()["volume_created"] == 2
+    roll_up_activity(db_session, today=today, first_day=settled)
+    assert client.get(closed, headers=headers).json()["volume_created"] == 5
+
+
+def test_dashboard_timeseries_fills_gaps_across_rollups_and_live_tail(client, db_session):
+    region, district, commune, version = _seed_territory(db_session)
+    actors = []
+    for index, role in enumerate(("admin", "commune_agent")):
+        actor = Actor(
+            type_personne="physique",
+            nom="Series",
+            prenoms=role,
+            telephone=f"034000180{index}",
+            email=f"series-{role}@example.com",
+            status="active",
+            region_id=region.id,
+            district_id=district.id,
+            commune_id=commune.id,
+            territory_version_id=version.id,
+            created_at=datetime.now(timezone.utc),
+        )
+        db_session.add(actor)
+        db_session.flush()
+        db_session.add(ActorAuth(actor_id=actor.id, password_hash=hash_password("secret"), is_active=1))
+        db_session.add(ActorRole(actor_id=actor.id, role=role, status="active"))
+        actors.append(actor)
+    admin, agent = actors
+    today = datetime.now(timezone.utc).date()
+    first_day = today - timedelta(days=9)
+
+    def at(day):
+        return datetime.combine(day, time(10), tzinfo=timezone.utc)
+
+    for lot_id, movement_type, quantity, day in (
+        (1, "create", 5, first_day),
+        (2, "create", 2, first_day + timedelta(days=2)),
+        (2, "transfer_out", -2, first_day + timedelta(days=2)),
+        (3, "create", 1.5, today),
+    ):
+        db_session.add(
+            InventoryLedger(
+                actor_id=agent.id,
+                lot_id=lot_id,
+                movement_type=movement_type,
+                quantity_delta=quantity,
+                ref_event_type="lot",
+                ref_event_id=str(lot_id),
+                created_at=at(day),
+            )
+        )
+    for amount, day in ((1000, first_day), (500, today)):
+        db_session.add(
+            TradeTransaction(
+                seller_actor_id=agent.id,
+                buyer_actor_id=admin.id,
+                status="paid",
+                total_amount=amount,
+                currency="MGA",
+                created_at=at(day),
+            )
+        )
+    db_session.commit()
+
+    def login(actor):
+        token = client.post("/api/v1/auth/login", json={"identifier": actor.email, "password": "secret"}).json()
+        return {"Authorization": f"Bearer {token['access_token']}"}
+
+    headers = login(admin)
+    base = f"/api/v1/dashboards/timeseries?date_from={first_day}&date_to={today}"
+    daily = f"{base}&metric=volume_created&granularity=day&group_by=region"
+    raw = client.get(daily, headers=headers).json()
+    assert raw["buckets"] == [str(first_day + timedelta(days=offset)) for offset in range(10)]
+    assert raw["series"] == [
+        {"key": region.id, "label": "Analamanga", "values": [5, 0, 2, 0, 0, 0, 0, 0, 0, 1.5]}
+    ]
+
+    roll_up_activity(db_session, today=today)
+    clear_dashboard_cache(db_session.get_bind())
+    assert client.get(daily, headers=headers).json() == raw
+
+    weekly = client.get(f"{base}&metric=transactions_total&granularity=week", headers=headers).json()
+    weeks = series_buckets(first_day, today, "week")
+    assert weekly["buckets"] == [str(week) for week in weeks]
+    expected = [0.0] * len(weeks)
+    expected[weeks.index(bucket_start(first_day, "week"))] += 1000
+    expected[weeks.index(bucket_start(today, "week"))] += 500
+    assert weekly["series"] == [{"key": None, "label": None, "values": expected}]
+
+    monthly = client.get(f"{base}&metric=ledger_movements&granularity=month&group_by=filiere", headers=headers).json()
+    assert [serie["key"] for serie in monthly["series"]] == ["OR"]
+    assert sum(monthly["series"][0]["values"]) == 4
+
+    # Agent communal : sa commune seulement, tranches limitées.
+    agent_headers = login(agent)
+    own = client.get(f"{base}&group_by=commune", headers=agent_headers).json()
+    assert own["series"] == [
+        {"key": commune.id, "label": "Antananarivo I", "values": [5, 0, 2, 0, 0, 0, 0, 0, 0, 1.5]}
+    ]
+    denied = client.get(f"{base}&commune_id={commune.id + 1}", headers=agent_headers)
+    assert denied.status_code == 400
+    too_long = client.get(f"{base.replace(str(first_day), str(today - timedelta(days=2000)))}", headers=headers)
+    assert too_long.json()["detail"]["message"] == "trop_de_tranches"